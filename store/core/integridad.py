@@ -0,0 +1,412 @@
+"""
+Verificacion de integridad de los datos entre stock, caja, pedidos, compras
+y cuenta corriente.
+
+Cada chequeo es un filtro sobre toda la tabla resuelto por la base (joins y
+subconsultas correlacionadas, sin recorrer filas en Python): una consulta
+cuenta los casos y otra trae algunos ejemplos. Los que se pueden corregir
+tienen una reparacion que es un UPDATE masivo (queryset.update, sin pasar por
+los save() de los modelos).
+
+  caja                  Caja.saldo_* contra la suma de MovimientoCaja
+  pedido_items          PedidoItem.total contra cantidad * precio_unitario
+  pedidos               Pedido.sub_total / total contra la suma de sus items
+  compras               Purchase.total contra la suma de sus items (con el redondeo del costo)
+  cuenta_corriente      movimiento 'venta' con monto distinto al total de la venta
+  cuenta_corriente_cliente  movimiento 'venta' de un cliente distinto al de la venta
+  ventas_sin_cobro      ventas cuyo total no esta en caja ni en cuenta corriente
+  stock_negativo        productos con cantidad < 0
+  estado_productos      status distinto del que pondria Products.update_status()
+
+Las reparaciones corren en orden (items antes que pedidos, stock antes que
+estado) y dentro de una transaccion.
+
+Uso:
+    informe = verificar()                  # {'chequeos': [...], 'problemas': n}
+    informe = verificar(reparar=True)
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    Case, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Abs, Cast, Coalesce, Round
+
+LIMITE_EJEMPLOS = 20
+TOLERANCIA = Decimal('0.01')
+# La compra guarda el total con el costo sin redondear y cada item el costo
+# redondeado a 4 decimales: hasta media unidad de la ultima cifra por unidad
+REDONDEO_COSTO_COMPRA = Decimal('0.00005')
+MOTIVO_STOCK_NEGATIVO = 'check_integrity: stock negativo llevado a cero'
+MONTO = DecimalField(max_digits=18, decimal_places=2)
+
+
+def _suma(queryset, referencia, campo):
+    """
+    Subconsulta correlacionada con la suma de `campo` de las filas de queryset
+    (agrupadas por la columna `referencia` que apunta a la fila externa),
+    redondeada a 2 decimales y 0 si no hay filas.
+    """
+    suma = queryset.order_by().values(referencia).annotate(suma=Round(Sum(campo), 2)).values('suma')
+    return Coalesce(Subquery(suma, output_field=MONTO), Value(Decimal('0')), output_field=MONTO)
+
+
+# ---------------------------------------------------------------------------
+# Caja
+# ---------------------------------------------------------------------------
+
+def _saldo_libro(cuenta):
+    return Sum(
+        Case(When(es_ingreso=True, then=F('monto')), default=-F('monto'), output_field=MONTO),
+        filter=Q(**{f'afecta_{cuenta}': True}),
+    )
+
+
+def _caja(tolerancia):
+    from finances.models import Caja, MovimientoCaja
+
+    caja = Caja.get_instance()
+    libro = MovimientoCaja.objects.aggregate(efectivo=_saldo_libro('efectivo'), banco=_saldo_libro('banco'))
+    casos = []
+    for cuenta in ('efectivo', 'banco'):
+        en_caja = getattr(caja, f'saldo_{cuenta}')
+        en_libro = Decimal(str(libro[cuenta] or 0)).quantize(Decimal('0.01'))
+        if abs(en_caja - en_libro) > tolerancia:
+            casos.append({'cuenta': cuenta, 'caja': en_caja, 'movimientos': en_libro, 'diferencia': en_caja - en_libro})
+    return casos, libro
+
+
+def verificar_caja(tolerancia=TOLERANCIA, limite=LIMITE_EJEMPLOS):
+    casos, _ = _caja(tolerancia)
+    return len(casos), casos
+
+
+def reparar_caja(tolerancia=TOLERANCIA):
+    from finances.models import Caja
+
+    casos, libro = _caja(tolerancia)
+    if not casos:
+        return 0
+    Caja.objects.filter(pk=Caja.get_instance().pk).update(
+        saldo_efectivo=Decimal(str(libro['efectivo'] or 0)).quantize(Decimal('0.01')),
+        saldo_banco=Decimal(str(libro['banco'] or 0)).quantize(Decimal('0.01')),
+    )
+    return len(casos)
+
+
+# ---------------------------------------------------------------------------
+# Pedidos
+# ---------------------------------------------------------------------------
+
+def _total_item_pedido():
+    return Round(ExpressionWrapper(F('cantidad') * F('precio_unitario'), output_field=MONTO), 2)
+
+
+def _pedido_items(tolerancia):
+    from pedidos.models import PedidoItem
+
+    return (
+        PedidoItem.objects
+        .annotate(calculado=_total_item_pedido())
+        .annotate(diferencia=Abs(F('total') - F('calculado')))
+        .filter(diferencia__gt=tolerancia)
+    )
+
+
+def verificar_pedido_items(tolerancia=TOLERANCIA, limite=LIMITE_EJEMPLOS):
+    casos = _pedido_items(tolerancia)
+    return casos.count(), list(
+        casos.order_by('pk').values('pk', 'pedido_id', 'cantidad', 'precio_unitario', 'total', 'calculado')[:limite]
+    )
+
+
+def reparar_pedido_items(tolerancia=TOLERANCIA):
+    from pedidos.models import PedidoItem
+
+    ids = _pedido_items(tolerancia).values('pk')
+    return PedidoItem.objects.filter(pk__in=ids).update(total=_total_item_pedido())
+
+
+def _suma_items_pedido():
+    from pedidos.models import PedidoItem
+
+    return _suma(PedidoItem.objects.filter(pedido=OuterRef('pk')), 'pedido', 'total')
+
+
+def _pedidos(tolerancia):
+    from pedidos.models import Pedido
+
+    return (
+        Pedido.objects
+        .annotate(suma_items=_suma_items_pedido())
+        .annotate(
+            diferencia_sub_total=Abs(F('sub_total') - F('suma_items')),
+            diferencia_total=Abs(F('total') - F('suma_items')),
+        )
+        .filter(Q(diferencia_sub_total__gt=tolerancia) | Q(diferencia_total__gt=tolerancia))
+    )
+
+
+def verificar_pedidos(tolerancia=TOLERANCIA, limite=LIMITE_EJEMPLOS):
+    casos = _pedidos(tolerancia)
+    return casos.count(), list(
+        casos.order_by('pk').values('pk', 'code', 'estado', 'sub_total', 'total', 'suma_items')[:limite]
+    )
+
+
+def reparar_pedidos(tolerancia=TOLERANCIA):
+    from pedidos.models import Pedido
+
+    ids = _pedidos(tolerancia).values('pk')
+    suma = _suma_items_pedido()
+    return Pedido.objects.filter(pk__in=ids).update(sub_total=suma, total=suma)
+
+
+# ---------------------------------------------------------------------------
+# Compras
+# ---------------------------------------------------------------------------
+
+def _suma_items_compra():
+    from purchase.models import PurchaseProduct
+
+    return _suma(PurchaseProduct.objects.filter(purchase=OuterRef('pk')), 'purchase', 'total')
+
+
+def _compras(tolerancia):
+    from purchase.models import Purchase, PurchaseProduct
+
+    unidades = _suma(PurchaseProduct.objects.filter(purchase=OuterRef('pk')), 'purchase', 'qty')
+    return (
+        Purchase.objects
+        .annotate(suma_items=_suma_items_compra(), unidades=unidades)
+        .annotate(
+            diferencia=Abs(F('total') - F('suma_items')),
+            margen=ExpressionWrapper(
+                Value(tolerancia) + F('unidades') * Value(REDONDEO_COSTO_COMPRA), output_field=MONTO,
+            ),
+        )
+        .filter(diferencia__gt=F('margen'))
+    )
+
+
+def verificar_compras(tolerancia=TOLERANCIA, limite=LIMITE_EJEMPLOS):
+    casos = _compras(tolerancia)
+    return casos.count(), list(
+        casos.order_by('pk').values('pk', 'numero_comprobante', 'supplier__name', 'total', 'suma_items')[:limite]
+    )
+
+
+def reparar_compras(tolerancia=TOLERANCIA):
+    from purchase.models import Purchase
+
+    ids = _compras(tolerancia).values('pk')
+    return Purchase.objects.filter(pk__in=ids).update(total=_suma_items_compra())
+
+
+# ---------------------------------------------------------------------------
+# Cuenta corriente y ventas
+# ---------------------------------------------------------------------------
+
+def _total_venta():
+    """Sales.grand_total (float) como decimal de 2 posiciones, para comparar con montos."""
+    return Round(Cast('venta__grand_total', output_field=MONTO), 2)
+
+
+def _cuenta_corriente(tolerancia):
+    from customers.models import MovimientoCuentaCorriente
+
+    return (
+        MovimientoCuentaCorriente.objects
+        .filter(tipo='venta', venta__isnull=False)
+        .annotate(total_venta=_total_venta())
+        .annotate(diferencia=Abs(F('monto') - F('total_venta')))
+        .filter(diferencia__gt=tolerancia)
+    )
+
+
+def verificar_cuenta_corriente(tolerancia=TOLERANCIA, limite=LIMITE_EJEMPLOS):
+    casos = _cuenta_corriente(tolerancia)
+    return casos.count(), list(
+        casos.order_by('pk').values('pk', 'cliente_id', 'cliente__name', 'venta__code', 'monto', 'total_venta')[:limite]
+    )
+
+
+def reparar_cuenta_corriente(tolerancia=TOLERANCIA):
+    from customers.models import MovimientoCuentaCorriente
+    from pos.models import Sales
+
+    ids = _cuenta_corriente(tolerancia).values('pk')
+    total_venta = Sales.objects.filter(pk=OuterRef('venta_id')).annotate(
+        monto=Round(Cast('grand_total', output_field=MONTO), 2),
+    ).values('monto')
+    return MovimientoCuentaCorriente.objects.filter(pk__in=ids).update(
+        monto=Subquery(total_venta, output_field=MONTO)
+    )
+
+
+def _cuenta_corriente_cliente():
+    from customers.models import MovimientoCuentaCorriente
+
+    return MovimientoCuentaCorriente.objects.filter(tipo='venta', venta__isnull=False).exclude(
+        venta__cliente_id=F('cliente_id')
+    )
+
+
+def verificar_cuenta_corriente_cliente(tolerancia=TOLERANCIA, limite=LIMITE_EJEMPLOS):
+    casos = _cuenta_corriente_cliente()
+    return casos.count(), list(
+        casos.order_by('pk').values('pk', 'cliente_id', 'venta__code', 'venta__cliente_id')[:limite]
+    )
+
+
+def _ventas_sin_cobro(tolerancia):
+    from customers.models import MovimientoCuentaCorriente
+    from finances.models import MovimientoCaja
+    from pos.models import Sales
+
+    en_caja = _suma(
+        MovimientoCaja.objects.filter(venta=OuterRef('pk'), tipo__in=['venta_efectivo', 'venta_banco']),
+        'venta', 'monto',
+    )
+    en_cuenta = _suma(
+        MovimientoCuentaCorriente.objects.filter(venta=OuterRef('pk'), tipo='venta'), 'venta', 'monto',
+    )
+    return (
+        Sales.objects
+        .annotate(
+            total=Round(Cast('grand_total', output_field=MONTO), 2),
+            en_caja=en_caja,
+            en_cuenta=en_cuenta,
+        )
+        .annotate(diferencia=Abs(F('total') - F('en_caja') - F('en_cuenta')))
+        .filter(diferencia__gt=tolerancia)
+    )
+
+
+def verificar_ventas_sin_cobro(tolerancia=TOLERANCIA, limite=LIMITE_EJEMPLOS):
+    casos = _ventas_sin_cobro(tolerancia)
+    return casos.count(), list(
+        casos.order_by('pk').values('pk', 'code', 'date_added', 'total', 'en_caja', 'en_cuenta')[:limite]
+    )
+
+
+# ---------------------------------------------------------------------------
+# Productos
+# ---------------------------------------------------------------------------
+
+def _stock_negativo():
+    from inventory.models import Products
+
+    return Products.objects.filter(quantity__lt=0)
+
+
+def verificar_stock_negativo(tolerancia=TOLERANCIA, limite=LIMITE_EJEMPLOS):
+    casos = _stock_negativo()
+    return casos.count(), list(casos.order_by('pk').values('pk', 'code', 'name', 'quantity')[:limite])
+
+
+def reparar_stock_negativo(tolerancia=TOLERANCIA):
+    """
+    Lleva el stock a cero como decrease_quantity / update_quantity_on_purchase,
+    dejando un AjusteStock por la diferencia para que el kardex siga cerrando.
+    """
+    from inventory.models import AjusteStock
+
+    AjusteStock.objects.bulk_create(
+        [
+            AjusteStock(
+                producto_id=pk,
+                cantidad=-cantidad,
+                costo_unitario=promedio if promedio > 0 else costo,
+                motivo=MOTIVO_STOCK_NEGATIVO,
+            )
+            for pk, cantidad, promedio, costo in _stock_negativo().values_list('pk', 'quantity', 'costo_promedio', 'cost')
+        ],
+        batch_size=1000,
+    )
+    return _stock_negativo().update(quantity=0)
+
+
+def _estados():
+    """(filtro de los que deberian estar activos, filtro de los que deberian estar inactivos)"""
+    from inventory.models import Products
+
+    vendible = Q(cost__gt=0, precio_minorista__gt=0)
+    unidad = ~Q(tipo_venta=Products.TIPO_VENTA_FRACCIONABLE)
+    activar = (
+        (unidad & vendible & Q(quantity__gt=0)) | (~unidad & vendible)
+    ) & ~Q(status=Products.STATUS_ACTIVE)
+    # Los fraccionables no se desactivan (ver update_status)
+    desactivar = unidad & ~(vendible & Q(quantity__gt=0)) & ~Q(status=Products.STATUS_INACTIVE)
+    return activar, desactivar
+
+
+def verificar_estado_productos(tolerancia=TOLERANCIA, limite=LIMITE_EJEMPLOS):
+    from inventory.models import Products
+
+    activar, desactivar = _estados()
+    casos = Products.objects.filter(activar | desactivar)
+    return casos.count(), list(
+        casos.order_by('pk').values('pk', 'code', 'name', 'status', 'quantity', 'cost', 'precio_minorista')[:limite]
+    )
+
+
+def reparar_estado_productos(tolerancia=TOLERANCIA):
+    from inventory.models import Products
+
+    activar, desactivar = _estados()
+    return (
+        Products.objects.filter(activar).update(status=Products.STATUS_ACTIVE)
+        + Products.objects.filter(desactivar).update(status=Products.STATUS_INACTIVE)
+    )
+
+
+# (nombre, descripcion, verificar, reparar o None), en el orden en que se reparan
+CHEQUEOS = [
+    ('caja', 'Saldos de Caja distintos de la suma de los movimientos', verificar_caja, reparar_caja),
+    ('pedido_items', 'Items de pedido con total distinto de cantidad x precio',
+     verificar_pedido_items, reparar_pedido_items),
+    ('pedidos', 'Pedidos con subtotal / total distinto de la suma de sus items', verificar_pedidos, reparar_pedidos),
+    ('compras', 'Compras con total distinto de la suma de sus items', verificar_compras, reparar_compras),
+    ('cuenta_corriente', 'Movimientos de cuenta corriente con monto distinto del total de la venta',
+     verificar_cuenta_corriente, reparar_cuenta_corriente),
+    ('cuenta_corriente_cliente', 'Movimientos de cuenta corriente de un cliente distinto al de la venta',
+     verificar_cuenta_corriente_cliente, None),
+    ('ventas_sin_cobro', 'Ventas cuyo total no coincide con lo registrado en caja + cuenta corriente',
+     verificar_ventas_sin_cobro, None),
+    ('stock_negativo', 'Productos con stock negativo', verificar_stock_negativo, reparar_stock_negativo),
+    ('estado_productos', 'Productos con estado (activo / inactivo) desactualizado',
+     verificar_estado_productos, reparar_estado_productos),
+]
+
+
+def verificar(nombres=None, reparar=False, tolerancia=TOLERANCIA, limite=LIMITE_EJEMPLOS):
+    """
+    Corre los chequeos (todos o los de `nombres`) y, con reparar=True, las
+    reparaciones masivas de los que tienen casos. Retorna
+    {'chequeos': [{'nombre', 'descripcion', 'casos', 'reparable', 'reparados', 'ejemplos'}],
+     'problemas': casos que quedan sin reparar}.
+    """
+    from django.db import transaction
+
+    resultado = []
+    with transaction.atomic():
+        for nombre, descripcion, verificar_chequeo, reparar_chequeo in CHEQUEOS:
+            if nombres and nombre not in nombres:
+                continue
+            casos, ejemplos = verificar_chequeo(tolerancia=tolerancia, limite=limite)
+            reparados = 0
+            if reparar and casos and reparar_chequeo:
+                reparados = reparar_chequeo(tolerancia=tolerancia)
+            resultado.append({
+                'nombre': nombre,
+                'descripcion': descripcion,
+                'casos': casos,
+                'reparable': reparar_chequeo is not None,
+                'reparados': reparados,
+                'ejemplos': ejemplos,
+            })
+    return {
+        'chequeos': resultado,
+        'problemas': sum(max(chequeo['casos'] - chequeo['reparados'], 0) for chequeo in resultado),
+    }
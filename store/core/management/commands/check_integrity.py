@@ -0,0 +1,79 @@
+"""
+Comando Django para verificar la integridad de los datos (ver core/integridad.py).
+
+Controla Caja contra el libro de movimientos, totales de pedidos y compras
+contra sus items, cuenta corriente contra las ventas, ventas sin cobro
+registrado, stock negativo y estado de los productos. Cada chequeo se
+resuelve con un par de consultas sobre toda la tabla, asi se puede correr
+todas las noches sobre la base completa.
+
+Falla (codigo de salida 1) si quedan problemas sin reparar.
+
+Uso:
+    python manage.py check_integrity
+    python manage.py check_integrity --json > integridad.json
+    python manage.py check_integrity --reparar
+    python manage.py check_integrity --solo caja --solo pedidos
+"""
+import json
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.integridad import CHEQUEOS, LIMITE_EJEMPLOS, TOLERANCIA, verificar
+
+
+class Command(BaseCommand):
+    help = 'Verifica invariantes entre stock, caja, pedidos, compras y cuenta corriente (y opcionalmente repara)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo',
+            action='append',
+            choices=[nombre for nombre, *_ in CHEQUEOS],
+            help='Chequeo a correr (se puede repetir; por defecto todos)'
+        )
+        parser.add_argument('--reparar', action='store_true', help='Corregir con UPDATE masivos lo que se pueda')
+        parser.add_argument('--json', action='store_true', help='Informe completo en JSON por la salida estandar')
+        parser.add_argument(
+            '--tolerancia',
+            type=Decimal,
+            default=TOLERANCIA,
+            help=f'Diferencia de importe que se ignora (por defecto {TOLERANCIA})'
+        )
+        parser.add_argument(
+            '--ejemplos',
+            type=int,
+            default=LIMITE_EJEMPLOS,
+            help=f'Cantidad de casos de ejemplo por chequeo (por defecto {LIMITE_EJEMPLOS})'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        informe = verificar(
+            nombres=options['solo'], reparar=options['reparar'],
+            tolerancia=options['tolerancia'], limite=options['ejemplos'],
+        )
+        informe['segundos'] = round(time.perf_counter() - inicio, 3)
+        informe['motor'] = connection.vendor
+
+        if options['json']:
+            self.stdout.write(json.dumps(informe, default=str, ensure_ascii=False, indent=2))
+        else:
+            for chequeo in informe['chequeos']:
+                if not chequeo['casos']:
+                    self.stdout.write(self.style.SUCCESS(f"  [OK] {chequeo['descripcion']}"))
+                    continue
+                estilo = self.style.WARNING if chequeo['reparados'] else self.style.ERROR
+                reparados = f", {chequeo['reparados']} reparados" if chequeo['reparados'] else ''
+                self.stdout.write(estilo(f"  [{chequeo['casos']}] {chequeo['descripcion']}{reparados}"))
+                for ejemplo in chequeo['ejemplos']:
+                    self.stdout.write('      ' + ', '.join(f'{clave}={valor}' for clave, valor in ejemplo.items()))
+            self.stdout.write(f"Listo en {informe['segundos']:.1f} s.")
+
+        if informe['problemas']:
+            raise CommandError(f"{informe['problemas']} problema(s) de integridad sin reparar")
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS('Sin problemas de integridad.'))
@@ -0,0 +1,131 @@
+"""
+Comando Django para verificar que las consultas mas usadas sigan usando indices.
+
+Ejecuta EXPLAIN sobre cada forma de consulta "caliente" (ventas por fecha,
+items por venta, ultima compra de un producto, cuenta corriente, caja del dia,
+productos activos, pedidos pendientes) y falla si alguna recorre la tabla
+completa (Seq Scan en PostgreSQL, SCAN sin indice en SQLite).
+
+En PostgreSQL se desactiva enable_seqscan dentro de la transaccion para que
+el resultado no dependa del tamaño de la base: si igual elige Seq Scan es
+porque no hay un indice utilizable.
+
+Uso:
+    python manage.py check_query_plans
+    python manage.py check_query_plans --verbose
+    python manage.py check_query_plans --sin-forzar
+"""
+
+import re
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from customers.models import Cliente, MovimientoCuentaCorriente
+from finances.models import MovimientoCaja
+from inventory.models import Products
+from pedidos.models import Pedido, PedidoItem
+from pos.models import Sales, salesItems
+from purchase.models import PurchaseProduct
+
+
+def consultas_calientes():
+    """
+    Retorna la lista de (nombre, modelo, queryset, solo_postgres).
+
+    solo_postgres marca las consultas cuyo indice de expresion solo coincide
+    en PostgreSQL (en SQLite __date se compila con parametros y no usa el indice).
+    """
+    hoy = date.today()
+    desde = datetime.combine(hoy - timedelta(days=30), datetime.min.time())
+    hasta = datetime.combine(hoy + timedelta(days=1), datetime.min.time())
+    cliente_id = Cliente.objects.values_list('pk', flat=True).first() or 1
+    producto_id = Products.objects.values_list('pk', flat=True).first() or 1
+    venta_id = Sales.objects.values_list('pk', flat=True).first() or 1
+
+    return [
+        ('Ventas por rango de fechas', Sales,
+         Sales.objects.filter(date_added__gte=desde, date_added__lt=hasta), False),
+        ('Ventas del dia (__date)', Sales,
+         Sales.objects.filter(date_added__date=hoy), True),
+        ('Ventas de un cliente por fecha', Sales,
+         Sales.objects.filter(cliente_id=cliente_id).order_by('-date_added'), False),
+        ('Items de una venta', salesItems,
+         salesItems.objects.filter(sale_id=venta_id, product_id=producto_id), False),
+        ('Ventas de un producto', salesItems,
+         salesItems.objects.filter(product_id=producto_id).values('sale_id'), False),
+        ('Ultima compra de un producto', PurchaseProduct,
+         PurchaseProduct.objects.filter(product_id=producto_id).order_by('-date_added')[:1], False),
+        ('Cuenta corriente de un cliente', MovimientoCuentaCorriente,
+         MovimientoCuentaCorriente.objects.filter(cliente_id=cliente_id, fecha__gte=desde), False),
+        ('Movimientos de caja del dia (__date)', MovimientoCaja,
+         MovimientoCaja.objects.filter(fecha__date=hoy), True),
+        ('Movimientos de caja por tipo y rango', MovimientoCaja,
+         MovimientoCaja.objects.filter(tipo='venta_efectivo', fecha__gte=desde, fecha__lt=hasta), False),
+        ('Productos activos por nombre', Products,
+         Products.objects.filter(status=1).order_by('name'), False),
+        ('Pedidos pendientes por entrega', Pedido,
+         Pedido.objects.filter(estado='pendiente', fecha_entrega_estimada__lte=hoy), False),
+        ('Items de pedidos pendientes', PedidoItem,
+         PedidoItem.objects.filter(pedido__estado='pendiente', pedido__fecha_entrega_estimada__lte=hoy), False),
+    ]
+
+
+def es_recorrido_completo(plan, tabla, vendor):
+    """Indica si el plan recorre la tabla completa sin usar un indice."""
+    if vendor == 'postgresql':
+        return re.search(rf'Seq Scan on {re.escape(tabla)}\b', plan) is not None
+    if vendor == 'sqlite':
+        for linea in plan.splitlines():
+            if re.search(rf'\bSCAN {re.escape(tabla)}\b', linea) and 'USING' not in linea:
+                return True
+        return False
+    return False
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN sobre las consultas mas usadas y falla si alguna hace un recorrido secuencial.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose', action='store_true', help='Muestra el plan completo de cada consulta.')
+        parser.add_argument(
+            '--sin-forzar',
+            action='store_true',
+            help='No desactiva enable_seqscan en PostgreSQL (plan real segun el tamaño de la base).'
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'Motor de base de datos no soportado: {vendor}')
+
+        self.stdout.write(f"Motor: {vendor}")
+        fallidas = []
+
+        with transaction.atomic():
+            if vendor == 'postgresql' and not options['sin_forzar']:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for nombre, modelo, queryset, solo_postgres in consultas_calientes():
+                if solo_postgres and vendor != 'postgresql':
+                    self.stdout.write(f"  [OMITIDA] {nombre} (indice de expresion solo en PostgreSQL)")
+                    continue
+
+                plan = queryset.explain()
+                tabla = modelo._meta.db_table
+                if es_recorrido_completo(plan, tabla, vendor):
+                    fallidas.append(nombre)
+                    self.stdout.write(self.style.ERROR(f"  [SEQ SCAN] {nombre} ({tabla})"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"  [OK] {nombre}"))
+
+                if options['verbose']:
+                    for linea in plan.splitlines():
+                        self.stdout.write(f"      {linea}")
+
+        if fallidas:
+            raise CommandError(f"{len(fallidas)} consulta(s) sin indice: {', '.join(fallidas)}")
+
+        self.stdout.write(self.style.SUCCESS('Todas las consultas usan indices.'))
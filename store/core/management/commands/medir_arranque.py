@@ -0,0 +1,117 @@
+"""
+Comando Django para medir el arranque de un worker.
+
+Lanza un proceso nuevo de Python con -X importtime que hace lo mismo que un
+worker de Gunicorn recien levantado: django.setup(), carga de store.urls (con
+todos los include) y un primer pedido. Informa el tiempo hasta responder ese
+pedido, la memoria maxima del proceso (RSS), la cantidad de modulos cargados
+y los paquetes que mas tardaron en importarse.
+
+Sirve para comparar antes/despues de un cambio: las librerias de los reportes
+(reportlab, openpyxl) no deberian aparecer, se importan recien al generar
+un reporte.
+
+Uso:
+    python manage.py medir_arranque
+    python manage.py medir_arranque --repeticiones 5 --top 20
+    python manage.py medir_arranque --url /pos/
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Librerias que solo hacen falta para generar reportes o importar archivos
+LIBRERIAS_PESADAS = ('reportlab', 'openpyxl', 'xhtml2pdf', 'PIL', 'numpy', 'lxml', 'html5lib', 'pypdf', 'svglib')
+
+SCRIPT_WORKER = '''
+import json, os, sys, time
+inicio = time.perf_counter()
+import django
+django.setup()
+from django.conf import settings
+from django.test import Client
+from django.urls import resolve
+resolve('/')
+urls = time.perf_counter()
+host = next((h for h in settings.ALLOWED_HOSTS if h and '*' not in h and not h.startswith('.')), 'localhost')
+respuesta = Client().get(sys.argv[1], HTTP_HOST=host)
+fin = time.perf_counter()
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss = rss / 1024 if sys.platform != 'darwin' else rss / 1024 / 1024
+except ImportError:  # Windows
+    rss = None
+print(json.dumps({
+    'urls': urls - inicio, 'primer_pedido': fin - inicio, 'estado': respuesta.status_code,
+    'rss': rss, 'modulos': len(sys.modules),
+    'pesadas': sorted(set(m.split('.')[0] for m in sys.modules) & set(sys.argv[2].split(','))),
+}))
+'''
+
+
+def leer_importtime(salida):
+    """
+    Tiempos acumulados (en segundos) de los paquetes de primer nivel a partir
+    de la salida de -X importtime: 'import time: self | cumulative | paquete'.
+    """
+    tiempos = {}
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, acumulado, nombre = linea[len('import time:'):].split('|')
+        if nombre.startswith('  '):
+            continue  # importado desde otro modulo: ya cuenta en el acumulado del padre
+        paquete = nombre.strip().split('.')[0]
+        tiempos[paquete] = tiempos.get(paquete, 0) + int(acumulado) / 1_000_000
+    return tiempos
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo hasta el primer pedido, memoria e imports de un worker recien iniciado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=3, help='Procesos a lanzar (se informa la mediana)')
+        parser.add_argument('--top', type=int, default=15, help='Cantidad de paquetes mas lentos a mostrar')
+        parser.add_argument('--url', default='/', help='URL del primer pedido')
+
+    def handle(self, *args, **options):
+        entorno = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'store.settings'))
+        comando = [sys.executable, '-X', 'importtime', '-c', SCRIPT_WORKER, options['url'], ','.join(LIBRERIAS_PESADAS)]
+
+        mediciones = []
+        tiempos_import = {}
+        for _ in range(max(1, options['repeticiones'])):
+            proceso = subprocess.run(comando, cwd=settings.BASE_DIR, env=entorno, capture_output=True, text=True)
+            if proceso.returncode != 0:
+                raise CommandError(f'El worker de prueba fallo:\n{proceso.stderr[-2000:]}')
+            mediciones.append(json.loads(proceso.stdout.strip().splitlines()[-1]))
+            for paquete, segundos in leer_importtime(proceso.stderr).items():
+                tiempos_import.setdefault(paquete, []).append(segundos)
+
+        mediciones.sort(key=lambda m: m['primer_pedido'])
+        mediana = mediciones[len(mediciones) // 2]
+
+        self.stdout.write(f"Carga de URLs:        {mediana['urls']:.3f} s")
+        self.stdout.write(f"Primer pedido ({options['url']}): {mediana['primer_pedido']:.3f} s (HTTP {mediana['estado']})")
+        rss = f"{mediana['rss']:.1f} MB" if mediana['rss'] is not None else 'n/d'
+        self.stdout.write(f'Memoria maxima (RSS): {rss}')
+        self.stdout.write(f"Modulos cargados:     {mediana['modulos']}")
+
+        if mediana['pesadas']:
+            self.stdout.write(self.style.WARNING('Librerias pesadas cargadas: ' + ', '.join(mediana['pesadas'])))
+        else:
+            self.stdout.write(self.style.SUCCESS('Ninguna libreria de reportes cargada al arrancar'))
+
+        self.stdout.write(f"\nPaquetes mas lentos de importar (mediana de {len(mediciones)}):")
+        ordenados = sorted(
+            ((sorted(valores)[len(valores) // 2], paquete) for paquete, valores in tiempos_import.items()),
+            reverse=True,
+        )
+        for segundos, paquete in ordenados[:options['top']]:
+            self.stdout.write(f'  {segundos * 1000:8.1f} ms  {paquete}')
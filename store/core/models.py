@@ -1,3 +1,33 @@
 from django.db import models
+from django.db.models import F
 
-# Create your models here.
+
+class VersionCache(models.Model):
+    """
+    Version de un grupo de claves de la cache, guardada en la base.
+
+    La cache por defecto es en memoria y cada worker de gunicorn tiene la
+    suya: invalidar ahi solo llega al proceso que hizo el cambio. Las claves
+    llevan esta version y para invalidarlas en todos los procesos se
+    incrementa la fila.
+    """
+    clave = models.CharField(max_length=100, unique=True)
+    version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Versión de Cache'
+        verbose_name_plural = 'Versiones de Cache'
+
+    def __str__(self):
+        return f"{self.clave}: {self.version}"
+
+    @classmethod
+    def actual(cls, clave):
+        """Version vigente de la clave (0 si nunca se invalido)."""
+        return cls.objects.filter(clave=clave).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def incrementar(cls, clave):
+        """Invalida en todos los procesos las claves de cache armadas con la version anterior."""
+        if not cls.objects.filter(clave=clave).update(version=F('version') + 1):
+            cls.objects.get_or_create(clave=clave, defaults={'version': 1})
@@ -0,0 +1,163 @@
+"""
+Paginacion por clave (keyset / seek).
+
+En vez de LIMIT/OFFSET (que obliga a la base a recorrer y descartar todas
+las filas anteriores, y a contar el total) se filtra por los valores de
+orden de la ultima fila mostrada:
+
+    ... WHERE (total < 1500) OR (total = 1500 AND id < 42) ORDER BY total DESC, id DESC
+
+asi la pagina 200 cuesta lo mismo que la primera y no hace falta COUNT.
+Funciona con campos del modelo y con anotaciones. El ultimo criterio de
+orden siempre es la clave primaria (se agrega si falta), para que el orden
+sea total. Los NULL van al final en ambos sentidos.
+
+El cursor es texto opaco (base64 de los valores de la ultima fila) que
+viaja en ?despues= / ?antes=.
+
+Uso:
+    pagina = paginar_keyset(queryset, ['-total_ventas'], despues=request.GET.get('despues'))
+    pagina.object_list, pagina.siguiente, pagina.anterior
+"""
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.db.models import F, Q
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def _serializar(valor):
+    if isinstance(valor, (datetime, date, time)):
+        return valor.isoformat()  # con microsegundos: la igualdad tiene que ser exacta
+    if isinstance(valor, Decimal):
+        return str(valor)
+    raise TypeError(f'No se puede usar {type(valor).__name__} en un cursor')
+
+
+def codificar_cursor(valores):
+    texto = json.dumps(valores, default=_serializar, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, cantidad):
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        valores = json.loads(texto)
+    except (ValueError, UnicodeDecodeError) as error:
+        raise CursorInvalido(str(error))
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise CursorInvalido('Cursor con otra cantidad de campos')
+    return valores
+
+
+def _normalizar(orden):
+    """['-total', 'name'] -> [('total', True), ('name', False), ('pk', False)]"""
+    campos = [(campo.lstrip('-'), campo.startswith('-')) for campo in orden]
+    if not any(nombre in ('pk', 'id') for nombre, _ in campos):
+        campos.append(('pk', campos[-1][1] if campos else False))
+    return campos
+
+
+def _posterior(nombre, descendente, valor, nulos_primero):
+    """Q de las filas que van despues de `valor` en este campo (None = ninguna)."""
+    if valor is None:
+        return Q(**{f'{nombre}__isnull': False}) if nulos_primero else None
+    condicion = Q(**{f'{nombre}__{"lt" if descendente else "gt"}': valor})
+    if not nulos_primero:
+        condicion |= Q(**{f'{nombre}__isnull': True})
+    return condicion
+
+
+def _igual(nombre, valor):
+    if valor is None:
+        return Q(**{f'{nombre}__isnull': True})
+    return Q(**{nombre: valor})
+
+
+def _filtro(campos, valores, nulos_primero):
+    filtro = Q(pk__in=[])
+    iguales = Q()
+    for (nombre, descendente), valor in zip(campos, valores):
+        posterior = _posterior(nombre, descendente, valor, nulos_primero)
+        if posterior is not None:
+            filtro |= iguales & posterior
+        iguales &= _igual(nombre, valor)
+    return filtro
+
+
+def _ordenar(queryset, campos, nulos_primero):
+    expresiones = []
+    for nombre, descendente in campos:
+        campo = F(nombre)
+        if nulos_primero:
+            expresiones.append(campo.desc(nulls_first=True) if descendente else campo.asc(nulls_first=True))
+        else:
+            expresiones.append(campo.desc(nulls_last=True) if descendente else campo.asc(nulls_last=True))
+    return queryset.order_by(*expresiones)
+
+
+class PaginaKeyset:
+    """Una pagina: object_list, siguiente / anterior (cursores o None)."""
+
+    def __init__(self, object_list, siguiente, anterior):
+        self.object_list = object_list
+        self.siguiente = siguiente
+        self.anterior = anterior
+
+    @property
+    def has_next(self):
+        return self.siguiente is not None
+
+    @property
+    def has_previous(self):
+        return self.anterior is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginar_keyset(queryset, orden, despues=None, antes=None, tamano=50):
+    """
+    Pagina de `tamano` filas de queryset ordenado por `orden` (como order_by),
+    despues del cursor `despues` o antes del cursor `antes`. Una sola consulta.
+    Lanza CursorInvalido si el cursor no corresponde a este orden.
+    """
+    campos = _normalizar(orden)
+    hacia_atras = bool(antes) and not despues
+    cursor = antes if hacia_atras else despues
+    if hacia_atras:
+        # se recorre al reves (y con los NULL primero) y despues se da vuelta la pagina
+        campos_consulta = [(nombre, not descendente) for nombre, descendente in campos]
+    else:
+        campos_consulta = campos
+
+    if cursor:
+        valores = decodificar_cursor(cursor, len(campos))
+        queryset = queryset.filter(_filtro(campos_consulta, valores, nulos_primero=hacia_atras))
+    filas = list(_ordenar(queryset, campos_consulta, nulos_primero=hacia_atras)[:tamano + 1])
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+    if hacia_atras:
+        filas.reverse()
+
+    def cursor_de(fila):
+        if isinstance(fila, dict):  # queryset.values(...)
+            return codificar_cursor([fila[nombre] for nombre, _ in campos])
+        return codificar_cursor([getattr(fila, nombre) for nombre, _ in campos])
+
+    if not filas:
+        return PaginaKeyset(filas, None, None)
+    if hacia_atras:
+        siguiente, anterior = cursor_de(filas[-1]), (cursor_de(filas[0]) if hay_mas else None)
+    else:
+        siguiente = cursor_de(filas[-1]) if hay_mas else None
+        anterior = cursor_de(filas[0]) if cursor else None
+    return PaginaKeyset(filas, siguiente, anterior)
@@ -86,14 +86,14 @@ def home(request):
     caja = Caja.get_instance()
 
     # ── CUENTA CORRIENTE ────────────────────────────────────
-    clientes_con_deuda = []
-    total_deuda = Decimal('0')
-    for cliente in Cliente.objects.filter(activo=True):
-        saldo = cliente.get_saldo_cuenta_corriente()
-        if saldo < 0:
-            clientes_con_deuda.append({'cliente': cliente, 'saldo': saldo})
-            total_deuda += abs(saldo)
-    clientes_con_deuda.sort(key=lambda x: x['saldo'])
+    # Saldo anotado en la misma consulta (sin recorrer los movimientos de cada cliente)
+    deudores = (
+        Cliente.con_totales(Cliente.objects.filter(activo=True))
+        .filter(saldo_cuenta__lt=0)
+        .order_by('saldo_cuenta')
+    )
+    clientes_con_deuda = [{'cliente': cliente, 'saldo': cliente.saldo_cuenta} for cliente in deudores]
+    total_deuda = sum((abs(item['saldo']) for item in clientes_con_deuda), Decimal('0'))
 
     # ── PUNTO DE PEDIDO ─────────────────────────────────────
     productos_bajo_stock = Products.objects.filter(
@@ -14,6 +14,10 @@ class ClienteAdmin(admin.ModelAdmin):
         'email',
         'tipo_cliente',
         'activo',
+        'total_facturado',
+        'cantidad_de_ventas',
+        'fecha_ultima_venta',
+        'saldo',
         'date_added',
     ]
     
@@ -54,6 +58,30 @@ class ClienteAdmin(admin.ModelAdmin):
     list_per_page = 25
     
     actions = ['activar_clientes', 'desactivar_clientes']
+
+    def get_queryset(self, request):
+        """Totales de ventas y saldo anotados en la misma consulta del listado"""
+        return Cliente.con_totales(super().get_queryset(request))
+
+    def total_facturado(self, obj):
+        return f"AR$ {obj.total_ventas:,.2f}"
+    total_facturado.short_description = 'Total Facturado'
+    total_facturado.admin_order_field = 'total_ventas'
+
+    def cantidad_de_ventas(self, obj):
+        return obj.cantidad_ventas
+    cantidad_de_ventas.short_description = 'Ventas'
+    cantidad_de_ventas.admin_order_field = 'cantidad_ventas'
+
+    def fecha_ultima_venta(self, obj):
+        return obj.ultima_venta
+    fecha_ultima_venta.short_description = 'Última Venta'
+    fecha_ultima_venta.admin_order_field = 'ultima_venta'
+
+    def saldo(self, obj):
+        return f"AR$ {obj.saldo_cuenta:,.2f}"
+    saldo.short_description = 'Saldo Cta. Cte.'
+    saldo.admin_order_field = 'saldo_cuenta'
     
     def activar_clientes(self, request, queryset):
         """Acción para activar clientes seleccionados"""
@@ -0,0 +1,175 @@
+"""
+Estado de cuenta corriente de un cliente y de todos los deudores.
+
+El saldo de cada renglon lo calcula la base con una funcion de ventana
+(SUM(...) OVER (ORDER BY fecha, id)) sobre los movimientos del periodo, mas
+el saldo inicial: la suma de los movimientos anteriores a `desde`, que sale
+de un aggregate sobre el indice (cliente, fecha). Asi cualquier pagina trae
+su saldo sin leer la historia completa en Python.
+
+Los pagos suman y las ventas restan (saldo negativo = el cliente debe);
+en el estado se muestran como Haber y Debe.
+
+El modo masivo (deudores / movimientos_deudores) resuelve todos los
+clientes con deuda al final del periodo con una sola consulta agrupada
+(saldo inicial, debitos, creditos y saldo final por cliente) y despues una
+sola consulta de movimientos con la ventana particionada por cliente.
+
+Uso:
+    estado = EstadoCuenta(cliente, desde=date(2026, 1, 1), hasta=date(2026, 1, 31))
+    estado.saldo_inicial, estado.totales(), Paginator(estado.movimientos(), 50)
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When, Window
+from django.db.models.expressions import RowRange
+from django.db.models.functions import Coalesce, Round
+
+from .models import MovimientoCuentaCorriente
+
+MONTO = DecimalField(max_digits=18, decimal_places=2)
+IMPORTE = Case(When(tipo='pago', then=F('monto')), default=-F('monto'), output_field=MONTO)
+
+
+def _inicio(desde):
+    return datetime.combine(desde, time.min) if desde else None
+
+
+def _fin(hasta):
+    """Fecha de fin inclusiva -> inicio del dia siguiente."""
+    return datetime.combine(hasta + timedelta(days=1), time.min) if hasta else None
+
+
+def _suma(expresion, **filtro):
+    """Sum redondeado a 2 decimales (en SQLite la suma de decimales es float) y 0 si no hay filas."""
+    suma = Sum(expresion, filter=Q(**filtro)) if filtro else Sum(expresion)
+    return Coalesce(Round(suma, 2), Value(Decimal('0')), output_field=MONTO)
+
+
+def _saldo_acumulado(particion=None, saldo_inicial=None):
+    """Suma acumulada de los importes en orden de fecha (por cliente si hay particion)."""
+    saldo = Window(
+        Sum(IMPORTE),
+        partition_by=particion,
+        order_by=[F('fecha').asc(), F('id').asc()],
+        frame=RowRange(start=None, end=0),
+    )
+    if saldo_inicial is not None:
+        saldo = saldo + Value(saldo_inicial, output_field=MONTO)
+    return Round(saldo, 2)
+
+
+class EstadoCuenta:
+    """Movimientos de un cliente entre dos fechas (inclusive) con saldo inicial y saldo por renglon."""
+
+    def __init__(self, cliente, desde=None, hasta=None):
+        self.cliente = cliente
+        self.desde = desde
+        self.hasta = hasta
+        self._saldo_inicial = None
+        self._totales = None
+
+    def _periodo(self):
+        movimientos = MovimientoCuentaCorriente.objects.filter(cliente=self.cliente)
+        if self.desde:
+            movimientos = movimientos.filter(fecha__gte=_inicio(self.desde))
+        if self.hasta:
+            movimientos = movimientos.filter(fecha__lt=_fin(self.hasta))
+        return movimientos
+
+    @property
+    def saldo_inicial(self):
+        """Saldo antes del primer dia del periodo."""
+        if self._saldo_inicial is None:
+            if self.desde:
+                self._saldo_inicial = MovimientoCuentaCorriente.objects.filter(
+                    cliente=self.cliente, fecha__lt=_inicio(self.desde),
+                ).aggregate(saldo=_suma(IMPORTE))['saldo']
+            else:
+                self._saldo_inicial = Decimal('0')
+        return self._saldo_inicial
+
+    def movimientos(self):
+        """
+        Queryset de los movimientos del periodo en orden cronologico, con
+        importe (+ pago / - venta), saldo (acumulado) y referencia (codigo de la venta).
+        Se puede paginar: la ventana se calcula antes del LIMIT.
+        """
+        return (
+            self._periodo()
+            .annotate(
+                importe=IMPORTE,
+                saldo=_saldo_acumulado(saldo_inicial=self.saldo_inicial),
+                referencia=F('venta__code'),
+            )
+            .order_by('fecha', 'id')
+        )
+
+    def totales(self):
+        """{'saldo_inicial', 'debitos', 'creditos', 'saldo_final', 'cantidad'} en una consulta."""
+        if self._totales is None:
+            totales = self._periodo().aggregate(
+                debitos=_suma('monto', tipo='venta'),
+                creditos=_suma('monto', tipo='pago'),
+                cantidad=Count('pk'),
+            )
+            totales['saldo_inicial'] = self.saldo_inicial
+            totales['saldo_final'] = self.saldo_inicial + totales['creditos'] - totales['debitos']
+            self._totales = totales
+        return self._totales
+
+
+def deudores(desde=None, hasta=None):
+    """
+    Clientes con saldo negativo al final del periodo, con saldo_inicial,
+    debitos, creditos y saldo_final, en una sola consulta agrupada por cliente.
+    """
+    movimientos = MovimientoCuentaCorriente.objects.all()
+    if hasta:
+        movimientos = movimientos.filter(fecha__lt=_fin(hasta))
+    en_periodo = {'fecha__gte': _inicio(desde)} if desde else {}
+    if desde:
+        saldo_inicial = _suma(IMPORTE, fecha__lt=_inicio(desde))
+    else:
+        saldo_inicial = Value(Decimal('0'), output_field=MONTO)
+    return (
+        movimientos.order_by()
+        .values('cliente_id', 'cliente__name', 'cliente__dni')
+        .annotate(
+            saldo_inicial=saldo_inicial,
+            debitos=_suma('monto', tipo='venta', **en_periodo),
+            creditos=_suma('monto', tipo='pago', **en_periodo),
+            saldo_final=_suma(IMPORTE),
+        )
+        .filter(saldo_final__lt=0)
+        .order_by('cliente__name', 'cliente_id')
+    )
+
+
+def movimientos_deudores(lista_deudores, desde=None, hasta=None, lote=2000):
+    """
+    Movimientos del periodo de los deudores (filas de deudores()), en orden de
+    cliente y fecha, con el saldo acumulado de cada cliente. Una sola consulta,
+    leida de a `lote` filas.
+    """
+    saldos_iniciales = {fila['cliente_id']: fila['saldo_inicial'] for fila in lista_deudores}
+    if not saldos_iniciales:
+        return
+    movimientos = MovimientoCuentaCorriente.objects.filter(cliente_id__in=list(saldos_iniciales))
+    if desde:
+        movimientos = movimientos.filter(fecha__gte=_inicio(desde))
+    if hasta:
+        movimientos = movimientos.filter(fecha__lt=_fin(hasta))
+    movimientos = (
+        movimientos
+        .annotate(
+            importe=IMPORTE,
+            saldo_periodo=_saldo_acumulado(particion=[F('cliente_id')]),
+            referencia=F('venta__code'),
+        )
+        .order_by('cliente__name', 'cliente_id', 'fecha', 'id')
+    )
+    for movimiento in movimientos.iterator(chunk_size=lote):
+        movimiento.saldo = saldos_iniciales[movimiento.cliente_id] + movimiento.saldo_periodo
+        yield movimiento
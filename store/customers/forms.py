@@ -149,3 +149,28 @@ class ClienteSearchForm(forms.Form):
         }),
         label='Estado'
     )
+
+
+class EstadoCuentaForm(forms.Form):
+    """
+    Periodo del estado de cuenta (fechas inclusive).
+    """
+
+    desde = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Desde'
+    )
+
+    hasta = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Hasta'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        desde, hasta = cleaned_data.get('desde'), cleaned_data.get('hasta')
+        if desde and hasta and desde > hasta:
+            self.add_error('hasta', 'La fecha hasta debe ser posterior a la fecha desde.')
+        return cleaned_data
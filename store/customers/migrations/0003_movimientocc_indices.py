@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_movimientocuentacorriente'),
+        ('pos', '0004_alter_salesitems_qty'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientocuentacorriente',
+            index=models.Index(fields=['cliente', 'fecha'], name='movcc_cliente_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:44
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+# Copias de inventory.search.normalizar_texto y customers.models.telefono_local
+# al momento de la migracion: una migracion no importa codigo de la app.
+def normalizar_texto(texto):
+    if not texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'[^0-9a-z]+', ' ', texto.lower())
+    return texto.strip()
+
+
+def telefono_local(telefono):
+    digitos = re.sub(r'\D', '', telefono or '')
+    if digitos.startswith('54'):
+        digitos = digitos[2:]
+        if digitos.startswith('9'):
+            digitos = digitos[1:]
+    return digitos.lstrip('0')
+
+
+def poblar_busqueda(apps, schema_editor):
+    """Calcula nombre normalizado y DNI/teléfono solo dígitos de los clientes existentes."""
+    Cliente = apps.get_model('customers', 'Cliente')
+    clientes = list(Cliente.objects.all())
+    for cliente in clientes:
+        cliente.nombre_busqueda = normalizar_texto(cliente.name)[:200]
+        cliente.dni_digitos = re.sub(r'\D', '', cliente.dni or '')[:20]
+        cliente.telefono_digitos = telefono_local(cliente.phone)[:50]
+    Cliente.objects.bulk_update(
+        clientes, ['nombre_busqueda', 'dni_digitos', 'telefono_digitos'], batch_size=1000
+    )
+
+
+def crear_indice_trigramas(apps, schema_editor):
+    # Acelera la búsqueda por palabra intermedia del nombre (LIKE '% perez%')
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS cliente_nombre_busqueda_trgm_idx '
+        'ON customers_cliente USING gin (nombre_busqueda gin_trgm_ops)'
+    )
+
+
+def borrar_indice_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS cliente_nombre_busqueda_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_movimientocc_indices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='dni_digitos',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='nombre_busqueda',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='telefono_digitos',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.RunPython(poblar_busqueda, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice_trigramas, borrar_indice_trigramas),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:48
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def normalizar_texto(texto):
+    # Copia de inventory.search.normalizar_texto al momento de la migracion
+    if not texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'[^0-9a-z]+', ' ', texto.lower())
+    return texto.strip()
+
+
+def poblar_palabras(apps, schema_editor):
+    """Palabras del nombre y del email de los clientes existentes."""
+    Cliente = apps.get_model('customers', 'Cliente')
+    ClientePalabra = apps.get_model('customers', 'ClientePalabra')
+    filas = []
+    for pk, nombre, email in Cliente.objects.values_list('pk', 'name', 'email').iterator(chunk_size=2000):
+        palabras = {palabra[:50] for palabra in f'{normalizar_texto(nombre)} {normalizar_texto(email)}'.split()}
+        filas.extend(ClientePalabra(cliente_id=pk, palabra=palabra) for palabra in palabras)
+        if len(filas) >= 5000:
+            ClientePalabra.objects.bulk_create(filas)
+            filas = []
+    ClientePalabra.objects.bulk_create(filas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0004_cliente_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientePalabra',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('palabra', models.CharField(max_length=50)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='palabras', to='customers.cliente')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['palabra', 'cliente'], name='palabra_cliente_idx')],
+            },
+        ),
+        migrations.RunPython(poblar_palabras, migrations.RunPython.noop),
+    ]
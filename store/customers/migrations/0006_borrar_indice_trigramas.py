@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def borrar_indice_trigramas(apps, schema_editor):
+    # La busqueda por palabra pasa por ClientePalabra: el indice pg_trgm de 0004 ya no se usa
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS cliente_nombre_busqueda_trgm_idx')
+
+
+def crear_indice_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS cliente_nombre_busqueda_trgm_idx '
+        'ON customers_cliente USING gin (nombre_busqueda gin_trgm_ops)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0005_clientepalabra'),
+    ]
+
+    operations = [
+        migrations.RunPython(borrar_indice_trigramas, crear_indice_trigramas),
+    ]
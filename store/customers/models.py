@@ -1,6 +1,43 @@
+import re
+from decimal import Decimal
+
 from django.db import models
+from django.db.models.functions import Coalesce, Round
 from django.urls import reverse
 
+# Saldo de cuenta corriente: los pagos suman y las ventas restan.
+# Round: en SQLite la suma de decimales se hace en float (0.1 + 0.2 != 0.3)
+SALDO_MOVIMIENTOS = Round(
+    models.Sum(
+        models.Case(
+            models.When(tipo='pago', then=models.F('monto')),
+            default=-models.F('monto'),
+            output_field=models.DecimalField(max_digits=18, decimal_places=2),
+        )
+    ),
+    2,
+)
+
+
+def telefono_local(telefono):
+    """
+    Solo los dígitos del teléfono, sin prefijo internacional ni el 9 de celulares,
+    ni el 0 de larga distancia: '+54 9 11 4444-5555' -> '1144445555'.
+    """
+    digitos = re.sub(r'\D', '', telefono or '')
+    if digitos.startswith('54'):
+        digitos = digitos[2:]
+        if digitos.startswith('9'):
+            digitos = digitos[1:]
+    return digitos.lstrip('0')
+
+
+def palabras_cliente(nombre, email=''):
+    """Palabras normalizadas del nombre y del email: 'Juan Pérez', 'jp@mail.com' -> {'juan', 'perez', 'jp', 'mail', 'com'}."""
+    from inventory.search import normalizar_texto
+    return {palabra[:50] for palabra in f'{normalizar_texto(nombre)} {normalizar_texto(email)}'.split()}
+
+
 class Cliente(models.Model):
     """
     Modelo para gestionar clientes de la tienda.
@@ -82,6 +119,11 @@ class Cliente(models.Model):
         auto_now=True,
         verbose_name='Última Actualización'
     )
+
+    # Índice de búsqueda (se recalcula en save): nombre normalizado y solo dígitos
+    nombre_busqueda = models.CharField(max_length=200, blank=True, default='', editable=False, db_index=True)
+    dni_digitos = models.CharField(max_length=20, blank=True, default='', editable=False, db_index=True)
+    telefono_digitos = models.CharField(max_length=50, blank=True, default='', editable=False, db_index=True)
     
     class Meta:
         verbose_name = 'Cliente'
@@ -95,6 +137,78 @@ class Cliente(models.Model):
     
     def __str__(self):
         return f"{self.name} ({self.dni})"
+
+    def actualizar_busqueda(self):
+        """Recalcula los campos de búsqueda a partir de nombre, DNI y teléfono."""
+        from inventory.search import normalizar_texto
+        self.nombre_busqueda = normalizar_texto(self.name)[:200]
+        self.dni_digitos = re.sub(r'\D', '', self.dni or '')[:20]
+        self.telefono_digitos = telefono_local(self.phone)[:50]
+
+    def actualizar_palabras(self):
+        """Regenera las filas de ClientePalabra del cliente (nombre y email)."""
+        self.palabras.all().delete()
+        ClientePalabra.objects.bulk_create(
+            [ClientePalabra(cliente=self, palabra=palabra) for palabra in palabras_cliente(self.name, self.email)]
+        )
+
+    def save(self, *args, **kwargs):
+        self.actualizar_busqueda()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'nombre_busqueda', 'dni_digitos', 'telefono_digitos'}
+        super().save(*args, **kwargs)
+        if update_fields is None or {'name', 'email'} & set(update_fields):
+            self.actualizar_palabras()
+
+    @classmethod
+    def filtro_busqueda(cls, texto):
+        """
+        Q para buscar clientes por prefijo: DNI/CUIT o teléfono (ignorando
+        puntos, guiones y espacios), o cada palabra buscada como comienzo de
+        alguna palabra del nombre o del email (sin acentos), en ClientePalabra.
+        Todas las condiciones son prefijos sobre columnas indexadas; un texto
+        en el medio de una palabra ('erez' en 'Pérez') no se encuentra.
+        """
+        from inventory.search import normalizar_texto
+        texto = (texto or '').strip()
+        digitos = re.sub(r'[\s.\-/()+]', '', texto)
+        if digitos.isdigit():
+            return (
+                models.Q(dni_digitos__startswith=digitos) |
+                models.Q(telefono_digitos__startswith=telefono_local(digitos) or digitos)
+            )
+
+        filtro = models.Q()
+        for token in normalizar_texto(texto).split():
+            filtro &= models.Q(
+                pk__in=ClientePalabra.objects.filter(palabra__startswith=token[:50]).values('cliente_id')
+            )
+        return filtro
+
+    @classmethod
+    def buscar(cls, texto, limite=20, solo_activos=True):
+        """
+        Clientes que coinciden con el texto, los más relevantes primero:
+        DNI exacto, nombre que empieza con lo buscado y luego alfabético.
+        """
+        from inventory.search import normalizar_texto
+        consulta = normalizar_texto(texto)
+        if not consulta:
+            return []
+        queryset = cls.objects.filter(cls.filtro_busqueda(texto))
+        if solo_activos:
+            queryset = queryset.filter(activo=True)
+        relevancia = models.Case(
+            models.When(dni_digitos=consulta.replace(' ', ''), then=models.Value(0)),
+            models.When(nombre_busqueda__startswith=consulta, then=models.Value(1)),
+            default=models.Value(2),
+            output_field=models.IntegerField(),
+        )
+        return list(
+            queryset.annotate(relevancia=relevancia)
+            .order_by('relevancia', 'nombre_busqueda')[:limite]
+        )
     
     def get_absolute_url(self):
         return reverse('customers:customer_detail', kwargs={'pk': self.pk})
@@ -105,34 +219,83 @@ class Cliente(models.Model):
             return 'success'  # Verde
         return 'primary'  # Azul
     
+    @classmethod
+    def con_totales(cls, queryset=None):
+        """
+        Clientes anotados con total_ventas, cantidad_ventas, ultima_venta y
+        saldo_cuenta (negativo = debe), todo en la misma consulta: cada total
+        es una subconsulta correlacionada por cliente (usa los indices por
+        cliente de ventas y movimientos), asi se puede ordenar y filtrar por
+        ellos sin multiplicar filas con joins.
+        """
+        from pos.models import Sales
+
+        queryset = cls.objects.all() if queryset is None else queryset
+        ventas = Sales.objects.filter(cliente=models.OuterRef('pk')).order_by().values('cliente')
+        movimientos = (
+            MovimientoCuentaCorriente.objects.filter(cliente=models.OuterRef('pk'))
+            .order_by().values('cliente')
+        )
+        return queryset.annotate(
+            total_ventas=Coalesce(
+                models.Subquery(ventas.annotate(total=models.Sum('grand_total')).values('total')),
+                models.Value(0.0), output_field=models.FloatField(),
+            ),
+            cantidad_ventas=Coalesce(
+                models.Subquery(ventas.annotate(cantidad=models.Count('pk')).values('cantidad')),
+                models.Value(0), output_field=models.IntegerField(),
+            ),
+            ultima_venta=models.Subquery(
+                ventas.annotate(ultima=models.Max('date_added')).values('ultima'),
+                output_field=models.DateTimeField(),
+            ),
+            saldo_cuenta=Coalesce(
+                models.Subquery(movimientos.annotate(saldo=SALDO_MOVIMIENTOS).values('saldo')),
+                models.Value(Decimal('0')), output_field=models.DecimalField(max_digits=18, decimal_places=2),
+            ),
+        )
+
     def get_total_ventas(self):
         """Calcula el total de ventas realizadas a este cliente"""
-        from pos.models import Sales
-        ventas = Sales.objects.filter(cliente=self)
-        total = sum([venta.grand_total for venta in ventas if venta.grand_total])
-        return total
+        if hasattr(self, 'total_ventas'):
+            return self.total_ventas
+        return self.ventas.aggregate(total=models.Sum('grand_total'))['total'] or 0
     
     def get_cantidad_ventas(self):
         """Retorna la cantidad de ventas realizadas a este cliente"""
-        from pos.models import Sales
-        return Sales.objects.filter(cliente=self).count()
+        if hasattr(self, 'cantidad_ventas'):
+            return self.cantidad_ventas
+        return self.ventas.count()
     
     def get_ultima_venta(self):
         """Retorna la fecha de la última venta"""
-        from pos.models import Sales
-        ultima = Sales.objects.filter(cliente=self).order_by('-date_added').first()
-        return ultima.date_added if ultima else None
+        if hasattr(self, 'ultima_venta'):
+            return self.ultima_venta
+        return self.ventas.aggregate(ultima=models.Max('date_added'))['ultima']
     
     def get_saldo_cuenta_corriente(self):
         """Retorna el saldo actual de la cuenta corriente (negativo = debe)"""
-        movimientos = self.movimientos_cuenta.all()
-        saldo = 0
-        for m in movimientos:
-            if m.tipo == 'pago':
-                saldo += m.monto
-            else:  # venta
-                saldo -= m.monto
-        return saldo
+        if hasattr(self, 'saldo_cuenta'):
+            return self.saldo_cuenta
+        return self.movimientos_cuenta.aggregate(saldo=SALDO_MOVIMIENTOS)['saldo'] or Decimal('0')
+
+
+class ClientePalabra(models.Model):
+    """
+    Palabras normalizadas del nombre y del email de cada cliente, para buscar
+    cualquier palabra por prefijo con el indice (palabra, cliente).
+    """
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='palabras')
+    palabra = models.CharField(max_length=50)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['palabra', 'cliente'], name='palabra_cliente_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.cliente_id}: {self.palabra!r}"
+
 
 class MovimientoCuentaCorriente(models.Model):
     
@@ -197,6 +360,9 @@ class MovimientoCuentaCorriente(models.Model):
         verbose_name = 'Movimiento Cuenta Corriente'
         verbose_name_plural = 'Movimientos Cuenta Corriente'
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['cliente', 'fecha'], name='movcc_cliente_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.cliente.name} - {self.tipo} - ${self.monto}"
\ No newline at end of file
@@ -24,4 +24,11 @@ urlpatterns = [
 
     # Registrar pago cuenta corriente
     path('<int:pk>/registrar-pago/', views.registrar_pago, name='registrar_pago'),
+
+    # Estado de cuenta corriente (y el de todos los deudores)
+    path('<int:pk>/estado-cuenta/', views.estado_cuenta, name='estado_cuenta'),
+    path('estados-cuenta/', views.estados_cuenta_deudores, name='estados_cuenta'),
+
+    # Typeahead de clientes (POS y pedidos)
+    path('api/buscar/', views.api_buscar_clientes, name='api_buscar_clientes'),
 ]
@@ -1,12 +1,18 @@
+from decimal import Decimal
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
+from django.http import HttpResponse, JsonResponse
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.db.models import Q, Sum, Count
 from .models import Cliente
-from .forms import ClienteForm, ClienteSearchForm
+from .forms import ClienteForm, ClienteSearchForm, EstadoCuentaForm
+
+MOVIMIENTOS_EN_DETALLE = 10
+MOVIMIENTOS_POR_PAGINA = 50
 
 # ============================================
 # VISTAS BASADAS EN CLASES (CBV)
@@ -15,11 +21,25 @@ from .forms import ClienteForm, ClienteSearchForm
 class ClienteListView(LoginRequiredMixin, ListView):
     """
     Vista para listar todos los clientes con filtros de búsqueda.
+    Los totales (facturado, ventas, última venta, saldo) vienen anotados en la
+    misma consulta; las columnas se ordenan con ?orden= y se pagina por clave
+    (?despues= / ?antes=), sin OFFSET ni COUNT del total.
     """
     model = Cliente
     template_name = 'customers/customer_list.html'
     context_object_name = 'clientes'
-    paginate_by = 20
+    tamano_pagina = 50
+
+    # ?orden= -> campo; el primer clic ordena en el sentido de `descendente`
+    ORDENES = {
+        'nombre': ('name', False),
+        'total': ('total_ventas', True),
+        'ventas': ('cantidad_ventas', True),
+        'ultima': ('ultima_venta', True),
+        'saldo': ('saldo_cuenta', False),
+        'registro': ('date_added', True),
+    }
+    ORDEN_POR_DEFECTO = '-registro'
     
     def get_queryset(self):
         queryset = Cliente.objects.all()
@@ -29,14 +49,9 @@ class ClienteListView(LoginRequiredMixin, ListView):
         tipo_cliente = self.request.GET.get('tipo_cliente', '')
         activo = self.request.GET.get('activo', '')
         
-        # Filtrar por búsqueda de texto
+        # Filtrar por búsqueda de texto (prefijos de nombre, DNI/CUIT, teléfono o email)
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(dni__icontains=search) |
-                Q(phone__icontains=search) |
-                Q(email__icontains=search)
-            )
+            queryset = queryset.filter(Cliente.filtro_busqueda(search))
         
         # Filtrar por tipo de cliente
         if tipo_cliente:
@@ -48,10 +63,53 @@ class ClienteListView(LoginRequiredMixin, ListView):
         elif activo == 'false':
             queryset = queryset.filter(activo=False)
         
-        return queryset.order_by('-date_added')
-    
+        return Cliente.con_totales(queryset)
+
+    def get_orden(self):
+        """('saldo', descendente) a partir de ?orden=, o el orden por defecto."""
+        orden = self.request.GET.get('orden', '') or self.ORDEN_POR_DEFECTO
+        clave = orden.lstrip('-')
+        if clave not in self.ORDENES:
+            clave = self.ORDEN_POR_DEFECTO.lstrip('-')
+            orden = self.ORDEN_POR_DEFECTO
+        return clave, orden.startswith('-')
+
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        from core.paginacion import CursorInvalido, paginar_keyset
+
+        clave, descendente = self.get_orden()
+        campo = self.ORDENES[clave][0]
+        orden = [f'-{campo}' if descendente else campo]
+        try:
+            pagina = paginar_keyset(
+                self.object_list, orden, tamano=self.tamano_pagina,
+                despues=self.request.GET.get('despues'), antes=self.request.GET.get('antes'),
+            )
+        except CursorInvalido:
+            pagina = paginar_keyset(self.object_list, orden, tamano=self.tamano_pagina)
+
+        context = super().get_context_data(object_list=pagina.object_list, **kwargs)
+        context['pagina'] = pagina
+
+        # Parámetros para los enlaces: filtros sin cursor ni orden
+        filtros = self.request.GET.copy()
+        for parametro in ('despues', 'antes', 'orden', 'page'):
+            filtros.pop(parametro, None)
+        con_orden = filtros.copy()
+        con_orden['orden'] = f'-{clave}' if descendente else clave
+        context['parametros'] = con_orden.urlencode()
+        context['ordenes'] = {}
+        for nombre, (_, descendente_inicial) in self.ORDENES.items():
+            activo = nombre == clave
+            siguiente_descendente = not descendente if activo else descendente_inicial
+            enlace = filtros.copy()
+            enlace['orden'] = f'-{nombre}' if siguiente_descendente else nombre
+            context['ordenes'][nombre] = {
+                'parametros': enlace.urlencode(),
+                'activo': activo,
+                'descendente': descendente,
+            }
+
         context['search_form'] = ClienteSearchForm(self.request.GET)
         context['total_clientes'] = Cliente.objects.filter(activo=True).count()
         return context
@@ -64,10 +122,13 @@ class ClienteDetailView(LoginRequiredMixin, DetailView):
     model = Cliente
     template_name = 'customers/customer_detail.html'
     context_object_name = 'cliente'
+
+    def get_queryset(self):
+        return Cliente.con_totales()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        cliente = self.get_object()
+        cliente = self.object
         
         # Importar Sales aquí para evitar circular import
         from pos.models import Sales
@@ -75,12 +136,10 @@ class ClienteDetailView(LoginRequiredMixin, DetailView):
         # Obtener ventas del cliente
         ventas = Sales.objects.filter(cliente=cliente).order_by('-date_added')
         
-        # Estadísticas
+        # Estadísticas (anotadas en get_queryset)
         context['ventas'] = ventas[:10]  # Últimas 10 ventas
-        context['total_ventas'] = ventas.count()
-        context['total_facturado'] = ventas.aggregate(
-            total=Sum('grand_total')
-        )['total'] or 0
+        context['total_ventas'] = cliente.cantidad_ventas
+        context['total_facturado'] = cliente.total_ventas
         
         # Productos más comprados
         from pos.models import salesItems
@@ -99,8 +158,8 @@ class ClienteDetailView(LoginRequiredMixin, DetailView):
         from customers.models import MovimientoCuentaCorriente
         movimientos = MovimientoCuentaCorriente.objects.filter(
             cliente=cliente
-        ).order_by('-fecha')
-        context['movimientos'] = movimientos
+        ).order_by('-fecha', '-id')
+        context['movimientos'] = movimientos[:MOVIMIENTOS_EN_DETALLE]  # el resto en el estado de cuenta
         context['saldo'] = cliente.get_saldo_cuenta_corriente()
         
         return context
@@ -237,4 +296,251 @@ def registrar_pago(request, pk):
 
         messages.success(request, f"Pago de AR$ {monto} registrado para {cliente.name}.")
     
-    return redirect('customers:customer_detail', pk=pk)
\ No newline at end of file
+    return redirect('customers:customer_detail', pk=pk)
+
+
+@login_required
+def api_buscar_clientes(request):
+    """
+    Typeahead de clientes para el POS y los pedidos: busca por nombre (sin acentos),
+    DNI/CUIT o teléfono. Devuelve el tipo de cliente para aplicar la lista de precios.
+    Responde en el formato de Select2 ({'results': [...]}).
+    """
+    texto = request.GET.get('q', '').strip()
+    try:
+        limite = max(1, min(int(request.GET.get('limit', 20)), 100))
+    except ValueError:
+        limite = 20
+    solo_activos = request.GET.get('todos') != '1'
+
+    resultados = []
+    for c in Cliente.buscar(texto, limite=limite, solo_activos=solo_activos):
+        resultados.append({
+            'id': c.pk,
+            'text': f'{c.name} ({c.dni})',
+            'name': c.name,
+            'dni': c.dni,
+            'phone': c.phone or '',
+            'tipo_cliente': c.tipo_cliente,
+        })
+    return JsonResponse({'results': resultados})
+
+
+# ============================================
+# ESTADO DE CUENTA CORRIENTE
+# ============================================
+
+def _periodo_estado(request):
+    """(form, desde, hasta): por defecto desde el primer día del mes hasta hoy."""
+    from django.utils import timezone
+
+    hoy = timezone.now().date()
+    desde, hasta = hoy.replace(day=1), hoy
+    form = EstadoCuentaForm(request.GET or None, initial={'desde': desde, 'hasta': hasta})
+    if form.is_bound and form.is_valid():
+        desde, hasta = form.cleaned_data['desde'], form.cleaned_data['hasta']
+    return form, desde, hasta
+
+
+def _texto_periodo(desde, hasta):
+    desde = desde.strftime('%d/%m/%Y') if desde else 'el inicio'
+    hasta = hasta.strftime('%d/%m/%Y') if hasta else 'hoy'
+    return f'Período: desde {desde} hasta {hasta}'
+
+
+def _concepto(movimiento):
+    if movimiento.tipo == 'venta':
+        return f'Venta {movimiento.referencia}' if movimiento.referencia else 'Venta'
+    forma_pago = movimiento.get_forma_pago_display()
+    return f'Pago ({forma_pago})' if forma_pago else 'Pago'
+
+
+def _fila_estado(movimiento):
+    """Fecha, concepto, notas, debe, haber, saldo."""
+    debe = movimiento.monto if movimiento.tipo == 'venta' else None
+    haber = movimiento.monto if movimiento.tipo == 'pago' else None
+    return [movimiento.fecha, _concepto(movimiento), movimiento.notas or '', debe, haber, movimiento.saldo]
+
+
+@login_required
+def estado_cuenta(request, pk):
+    """
+    Estado de cuenta del cliente: saldo inicial, movimientos del período con
+    su saldo acumulado (paginados) y saldo final. ?formato=pdf|excel lo exporta.
+    """
+    from django.core.paginator import Paginator
+    from .estado_cuenta import EstadoCuenta
+
+    cliente = get_object_or_404(Cliente, pk=pk)
+    form, desde, hasta = _periodo_estado(request)
+    estado = EstadoCuenta(cliente, desde, hasta)
+
+    formato = request.GET.get('formato')
+    if formato == 'pdf':
+        return _estado_cuenta_pdf(request, estado)
+    if formato == 'excel':
+        return _estado_cuenta_excel(estado)
+
+    parametros = request.GET.copy()
+    parametros.pop('page', None)
+    context = {
+        'page_title': f'Estado de Cuenta - {cliente.name}',
+        'cliente': cliente,
+        'form': form,
+        'desde': desde,
+        'hasta': hasta,
+        'totales': estado.totales(),
+        'pagina': Paginator(estado.movimientos(), MOVIMIENTOS_POR_PAGINA).get_page(request.GET.get('page')),
+        'parametros': parametros.urlencode(),
+    }
+    return render(request, 'customers/estado_cuenta.html', context)
+
+
+@login_required
+def estados_cuenta_deudores(request):
+    """
+    Resumen de todos los clientes con deuda al final del período (una consulta
+    agrupada); ?formato=pdf|excel genera los estados de cuenta de todos juntos.
+    """
+    from .estado_cuenta import deudores
+
+    form, desde, hasta = _periodo_estado(request)
+    lista = list(deudores(desde, hasta))
+
+    formato = request.GET.get('formato')
+    if formato == 'pdf':
+        return _estados_deudores_pdf(request, lista, desde, hasta)
+    if formato == 'excel':
+        return _estados_deudores_excel(lista, desde, hasta)
+
+    context = {
+        'page_title': 'Estados de Cuenta',
+        'form': form,
+        'desde': desde,
+        'hasta': hasta,
+        'deudores': lista,
+        'total_deuda': -sum((fila['saldo_final'] for fila in lista), Decimal('0')),
+        'parametros': request.GET.urlencode(),
+    }
+    return render(request, 'customers/estados_cuenta.html', context)
+
+
+def _columnas_estado():
+    from inventory.templatetags.formato import pesos
+    from report.tabla_pdf import Columna, fecha_hora
+
+    def importe(valor):
+        return pesos(valor) if valor is not None else ''
+
+    return [
+        Columna('Fecha', 0.15, formato=fecha_hora),
+        Columna('Concepto', 0.20, alinear='LEFT'),
+        Columna('Notas', 0.23, alinear='LEFT'),
+        Columna('Debe', 0.14, formato=importe, sumar=True),
+        Columna('Haber', 0.14, formato=importe, sumar=True),
+        Columna('Saldo', 0.14, formato=pesos),
+    ]
+
+
+def _estado_cuenta_pdf(request, estado):
+    from inventory.templatetags.formato import pesos
+    from report.tabla_pdf import reporte_pdf
+
+    cliente = estado.cliente
+    totales = estado.totales()
+    return reporte_pdf(
+        f'estado_cuenta_{cliente.dni}.pdf', _columnas_estado(),
+        (_fila_estado(movimiento) for movimiento in estado.movimientos().iterator(chunk_size=2000)),
+        encabezado='Estado de Cuenta', usuario=request.user.username,
+        titulos=[f'{cliente.name} ({cliente.dni})'],
+        subtitulos=[_texto_periodo(estado.desde, estado.hasta), f"Saldo inicial: {pesos(totales['saldo_inicial'])}"],
+        resumen=[
+            f"Saldo inicial: {pesos(totales['saldo_inicial'])}",
+            f"Débitos (ventas): {pesos(totales['debitos'])}",
+            f"Créditos (pagos): {pesos(totales['creditos'])}",
+            f"Saldo final: {pesos(totales['saldo_final'])}",
+        ],
+    )
+
+
+def _estado_cuenta_excel(estado):
+    from openpyxl import Workbook
+
+    cliente = estado.cliente
+    totales = estado.totales()
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Estado de cuenta')
+    hoja.append([f'{cliente.name} ({cliente.dni})'])
+    hoja.append([_texto_periodo(estado.desde, estado.hasta)])
+    hoja.append(['Saldo inicial', float(totales['saldo_inicial'])])
+    hoja.append([])
+    hoja.append(['Fecha', 'Concepto', 'Notas', 'Debe', 'Haber', 'Saldo'])
+    for movimiento in estado.movimientos().iterator(chunk_size=2000):
+        hoja.append([float(valor) if isinstance(valor, Decimal) else valor for valor in _fila_estado(movimiento)])
+    hoja.append([])
+    hoja.append(['Saldo final', float(totales['saldo_final'])])
+
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = f'attachment; filename="estado_cuenta_{cliente.dni}.xlsx"'
+    libro.save(response)
+    return response
+
+
+def _filas_deudores(lista, desde, hasta):
+    """Filas de todos los deudores con una Seccion por cliente (una sola consulta de movimientos)."""
+    from inventory.templatetags.formato import pesos
+    from report.tabla_pdf import Seccion
+    from .estado_cuenta import movimientos_deudores
+
+    por_cliente = {fila['cliente_id']: fila for fila in lista}
+    cliente_actual = None
+    for movimiento in movimientos_deudores(lista, desde, hasta):
+        if movimiento.cliente_id != cliente_actual:
+            cliente_actual = movimiento.cliente_id
+            fila = por_cliente[cliente_actual]
+            yield Seccion(
+                f"{fila['cliente__name']} ({fila['cliente__dni']}) - saldo inicial {pesos(fila['saldo_inicial'])}, "
+                f"saldo final {pesos(fila['saldo_final'])}"
+            )
+        yield _fila_estado(movimiento)
+
+
+def _estados_deudores_pdf(request, lista, desde, hasta):
+    from inventory.templatetags.formato import pesos
+    from report.tabla_pdf import reporte_pdf
+
+    total_deuda = -sum((fila['saldo_final'] for fila in lista), Decimal('0'))
+    return reporte_pdf(
+        'estados_cuenta.pdf', _columnas_estado(), _filas_deudores(lista, desde, hasta),
+        encabezado='Estados de Cuenta', usuario=request.user.username,
+        titulos=['Estados de Cuenta de Clientes con Deuda'], subtitulos=[_texto_periodo(desde, hasta)],
+        resumen=[f'Clientes con deuda: {len(lista)}', f'Total adeudado: {pesos(total_deuda)}'],
+    )
+
+
+def _estados_deudores_excel(lista, desde, hasta):
+    from openpyxl import Workbook
+    from .estado_cuenta import movimientos_deudores
+
+    libro = Workbook(write_only=True)
+    resumen = libro.create_sheet('Deudores')
+    resumen.append(['Cliente', 'DNI/CUIT', 'Saldo inicial', 'Débitos', 'Créditos', 'Saldo final'])
+    for fila in lista:
+        resumen.append([
+            fila['cliente__name'], fila['cliente__dni'], float(fila['saldo_inicial']),
+            float(fila['debitos']), float(fila['creditos']), float(fila['saldo_final']),
+        ])
+
+    por_cliente = {fila['cliente_id']: fila for fila in lista}
+    hoja = libro.create_sheet('Movimientos')
+    hoja.append(['Cliente', 'DNI/CUIT', 'Fecha', 'Concepto', 'Notas', 'Debe', 'Haber', 'Saldo'])
+    for movimiento in movimientos_deudores(lista, desde, hasta):
+        fila = por_cliente[movimiento.cliente_id]
+        hoja.append([fila['cliente__name'], fila['cliente__dni']] + [
+            float(valor) if isinstance(valor, Decimal) else valor for valor in _fila_estado(movimiento)
+        ])
+
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = 'attachment; filename="estados_cuenta.xlsx"'
+    libro.save(response)
+    return response
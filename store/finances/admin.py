@@ -109,12 +109,14 @@ class CierreCajaAdmin(admin.ModelAdmin):
         'saldo_real_efectivo',
         'diferencia_efectivo',
         'cerrado_por',
+        'generado',
         'fecha_hora_cierre'
     ]
     
     list_filter = [
         'fecha',
-        'cerrado_por'
+        'cerrado_por',
+        'generado'
     ]
     
     readonly_fields = [
@@ -124,7 +126,7 @@ class CierreCajaAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Información del Cierre', {
-            'fields': ('fecha', 'cerrado_por', 'fecha_hora_cierre')
+            'fields': ('fecha', 'cerrado_por', 'fecha_hora_cierre', 'generado')
         }),
         ('Saldos Iniciales', {
             'fields': ('saldo_inicial_efectivo', 'saldo_inicial_banco')
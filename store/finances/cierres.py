@@ -0,0 +1,203 @@
+"""
+Motor de cierres de caja: arma los cierres que faltan en un rango de fechas
+y recalcula los existentes despues de correcciones con fecha atrasada.
+
+Una sola consulta agrupa MovimientoCaja por (dia, tipo, cuenta, ingreso /
+egreso); con eso se recorren los dias en orden encadenando los saldos:
+
+  - saldo inicial efectivo = saldo real contado del cierre anterior
+  - saldo inicial banco    = saldo esperado en banco del cierre anterior
+  - saldo esperado         = saldo inicial + ingresos - egresos del dia
+                             (todos los movimientos de la cuenta, ajustes incluidos)
+
+Los dias con movimientos pero sin cierre igual mueven el saldo, asi un dia
+salteado no rompe la cadena. Si no hay cierre anterior el saldo inicial sale
+del libro de movimientos (flujo_caja.saldos_al).
+
+Los cierres generados (generado=True) no tienen conteo de efectivo: el saldo
+real es el esperado. En los cierres hechos a mano el conteo no se toca, solo
+cambian saldos iniciales, totales, esperado y diferencia.
+
+Uso:
+    resultado = recalcular_cierres(date(2026, 1, 1), date(2026, 12, 31), aplicar=False)
+    resultado['creados'], resultado['cambiados']
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .flujo_caja import CUENTAS, _decimal, saldos_al
+
+CAMPO_POR_TIPO = {
+    'venta_efectivo': 'total_ventas_efectivo',
+    'venta_banco': 'total_ventas_banco',
+    'compra_efectivo': 'total_compras_efectivo',
+    'compra_banco': 'total_compras_banco',
+    'retiro_efectivo': 'total_retiros_efectivo',
+    'retiro_banco': 'total_retiros_banco',
+}
+CAMPOS_TOTALES = (
+    'total_ventas_efectivo', 'total_ventas_banco',
+    'total_compras_efectivo', 'total_compras_banco',
+    'total_retiros_efectivo', 'total_retiros_banco',
+    'total_gastos_efectivo', 'total_gastos_banco',
+    'total_transferencias_salida', 'total_transferencias_entrada',
+)
+CAMPOS_CALCULADOS = (
+    'saldo_inicial_efectivo', 'saldo_inicial_banco',
+    *CAMPOS_TOTALES,
+    'saldo_esperado_efectivo', 'saldo_esperado_banco',
+    'saldo_real_efectivo', 'diferencia_efectivo',
+)
+NOTA_GENERADO = 'Cierre generado automáticamente (sin conteo de efectivo).'
+
+
+def campo_total(tipo, afecta_efectivo):
+    """Campo total_* del cierre donde suma un movimiento (None: solo mueve el saldo)."""
+    if tipo == 'gasto':
+        return 'total_gastos_efectivo' if afecta_efectivo else 'total_gastos_banco'
+    # Una transferencia son dos movimientos del mismo tipo: se cuenta la pata de efectivo
+    if tipo == 'transferencia_caja_banco':
+        return 'total_transferencias_salida' if afecta_efectivo else None
+    if tipo == 'transferencia_banco_caja':
+        return 'total_transferencias_entrada' if afecta_efectivo else None
+    return CAMPO_POR_TIPO.get(tipo)
+
+
+def _dia_vacio():
+    return {
+        'totales': {campo: Decimal('0') for campo in CAMPOS_TOTALES},
+        'neto': {cuenta: Decimal('0') for cuenta in CUENTAS},
+    }
+
+
+def movimientos_por_dia(desde, hasta):
+    """
+    {dia: {'totales': {campo total_*: monto}, 'neto': {cuenta: ingresos - egresos}}}
+    de los dias con movimientos entre desde y hasta inclusive, en una consulta.
+    """
+    from django.db.models import Sum
+    from django.db.models.functions import TruncDate
+    from .models import MovimientoCaja
+
+    filas = (
+        MovimientoCaja.objects
+        .filter(
+            fecha__gte=datetime.combine(desde, time.min),
+            fecha__lt=datetime.combine(hasta + timedelta(days=1), time.min),
+        )
+        .order_by()
+        .annotate(dia=TruncDate('fecha'))
+        .values('dia', 'tipo', 'afecta_efectivo', 'afecta_banco', 'es_ingreso')
+        .annotate(total=Sum('monto'))
+    )
+    dias = {}
+    for fila in filas:
+        datos = dias.setdefault(fila['dia'], _dia_vacio())
+        total = _decimal(fila['total'])
+        campo = campo_total(fila['tipo'], fila['afecta_efectivo'])
+        if campo:
+            datos['totales'][campo] += total
+        for cuenta in CUENTAS:
+            if fila[f'afecta_{cuenta}']:
+                datos['neto'][cuenta] += total if fila['es_ingreso'] else -total
+    return dias
+
+
+def aplicar_movimientos(cierre, datos):
+    """Carga en el cierre los totales del dia y el saldo esperado (saldo inicial + neto)."""
+    datos = datos or _dia_vacio()
+    for campo, total in datos['totales'].items():
+        setattr(cierre, campo, total)
+    cierre.saldo_esperado_efectivo = cierre.saldo_inicial_efectivo + datos['neto']['efectivo']
+    cierre.saldo_esperado_banco = cierre.saldo_inicial_banco + datos['neto']['banco']
+
+
+def _saldos_del_cierre(cierre):
+    return {'efectivo': cierre.saldo_real_efectivo, 'banco': cierre.saldo_esperado_banco}
+
+
+def saldos_iniciales(fecha):
+    """
+    {cuenta: saldo} al empezar el dia: el cierre anterior mas los movimientos
+    de los dias sin cierre que haya en el medio (o el libro si no hay cierres).
+    """
+    from .models import CierreCaja
+
+    anterior = CierreCaja.objects.filter(fecha__lt=fecha).order_by('-fecha').first()
+    if anterior is None:
+        return saldos_al(fecha)
+    saldos = _saldos_del_cierre(anterior)
+    if anterior.fecha + timedelta(days=1) < fecha:
+        for datos in movimientos_por_dia(anterior.fecha + timedelta(days=1), fecha - timedelta(days=1)).values():
+            for cuenta in CUENTAS:
+                saldos[cuenta] += datos['neto'][cuenta]
+    return saldos
+
+
+def recalcular_cierres(desde, hasta, usuario=None, crear=True, aplicar=True):
+    """
+    Crea los cierres que faltan entre desde y hasta (solo dias con movimientos
+    y anteriores a hoy: el cierre de hoy se hace contando la caja) y recalcula
+    todos los cierres desde `desde` en adelante, porque el saldo se encadena.
+
+    Retorna {'desde', 'hasta', 'revisados', 'creados': [cierre],
+    'cambiados': [(cierre, {campo: (antes, despues)})]}. Con aplicar=False no guarda nada.
+    """
+    from django.db import transaction
+    from .models import CierreCaja
+
+    limite = min(hasta, timezone.now().date() - timedelta(days=1))
+    existentes = {cierre.fecha: cierre for cierre in CierreCaja.objects.filter(fecha__gte=desde)}
+    anterior = CierreCaja.objects.filter(fecha__lt=desde).order_by('-fecha').first()
+    if anterior is None:
+        inicio, saldo = desde, saldos_al(desde)
+    else:
+        # desde el dia siguiente al cierre anterior, por si hay dias sin cierre antes de `desde`
+        inicio, saldo = anterior.fecha + timedelta(days=1), _saldos_del_cierre(anterior)
+    fin = max([hasta, *existentes])
+
+    por_dia = movimientos_por_dia(inicio, fin)
+    creados, cambiados = [], []
+    for dia in sorted(set(por_dia) | set(existentes)):
+        cierre = existentes.get(dia)
+        if cierre is None and crear and desde <= dia <= limite:
+            cierre = CierreCaja(fecha=dia, generado=True, cerrado_por=usuario, notas=NOTA_GENERADO)
+        if cierre is None:
+            for cuenta in CUENTAS:
+                saldo[cuenta] += por_dia[dia]['neto'][cuenta]
+            continue
+
+        antes = {campo: getattr(cierre, campo) for campo in CAMPOS_CALCULADOS} if cierre.pk else None
+        cierre.saldo_inicial_efectivo = saldo['efectivo']
+        cierre.saldo_inicial_banco = saldo['banco']
+        aplicar_movimientos(cierre, por_dia.get(dia))
+        if cierre.generado:
+            cierre.saldo_real_efectivo = cierre.saldo_esperado_efectivo
+        cierre.calcular_diferencia()
+        saldo = _saldos_del_cierre(cierre)
+
+        if antes is None:
+            creados.append(cierre)
+            continue
+        cambios = {
+            campo: (antes[campo], getattr(cierre, campo))
+            for campo in CAMPOS_CALCULADOS
+            if Decimal(antes[campo]) != getattr(cierre, campo)
+        }
+        if cambios:
+            cambiados.append((cierre, cambios))
+
+    if aplicar and (creados or cambiados):
+        with transaction.atomic():
+            CierreCaja.objects.bulk_create(creados, batch_size=500)
+            CierreCaja.objects.bulk_update([cierre for cierre, _ in cambiados], CAMPOS_CALCULADOS, batch_size=500)
+
+    return {
+        'desde': desde,
+        'hasta': hasta,
+        'revisados': len(existentes),
+        'creados': creados,
+        'cambiados': cambiados,
+    }
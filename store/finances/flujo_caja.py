@@ -0,0 +1,262 @@
+"""
+Flujo de caja por dia, semana o mes, separado por cuenta (efectivo / banco).
+
+Una consulta agrupa los movimientos del rango por (periodo, cuenta, tipo,
+ingreso/egreso) y, sobre ese resultado, una funcion de ventana acumula el
+neto de cada cuenta en orden de periodo:
+
+    SELECT g.*, SUM(neto) OVER (PARTITION BY g.cuenta ORDER BY g.periodo) FROM (...agrupado...) g
+
+El saldo inicial es la suma de los movimientos anteriores al rango (un
+aggregate sobre el indice de fecha) y el saldo final de cada periodo es el
+saldo inicial + el acumulado.
+
+Los periodos cerrados (terminan antes de hoy) quedan en la cache de Django;
+solo se consulta desde el primer periodo que no esta en la cache (en el uso
+normal, el periodo actual). Un movimiento cargado con fecha anterior a hoy
+(ventas sincronizadas sin conexion, ajustes) invalida la cache: las claves
+llevan una version que se guarda en la base (core.VersionCache), asi la
+invalidacion llega a todos los workers aunque cada uno tenga su cache.
+
+Uso:
+    flujo = calcular(date(2026, 1, 1), date(2026, 3, 31), 'semana')
+    for periodo in flujo['periodos']: periodo['saldo_final']['efectivo'] ...
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+PERIODOS = {
+    'dia': 'Diario',
+    'semana': 'Semanal',
+    'mes': 'Mensual',
+}
+CUENTAS = ('efectivo', 'banco')
+CACHE_TIMEOUT = 60 * 60 * 24 * 30
+CLAVE_VERSION = 'flujo_caja:version'
+
+
+def inicio_periodo(fecha, periodo):
+    """Primer dia del dia / semana (lunes) / mes que contiene la fecha."""
+    if periodo == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if periodo == 'mes':
+        return fecha.replace(day=1)
+    return fecha
+
+
+def _siguiente(inicio, periodo):
+    if periodo == 'semana':
+        return inicio + timedelta(days=7)
+    if periodo == 'mes':
+        return (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return inicio + timedelta(days=1)
+
+
+def periodos(desde, hasta, periodo):
+    """[(inicio del periodo, desde, hasta)]: el primero y el ultimo recortados al rango."""
+    resultado = []
+    inicio = inicio_periodo(desde, periodo)
+    while inicio <= hasta:
+        siguiente = _siguiente(inicio, periodo)
+        resultado.append((inicio, max(inicio, desde), min(siguiente - timedelta(days=1), hasta)))
+        inicio = siguiente
+    return resultado
+
+
+def invalidar_cache():
+    """Descarta todos los periodos guardados (cambio un movimiento de un dia cerrado)."""
+    from core.models import VersionCache
+    VersionCache.incrementar(CLAVE_VERSION)
+
+
+def _decimal(valor):
+    if valor is None:
+        return Decimal('0')
+    if isinstance(valor, float):
+        return Decimal(str(round(valor, 2)))
+    return Decimal(valor).quantize(Decimal('0.01'))
+
+
+def _fecha(valor):
+    if isinstance(valor, str):  # SQLite: texto
+        valor = parse_datetime(valor) or datetime.fromisoformat(valor)
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def _neto(cuenta):
+    """Sum de ingresos - egresos que afectan la cuenta."""
+    from django.db.models import Case, DecimalField, F, Q, Sum, When
+
+    return Sum(
+        Case(When(es_ingreso=True, then=F('monto')), default=-F('monto'),
+             output_field=DecimalField(max_digits=12, decimal_places=2)),
+        filter=Q(**{f'afecta_{cuenta}': True}),
+    )
+
+
+def saldos_al(fecha):
+    """{cuenta: saldo} con los movimientos anteriores al dia `fecha`, en una consulta."""
+    from .models import MovimientoCaja
+
+    saldos = MovimientoCaja.objects.filter(fecha__lt=datetime.combine(fecha, time.min)).aggregate(
+        **{cuenta: _neto(cuenta) for cuenta in CUENTAS}
+    )
+    return {cuenta: _decimal(saldos[cuenta]) for cuenta in CUENTAS}
+
+
+def _agrupado(desde, hasta, periodo):
+    """
+    [(inicio del periodo, cuenta, tipo, es_ingreso, total, acumulado de la cuenta)]
+    entre desde y hasta inclusive: agrupado con el ORM y acumulado con la ventana.
+    """
+    from django.db.models import Case, Q, Sum, Value, When
+    from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+    from .models import MovimientoCaja
+
+    truncar = {'dia': TruncDay, 'semana': TruncWeek, 'mes': TruncMonth}[periodo]
+    agrupado = (
+        MovimientoCaja.objects
+        .filter(
+            fecha__gte=datetime.combine(desde, time.min),
+            fecha__lt=datetime.combine(hasta + timedelta(days=1), time.min),
+        )
+        .filter(Q(afecta_efectivo=True) | Q(afecta_banco=True))
+        .order_by()
+        .annotate(
+            periodo=truncar('fecha'),
+            cuenta=Case(When(afecta_efectivo=True, then=Value('efectivo')), default=Value('banco')),
+        )
+        .values('periodo', 'cuenta', 'tipo', 'es_ingreso')
+        .annotate(total=Sum('monto'))
+    )
+    sql, parametros = agrupado.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""SELECT g.periodo, g.cuenta, g.tipo, g.es_ingreso, g.total,
+                       SUM(CASE WHEN g.es_ingreso THEN g.total ELSE -g.total END)
+                           OVER (PARTITION BY g.cuenta ORDER BY g.periodo) AS acumulado
+                FROM ({sql}) g
+                ORDER BY g.periodo, g.cuenta, g.tipo""",
+            parametros,
+        )
+        return [
+            (_fecha(fila[0]), fila[1], fila[2], bool(fila[3]), _decimal(fila[4]), _decimal(fila[5]))
+            for fila in cursor.fetchall()
+        ]
+
+
+def _vacio():
+    return {
+        'tipos': {},  # (tipo, cuenta) -> {'ingreso': x, 'egreso': y}
+        'ingresos': {cuenta: Decimal('0') for cuenta in CUENTAS},
+        'egresos': {cuenta: Decimal('0') for cuenta in CUENTAS},
+    }
+
+
+def calcular(desde, hasta, periodo='dia'):
+    """
+    {'periodos': [{'inicio', 'desde', 'hasta', 'ingresos', 'egresos', 'neto',
+                   'saldo_inicial', 'saldo_final', 'saldo_total', 'tipos'}],
+     'saldo_inicial': {cuenta}, 'saldo_final': {cuenta},
+     'ingresos': {cuenta}, 'egresos': {cuenta}, 'por_tipo': [...]}
+    Los montos por cuenta son dicts {'efectivo': Decimal, 'banco': Decimal}.
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f'Periodo desconocido: {periodo}')
+    from core.models import VersionCache
+
+    hoy = timezone.now().date()
+    version = VersionCache.actual(CLAVE_VERSION)
+    lista = periodos(desde, hasta, periodo)
+
+    def clave(item):
+        return f'flujo_caja:{version}:{periodo}:{item[1]}:{item[2]}'
+
+    cerrados = [item for item in lista if item[2] < hoy]
+    en_cache = cache.get_many([clave(item) for item in cerrados])
+    primero = 0
+    while primero < len(lista) and clave(lista[primero]) in en_cache:
+        primero += 1
+
+    # Consulta agrupada + ventana desde el primer periodo que no esta en la cache
+    consultados = {}
+    if primero < len(lista):
+        for inicio, cuenta, tipo, es_ingreso, total, acumulado in _agrupado(lista[primero][1], hasta, periodo):
+            datos = consultados.setdefault(inicio, _vacio())
+            montos = datos['tipos'].setdefault((tipo, cuenta), {'ingreso': Decimal('0'), 'egreso': Decimal('0')})
+            montos['ingreso' if es_ingreso else 'egreso'] += total
+            datos['ingresos' if es_ingreso else 'egresos'][cuenta] += total
+            datos.setdefault('acumulado', {})[cuenta] = acumulado
+
+    saldo_inicial = saldos_al(desde)
+    saldo = dict(saldo_inicial)
+    base = None  # saldo al comenzar el primer periodo consultado
+    resultado, guardar = [], {}
+    for indice, item in enumerate(lista):
+        inicio, desde_periodo, hasta_periodo = item
+        if indice < primero:
+            datos, acumulado = en_cache[clave(item)], {}
+        else:
+            if base is None:
+                base = dict(saldo)
+            datos = consultados.get(inicio, _vacio())
+            acumulado = datos.pop('acumulado', {})
+            if hasta_periodo < hoy:
+                guardar[clave(item)] = datos
+        neto = {cuenta: datos['ingresos'][cuenta] - datos['egresos'][cuenta] for cuenta in CUENTAS}
+        saldo_periodo = dict(saldo)
+        for cuenta in CUENTAS:
+            if indice < primero:
+                saldo[cuenta] += neto[cuenta]
+            elif cuenta in acumulado:
+                saldo[cuenta] = base[cuenta] + acumulado[cuenta]
+            # sin movimientos de la cuenta en el periodo el saldo no cambia
+        resultado.append({
+            'inicio': inicio,
+            'desde': desde_periodo,
+            'hasta': hasta_periodo,
+            'ingresos': datos['ingresos'],
+            'egresos': datos['egresos'],
+            'neto': neto,
+            'saldo_inicial': saldo_periodo,
+            'saldo_final': dict(saldo),
+            'saldo_total': sum(saldo.values()),
+            'tipos': datos['tipos'],
+        })
+    if guardar:
+        cache.set_many(guardar, CACHE_TIMEOUT)
+
+    return {
+        'desde': desde,
+        'hasta': hasta,
+        'periodo': periodo,
+        'periodos': resultado,
+        'saldo_inicial': saldo_inicial,
+        'saldo_final': saldo,
+        'ingresos': {cuenta: sum((p['ingresos'][cuenta] for p in resultado), Decimal('0')) for cuenta in CUENTAS},
+        'egresos': {cuenta: sum((p['egresos'][cuenta] for p in resultado), Decimal('0')) for cuenta in CUENTAS},
+        'por_tipo': _por_tipo(resultado),
+    }
+
+
+def _por_tipo(resultado):
+    """[{'tipo', 'nombre', 'cuenta', 'ingreso', 'egreso'}] del rango completo, en el orden de TIPO_CHOICES."""
+    from .models import MovimientoCaja
+
+    totales = {}
+    for item in resultado:
+        for (tipo, cuenta), montos in item['tipos'].items():
+            total = totales.setdefault((tipo, cuenta), {'ingreso': Decimal('0'), 'egreso': Decimal('0')})
+            total['ingreso'] += montos['ingreso']
+            total['egreso'] += montos['egreso']
+    filas = []
+    for tipo, nombre in MovimientoCaja.TIPO_CHOICES:
+        for cuenta in CUENTAS:
+            if (tipo, cuenta) in totales:
+                filas.append({'tipo': tipo, 'nombre': nombre, 'cuenta': cuenta, **totales[(tipo, cuenta)]})
+    return filas
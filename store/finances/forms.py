@@ -348,3 +348,73 @@ class FiltroMovimientosForm(forms.Form):
         widget=forms.Select(attrs={'class': 'form-select'}),
         label='Cuenta'
     )
+
+
+class FlujoCajaForm(forms.Form):
+    """Rango y agrupación del reporte de flujo de caja"""
+    
+    desde = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        }),
+        label='Desde'
+    )
+    
+    hasta = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        }),
+        label='Hasta'
+    )
+    
+    periodo = forms.ChoiceField(
+        choices=[('dia', 'Diario'), ('semana', 'Semanal'), ('mes', 'Mensual')],
+        initial='dia',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Agrupar por'
+    )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        desde = cleaned_data.get('desde')
+        hasta = cleaned_data.get('hasta')
+        if desde and hasta and desde > hasta:
+            self.add_error('hasta', 'La fecha hasta debe ser posterior a la fecha desde.')
+        return cleaned_data
+
+
+class RecalcularCierresForm(forms.Form):
+    """Rango de fechas para armar los cierres que faltan y recalcular los existentes"""
+    
+    desde = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        }),
+        label='Desde'
+    )
+    
+    hasta = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        }),
+        label='Hasta'
+    )
+    
+    crear = forms.BooleanField(
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label='Crear los cierres que faltan'
+    )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        desde = cleaned_data.get('desde')
+        hasta = cleaned_data.get('hasta')
+        if desde and hasta and desde > hasta:
+            self.add_error('hasta', 'La fecha hasta debe ser posterior a la fecha desde.')
+        return cleaned_data
@@ -0,0 +1,75 @@
+"""
+Comando Django para completar y recalcular los cierres de caja.
+
+Arma los cierres de los dias con movimientos que quedaron sin cerrar y
+recalcula todos los cierres desde --desde en adelante encadenando los
+saldos (ver finances/cierres.py). Usarlo despues de cargar movimientos con
+fecha atrasada o para generar la historia de cierres de un periodo.
+
+Uso:
+    python manage.py recalcular_cierres --desde 2026-01-01
+    python manage.py recalcular_cierres --desde 2026-01-01 --hasta 2026-06-30 --simular
+    python manage.py recalcular_cierres --desde 2026-01-01 --sin-crear
+"""
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finances.cierres import recalcular_cierres
+
+
+class Command(BaseCommand):
+    help = 'Crea los cierres de caja que faltan y recalcula los existentes desde una fecha'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            type=date.fromisoformat,
+            required=True,
+            help='Primer dia a recalcular (AAAA-MM-DD)'
+        )
+        parser.add_argument(
+            '--hasta',
+            type=date.fromisoformat,
+            help='Ultimo dia en el que se crean cierres (AAAA-MM-DD, por defecto ayer)'
+        )
+        parser.add_argument(
+            '--sin-crear',
+            action='store_true',
+            help='Solo recalcular los cierres existentes, sin crear los que faltan'
+        )
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Solo informar que dias cambiarian, sin guardar'
+        )
+
+    def handle(self, *args, **options):
+        desde = options['desde']
+        hasta = options['hasta'] or date.today() - timedelta(days=1)
+        if desde > hasta:
+            raise CommandError('--desde tiene que ser anterior a --hasta')
+
+        inicio = time.perf_counter()
+        resultado = recalcular_cierres(
+            desde, hasta, crear=not options['sin_crear'], aplicar=not options['simular'],
+        )
+        segundos = time.perf_counter() - inicio
+
+        simular = options['simular']
+        for cierre in resultado['creados']:
+            self.stdout.write(
+                f'{cierre.fecha}  nuevo    esperado efectivo {cierre.saldo_esperado_efectivo}  '
+                f'banco {cierre.saldo_esperado_banco}'
+            )
+        for cierre, cambios in resultado['cambiados']:
+            detalle = ', '.join(f'{campo} {antes} -> {despues}' for campo, (antes, despues) in cambios.items())
+            self.stdout.write(f'{cierre.fecha}  cambia   {detalle}')
+
+        verbo = 'cambiarian' if simular else 'cambiaron'
+        self.stdout.write(
+            f'Cierres revisados: {resultado["revisados"]} ({len(resultado["cambiados"])} {verbo}); '
+            f'{"a crear" if simular else "creados"}: {len(resultado["creados"])}'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Listo en {segundos:.1f} s.'))
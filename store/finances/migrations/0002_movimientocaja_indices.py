@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:35
+
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0001_initial'),
+        ('pos', '0005_indices_consultas'),
+        ('purchase', '0008_purchaseproduct_indices'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientocaja',
+            index=models.Index(fields=['tipo', 'fecha'], name='movcaja_tipo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocaja',
+            index=models.Index(django.db.models.functions.datetime.TruncDate('fecha'), name='movcaja_fecha_dia_idx'),
+        ),
+    ]
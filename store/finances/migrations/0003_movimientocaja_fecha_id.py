@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0002_movimientocaja_indices'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientocaja',
+            index=models.Index(fields=['-fecha', '-id'], name='movcaja_fecha_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0003_movimientocaja_fecha_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cierrecaja',
+            name='generado',
+            field=models.BooleanField(default=False, help_text='Cierre armado por el sistema para un día sin cierre (sin conteo de efectivo)', verbose_name='Generado Automáticamente'),
+        ),
+    ]
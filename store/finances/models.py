@@ -4,6 +4,7 @@ from django.urls import reverse
 from django.utils import timezone
 from decimal import Decimal
 from django.db.models import Sum, Q
+from django.db.models.functions import TruncDate
 
 
 class Caja(models.Model):
@@ -175,6 +176,11 @@ class MovimientoCaja(models.Model):
             models.Index(fields=['tipo']),
             models.Index(fields=['fecha']),
             models.Index(fields=['-fecha']),
+            models.Index(fields=['tipo', 'fecha'], name='movcaja_tipo_fecha_idx'),
+            # Caja y cierres filtran por fecha__date
+            models.Index(TruncDate('fecha'), name='movcaja_fecha_dia_idx'),
+            # Historial: paginacion por (fecha, id)
+            models.Index(fields=['-fecha', '-id'], name='movcaja_fecha_id_idx'),
         ]
     
     def __str__(self):
@@ -185,6 +191,7 @@ class MovimientoCaja(models.Model):
         """Al guardar, actualizar los saldos de Caja"""
         es_nuevo = self.pk is None
         super().save(*args, **kwargs)
+        self._invalidar_flujo_caja()
         
         if es_nuevo:
             # Actualizar saldos de Caja
@@ -222,12 +229,20 @@ class MovimientoCaja(models.Model):
         
         caja.save()
         super().delete(*args, **kwargs)
+        self._invalidar_flujo_caja()
+
+    def _invalidar_flujo_caja(self):
+        """Un movimiento de un día ya cerrado cambia el flujo de caja guardado en la cache"""
+        if self.fecha and self.fecha.date() < timezone.now().date():
+            from .flujo_caja import invalidar_cache
+            invalidar_cache()
     
     @classmethod
-    def crear_desde_venta(cls, venta, forma_pago, monto_transferencia=0, usuario=None):
-        """Crea un movimiento desde una venta"""
+    def crear_desde_venta(cls, venta, forma_pago, monto_transferencia=0, usuario=None, fecha=None):
+        """Crea un movimiento desde una venta (fecha: la de la venta si se cargó sin conexión)"""
         from django.db import transaction
         
+        fecha = fecha or timezone.now()
         with transaction.atomic():
             caja = Caja.get_instance()
             
@@ -240,7 +255,7 @@ class MovimientoCaja(models.Model):
                     tipo='venta_efectivo',
                     monto=monto_efectivo,
                     concepto=f"Venta {venta.code} (Efectivo - pago mixto)",
-                    fecha=timezone.now(),
+                    fecha=fecha,
                     venta=venta,
                     afecta_efectivo=True,
                     afecta_banco=False,
@@ -254,7 +269,7 @@ class MovimientoCaja(models.Model):
                     tipo='venta_banco',
                     monto=monto_transferencia,
                     concepto=f"Venta {venta.code} (Transferencia - pago mixto)",
-                    fecha=timezone.now(),
+                    fecha=fecha,
                     venta=venta,
                     afecta_efectivo=False,
                     afecta_banco=True,
@@ -269,7 +284,7 @@ class MovimientoCaja(models.Model):
                     tipo='venta_efectivo',
                     monto=Decimal(str(venta.grand_total)),
                     concepto=f"Venta {venta.code}",
-                    fecha=timezone.now(),
+                    fecha=fecha,
                     venta=venta,
                     afecta_efectivo=True,
                     afecta_banco=False,
@@ -284,7 +299,7 @@ class MovimientoCaja(models.Model):
                     tipo='venta_banco',
                     monto=Decimal(str(venta.grand_total)),
                     concepto=f"Venta {venta.code} (Banco/Transferencia)",
-                    fecha=timezone.now(),
+                    fecha=fecha,
                     venta=venta,
                     afecta_efectivo=False,
                     afecta_banco=True,
@@ -479,6 +494,12 @@ class CierreCaja(models.Model):
         verbose_name='Fecha y Hora del Cierre'
     )
     
+    generado = models.BooleanField(
+        default=False,
+        verbose_name='Generado Automáticamente',
+        help_text='Cierre armado por el sistema para un día sin cierre (sin conteo de efectivo)'
+    )
+    
     class Meta:
         verbose_name = 'Cierre de Caja'
         verbose_name_plural = 'Cierres de Caja'
@@ -488,78 +509,13 @@ class CierreCaja(models.Model):
         return f"Cierre de Caja - {self.fecha}"
     
     def calcular_totales(self):
-        """Calcula los totales del día desde MovimientoCaja"""
-        movimientos = MovimientoCaja.objects.filter(
-            fecha__date=self.fecha
-        )
-        
-        # Ventas
-        self.total_ventas_efectivo = movimientos.filter(
-            tipo='venta_efectivo'
-        ).aggregate(Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        self.total_ventas_banco = movimientos.filter(
-            tipo='venta_banco'
-        ).aggregate(Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        # Compras
-        self.total_compras_efectivo = movimientos.filter(
-            tipo='compra_efectivo'
-        ).aggregate(Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        self.total_compras_banco = movimientos.filter(
-            tipo='compra_banco'
-        ).aggregate(Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        # Retiros
-        self.total_retiros_efectivo = movimientos.filter(
-            tipo='retiro_efectivo'
-        ).aggregate(Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        self.total_retiros_banco = movimientos.filter(
-            tipo='retiro_banco'
-        ).aggregate(Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        # Gastos
-        self.total_gastos_efectivo = movimientos.filter(
-            tipo='gasto',
-            afecta_efectivo=True
-        ).aggregate(Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        self.total_gastos_banco = movimientos.filter(
-            tipo='gasto',
-            afecta_banco=True
-        ).aggregate(Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        # Transferencias
-        self.total_transferencias_salida = movimientos.filter(
-            tipo='transferencia_caja_banco'
-        ).aggregate(Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        self.total_transferencias_entrada = movimientos.filter(
-            tipo='transferencia_banco_caja'
-        ).aggregate(Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        # Calcular saldos esperados
-        self.saldo_esperado_efectivo = (
-            self.saldo_inicial_efectivo +
-            self.total_ventas_efectivo +
-            self.total_transferencias_entrada -
-            self.total_compras_efectivo -
-            self.total_retiros_efectivo -
-            self.total_gastos_efectivo -
-            self.total_transferencias_salida
-        )
+        """
+        Calcula los totales del día desde MovimientoCaja y el saldo esperado
+        (saldo inicial + ingresos - egresos de cada cuenta), ver finances/cierres.py
+        """
+        from .cierres import aplicar_movimientos, movimientos_por_dia
         
-        self.saldo_esperado_banco = (
-            self.saldo_inicial_banco +
-            self.total_ventas_banco +
-            self.total_transferencias_salida -
-            self.total_compras_banco -
-            self.total_retiros_banco -
-            self.total_gastos_banco -
-            self.total_transferencias_entrada
-        )
+        aplicar_movimientos(self, movimientos_por_dia(self.fecha, self.fecha).get(self.fecha))
     
     def calcular_diferencia(self):
         """Calcula la diferencia entre esperado y real"""
@@ -21,6 +21,7 @@ urlpatterns = [
     path('cierre/', views.cierre_caja, name='cierre_caja'),
     path('cierres/', views.lista_cierres, name='lista_cierres'),
     path('cierre/<int:pk>/', views.detalle_cierre, name='detalle_cierre'),
+    path('cierres/recalcular/', views.recalcular_cierres, name='recalcular_cierres'),
     
     # Reportes
     path('reportes/', views.reportes_financieros, name='reportes'),
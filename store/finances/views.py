@@ -350,47 +350,172 @@ def ajuste_manual(request):
     return render(request, 'finances/ajuste.html', context)
 
 
+MOVIMIENTOS_POR_PAGINA = 50
+COLUMNAS_HISTORIAL = ['Fecha', 'Tipo', 'Concepto', 'Cuenta', 'Ingreso', 'Egreso', 'Venta', 'Compra', 'Usuario']
+
+
+def _filtrar_movimientos(form):
+    """
+    Movimientos que cumplen los filtros del formulario. Las fechas se
+    comparan como rango de datetime (fecha >= desde 00:00 y < hasta + 1 dia)
+    para que la base use el indice de fecha.
+    """
+    movimientos = MovimientoCaja.objects.all()
+    if not form.is_valid():
+        return movimientos
+    
+    if form.cleaned_data.get('tipo'):
+        movimientos = movimientos.filter(tipo=form.cleaned_data['tipo'])
+    
+    if form.cleaned_data.get('fecha_desde'):
+        movimientos = movimientos.filter(
+            fecha__gte=datetime.combine(form.cleaned_data['fecha_desde'], datetime.min.time())
+        )
+    
+    if form.cleaned_data.get('fecha_hasta'):
+        movimientos = movimientos.filter(
+            fecha__lt=datetime.combine(form.cleaned_data['fecha_hasta'] + timedelta(days=1), datetime.min.time())
+        )
+    
+    cuenta = form.cleaned_data.get('cuenta')
+    if cuenta == 'efectivo':
+        movimientos = movimientos.filter(afecta_efectivo=True)
+    elif cuenta == 'banco':
+        movimientos = movimientos.filter(afecta_banco=True)
+    
+    return movimientos
+
+
+def _totales_movimientos(movimientos):
+    """Cantidad, ingresos y egresos (total y por cuenta) del conjunto filtrado en un solo aggregate"""
+    from django.db.models import Count
+    
+    totales = movimientos.order_by().aggregate(
+        cantidad=Count('pk'),
+        ingresos=Sum('monto', filter=Q(es_ingreso=True)),
+        egresos=Sum('monto', filter=Q(es_ingreso=False)),
+        ingresos_efectivo=Sum('monto', filter=Q(es_ingreso=True, afecta_efectivo=True)),
+        egresos_efectivo=Sum('monto', filter=Q(es_ingreso=False, afecta_efectivo=True)),
+        ingresos_banco=Sum('monto', filter=Q(es_ingreso=True, afecta_banco=True)),
+        egresos_banco=Sum('monto', filter=Q(es_ingreso=False, afecta_banco=True)),
+    )
+    for clave, valor in totales.items():
+        if clave != 'cantidad':
+            totales[clave] = Decimal(str(valor or 0)).quantize(Decimal('0.01'))
+    totales['neto'] = totales['ingresos'] - totales['egresos']
+    return totales
+
+
 @login_required
 def historial_movimientos(request):
-    """Vista para ver el historial completo de movimientos con filtros"""
-    
-    movimientos = MovimientoCaja.objects.all()
+    """
+    Historial completo de movimientos con filtros, paginado por (fecha, id)
+    con cursores ?despues= / ?antes= (core/paginacion.py).
+    ?formato=csv o ?formato=excel descarga todo el historial filtrado.
+    """
+    from core.paginacion import CursorInvalido, paginar_keyset
     
-    # Aplicar filtros si hay
     form = FiltroMovimientosForm(request.GET or None)
-    if form.is_valid():
-        if form.cleaned_data.get('tipo'):
-            movimientos = movimientos.filter(tipo=form.cleaned_data['tipo'])
-        
-        if form.cleaned_data.get('fecha_desde'):
-            movimientos = movimientos.filter(
-                fecha__date__gte=form.cleaned_data['fecha_desde']
-            )
-        
-        if form.cleaned_data.get('fecha_hasta'):
-            movimientos = movimientos.filter(
-                fecha__date__lte=form.cleaned_data['fecha_hasta']
-            )
-        
-        if form.cleaned_data.get('cuenta'):
-            cuenta = form.cleaned_data['cuenta']
-            if cuenta == 'efectivo':
-                movimientos = movimientos.filter(afecta_efectivo=True)
-            elif cuenta == 'banco':
-                movimientos = movimientos.filter(afecta_banco=True)
-    
-    # Paginación simple
-    movimientos = movimientos[:100]  # Limitar a 100 por ahora
+    movimientos = _filtrar_movimientos(form)
+    
+    formato = request.GET.get('formato')
+    if formato == 'csv':
+        return _historial_csv(movimientos)
+    if formato == 'excel':
+        return _historial_excel(movimientos)
+    
+    try:
+        pagina = paginar_keyset(
+            movimientos, ['-fecha', '-id'],
+            despues=request.GET.get('despues'), antes=request.GET.get('antes'),
+            tamano=MOVIMIENTOS_POR_PAGINA,
+        )
+    except CursorInvalido:
+        pagina = paginar_keyset(movimientos, ['-fecha', '-id'], tamano=MOVIMIENTOS_POR_PAGINA)
+    
+    parametros = request.GET.copy()
+    for clave in ('despues', 'antes', 'formato'):
+        parametros.pop(clave, None)
     
     context = {
         'page_title': 'Historial de Movimientos',
-        'movimientos': movimientos,
+        'movimientos': pagina,
+        'pagina': pagina,
+        'totales': _totales_movimientos(movimientos),
+        'parametros': parametros.urlencode(),
         'form': form,
     }
     
     return render(request, 'finances/historial.html', context)
 
 
+def _filas_historial(movimientos):
+    """Filas de exportacion leidas de a bloques (values_list + iterator, sin instanciar modelos)"""
+    nombres = dict(MovimientoCaja.TIPO_CHOICES)
+    filas = movimientos.order_by('fecha', 'id').values_list(
+        'fecha', 'tipo', 'concepto', 'afecta_efectivo', 'afecta_banco', 'es_ingreso', 'monto',
+        'venta__code', 'compra_id', 'usuario__username',
+    )
+    for fecha, tipo, concepto, efectivo, banco, es_ingreso, monto, venta, compra, usuario in filas.iterator(chunk_size=2000):
+        cuenta = 'Efectivo' if efectivo else 'Banco' if banco else ''
+        yield [
+            fecha, nombres.get(tipo, tipo), concepto, cuenta,
+            monto if es_ingreso else None, None if es_ingreso else monto,
+            venta or '', compra or '', usuario or '',
+        ]
+
+
+class _Eco:
+    """Archivo que devuelve lo que se le escribe: csv.writer arma cada linea para el StreamingHttpResponse"""
+    
+    def write(self, valor):
+        return valor
+
+
+def _historial_csv(movimientos):
+    import csv
+    from django.http import StreamingHttpResponse
+    
+    escritor = csv.writer(_Eco(), delimiter=';')
+    
+    def lineas():
+        yield '\ufeff'  # BOM para que Excel reconozca UTF-8
+        yield escritor.writerow(COLUMNAS_HISTORIAL)
+        for fila in _filas_historial(movimientos):
+            fila[0] = f'{fila[0]:%Y-%m-%d %H:%M:%S}'
+            yield escritor.writerow(fila)
+    
+    response = StreamingHttpResponse(lineas(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="movimientos_caja.csv"'
+    return response
+
+
+def _historial_excel(movimientos):
+    """
+    openpyxl en modo write_only va escribiendo las filas a disco; el libro
+    se guarda en un archivo temporal que se envia de a bloques.
+    """
+    import tempfile
+    from openpyxl import Workbook
+    from django.http import FileResponse
+    
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Movimientos')
+    hoja.append(COLUMNAS_HISTORIAL)
+    for fila in _filas_historial(movimientos):
+        hoja.append([float(valor) if isinstance(valor, Decimal) else valor for valor in fila])
+    
+    archivo = tempfile.TemporaryFile()
+    libro.save(archivo)
+    archivo.seek(0)
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename='movimientos_caja.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
 @login_required
 def detalle_movimiento(request, pk):
     """Vista de detalle de un movimiento específico"""
@@ -434,26 +559,15 @@ def cierre_caja(request):
     if request.method == 'POST':
         form = CierreCajaForm(request.POST)
         if form.is_valid():
+            from .cierres import saldos_iniciales
+            
             cierre = form.save(commit=False)
             cierre.cerrado_por = request.user
             
-            # Obtener saldos iniciales (del cierre anterior o saldos actuales)
-            cierre_anterior = CierreCaja.objects.filter(
-                fecha__lt=hoy
-            ).order_by('-fecha').first()
-            
-            if cierre_anterior:
-                cierre.saldo_inicial_efectivo = cierre_anterior.saldo_real_efectivo
-                cierre.saldo_inicial_banco = cierre_anterior.saldo_esperado_banco
-            else:
-                # Primer cierre: calcular saldo inicial restando movimientos de hoy
-                movs_hoy = MovimientoCaja.objects.filter(fecha__date=hoy)
-                ing_ef = movs_hoy.filter(afecta_efectivo=True, es_ingreso=True).aggregate(t=Sum('monto'))['t'] or Decimal('0')
-                egr_ef = movs_hoy.filter(afecta_efectivo=True, es_ingreso=False).aggregate(t=Sum('monto'))['t'] or Decimal('0')
-                ing_banco = movs_hoy.filter(afecta_banco=True, es_ingreso=True).aggregate(t=Sum('monto'))['t'] or Decimal('0')
-                egr_banco = movs_hoy.filter(afecta_banco=True, es_ingreso=False).aggregate(t=Sum('monto'))['t'] or Decimal('0')
-                cierre.saldo_inicial_efectivo = caja.saldo_efectivo - ing_ef + egr_ef
-                cierre.saldo_inicial_banco = caja.saldo_banco - ing_banco + egr_banco
+            # Saldos iniciales: cierre anterior + movimientos de los días sin cierre
+            saldos = saldos_iniciales(hoy)
+            cierre.saldo_inicial_efectivo = saldos['efectivo']
+            cierre.saldo_inicial_banco = saldos['banco']
             
             # Calcular totales del día
             cierre.calcular_totales()
@@ -508,6 +622,67 @@ def lista_cierres(request):
     return render(request, 'finances/lista_cierres.html', context)
 
 
+@login_required
+@permission_required('finances.change_cierrecaja', raise_exception=True)
+def recalcular_cierres(request):
+    """
+    Arma los cierres de los días que quedaron sin cerrar y recalcula los
+    existentes desde una fecha (después de cargar movimientos atrasados).
+    "Simular" solo muestra qué días cambiarían.
+    """
+    from .cierres import recalcular_cierres as recalcular
+    from .forms import RecalcularCierresForm
+    
+    resultado = None
+    if request.method == 'POST':
+        form = RecalcularCierresForm(request.POST)
+        if form.is_valid():
+            aplicar = 'aplicar' in request.POST
+            resultado = recalcular(
+                form.cleaned_data['desde'], form.cleaned_data['hasta'],
+                usuario=request.user, crear=form.cleaned_data['crear'], aplicar=aplicar,
+            )
+            resultado['aplicado'] = aplicar
+            resultado['filas'] = _filas_recalculo(resultado)
+            if aplicar:
+                messages.success(
+                    request,
+                    f'✅ Cierres creados: {len(resultado["creados"])}. '
+                    f'Cierres recalculados con cambios: {len(resultado["cambiados"])}.'
+                )
+    else:
+        hoy = date.today()
+        ultimo = CierreCaja.objects.order_by('-fecha').first()
+        form = RecalcularCierresForm(initial={
+            'desde': ultimo.fecha if ultimo else hoy - timedelta(days=30),
+            'hasta': hoy - timedelta(days=1),
+            'crear': True,
+        })
+    
+    context = {
+        'page_title': 'Recalcular Cierres de Caja',
+        'form': form,
+        'resultado': resultado,
+    }
+    
+    return render(request, 'finances/recalcular_cierres.html', context)
+
+
+def _filas_recalculo(resultado):
+    """Cierres nuevos y cierres con cambios en orden de fecha, con los campos que cambiaron"""
+    nombres = {campo.name: campo.verbose_name for campo in CierreCaja._meta.fields}
+    filas = [{'cierre': cierre, 'nuevo': True, 'cambios': []} for cierre in resultado['creados']]
+    filas += [
+        {
+            'cierre': cierre,
+            'nuevo': False,
+            'cambios': [(nombres[campo], antes, despues) for campo, (antes, despues) in cambios.items()],
+        }
+        for cierre, cambios in resultado['cambiados']
+    ]
+    return sorted(filas, key=lambda fila: fila['cierre'].fecha)
+
+
 @login_required
 def detalle_cierre(request, pk):
     """Vista de detalle de un cierre de caja específico"""
@@ -541,11 +716,72 @@ def reportes_financieros(request):
 
 @login_required
 def reporte_flujo_caja(request):
-    """Reporte de flujo de caja por período"""
+    """
+    Flujo de caja por día, semana o mes: ingresos y egresos de efectivo y
+    banco, saldo inicial y saldo al final de cada período (finances/flujo_caja.py).
+    ?formato=excel exporta el detalle por período y por tipo de movimiento.
+    """
+    from .flujo_caja import calcular
+    from .forms import FlujoCajaForm
+    
+    hoy = timezone.now().date()
+    desde, hasta, periodo = hoy - timedelta(days=29), hoy, 'dia'
+    form = FlujoCajaForm(request.GET or None, initial={'desde': desde, 'hasta': hasta, 'periodo': periodo})
+    if form.is_bound and form.is_valid():
+        desde, hasta = form.cleaned_data['desde'], form.cleaned_data['hasta']
+        periodo = form.cleaned_data['periodo']
+    
+    flujo = calcular(desde, hasta, periodo)
+    
+    if request.GET.get('formato') == 'excel':
+        return _flujo_caja_excel(flujo)
     
-    # Por ahora placeholder
     context = {
         'page_title': 'Reporte de Flujo de Caja',
+        'form': form,
+        'flujo': flujo,
+        'saldo_inicial_total': sum(flujo['saldo_inicial'].values()),
+        'saldo_final_total': sum(flujo['saldo_final'].values()),
+        'parametros': request.GET.urlencode(),
     }
     
     return render(request, 'finances/reporte_flujo.html', context)
+
+
+def _flujo_caja_excel(flujo):
+    from openpyxl import Workbook
+    from django.http import HttpResponse
+    from .models import MovimientoCaja
+    
+    nombres = dict(MovimientoCaja.TIPO_CHOICES)
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Flujo de caja')
+    hoja.append([
+        'Desde', 'Hasta',
+        'Saldo inicial efectivo', 'Ingresos efectivo', 'Egresos efectivo', 'Saldo final efectivo',
+        'Saldo inicial banco', 'Ingresos banco', 'Egresos banco', 'Saldo final banco',
+        'Saldo final total',
+    ])
+    for item in flujo['periodos']:
+        hoja.append([item['desde'], item['hasta']] + [
+            float(valor) for cuenta in ('efectivo', 'banco') for valor in (
+                item['saldo_inicial'][cuenta], item['ingresos'][cuenta],
+                item['egresos'][cuenta], item['saldo_final'][cuenta],
+            )
+        ] + [float(item['saldo_total'])])
+    
+    detalle = libro.create_sheet('Por tipo')
+    detalle.append(['Desde', 'Hasta', 'Tipo', 'Cuenta', 'Ingreso', 'Egreso'])
+    for item in flujo['periodos']:
+        for (tipo, cuenta), montos in sorted(item['tipos'].items()):
+            detalle.append([
+                item['desde'], item['hasta'], nombres.get(tipo, tipo), cuenta.capitalize(),
+                float(montos['ingreso']), float(montos['egreso']),
+            ])
+    
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = (
+        f'attachment; filename="flujo_caja_{flujo["desde"]:%Y%m%d}_{flujo["hasta"]:%Y%m%d}.xlsx"'
+    )
+    libro.save(response)
+    return response
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Category, Products
+from .models import Category, Products, HistorialPrecio
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'description', 'status', 'date_added', 'date_updated')
     search_fields = ('name', 'description')
@@ -12,5 +12,13 @@ class ProductsAdmin(admin.ModelAdmin):
     list_filter = ('status', 'category', 'date_added', 'date_updated')
     
 
+class HistorialPrecioAdmin(admin.ModelAdmin):
+    list_display = ('producto', 'fecha', 'costo', 'precio_minorista', 'precio_mayorista', 'origen')
+    search_fields = ('producto__name', 'producto__code')
+    list_filter = ('origen', 'fecha')
+    raw_id_fields = ('producto',)
+
+
 admin.site.register(Category, CategoryAdmin)
-admin.site.register(Products, ProductsAdmin)
\ No newline at end of file
+admin.site.register(Products, ProductsAdmin)
+admin.site.register(HistorialPrecio, HistorialPrecioAdmin)
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+Clasificacion ABC (Pareto) y XYZ de los productos segun sus ventas.
+
+Una sola consulta agrupa los items de venta del periodo por producto y por
+semana (unidades, venta = price * qty, costo = costo_unitario * qty). Con
+NumPy se arma la matriz productos x semanas y de ahi sale todo vectorizado:
+
+  ABC (por venta, margen o unidades): se ordena de mayor a menor y se
+      acumula la participacion. A hasta el 80%, B hasta el 95%, C el resto
+      (el producto que cruza el limite queda en la clase de arriba).
+  XYZ (variabilidad de la demanda): coeficiente de variacion de las
+      unidades semanales. X hasta 0.5 (estable), Y hasta 1, Z mas (erratico).
+
+Los productos activos sin ventas en el periodo quedan C / Z.
+El resultado queda en la cache de Django por periodo y criterio; la clave
+incluye la cantidad y el ultimo id de los items del periodo, asi una venta
+nueva genera otra clave. La lista de productos usa exacta=False: la clave
+es solo el periodo y el criterio, y el resultado se rehace cada
+CACHE_TIMEOUT en lugar de con cada venta.
+
+Uso:
+    resultado = clasificar(desde, hasta, criterio='venta')
+    resultado['productos'][producto_id]['abc']  # 'A', 'B' o 'C'
+"""
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+LIMITE_A = 0.80
+LIMITE_B = 0.95
+LIMITE_X = 0.5
+LIMITE_Y = 1.0
+DIAS_POR_DEFECTO = 90
+CACHE_TIMEOUT = 60 * 60
+
+CRITERIOS = {
+    'venta': 'Venta',
+    'margen': 'Margen',
+    'unidades': 'Unidades',
+}
+
+
+def periodo_por_defecto(hoy=None):
+    """(desde, hasta) de los ultimos DIAS_POR_DEFECTO dias, hoy inclusive."""
+    hoy = hoy or timezone.now().date()
+    return hoy - timedelta(days=DIAS_POR_DEFECTO - 1), hoy
+
+
+def _items(desde, hasta):
+    from pos.models import salesItems
+
+    return salesItems.objects.filter(
+        sale__date_added__gte=datetime.combine(desde, time.min),
+        sale__date_added__lt=datetime.combine(hasta + timedelta(days=1), time.min),
+    )
+
+
+def _clave(desde, hasta, criterio):
+    from django.db.models import Count, Max
+
+    marca = _items(desde, hasta).aggregate(cantidad=Count('pk'), ultimo=Max('pk'))
+    return f"clasificacion_abc:{desde}:{hasta}:{criterio}:{marca['cantidad']}:{marca['ultimo']}"
+
+
+def clases_abc(valores, limite_a=LIMITE_A, limite_b=LIMITE_B):
+    """
+    Clase A/B/C de cada valor (np.array) y su participacion acumulada,
+    en el orden original. Los valores <= 0 son siempre C.
+    """
+    import numpy as np
+
+    orden = np.argsort(-valores, kind='stable')
+    ordenados = np.maximum(valores[orden], 0)
+    total = ordenados.sum()
+    acumulado = np.cumsum(ordenados) / total if total > 0 else np.zeros_like(ordenados)
+    anterior = acumulado - (ordenados / total if total > 0 else 0)  # participacion antes de sumar el producto
+
+    clases_ordenadas = np.where(anterior < limite_a, 'A', np.where(anterior < limite_b, 'B', 'C'))
+    clases_ordenadas[ordenados <= 0] = 'C'
+
+    clases = np.empty_like(clases_ordenadas)
+    clases[orden] = clases_ordenadas
+    participacion = np.empty_like(acumulado)
+    participacion[orden] = acumulado
+    ranking = np.empty(len(valores), dtype=np.int64)
+    ranking[orden] = np.arange(1, len(valores) + 1)
+    return clases, participacion, ranking
+
+
+def clases_xyz(semanas):
+    """Clase X/Y/Z por fila de la matriz de unidades semanales y su coeficiente de variacion."""
+    import numpy as np
+
+    media = semanas.mean(axis=1)
+    variacion = np.divide(semanas.std(axis=1), media, out=np.full_like(media, np.inf), where=media > 0)
+    clases = np.where(variacion <= LIMITE_X, 'X', np.where(variacion <= LIMITE_Y, 'Y', 'Z'))
+    return clases, variacion
+
+
+def _fecha(valor):
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def _calcular(desde, hasta, criterio):
+    import numpy as np
+    from django.db.models import F, FloatField, Sum
+    from django.db.models.functions import TruncWeek
+    from .models import Products
+
+    productos = list(
+        Products.objects.filter(status=Products.STATUS_ACTIVE).order_by('pk')
+        .values_list('pk', 'code', 'name', 'category__name')
+    )
+    ids = np.array([fila[0] for fila in productos], dtype=np.int64)
+    inicio_semana = desde - timedelta(days=desde.weekday())
+    cantidad_semanas = (hasta - inicio_semana).days // 7 + 1
+
+    filas = (
+        _items(desde, hasta)
+        .annotate(semana=TruncWeek('sale__date_added'))
+        .values('product_id', 'semana')
+        .annotate(
+            unidades=Sum('qty', output_field=FloatField()),
+            venta=Sum(F('price') * F('qty'), output_field=FloatField()),
+            costo=Sum(F('costo_unitario') * F('qty'), output_field=FloatField()),
+        )
+        .values_list('product_id', 'semana', 'unidades', 'venta', 'costo')
+    )
+    datos = list(filas)
+
+    semanas = np.zeros((len(ids), cantidad_semanas))
+    venta = np.zeros(len(ids))
+    costo = np.zeros(len(ids))
+    if datos and len(ids):
+        producto_ids = np.array([fila[0] for fila in datos], dtype=np.int64)
+        posiciones = np.minimum(np.searchsorted(ids, producto_ids), len(ids) - 1)
+        validos = ids[posiciones] == producto_ids  # ventas de productos inactivos
+        semana = np.array([(_fecha(fila[1]) - inicio_semana).days // 7 for fila in datos], dtype=np.int64)
+        posiciones, semana = posiciones[validos], semana[validos]
+        np.add.at(semanas, (posiciones, semana), np.array([float(fila[2] or 0) for fila in datos])[validos])
+        np.add.at(venta, posiciones, np.array([float(fila[3] or 0) for fila in datos])[validos])
+        np.add.at(costo, posiciones, np.array([float(fila[4] or 0) for fila in datos])[validos])
+
+    unidades = semanas.sum(axis=1)
+    margen = venta - costo
+    valores = {'venta': venta, 'margen': margen, 'unidades': unidades}[criterio]
+    abc, participacion, ranking = clases_abc(valores)
+    xyz, variacion = clases_xyz(semanas)
+
+    resultado = {}
+    for i, (pk, code, name, categoria) in enumerate(productos):
+        resultado[pk] = {
+            'code': code,
+            'name': name,
+            'categoria': categoria or '',
+            'unidades': round(float(unidades[i]), 3),
+            'venta': round(float(venta[i]), 2),
+            'margen': round(float(margen[i]), 2),
+            'participacion': round(float(participacion[i]) * 100, 2),
+            'ranking': int(ranking[i]),
+            'abc': str(abc[i]),
+            'xyz': str(xyz[i]),
+            'variacion': None if not np.isfinite(variacion[i]) else round(float(variacion[i]), 2),
+        }
+
+    resumen = {}
+    total = float(np.maximum(valores, 0).sum())
+    for clase in 'ABC':
+        marca = abc == clase
+        resumen[clase] = {
+            'productos': int(marca.sum()),
+            'valor': round(float(valores[marca].sum()), 2),
+            'participacion': round(float(np.maximum(valores[marca], 0).sum()) / total * 100, 1) if total > 0 else 0,
+        }
+    return {
+        'desde': desde, 'hasta': hasta, 'criterio': criterio,
+        'productos': resultado, 'resumen': resumen,
+        'matriz': {f'{a}{x}': int(((abc == a) & (xyz == x)).sum()) for a in 'ABC' for x in 'XYZ'},
+    }
+
+
+def clasificar(desde=None, hasta=None, criterio='venta', exacta=True):
+    """
+    Clasificacion del periodo (por defecto los ultimos 90 dias), desde la
+    cache si ya se calculo. Con exacta=False puede tener hasta CACHE_TIMEOUT
+    de atraso, pero no consulta la marca de las ventas ni recalcula por cada
+    venta nueva.
+    """
+    if desde is None or hasta is None:
+        desde, hasta = periodo_por_defecto()
+    if criterio not in CRITERIOS:
+        raise ValueError(f'Criterio desconocido: {criterio}')
+    clave = _clave(desde, hasta, criterio) if exacta else f'clasificacion_abc:{desde}:{hasta}:{criterio}'
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = _calcular(desde, hasta, criterio)
+        cache.set(clave, resultado, CACHE_TIMEOUT)
+    return resultado
@@ -0,0 +1,180 @@
+"""
+Costo promedio ponderado de los productos.
+
+Products.cost es el costo de reposicion (ultima compra) y de ahi salen los
+precios. Products.costo_promedio es el costo de lo que hay en stock:
+
+  - compra de n unidades a c:  promedio = (stock * promedio + n * c) / (stock + n)
+  - venta:                     el promedio no cambia; el item guarda el promedio
+                               como costo_unitario
+  - compra eliminada:          se quitan las n unidades a c (la inversa)
+  - item de venta eliminado:   vuelven las unidades a su costo_unitario
+  - ajuste de stock:           entra o sale al costo promedio (no lo cambia)
+
+Un producto sin compras tiene costo_promedio en 0 y vende al costo de
+reposicion; un costo cargado a mano (edicion, masiva, importacion) tambien lo
+vuelve a 0. Los fraccionados no promedian: copian el del producto origen.
+
+Cada movimiento es O(1): solo hace falta el stock y el promedio actuales.
+Si los datos quedan mal (compras corregidas a mano, borrados masivos) el
+comando recalcular_costos rearma todo recorriendo los movimientos en orden.
+"""
+from decimal import Decimal
+
+CERO = Decimal('0')
+DECIMALES = Decimal('0.000001')
+
+
+def promedio_entrada(stock, promedio, cantidad, costo):
+    """Promedio despues de ingresar `cantidad` unidades a `costo` con `stock` previo."""
+    stock, cantidad, costo = Decimal(stock), Decimal(cantidad), Decimal(costo)
+    if stock <= CERO or promedio <= CERO:
+        return costo.quantize(DECIMALES)
+    if cantidad <= CERO:
+        return Decimal(promedio)
+    return ((stock * Decimal(promedio) + cantidad * costo) / (stock + cantidad)).quantize(DECIMALES)
+
+
+def promedio_salida(stock, promedio, cantidad, costo):
+    """Promedio despues de quitar `cantidad` unidades que habian entrado a `costo`."""
+    stock, cantidad, costo = Decimal(stock), Decimal(cantidad), Decimal(costo)
+    restante = stock - cantidad
+    if restante <= CERO:
+        return Decimal(promedio)  # sin stock: queda el ultimo promedio como referencia
+    nuevo = (stock * Decimal(promedio) - cantidad * costo) / restante
+    return nuevo.quantize(DECIMALES) if nuevo > CERO else Decimal(promedio)
+
+
+def recalcular(producto_ids=None, aplicar=True, lote=1000):
+    """
+    Rearma costo_promedio de los productos y costo_unitario de los items de
+    venta recorriendo una sola vez compras, ajustes y ventas en orden de fecha.
+    Los cambios de costo a mano del historial de precios vuelven el promedio
+    a 0, como lo hace Products.save.
+
+    El stock arranca en cero; una venta sin promedio toma el costo de
+    reposicion de ese momento (o el actual si no hubo compras ni ediciones)
+    y las de un fraccionado el promedio de su origen. Los productos sin
+    compras quedan en 0.
+
+    bulk_update no pasa por salesItems.save: las ventas de los items que
+    cambiaron quedan con date_updated actual, asi la tabla analitica (y el
+    resto de lo que va por esa fecha) los vuelve a leer.
+
+    Retorna (items recalculados, items que cambiaron, productos que
+    cambiaron). Con aplicar=False solo cuenta.
+    """
+    import heapq
+    from django.db import transaction
+    from django.utils import timezone
+    from pos.models import Sales, salesItems
+    from purchase.models import PurchaseProduct
+    from .models import AjusteStock, HistorialPrecio, Products
+
+    origenes = dict(Products.objects.filter(producto_origen__isnull=False).values_list('pk', 'producto_origen_id'))
+    compras = PurchaseProduct.objects.filter(product__isnull=False)
+    historial = HistorialPrecio.objects.all()
+    ajustes = AjusteStock.objects.all()
+    items = salesItems.objects.all()
+    productos = Products.objects.all()
+    if producto_ids is not None:
+        # los fraccionados necesitan las compras de su origen
+        producto_ids = set(producto_ids) | {origenes[pk] for pk in producto_ids if pk in origenes}
+        compras = compras.filter(product_id__in=producto_ids)
+        historial = historial.filter(producto_id__in=producto_ids)
+        ajustes = ajustes.filter(producto_id__in=producto_ids)
+        items = items.filter(product_id__in=producto_ids)
+        productos = productos.filter(pk__in=producto_ids)
+
+    # Solo los renglones del historial donde cambio el costo por algo que no es una compra
+    ediciones, costo_previo = [], {}
+    # (el alta no cuenta: un producto nuevo ya arranca sin promedio)
+    no_manuales = (*HistorialPrecio.ORIGENES_COMPRA, HistorialPrecio.ORIGEN_INICIAL, HistorialPrecio.ORIGEN_ALTA)
+    for pk, producto_id, costo, origen, fecha in (
+        historial.order_by('producto', 'fecha', 'pk')
+        .values_list('pk', 'producto_id', 'costo', 'origen', 'fecha').iterator(chunk_size=5000)
+    ):
+        if origen not in no_manuales and costo != costo_previo.get(producto_id):
+            ediciones.append((fecha, 1, pk, producto_id, CERO, costo))
+        costo_previo[producto_id] = costo
+    ediciones.sort()
+
+    # (fecha, orden, ...): a igual fecha compras, ediciones, ajustes y al final ventas
+    movimientos_compras = (
+        (fecha, 0, pk, producto_id, cantidad, costo)
+        for pk, producto_id, cantidad, costo, fecha in compras.order_by('date_added', 'pk')
+        .values_list('pk', 'product_id', 'qty', 'cost', 'date_added').iterator(chunk_size=5000)
+    )
+    movimientos_ajustes = (
+        (fecha, 2, pk, producto_id, cantidad, costo)
+        for pk, producto_id, cantidad, costo, fecha in ajustes.order_by('fecha', 'pk')
+        .values_list('pk', 'producto_id', 'cantidad', 'costo_unitario', 'fecha').iterator(chunk_size=5000)
+    )
+    movimientos_ventas = (
+        (fecha, 3, pk, producto_id, cantidad, costo)
+        for pk, producto_id, cantidad, costo, fecha in items.order_by('sale__date_added', 'pk')
+        .values_list('pk', 'product_id', 'qty', 'costo_unitario', 'sale__date_added').iterator(chunk_size=5000)
+    )
+
+    costo_vigente = dict(productos.values_list('pk', 'cost'))
+    reposicion = {}  # producto_id -> costo de la ultima compra o edicion a mano recorrida
+    ahora = timezone.now()
+
+    def guardar_items(cambios):
+        salesItems.objects.bulk_update(cambios, ['costo_unitario'])
+        ventas = salesItems.objects.filter(pk__in=[item.pk for item in cambios]).values('sale_id')
+        Sales.objects.filter(pk__in=ventas).update(date_updated=ahora)
+    estado = {}  # producto_id -> [stock, promedio]
+    revisados = 0
+    cambios_items = []
+    total_cambios_items = 0
+
+    with transaction.atomic():
+        movimientos = heapq.merge(movimientos_compras, ediciones, movimientos_ajustes, movimientos_ventas)
+        for fecha, tipo, pk, producto_id, cantidad, costo in movimientos:
+            stock, promedio = estado.setdefault(producto_id, [CERO, CERO])
+            if tipo == 1:
+                estado[producto_id][1] = CERO
+                reposicion[producto_id] = costo
+                continue
+            if tipo == 0:
+                if promedio <= CERO and stock > CERO:
+                    # el stock que habia estaba valuado al costo de reposicion
+                    promedio = reposicion.get(producto_id, CERO)
+                reposicion[producto_id] = costo
+            if tipo == 0 or (tipo == 2 and cantidad > CERO):
+                estado[producto_id] = [stock + cantidad, promedio_entrada(stock, promedio, cantidad, costo)]
+                continue
+            if tipo == 2:
+                estado[producto_id][0] = stock + cantidad  # ajuste negativo: sale al promedio
+                continue
+
+            revisados += 1
+            origen = origenes.get(producto_id)
+            if origen is not None:
+                promedio = estado.get(origen, [CERO, CERO])[1]
+            if promedio <= CERO:
+                promedio = reposicion.get(origen or producto_id) or costo_vigente.get(producto_id) or CERO
+            costo_venta = Decimal(promedio)
+            estado[producto_id][0] = stock - Decimal(cantidad)
+            nuevo = float(costo_venta.quantize(Decimal('0.01')))
+            if abs(nuevo - (costo or 0)) >= 0.005:
+                total_cambios_items += 1
+                if aplicar:
+                    cambios_items.append(salesItems(pk=pk, costo_unitario=nuevo))
+                    if len(cambios_items) >= lote:
+                        guardar_items(cambios_items)
+                        cambios_items = []
+        if cambios_items:
+            guardar_items(cambios_items)
+
+        cambios_productos = []
+        for producto in productos.only('pk', 'costo_promedio').iterator(chunk_size=2000):
+            promedio = estado.get(origenes.get(producto.pk, producto.pk), [CERO, CERO])[1]
+            if promedio != producto.costo_promedio:
+                producto.costo_promedio = promedio
+                cambios_productos.append(producto)
+        if aplicar:
+            Products.objects.bulk_update(cambios_productos, ['costo_promedio'], batch_size=lote)
+
+    return revisados, total_cambios_items, len(cambios_productos)
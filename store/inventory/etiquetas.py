@@ -0,0 +1,221 @@
+"""
+Etiquetas de gondola con codigo de barras, en PDF (reportlab).
+
+El simbolo EAN-13 se calcula en Python puro (tablas L/G/R del estandar) y las
+barras de cada codigo quedan en cache (lru_cache), asi reimprimir cientos de
+etiquetas despues de un cambio de precios no vuelve a codificar nada. Dentro
+del PDF cada simbolo se dibuja una sola vez como "form" y las etiquetas
+repetidas lo reutilizan. Los codigos que no son EAN-13 (externos raros) van
+en Code128.
+
+Formatos:
+  a4:      hoja A4 de 3 x 8 etiquetas de 70 x 37 mm
+  rollo58: rollo de 58 mm, una etiqueta de 58 x 40 mm por pagina
+"""
+from functools import lru_cache
+
+from reportlab.lib.units import mm
+
+# Codificacion de cada digito (7 modulos) segun el juego L, G o R
+JUEGO_L = ('0001101', '0011001', '0010011', '0111101', '0100011',
+           '0110001', '0101111', '0111011', '0110111', '0001011')
+JUEGO_R = tuple(''.join('1' if b == '0' else '0' for b in codigo) for codigo in JUEGO_L)
+JUEGO_G = tuple(codigo[::-1] for codigo in JUEGO_R)
+
+# El primer digito no se dibuja: define la paridad de los 6 digitos de la izquierda
+PARIDAD = ('LLLLLL', 'LLGLGG', 'LLGGLG', 'LLGGGL', 'LGLLGG',
+           'LGGLLG', 'LGGGLL', 'LGLGLG', 'LGLGGL', 'LGGLGL')
+
+MODULOS_EAN13 = 95
+MARGEN_SILENCIO = 9  # modulos libres a cada lado del simbolo
+
+FORMATOS = {
+    'a4': {
+        'pagina': (210 * mm, 297 * mm), 'columnas': 3, 'filas': 8,
+        'etiqueta': (70 * mm, 37 * mm), 'margen': (0, (297 - 8 * 37) / 2 * mm),
+    },
+    'rollo58': {
+        'pagina': (58 * mm, 40 * mm), 'columnas': 1, 'filas': 1,
+        'etiqueta': (58 * mm, 40 * mm), 'margen': (0, 0),
+    },
+}
+
+
+def digito_verificador(base):
+    """Digito verificador EAN-13 de los primeros 12 digitos."""
+    pares = sum(int(base[i]) for i in range(0, 12, 2))
+    impares = sum(int(base[i]) for i in range(1, 12, 2))
+    return str((10 - ((pares + impares * 3) % 10)) % 10)
+
+
+def es_ean13(codigo):
+    codigo = str(codigo or '')
+    return len(codigo) == 13 and codigo.isdigit() and digito_verificador(codigo) == codigo[12]
+
+
+@lru_cache(maxsize=4096)
+def barras_ean13(codigo):
+    """
+    Barras del simbolo EAN-13 como tuplas (modulo inicial, ancho en modulos, es_guarda).
+    Lanza ValueError si el codigo no es un EAN-13 valido.
+    """
+    if not es_ean13(codigo):
+        raise ValueError(f'{codigo!r} no es un EAN-13 valido')
+
+    paridad = PARIDAD[int(codigo[0])]
+    izquierda = ''.join((JUEGO_L if juego == 'L' else JUEGO_G)[int(d)] for juego, d in zip(paridad, codigo[1:7]))
+    derecha = ''.join(JUEGO_R[int(d)] for d in codigo[7:])
+    modulos = '101' + izquierda + '01010' + derecha + '101'
+    guardas = set(range(0, 3)) | set(range(45, 50)) | set(range(92, 95))
+
+    barras = []
+    inicio = None
+    for posicion, modulo in enumerate(modulos + '0'):
+        if modulo == '1' and inicio is None:
+            inicio = posicion
+        elif modulo == '0' and inicio is not None:
+            barras.append((inicio, posicion - inicio, inicio in guardas))
+            inicio = None
+    return tuple(barras)
+
+
+def productos_por_codigo(codigos):
+    """
+    Productos de una lista de codigos internos o de barras (por ejemplo
+    escaneados uno por renglon), en el mismo orden y con repeticiones.
+    Retorna (productos, codigos no encontrados).
+    """
+    from django.db.models import Q
+    from .models import Products
+
+    codigos = [c.strip() for c in codigos if c and c.strip()]
+    encontrados = {}
+    for producto in Products.objects.filter(Q(code__in=codigos) | Q(codigo_barras__in=codigos)).select_related('category'):
+        encontrados[producto.code] = producto
+        if producto.codigo_barras:
+            encontrados[producto.codigo_barras] = producto
+    productos = [encontrados[c] for c in codigos if c in encontrados]
+    faltantes = [c for c in codigos if c not in encontrados]
+    return productos, faltantes
+
+
+class _Hoja:
+    """Dibuja las etiquetas sobre el canvas, reutilizando el simbolo de cada codigo."""
+
+    def __init__(self, canvas, formato):
+        self.canvas = canvas
+        self.formato = formato
+        self.simbolos = {}  # codigo -> nombre del form
+
+    def simbolo(self, codigo, ancho, alto):
+        """Nombre del form con el codigo de barras (se dibuja una sola vez por documento)."""
+        from reportlab.graphics.barcode.code128 import Code128
+
+        if codigo in self.simbolos:
+            return self.simbolos[codigo]
+        nombre = f'simbolo{len(self.simbolos)}'
+        canvas = self.canvas
+        canvas.beginForm(nombre)
+        canvas.setFillColorRGB(0, 0, 0)
+        if es_ean13(codigo):
+            modulo = ancho / (MODULOS_EAN13 + 2 * MARGEN_SILENCIO)
+            alto_texto = 2.6 * mm
+            for inicio, largo, es_guarda in barras_ean13(codigo):
+                extra = alto_texto * 0.6 if es_guarda else 0
+                canvas.rect((MARGEN_SILENCIO + inicio) * modulo, alto_texto - extra,
+                            largo * modulo, alto - alto_texto + extra, stroke=0, fill=1)
+            canvas.setFont('Helvetica', 7)
+            canvas.drawString(1 * modulo, 0.3 * mm, codigo[0])
+            canvas.drawCentredString((MARGEN_SILENCIO + 24) * modulo, 0.3 * mm, codigo[1:7])
+            canvas.drawCentredString((MARGEN_SILENCIO + 71) * modulo, 0.3 * mm, codigo[7:])
+        else:
+            barra = Code128(codigo, barHeight=alto - 3 * mm, barWidth=0.25 * mm, quiet=False)
+            escala = min(1, ancho / barra.width)
+            canvas.saveState()
+            canvas.translate((ancho - barra.width * escala) / 2, 3 * mm)
+            canvas.scale(escala, 1)
+            barra.drawOn(canvas, 0, 0)
+            canvas.restoreState()
+            canvas.setFont('Helvetica', 7)
+            canvas.drawCentredString(ancho / 2, 0.3 * mm, codigo)
+        canvas.endForm()
+        self.simbolos[codigo] = nombre
+        return nombre
+
+    def etiqueta(self, x, y, producto, precio, codigo):
+        from reportlab.lib.utils import simpleSplit
+        from inventory.templatetags.formato import pesos
+
+        canvas = self.canvas
+        ancho, alto = self.formato['etiqueta']
+        margen = 3 * mm
+
+        canvas.setStrokeColorRGB(0.8, 0.8, 0.8)
+        canvas.setLineWidth(0.3)
+        canvas.rect(x + 1, y + 1, ancho - 2, alto - 2, stroke=1, fill=0)
+
+        # Nombre (hasta 2 renglones)
+        canvas.setFillColorRGB(0, 0, 0)
+        canvas.setFont('Helvetica-Bold', 8)
+        lineas = simpleSplit(producto.name, 'Helvetica-Bold', 8, ancho - 2 * margen)
+        if len(lineas) > 2:
+            lineas = [lineas[0], lineas[1][:max(0, len(lineas[1]) - 3)] + '...']
+        for numero, linea in enumerate(lineas):
+            canvas.drawString(x + margen, y + alto - margen - 7 - numero * 9, linea)
+
+        # Precio
+        texto_precio = pesos(precio)
+        if producto.tipo_venta == producto.TIPO_VENTA_FRACCIONABLE:
+            texto_precio += ' x kg'
+        canvas.setFont('Helvetica-Bold', 16)
+        canvas.drawRightString(x + ancho - margen, y + alto - margen - 34, texto_precio)
+
+        # Codigo de barras (o el codigo interno si no tiene)
+        alto_simbolo = alto - margen - 48
+        if codigo and alto_simbolo > 6 * mm:
+            ancho_simbolo = min(ancho - 2 * margen, 42 * mm)
+            nombre = self.simbolo(codigo, ancho_simbolo, alto_simbolo)
+            canvas.saveState()
+            canvas.translate(x + (ancho - ancho_simbolo) / 2, y + margen / 2)
+            canvas.doForm(nombre)
+            canvas.restoreState()
+        else:
+            canvas.setFont('Helvetica', 8)
+            canvas.drawString(x + margen, y + margen, f'Cód. {producto.code}')
+
+
+def etiquetas_pdf(productos, formato='a4', lista='minorista', copias=1, posicion_inicial=1):
+    """
+    PDF (bytes) con una etiqueta por producto (y por copia).
+    posicion_inicial permite empezar una hoja A4 ya usada en la etiqueta N.
+    """
+    from io import BytesIO
+    from reportlab.pdfgen.canvas import Canvas
+
+    formato = FORMATOS[formato]
+    columnas, filas = formato['columnas'], formato['filas']
+    ancho, alto = formato['etiqueta']
+    margen_x, margen_y = formato['margen']
+    por_hoja = columnas * filas
+
+    buffer = BytesIO()
+    canvas = Canvas(buffer, pagesize=formato['pagina'], pageCompression=1)
+    canvas.setTitle('Etiquetas')
+    hoja = _Hoja(canvas, formato)
+
+    posicion = max(0, min(posicion_inicial - 1, por_hoja - 1))
+    campo_precio = 'precio_minorista' if lista == 'minorista' else 'precio_mayorista'
+    for producto in productos:
+        codigo = producto.codigo_barras or ''
+        for _ in range(max(1, copias)):
+            if posicion == por_hoja:
+                canvas.showPage()
+                posicion = 0
+            fila, columna = divmod(posicion, columnas)
+            x = margen_x + columna * ancho
+            y = formato['pagina'][1] - margen_y - (fila + 1) * alto
+            hoja.etiqueta(x, y, producto, getattr(producto, campo_precio), codigo)
+            posicion += 1
+    canvas.showPage()
+    canvas.save()
+    return buffer.getvalue()
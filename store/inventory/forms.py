@@ -114,3 +114,84 @@ class ProductsForm(forms.ModelForm):
         ).order_by('name')
         # El codigo interno es opcional: si se deja vacio, el sistema asigna el proximo correlativo
         self.fields['code'].required = False
+
+
+class EtiquetasForm(forms.Form):
+    """Seleccion de productos y formato para imprimir etiquetas de gondola"""
+
+    FORMATO_CHOICES = [
+        ('a4', 'Hoja A4 (3 x 8 etiquetas de 70 x 37 mm)'),
+        ('rollo58', 'Rollo de 58 mm (58 x 40 mm)'),
+    ]
+
+    LISTA_CHOICES = [
+        ('minorista', 'Precio Minorista'),
+        ('mayorista', 'Precio Mayorista'),
+    ]
+
+    codigos = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 6, 'placeholder': 'Escanear o escribir un código por renglón'}),
+        label='Códigos (internos o de barras)'
+    )
+    desde = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Productos con precio modificado desde'
+    )
+    categoria = forms.ModelChoiceField(
+        queryset=Category.objects.order_by('name'),
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+        label='Categoría'
+    )
+    formato = forms.ChoiceField(choices=FORMATO_CHOICES, widget=forms.Select(attrs={'class': 'form-control'}))
+    lista = forms.ChoiceField(choices=LISTA_CHOICES, label='Precio', widget=forms.Select(attrs={'class': 'form-control'}))
+    copias = forms.IntegerField(
+        min_value=1, max_value=50, initial=1,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+        label='Copias por producto'
+    )
+    posicion_inicial = forms.IntegerField(
+        min_value=1, max_value=24, initial=1,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+        label='Empezar en la etiqueta N° (hojas A4 ya usadas)'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not (cleaned_data.get('codigos', '').strip() or cleaned_data.get('desde') or cleaned_data.get('categoria')):
+            raise ValidationError('Indicar códigos, una fecha de modificación o una categoría.')
+        return cleaned_data
+
+
+class ReposicionForm(forms.Form):
+    """Parametros del calculo de sugerencias de reposicion"""
+
+    SERVICIO_CHOICES = [
+        ('0.90', '90%'),
+        ('0.95', '95%'),
+        ('0.98', '98%'),
+        ('0.99', '99%'),
+    ]
+
+    dias = forms.IntegerField(
+        min_value=28, max_value=730, initial=90,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+        label='Días de historia'
+    )
+    plazo = forms.IntegerField(
+        min_value=1, max_value=90, initial=7,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+        label='Plazo de entrega (días)'
+    )
+    cobertura = forms.IntegerField(
+        min_value=1, max_value=180, initial=14,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+        label='Cubrir (días de venta)'
+    )
+    servicio = forms.TypedChoiceField(
+        choices=SERVICIO_CHOICES, coerce=float, initial='0.95',
+        widget=forms.Select(attrs={'class': 'form-control'}),
+        label='Nivel de servicio'
+    )
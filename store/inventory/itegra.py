@@ -0,0 +1,162 @@
+"""
+Exportacion de PLUs a la balanza Kretz (software Itegra).
+
+El CSV (separado por ';', latin-1, fin de linea CRLF) tiene un renglon por PLU:
+    NUMERO DE PLU ; CODIGO DE PLU ; NOMBRE (max 26) ; DEPARTAMENTO ; PRECIO (entero) ; TIPO (P) ; ETIQUETA
+
+PluExportado guarda lo ultimo que se exporto de cada PLU (nombre y precio),
+asi se puede generar solo la diferencia:
+  - cambios: PLUs nuevos o con nombre/precio distinto al exportado
+  - bajas:   PLUs exportados que ya no existen (producto borrado, dejo de ser
+             fraccionable o cambio de numero); van en un archivo aparte con
+             NUMERO DE PLU ; NOMBRE DE PLU para darlos de baja en la balanza
+
+Desde la web (inventory:plu_itegra) descargar no toca la marca de agua: se
+actualiza recien cuando el usuario confirma que importo ese archivo en la
+balanza. El comando exportar_plu_itegra la actualiza al dejar los archivos.
+
+Configuracion opcional en settings.py:
+  ITEGRA_DIRECTORIO = r'C:\\Itegra\\Importar'   # carpeta donde deja los archivos el comando
+"""
+import hashlib
+import os
+
+from django.utils import timezone
+
+DEPARTAMENTO = '1'   # Depto. 1 en Itegra
+ETIQUETA = '1'       # diseno de etiqueta en la balanza
+TIPO = 'P'           # P = pesable
+LARGO_NOMBRE = 26
+
+ENCABEZADO = 'NUMERO DE PLU;CODIGO DE PLU;NOMBRE DE PLU;CODIGO DE DEPARTAMENTO;PRECIO;TIPO DE PLU;CODIGO DE ETIQUETA'
+ENCABEZADO_BAJAS = 'NUMERO DE PLU;NOMBRE DE PLU'
+
+
+def plu_actuales():
+    """{plu: (producto_id, nombre, precio)} de los productos fraccionables, como se exportan."""
+    from .models import Products
+
+    productos = (
+        Products.objects.filter(tipo_venta=Products.TIPO_VENTA_FRACCIONABLE, plu__isnull=False)
+        .order_by('plu')
+        .values_list('plu', 'pk', 'name', 'precio_minorista')
+    )
+    return {
+        plu: (pk, (nombre or '').replace(';', ' ').strip()[:LARGO_NOMBRE], int(round(float(precio or 0))))
+        for plu, pk, nombre, precio in productos
+    }
+
+
+def calcular_cambios():
+    """
+    Compara los PLUs actuales con la ultima exportacion.
+    Retorna (cambios, bajas): cambios = [(plu, producto_id, nombre, precio)],
+    bajas = [(plu, nombre)] de lo exportado que ya no corresponde a ningun PLU.
+    """
+    from .models import PluExportado
+
+    actuales = plu_actuales()
+    exportados = {plu: (nombre, precio) for plu, nombre, precio in PluExportado.objects.values_list('plu', 'nombre', 'precio')}
+
+    cambios = [
+        (plu, pk, nombre, precio)
+        for plu, (pk, nombre, precio) in actuales.items()
+        if exportados.get(plu) != (nombre, precio)
+    ]
+    bajas = sorted((plu, nombre) for plu, (nombre, _) in exportados.items() if plu not in actuales)
+    return cambios, bajas
+
+
+def csv_plu(filas):
+    lineas = [ENCABEZADO]
+    for plu, _, nombre, precio in filas:
+        lineas.append(f"{plu};{plu};{nombre};{DEPARTAMENTO};{precio};{TIPO};{ETIQUETA}")
+    return ('\r\n'.join(lineas) + '\r\n').encode('latin-1', errors='replace')
+
+
+def csv_bajas(bajas):
+    lineas = [ENCABEZADO_BAJAS] + [f"{plu};{nombre}" for plu, nombre in bajas]
+    return ('\r\n'.join(lineas) + '\r\n').encode('latin-1', errors='replace')
+
+
+def exportacion(modo):
+    """
+    Lo que se descarga para cada modo ('completo', 'cambios' o 'bajas').
+    Retorna (filas, bajas, contenido CSV).
+    """
+    if modo == 'cambios':
+        filas, _ = calcular_cambios()
+        return filas, [], csv_plu(filas)
+    if modo == 'bajas':
+        _, bajas = calcular_cambios()
+        return [], bajas, csv_bajas(bajas)
+    filas = sorted((plu, *datos) for plu, datos in plu_actuales().items())
+    return filas, [], csv_plu(filas)
+
+
+def huella(contenido):
+    """Identifica una descarga: al confirmarla se verifica que los PLU no cambiaron desde entonces."""
+    return hashlib.sha1(contenido).hexdigest()[:12]
+
+
+def registrar_exportacion(filas, bajas=(), completo=False):
+    """
+    Actualiza la marca de agua con lo que se acaba de exportar.
+    Con completo=True la balanza queda igual a `filas` (se borra todo lo demas).
+    """
+    from django.db import transaction
+    from .models import PluExportado
+
+    with transaction.atomic():
+        if completo:
+            PluExportado.objects.exclude(plu__in=[fila[0] for fila in filas]).delete()
+        elif bajas:
+            PluExportado.objects.filter(plu__in=[plu for plu, _ in bajas]).delete()
+
+        existentes = {registro.plu: registro for registro in PluExportado.objects.filter(plu__in=[fila[0] for fila in filas])}
+        ahora = timezone.now()
+        nuevos, modificados = [], []
+        for plu, pk, nombre, precio in filas:
+            registro = existentes.get(plu)
+            if registro is None:
+                nuevos.append(PluExportado(plu=plu, producto_id=pk, nombre=nombre, precio=precio, fecha_exportacion=ahora))
+            else:
+                registro.producto_id, registro.nombre, registro.precio, registro.fecha_exportacion = pk, nombre, precio, ahora
+                modificados.append(registro)
+        PluExportado.objects.bulk_create(nuevos, batch_size=500)
+        PluExportado.objects.bulk_update(modificados, ['producto', 'nombre', 'precio', 'fecha_exportacion'], batch_size=500)
+
+
+def _escribir(ruta, contenido):
+    with open(ruta + '.tmp', 'wb') as archivo:
+        archivo.write(contenido)
+    os.replace(ruta + '.tmp', ruta)  # Itegra nunca ve un archivo a medias
+
+
+def exportar_a_directorio(directorio, completo=False):
+    """
+    Deja en `directorio` el CSV de cambios (o completo) y, si hay, el de bajas,
+    con fecha y hora en el nombre. No escribe nada si no hay cambios.
+    Retorna (archivos escritos, cantidad de cambios, cantidad de bajas).
+    """
+    if completo:
+        filas, bajas = sorted((plu, *datos) for plu, datos in plu_actuales().items()), []
+    else:
+        filas, bajas = calcular_cambios()
+    if not completo and not filas and not bajas:
+        return [], 0, 0
+
+    os.makedirs(directorio, exist_ok=True)
+    marca = timezone.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]  # con milisegundos: dos corridas seguidas no se pisan
+    archivos = []
+    if filas or completo:
+        ruta = os.path.join(directorio, f"plu_itegra_{'completo' if completo else 'cambios'}_{marca}.csv")
+        _escribir(ruta, csv_plu(filas))
+        archivos.append(ruta)
+    if bajas:
+        ruta = os.path.join(directorio, f'plu_itegra_bajas_{marca}.csv')
+        _escribir(ruta, csv_bajas(bajas))
+        archivos.append(ruta)
+
+    registrar_exportacion(filas, bajas, completo=completo)
+    return archivos, len(filas), len(bajas)
@@ -0,0 +1,237 @@
+"""
+Kardex (ficha de stock) de un producto o de una categoria.
+
+Une en una sola consulta SQL las compras (PurchaseProduct), los ajustes
+(AjusteStock) y los items de venta (salesItems) y calcula con funciones de
+ventana, por producto y en orden de fecha:
+  saldo: stock acumulado (entradas - salidas)
+  valor: valor acumulado del stock (entradas y salidas a su costo unitario)
+El costo promedio de cada renglon es valor / saldo.
+
+El saldo se calcula sobre toda la historia del producto y recien despues se
+filtra por fechas y se pagina (LIMIT/OFFSET), asi la primera fila de una
+pagina o de un periodo ya trae el saldo correcto. Los indices
+(producto, fecha) de cada tabla mantienen la consulta rapida aun con
+decenas de miles de movimientos.
+
+Uso:
+    movimientos = Kardex(producto_id=15, desde=date(2026, 1, 1))
+    Paginator(movimientos, 100)      # se puede paginar como un queryset
+    for movimiento in movimientos.iterar(): ...
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.utils.dateparse import parse_datetime
+
+
+class Movimiento:
+    """Renglon del kardex."""
+
+    __slots__ = ('producto_id', 'producto', 'fecha', 'tipo', 'referencia', 'entrada', 'salida',
+                 'costo_unitario', 'saldo', 'valor')
+
+    def __init__(self, producto_id, producto, fecha, tipo, referencia, entrada, salida, costo_unitario, saldo, valor):
+        self.producto_id = producto_id
+        self.producto = producto
+        self.fecha = parse_datetime(fecha) if isinstance(fecha, str) else fecha  # SQLite: texto
+        self.tipo = tipo
+        self.referencia = referencia or ''
+        self.entrada = _decimal(entrada)
+        self.salida = _decimal(salida)
+        self.costo_unitario = _decimal(costo_unitario)
+        self.saldo = _decimal(saldo)
+        self.valor = _decimal(valor)
+
+    @property
+    def costo_promedio(self):
+        return (self.valor / self.saldo).quantize(Decimal('0.01')) if self.saldo > 0 else None
+
+    def get_tipo_display(self):
+        return {'compra': 'Compra', 'ajuste': 'Ajuste', 'venta': 'Venta'}[self.tipo]
+
+
+def _decimal(valor):
+    if valor is None:
+        return Decimal('0')
+    if isinstance(valor, float):
+        return Decimal(str(round(valor, 6)))
+    return Decimal(valor)
+
+
+def _tablas():
+    from inventory.models import AjusteStock, Products
+    from pos.models import Sales, salesItems
+    from purchase.models import PurchaseProduct, Supplier
+
+    return {
+        'productos': Products._meta.db_table,
+        'compras': PurchaseProduct._meta.db_table,
+        'proveedores': Supplier._meta.db_table,
+        'ajustes': AjusteStock._meta.db_table,
+        'items': salesItems._meta.db_table,
+        'ventas': Sales._meta.db_table,
+    }
+
+
+def _fecha_hasta(hasta):
+    """Fecha de fin inclusiva -> inicio del dia siguiente."""
+    if hasta is None:
+        return None
+    if isinstance(hasta, datetime):
+        return hasta
+    return datetime.combine(hasta + timedelta(days=1), time.min)
+
+
+def _fecha_desde(desde):
+    if desde is None or isinstance(desde, datetime):
+        return desde
+    return datetime.combine(desde, time.min)
+
+
+class Kardex:
+    """
+    Movimientos de un producto (producto_id) o de todos los productos de una
+    categoria (categoria_id), opcionalmente entre dos fechas inclusive.
+    Se comporta como una secuencia: len() y rebanadas [a:b] (para Paginator).
+    """
+
+    def __init__(self, producto_id=None, categoria_id=None, desde=None, hasta=None):
+        if producto_id is None and categoria_id is None:
+            raise ValueError('Indicar un producto o una categoria')
+        self.producto_id = producto_id
+        self.categoria_id = categoria_id
+        self.desde = _fecha_desde(desde)
+        self.hasta = _fecha_hasta(hasta)
+        self._cantidad = None
+
+    def _filtro(self, columna):
+        """Condicion sobre el producto de cada tabla y sus parametros."""
+        if self.producto_id is not None:
+            return f'{columna} = %s', [self.producto_id]
+        return f'{columna} IN (SELECT id FROM {_tablas()["productos"]} WHERE category_id = %s)', [self.categoria_id]
+
+    def _movimientos_sql(self):
+        """UNION ALL de compras, ajustes y ventas de los productos elegidos."""
+        tablas = _tablas()
+        filtro_compras, parametros_compras = self._filtro('pp.product_id')
+        filtro_ajustes, parametros_ajustes = self._filtro('a.producto_id')
+        filtro_items, parametros_items = self._filtro('si.product_id')
+        sql = f"""
+            SELECT pp.product_id AS producto_id, pp.date_added AS fecha, 0 AS orden, pp.id AS id,
+                   'compra' AS tipo, COALESCE(s.name, '') AS referencia,
+                   CAST(pp.qty AS NUMERIC(18, 3)) AS entrada, CAST(0 AS NUMERIC(18, 3)) AS salida,
+                   CAST(pp.cost AS DOUBLE PRECISION) AS costo_unitario
+            FROM {tablas['compras']} pp
+            LEFT JOIN {tablas['proveedores']} s ON s.id = pp.supplier_id
+            WHERE {filtro_compras}
+            UNION ALL
+            SELECT a.producto_id, a.fecha, 1, a.id, 'ajuste', a.motivo,
+                   CAST(CASE WHEN a.cantidad > 0 THEN a.cantidad ELSE 0 END AS NUMERIC(18, 3)),
+                   CAST(CASE WHEN a.cantidad < 0 THEN -a.cantidad ELSE 0 END AS NUMERIC(18, 3)),
+                   CAST(a.costo_unitario AS DOUBLE PRECISION)
+            FROM {tablas['ajustes']} a
+            WHERE {filtro_ajustes}
+            UNION ALL
+            SELECT si.product_id, v.date_added, 2, si.id, 'venta', v.code,
+                   CAST(0 AS NUMERIC(18, 3)), CAST(si.qty AS NUMERIC(18, 3)),
+                   CAST(si.costo_unitario AS DOUBLE PRECISION)
+            FROM {tablas['items']} si
+            JOIN {tablas['ventas']} v ON v.id = si.sale_id
+            WHERE {filtro_items}
+        """
+        return sql, parametros_compras + parametros_ajustes + parametros_items
+
+    def _periodo_sql(self):
+        condiciones, parametros = [], []
+        if self.desde is not None:
+            condiciones.append('k.fecha >= %s')
+            parametros.append(self.desde)
+        if self.hasta is not None:
+            condiciones.append('k.fecha < %s')
+            parametros.append(self.hasta)
+        return (' WHERE ' + ' AND '.join(condiciones)) if condiciones else '', parametros
+
+    def _consulta(self, limite=None, desplazamiento=0):
+        movimientos, parametros = self._movimientos_sql()
+        periodo, parametros_periodo = self._periodo_sql()
+        ventana = 'PARTITION BY m.producto_id ORDER BY m.fecha, m.orden, m.id ROWS UNBOUNDED PRECEDING'
+        sql = f"""
+            SELECT k.producto_id, p.name, k.fecha, k.tipo, k.referencia, k.entrada, k.salida,
+                   k.costo_unitario, k.saldo, k.valor
+            FROM (
+                SELECT m.*,
+                       SUM(m.entrada - m.salida) OVER ({ventana}) AS saldo,
+                       SUM((m.entrada - m.salida) * m.costo_unitario) OVER ({ventana}) AS valor
+                FROM ({movimientos}) m
+            ) k
+            JOIN {_tablas()['productos']} p ON p.id = k.producto_id
+            {periodo}
+            ORDER BY p.name, k.producto_id, k.fecha, k.orden, k.id
+        """
+        parametros = parametros + parametros_periodo
+        if limite is not None:
+            sql += ' LIMIT %s OFFSET %s'
+            parametros += [limite, desplazamiento]
+        return sql, parametros
+
+    def iterar(self, lote=2000):
+        """Todos los movimientos del periodo, leidos de a `lote` (para exportar)."""
+        sql, parametros = self._consulta()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, parametros)
+            while True:
+                filas = cursor.fetchmany(lote)
+                if not filas:
+                    break
+                for fila in filas:
+                    yield Movimiento(*fila)
+
+    def __iter__(self):
+        return self.iterar()
+
+    def __len__(self):
+        if self._cantidad is None:
+            movimientos, parametros = self._movimientos_sql()
+            periodo, parametros_periodo = self._periodo_sql()
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM ({movimientos}) k {periodo}', parametros + parametros_periodo)
+                self._cantidad = cursor.fetchone()[0]
+        return self._cantidad
+
+    def count(self):
+        return len(self)
+
+    def __getitem__(self, indice):
+        if not isinstance(indice, slice):
+            raise TypeError('El kardex solo se puede leer por rebanadas')
+        inicio = indice.start or 0
+        fin = indice.stop if indice.stop is not None else len(self)
+        sql, parametros = self._consulta(limite=max(0, fin - inicio), desplazamiento=inicio)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, parametros)
+            return [Movimiento(*fila) for fila in cursor.fetchall()]
+
+    def saldos(self, antes_de=None):
+        """{producto_id: (saldo, valor)} con los movimientos anteriores a `antes_de` (o todos)."""
+        movimientos, parametros = self._movimientos_sql()
+        condicion = ''
+        if antes_de is not None:
+            condicion = 'WHERE m.fecha < %s'
+            parametros = parametros + [antes_de]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""SELECT m.producto_id, SUM(m.entrada - m.salida), SUM((m.entrada - m.salida) * m.costo_unitario)
+                    FROM ({movimientos}) m {condicion} GROUP BY m.producto_id""",
+                parametros,
+            )
+            return {producto_id: (_decimal(saldo), _decimal(valor)) for producto_id, saldo, valor in cursor.fetchall()}
+
+    def saldo_inicial(self):
+        """Saldos al comienzo del periodo (vacio si no hay fecha desde)."""
+        return self.saldos(self.desde) if self.desde is not None else {}
+
+    def saldo_final(self):
+        """Saldos al final del periodo (o con todos los movimientos)."""
+        return self.saldos(self.hasta)
@@ -0,0 +1,51 @@
+"""
+Comando Django para dejar los PLUs de la balanza en la carpeta que lee Itegra.
+
+Por defecto solo escribe los cambios desde la ultima exportacion (PLUs nuevos
+o con otro nombre/precio) y, si hay, un archivo aparte con las bajas. Si no
+cambio nada no escribe ningun archivo, asi se puede programar cada pocos
+minutos (cron o Programador de tareas de Windows).
+
+Uso:
+    python manage.py exportar_plu_itegra
+    python manage.py exportar_plu_itegra --directorio /ruta/itegra
+    python manage.py exportar_plu_itegra --completo
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.itegra import exportar_a_directorio
+
+
+class Command(BaseCommand):
+    help = 'Exporta a la carpeta de Itegra los PLUs que cambiaron desde la ultima exportacion'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directorio',
+            default=getattr(settings, 'ITEGRA_DIRECTORIO', ''),
+            help='Carpeta destino (por defecto settings.ITEGRA_DIRECTORIO)'
+        )
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Exportar todos los PLUs (recarga completa de la balanza)'
+        )
+
+    def handle(self, *args, **options):
+        directorio = options['directorio']
+        if not directorio:
+            raise CommandError('No hay carpeta configurada: usar --directorio o ITEGRA_DIRECTORIO en settings.')
+
+        try:
+            archivos, cambios, bajas = exportar_a_directorio(directorio, completo=options['completo'])
+        except OSError as error:
+            raise CommandError(f'No se pudo escribir en {directorio}: {error}')
+
+        if not archivos:
+            self.stdout.write('Sin cambios desde la ultima exportacion.')
+            return
+        for archivo in archivos:
+            self.stdout.write(f'  {archivo}')
+        self.stdout.write(self.style.SUCCESS(f'Listo: {cambios} PLUs exportados, {bajas} bajas.'))
@@ -18,7 +18,7 @@ Uso:
 """
 
 from django.core.management.base import BaseCommand
-from inventory.models import Products, Category
+from inventory.models import Products, Category, HistorialPrecio
 from purchase.models import Supplier, Purchase, PurchaseProduct
 from decimal import Decimal
 from django.utils import timezone
@@ -234,6 +234,7 @@ class Command(BaseCommand):
                     producto_existente.marca = data['marca']
                 if data.get('descripcion'):
                     producto_existente.description = data['descripcion']
+                producto_existente.origen_precio = HistorialPrecio.ORIGEN_IMPORTACION
                 producto_existente.save()
                 return 'actualizado', producto_existente
             else:
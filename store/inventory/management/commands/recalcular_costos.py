@@ -0,0 +1,45 @@
+"""
+Comando Django para rearmar el costo promedio ponderado desde cero.
+
+Recorre una sola vez todas las compras y los items de venta en orden de
+fecha (ver inventory/costeo.py): deja en cada item de venta el costo
+promedio que tenia el producto en ese momento y en cada producto su costo
+promedio actual. Usarlo despues de corregir o borrar compras viejas.
+
+Uso:
+    python manage.py recalcular_costos
+    python manage.py recalcular_costos --producto 15 --producto 16
+    python manage.py recalcular_costos --simular
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.costeo import recalcular
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el costo promedio de los productos y el costo de cada item vendido'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--producto',
+            type=int,
+            action='append',
+            help='ID de producto a recalcular (se puede repetir; por defecto todos)'
+        )
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Solo informar cuantos costos cambiarian, sin guardar'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        items, items_cambiados, productos = recalcular(options['producto'], aplicar=not options['simular'])
+        segundos = time.perf_counter() - inicio
+
+        verbo = 'cambiarian' if options['simular'] else 'cambiaron'
+        self.stdout.write(f'Items de venta revisados: {items} ({items_cambiados} {verbo} de costo)')
+        self.stdout.write(f'Productos con costo promedio distinto: {productos}')
+        self.stdout.write(self.style.SUCCESS(f'Listo en {segundos:.1f} s.'))
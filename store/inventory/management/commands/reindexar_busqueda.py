@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from inventory.models import Products
+from inventory.search import texto_busqueda, actualizar_ngramas
+
+
+class Command(BaseCommand):
+    help = "Recalcula el texto de busqueda de todos los productos (y sus trigramas fuera de PostgreSQL)."
+
+    def handle(self, *args, **options):
+        productos = list(Products.objects.all())
+        for p in productos:
+            p.busqueda = texto_busqueda(p)
+
+        with transaction.atomic():
+            Products.objects.bulk_update(productos, ['busqueda'], batch_size=1000)
+            actualizar_ngramas(productos, todos=True)
+
+        self.stdout.write(self.style.SUCCESS(f"Listo: {len(productos)} productos reindexados."))
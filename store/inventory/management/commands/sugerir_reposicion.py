@@ -0,0 +1,57 @@
+"""
+Comando Django para calcular las sugerencias de reposicion.
+
+Pronostica la demanda de todos los productos activos con sus ventas diarias
+(ver inventory/reposicion.py), lista lo que hay que pedir por proveedor y,
+con --aplicar, guarda el punto de pedido sugerido en los productos con
+ventas. Pensado para correr de noche (cron) antes de armar los pedidos.
+
+Uso:
+    python manage.py sugerir_reposicion
+    python manage.py sugerir_reposicion --dias 120 --plazo 10 --cobertura 21
+    python manage.py sugerir_reposicion --aplicar
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.reposicion import Reposicion
+
+
+class Command(BaseCommand):
+    help = 'Sugiere puntos de pedido y cantidades a comprar por proveedor segun las ventas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=90, help='Dias de historia de ventas (minimo 28)')
+        parser.add_argument('--plazo', type=int, default=7, help='Dias de entrega del proveedor')
+        parser.add_argument('--cobertura', type=int, default=14, help='Dias de venta que cubre cada pedido')
+        parser.add_argument('--servicio', type=float, default=0.95, help='Nivel de servicio (0.90 a 0.99)')
+        parser.add_argument(
+            '--aplicar',
+            action='store_true',
+            help='Guardar el punto de pedido sugerido en los productos'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        reposicion = Reposicion(
+            dias=options['dias'], plazo=options['plazo'],
+            cobertura=options['cobertura'], servicio=options['servicio'],
+        )
+        calculo = time.perf_counter() - inicio
+
+        for proveedor, filas in reposicion.por_proveedor():
+            self.stdout.write(self.style.MIGRATE_HEADING(proveedor.name if proveedor else 'Sin compras registradas'))
+            for fila in filas:
+                dias = fila['dias_cobertura'] if fila['dias_cobertura'] is not None else '-'
+                self.stdout.write(
+                    f"  {fila['code']:>14}  {fila['name'][:40]:40}  stock {fila['stock']:>9}  "
+                    f"dias {dias:>4}  pedir {fila['a_pedir']:>9}"
+                )
+
+        if options['aplicar']:
+            cambiados = reposicion.aplicar_punto_pedido()
+            self.stdout.write(f'Punto de pedido actualizado en {cambiados} productos')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(reposicion.productos)} productos calculados en {calculo:.1f} s.'
+        ))
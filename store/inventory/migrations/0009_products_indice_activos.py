@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_alter_products_codigo_tipo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='products',
+            index=models.Index(condition=models.Q(('status', 1)), fields=['name'], name='products_activos_name_idx'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:37
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Copias de inventory.search al momento de la migracion: una migracion no
+# importa codigo de la app, que puede cambiar o desaparecer despues.
+CAMPOS_BUSQUEDA = ('name', 'marca', 'code', 'codigo_barras')
+
+
+def normalizar_texto(texto):
+    if not texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'[^0-9a-z]+', ' ', texto.lower())
+    return texto.strip()
+
+
+def texto_busqueda(producto):
+    partes = [normalizar_texto(getattr(producto, campo, '')) for campo in CAMPOS_BUSQUEDA]
+    return ' '.join(p for p in partes if p)
+
+
+def trigramas_texto(texto):
+    resultado = set()
+    for palabra in texto.split():
+        relleno = '  ' + palabra + ' '
+        resultado |= {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+    return resultado
+
+
+def poblar_busqueda(apps, schema_editor):
+    """Calcula el texto de busqueda (y los trigramas fuera de PostgreSQL) de los productos existentes."""
+    Products = apps.get_model('inventory', 'Products')
+    ProductoNgrama = apps.get_model('inventory', 'ProductoNgrama')
+    productos = list(Products.objects.all())
+    for producto in productos:
+        producto.busqueda = texto_busqueda(producto)
+    Products.objects.bulk_update(productos, ['busqueda'], batch_size=1000)
+
+    if schema_editor.connection.vendor != 'postgresql':
+        ProductoNgrama.objects.bulk_create([
+            ProductoNgrama(producto_id=producto.pk, ngrama=ngrama)
+            for producto in productos
+            for ngrama in trigramas_texto(producto.busqueda)
+        ], batch_size=5000)
+
+
+def crear_indice_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS products_busqueda_trgm_idx '
+        'ON inventory_products USING gin (busqueda gin_trgm_ops)'
+    )
+
+
+def borrar_indice_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS products_busqueda_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_products_indice_activos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='products',
+            name='busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.CreateModel(
+            name='ProductoNgrama',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ngrama', models.CharField(max_length=3)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ngramas', to='inventory.products')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ngrama', 'producto'], name='ngrama_producto_idx')],
+            },
+        ),
+        migrations.RunPython(poblar_busqueda, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice_trigramas, borrar_indice_trigramas),
+    ]
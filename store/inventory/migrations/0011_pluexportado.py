@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_products_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PluExportado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plu', models.PositiveIntegerField(unique=True, verbose_name='PLU')),
+                ('nombre', models.CharField(max_length=26)),
+                ('precio', models.IntegerField(default=0)),
+                ('fecha_exportacion', models.DateTimeField(auto_now=True, verbose_name='Exportado el')),
+                ('producto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.products')),
+            ],
+            options={
+                'verbose_name': 'PLU Exportado',
+                'verbose_name_plural': 'PLUs Exportados',
+            },
+        ),
+    ]
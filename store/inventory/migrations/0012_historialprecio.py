@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def cargar_historial(apps, schema_editor):
+    """
+    Arma el historial inicial: el costo de cada compra registrada (con los
+    precios que darian los margenes actuales) y al final el costo y precios
+    de hoy si son distintos del ultimo.
+    """
+    Products = apps.get_model('inventory', 'Products')
+    PurchaseProduct = apps.get_model('purchase', 'PurchaseProduct')
+    HistorialPrecio = apps.get_model('inventory', 'HistorialPrecio')
+    centavos = Decimal('0.01')
+
+    compras = {}
+    for producto_id, fecha, costo in (
+        PurchaseProduct.objects.filter(product__isnull=False)
+        .order_by('product_id', 'date_added', 'pk')
+        .values_list('product_id', 'date_added', 'cost')
+        .iterator()
+    ):
+        compras.setdefault(producto_id, []).append((fecha, Decimal(costo).quantize(centavos)))
+
+    renglones = []
+    for producto in Products.objects.order_by('pk').iterator():
+        ultimo = None
+        fecha_ultima = None
+        for fecha, costo in compras.get(producto.pk, []):
+            if ultimo is not None and ultimo[0] == costo:
+                continue
+            ultimo = (
+                costo,
+                (costo * (1 + producto.margen_minorista / Decimal('100'))).quantize(centavos),
+                (costo * (1 + producto.margen_mayorista / Decimal('100'))).quantize(centavos),
+            )
+            fecha_ultima = fecha
+            renglones.append(HistorialPrecio(
+                producto_id=producto.pk, fecha=fecha, costo=ultimo[0],
+                precio_minorista=ultimo[1], precio_mayorista=ultimo[2], origen='compra',
+            ))
+
+        actual = (
+            Decimal(producto.cost).quantize(centavos),
+            Decimal(producto.precio_minorista).quantize(centavos),
+            Decimal(producto.precio_mayorista).quantize(centavos),
+        )
+        if actual != ultimo:
+            fecha = producto.date_updated or producto.date_added
+            if fecha_ultima is not None and fecha < fecha_ultima:
+                fecha = fecha_ultima
+            renglones.append(HistorialPrecio(
+                producto_id=producto.pk, fecha=fecha, costo=actual[0],
+                precio_minorista=actual[1], precio_mayorista=actual[2], origen='inicial',
+            ))
+
+        if len(renglones) >= 5000:
+            HistorialPrecio.objects.bulk_create(renglones)
+            renglones = []
+    HistorialPrecio.objects.bulk_create(renglones)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_pluexportado'),
+        ('purchase', '0008_purchaseproduct_indices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistorialPrecio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('costo', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('precio_minorista', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('precio_mayorista', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('origen', models.CharField(choices=[('inicial', 'Carga inicial'), ('alta', 'Alta del producto'), ('compra', 'Compra'), ('compra_eliminada', 'Compra eliminada'), ('edicion', 'Edición del producto'), ('edicion_rapida', 'Edición rápida de precios'), ('masiva', 'Actualización masiva'), ('importacion', 'Importación')], default='edicion', max_length=20)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historial_precios', to='inventory.products')),
+            ],
+            options={
+                'verbose_name': 'Historial de Precio',
+                'verbose_name_plural': 'Historial de Precios',
+                'ordering': ['fecha', 'pk'],
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='historial_producto_fecha_idx')],
+            },
+        ),
+        migrations.RunPython(cargar_historial, migrations.RunPython.noop),
+    ]
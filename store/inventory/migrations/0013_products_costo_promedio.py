@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:52
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def costo_promedio_inicial(apps, schema_editor):
+    """Arranca con el costo actual; `manage.py recalcular_costos` lo rearma desde las compras."""
+    Products = apps.get_model('inventory', 'Products')
+    Products.objects.update(costo_promedio=models.F('cost'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_historialprecio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='products',
+            name='costo_promedio',
+            field=models.DecimalField(decimal_places=6, default=Decimal('0'), editable=False, max_digits=18, verbose_name='Costo Promedio'),
+        ),
+        migrations.RunPython(costo_promedio_inicial, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_products_costo_promedio'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AjusteStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cantidad', models.DecimalField(decimal_places=3, max_digits=10, verbose_name='Diferencia')),
+                ('costo_unitario', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18)),
+                ('motivo', models.CharField(blank=True, default='', max_length=200)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ajustes_stock', to='inventory.products')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ajuste de Stock',
+                'verbose_name_plural': 'Ajustes de Stock',
+                'ordering': ['fecha', 'pk'],
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='ajuste_producto_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def costo_promedio_sin_compras(apps, schema_editor):
+    """
+    0013 arranco el promedio con el costo de ese momento. Los productos sin
+    compras vuelven a 0 (venden al costo de reposicion) y los fraccionados
+    toman el promedio de su producto origen.
+    """
+    Products = apps.get_model('inventory', 'Products')
+    PurchaseProduct = apps.get_model('purchase', 'PurchaseProduct')
+
+    con_compras = PurchaseProduct.objects.filter(product_id=models.OuterRef('pk'))
+    (
+        Products.objects
+        .filter(producto_origen__isnull=True)
+        .exclude(models.Exists(con_compras))
+        .update(costo_promedio=Decimal('0'))
+    )
+    origen = Products.objects.filter(pk=models.OuterRef('producto_origen_id')).values('costo_promedio')[:1]
+    Products.objects.filter(producto_origen__isnull=False).update(costo_promedio=models.Subquery(origen))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_ajustestock'),
+        ('purchase', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(costo_promedio_sin_compras, migrations.RunPython.noop),
+    ]
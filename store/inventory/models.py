@@ -1,5 +1,5 @@
 import unicodedata
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.core.exceptions import ValidationError
 from django.db import models
@@ -76,6 +76,15 @@ class Products(models.Model):
         verbose_name='Costo'
     )
 
+    # Costo promedio ponderado del stock (ver inventory/costeo.py); cost sigue siendo el de reposicion
+    costo_promedio = models.DecimalField(
+        max_digits=18,
+        decimal_places=6,
+        default=Decimal('0'),
+        editable=False,
+        verbose_name='Costo Promedio'
+    )
+
     # Margenes de ganancia (en porcentaje)
     margen_mayorista = models.DecimalField(
         max_digits=5,
@@ -159,16 +168,54 @@ class Products(models.Model):
         help_text='Para fraccionables: producto del cual proviene (actualiza costo automáticamente)'
     )
 
+    # Nombre, marca, codigo y codigo de barras normalizados (ver inventory.search)
+    busqueda = models.TextField(blank=True, default='', editable=False)
+
     class Meta:
         indexes = [
             models.Index(fields=['code']),
             models.Index(fields=['name']),
             models.Index(fields=['status']),
+            # Indice parcial: POS, pedidos y listas solo leen productos activos
+            models.Index(fields=['name'], condition=models.Q(status=1), name='products_activos_name_idx'),
         ]
 
+    # Origen que queda en el historial de precios al guardar (ver HistorialPrecio)
+    origen_precio = 'edicion'
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Costo y precios tal como estan en la base, para saber si cambiaron al guardar
+        if all(campo in field_names for campo in HistorialPrecio.CAMPOS_PRODUCTO):
+            instancia._precios_guardados = instancia.precios_historial()
+        return instancia
+
+    def precios_historial(self):
+        """(costo, precio minorista, precio mayorista) redondeados como se guardan."""
+        return tuple(Decimal(getattr(self, campo) or 0).quantize(Decimal('0.01')) for campo in HistorialPrecio.CAMPOS_PRODUCTO)
+
+    def registrar_historial_precio(self, creado=False):
+        """Agrega un renglon al historial si cambio el costo o algun precio."""
+        actuales = self.precios_historial()
+        previos = getattr(self, '_precios_guardados', None)
+        if previos is None and not creado:
+            previos = HistorialPrecio.objects.filter(producto=self).values_list(*HistorialPrecio.CAMPOS_HISTORIAL).last()
+        if actuales == previos:
+            return
+        costo, precio_minorista, precio_mayorista = actuales
+        HistorialPrecio.objects.create(
+            producto=self,
+            costo=costo,
+            precio_minorista=precio_minorista,
+            precio_mayorista=precio_mayorista,
+            origen=HistorialPrecio.ORIGEN_ALTA if creado and self.origen_precio == 'edicion' else self.origen_precio,
+        )
+        self._precios_guardados = actuales
+
     def update_quantity_on_sale(self, quantity_sold):
         from decimal import Decimal
         quantity_sold = Decimal(str(quantity_sold))
@@ -190,6 +237,28 @@ class Products(models.Model):
         self.save(update_fields=['quantity'])
         self.update_status()
         
+    def ajustar_stock(self, cantidad_real, motivo='', usuario=None):
+        """
+        Deja el stock en `cantidad_real` (recuento fisico, rotura, vencimiento)
+        y registra la diferencia como AjusteStock. Retorna el ajuste o None si
+        no habia diferencia.
+        """
+        self.refresh_from_db(fields=['quantity', 'costo_promedio', 'cost'])
+        diferencia = Decimal(cantidad_real) - self.quantity
+        if not diferencia:
+            return None
+        ajuste = AjusteStock.objects.create(
+            producto=self,
+            cantidad=diferencia,
+            costo_unitario=self.costo_venta(),
+            motivo=motivo,
+            usuario=usuario if usuario is not None and usuario.is_authenticated else None,
+        )
+        self.quantity = Decimal(cantidad_real)
+        self.save(update_fields=['quantity'])
+        self.update_status()
+        return ajuste
+
     def update_quantity_on_purchase(self, quantity_difference):
         self.quantity += quantity_difference
         if self.quantity < 0:
@@ -197,9 +266,43 @@ class Products(models.Model):
         self.save(update_fields=['quantity'])
         self.update_status()
 
-    def update_cost(self, new_cost):
+    def costo_venta(self):
+        """
+        Costo unitario que queda en el item de venta: el promedio, o el de
+        reposicion si no hay promedio de compras (costo_promedio en 0).
+        """
+        return self.costo_promedio if self.costo_promedio > Decimal('0') else self.cost
+
+    def ajustar_costo_promedio(self, entrada=None, salida=None):
+        """
+        Recalcula el costo promedio por un movimiento de stock valorizado.
+        entrada y salida son (cantidad, costo unitario): salida quita unidades
+        que habian entrado a ese costo (compra eliminada o modificada), entrada
+        las agrega (compra o item de venta eliminado). Llamar antes de
+        actualizar la cantidad en stock.
+        """
+        from .costeo import promedio_entrada, promedio_salida
+
+        # El promedio de un fraccionado es el de su producto origen (ver update_cost)
+        if self.producto_origen_id:
+            return
+        self.refresh_from_db(fields=['quantity', 'costo_promedio', 'cost'])
+        # Sin promedio de compras el stock que hay esta valuado al costo de reposicion
+        stock, promedio = self.quantity, self.costo_venta()
+        if salida:
+            promedio = promedio_salida(stock, promedio, *salida)
+            stock -= salida[0]
+        if entrada:
+            promedio = promedio_entrada(stock, promedio, *entrada)
+        if promedio != self.costo_promedio:
+            self.costo_promedio = promedio
+            self.save(update_fields=['costo_promedio'])
+            self.fraccionados.update(costo_promedio=promedio)
+
+    def update_cost(self, new_cost, origen='compra'):
         """Actualiza el costo y recalcula los precios."""
         self.cost = new_cost
+        self.origen_precio = origen
         self.calcular_precios()
         self.save(update_fields=['cost', 'precio_mayorista', 'precio_minorista'])
         self.update_status()
@@ -207,10 +310,32 @@ class Products(models.Model):
         # Si este producto es origen de fraccionados, actualizar su costo también
         for fraccionado in self.fraccionados.all():
             fraccionado.cost = new_cost
+            fraccionado.costo_promedio = self.costo_promedio
+            fraccionado.origen_precio = origen
             fraccionado.calcular_precios()
-            fraccionado.save(update_fields=['cost', 'precio_mayorista', 'precio_minorista'])
+            fraccionado.save(update_fields=['cost', 'costo_promedio', 'precio_mayorista', 'precio_minorista'])
             fraccionado.update_status()
 
+    def costo_editado_a_mano(self):
+        """True si cambio el costo por algo que no es una compra (edicion, masiva, importacion)."""
+        if self.origen_precio in HistorialPrecio.ORIGENES_COMPRA:
+            return False
+        if self._state.adding:
+            return True
+        previos = getattr(self, '_precios_guardados', None)
+        return previos is not None and previos[0] != Decimal(self.cost or 0).quantize(Decimal('0.01'))
+
+    def costo_promedio_inicial(self):
+        """
+        Promedio al cargar el costo a mano: el del producto origen si es un
+        fraccionado con su mismo costo, si no 0 (se usa el costo de reposicion).
+        """
+        if self.producto_origen_id:
+            origen = Products.objects.filter(pk=self.producto_origen_id).values_list('cost', 'costo_promedio').first()
+            if origen is not None and origen[0] == self.cost:
+                return origen[1]
+        return Decimal('0')
+
     def calcular_precios(self):
         """
         Calcula los precios mayorista y minorista basandose en el costo y margenes.
@@ -253,47 +378,74 @@ class Products(models.Model):
 
     def save(self, *args, **kwargs):
         """Guarda el producto calculando los precios automaticamente."""
+        from .search import CAMPOS_BUSQUEDA, texto_busqueda, actualizar_ngramas
+
         # Solo validar si no es una actualizacion parcial de campos especificos
         update_fields = kwargs.get('update_fields')
         if update_fields is None or 'cost' in update_fields or 'margen_mayorista' in update_fields or 'margen_minorista' in update_fields:
             self.calcular_precios()
 
+        # Un costo cargado a mano reemplaza al promedio de las compras
+        costo_a_mano = (update_fields is None or 'cost' in update_fields) and self.costo_editado_a_mano()
+        if costo_a_mano:
+            self.costo_promedio = self.costo_promedio_inicial()
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = list(update_fields) + ['costo_promedio']
+
+        # Mantener el texto de busqueda si cambia alguno de sus campos
+        reindexar = update_fields is None or any(campo in update_fields for campo in CAMPOS_BUSQUEDA)
+        if reindexar:
+            self.busqueda = texto_busqueda(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = list(update_fields) + ['busqueda']
+
         # Validar solo en creacion o actualizacion completa
         if update_fields is None:
             self.full_clean()
 
+        creado = self._state.adding
         super().save(*args, **kwargs)
 
+        if update_fields is None or any(campo in update_fields for campo in HistorialPrecio.CAMPOS_PRODUCTO):
+            self.registrar_historial_precio(creado=creado)
+
+        if reindexar:
+            actualizar_ngramas([self])
+
+        if costo_a_mano and not creado:
+            self.fraccionados.update(costo_promedio=Decimal('0'))
+
         # Actualizar status solo si no es una actualizacion de status
         if update_fields is None or 'status' not in update_fields:
             self.update_status()
 
-    def update_status(self):
-        """Actualiza el estado del producto basandose en cantidad, costo y precio."""
+    def status_calculado(self):
+        """Estado que corresponde por cantidad, costo y precio (sin guardar)."""
+        con_precio = self.cost > Decimal('0') and self.precio_minorista > Decimal('0')
         # Los fraccionables no se desactivan por stock cero
         if self.tipo_venta == self.TIPO_VENTA_FRACCIONABLE:
-            if self.cost > Decimal('0') and self.precio_minorista > Decimal('0'):
-                if self.status != self.STATUS_ACTIVE:
-                    self.status = self.STATUS_ACTIVE
-                    self.save(update_fields=['status'])
-            return
+            return self.STATUS_ACTIVE if con_precio else self.status
+        return self.STATUS_ACTIVE if self.quantity > 0 and con_precio else self.STATUS_INACTIVE
 
-        if self.quantity > 0 and self.cost > Decimal('0') and self.precio_minorista > Decimal('0'):
-            if self.status != self.STATUS_ACTIVE:
-                self.status = self.STATUS_ACTIVE
-                self.save(update_fields=['status'])
-        else:
-            if self.status != self.STATUS_INACTIVE:
-                self.status = self.STATUS_INACTIVE
-                self.save(update_fields=['status'])
+    def update_status(self):
+        """Actualiza el estado del producto basandose en cantidad, costo y precio."""
+        status = self.status_calculado()
+        if self.status != status:
+            self.status = status
+            self.save(update_fields=['status'])
 
-    def update_cost_after_deletion(self, cost_removed):
-        self.cost = self.calculate_new_cost_after_deletion(cost_removed)
-        self.save(update_fields=['cost'])
-        self.update_status()
-    
-    def calculate_new_cost_after_deletion(self, cost_removed):
-        return max(self.cost - cost_removed, Decimal('0'))
+    def update_cost_after_deletion(self, compra_eliminada):
+        """
+        Al eliminar una compra el costo de reposicion vuelve al de la compra
+        anterior que quede; si no queda ninguna se mantiene el actual.
+        """
+        anterior = (
+            self.purchaseproduct_set.exclude(pk=compra_eliminada.pk)
+            .order_by('-date_added', '-pk')
+            .first()
+        )
+        if anterior is not None and anterior.cost != self.cost:
+            self.update_cost(anterior.cost, origen=HistorialPrecio.ORIGEN_COMPRA_ELIMINADA)
     
     @property
     def last_purchase(self):
@@ -327,4 +479,181 @@ class Products(models.Model):
     @property
     def ganancia_minorista(self):
         """Retorna la ganancia por unidad en precio minorista."""
-        return self.precio_minorista - self.cost
\ No newline at end of file
+        return self.precio_minorista - self.cost
+
+
+class ProductoNgrama(models.Model):
+    """
+    Trigramas del texto de busqueda de cada producto.
+    Solo se usa fuera de PostgreSQL (alli lo reemplaza el indice pg_trgm).
+    """
+    producto = models.ForeignKey(Products, on_delete=models.CASCADE, related_name='ngramas')
+    ngrama = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ngrama', 'producto'], name='ngrama_producto_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id}: {self.ngrama!r}"
+
+
+class PluExportado(models.Model):
+    """
+    Marca de agua de la exportacion a la balanza (Itegra / Kretz): el nombre y
+    el precio con que se exporto por ultima vez cada PLU. Ver inventory/itegra.py.
+    """
+    plu = models.PositiveIntegerField(unique=True, verbose_name='PLU')
+    producto = models.ForeignKey(
+        Products,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    nombre = models.CharField(max_length=26)
+    precio = models.IntegerField(default=0)
+    fecha_exportacion = models.DateTimeField(auto_now=True, verbose_name='Exportado el')
+
+    class Meta:
+        verbose_name = 'PLU Exportado'
+        verbose_name_plural = 'PLUs Exportados'
+
+    def __str__(self):
+        return f"PLU {self.plu}: {self.nombre} (${self.precio})"
+
+
+class HistorialPrecio(models.Model):
+    """
+    Historial de costo y precios de cada producto: un renglon por cambio.
+
+    Lo escribe Products.save cuando cambia el costo o algun precio, con el
+    origen del cambio (compra, edicion rapida, actualizacion masiva, ...).
+    Con esto se calcula la inflacion de costos por producto (ver metricas).
+    """
+    ORIGEN_INICIAL = 'inicial'
+    ORIGEN_ALTA = 'alta'
+    ORIGEN_COMPRA = 'compra'
+    ORIGEN_COMPRA_ELIMINADA = 'compra_eliminada'
+    ORIGEN_EDICION = 'edicion'
+    ORIGEN_EDICION_RAPIDA = 'edicion_rapida'
+    ORIGEN_MASIVA = 'masiva'
+    ORIGEN_IMPORTACION = 'importacion'
+    ORIGENES_COMPRA = (ORIGEN_COMPRA, ORIGEN_COMPRA_ELIMINADA)
+    ORIGEN_CHOICES = [
+        (ORIGEN_INICIAL, 'Carga inicial'),
+        (ORIGEN_ALTA, 'Alta del producto'),
+        (ORIGEN_COMPRA, 'Compra'),
+        (ORIGEN_COMPRA_ELIMINADA, 'Compra eliminada'),
+        (ORIGEN_EDICION, 'Edición del producto'),
+        (ORIGEN_EDICION_RAPIDA, 'Edición rápida de precios'),
+        (ORIGEN_MASIVA, 'Actualización masiva'),
+        (ORIGEN_IMPORTACION, 'Importación'),
+    ]
+
+    # Campos de Products que se historian y sus equivalentes en este modelo
+    CAMPOS_PRODUCTO = ('cost', 'precio_minorista', 'precio_mayorista')
+    CAMPOS_HISTORIAL = ('costo', 'precio_minorista', 'precio_mayorista')
+
+    # Periodos (en dias) de las variaciones de costo
+    PERIODOS = (7, 30, 90)
+
+    producto = models.ForeignKey(Products, on_delete=models.CASCADE, related_name='historial_precios')
+    fecha = models.DateTimeField(default=timezone.now)
+    costo = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    precio_minorista = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    precio_mayorista = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    origen = models.CharField(max_length=20, choices=ORIGEN_CHOICES, default=ORIGEN_EDICION)
+
+    class Meta:
+        ordering = ['fecha', 'pk']
+        indexes = [
+            models.Index(fields=['producto', 'fecha'], name='historial_producto_fecha_idx'),
+        ]
+        verbose_name = 'Historial de Precio'
+        verbose_name_plural = 'Historial de Precios'
+
+    def __str__(self):
+        return f"{self.producto_id} {self.fecha:%d/%m/%Y %H:%M}: costo {self.costo}"
+
+    @classmethod
+    def metricas(cls, producto_ids=None, ahora=None):
+        """
+        Variacion porcentual del costo en los ultimos 7, 30 y 90 dias y dias
+        desde el ultimo cambio de precio, para todos los productos de una vez:
+            {producto_id: {'variacion_7': 12.5, 'variacion_30': ..., 'variacion_90': None,
+                           'dias_sin_cambio': 41, 'ultimo_cambio': datetime}}
+        La variacion es None si no hay historial que llegue a ese periodo.
+
+        Una sola consulta: con LEAD cada renglon sabe hasta cuando estuvo
+        vigente y solo se leen los renglones vigentes en algun momento de los
+        ultimos 90 dias (el actual y los cambios del periodo), no todo el historial.
+        """
+        from django.db.models import F, Q, Window
+        from django.db.models.functions import Lead
+
+        ahora = ahora or timezone.now()
+        cortes = {dias: ahora - timedelta(days=dias) for dias in cls.PERIODOS}
+        desde = min(cortes.values())
+
+        historial = cls.objects.all()
+        if producto_ids is not None:
+            historial = historial.filter(producto_id__in=producto_ids)
+        renglones = (
+            historial.annotate(hasta=Window(
+                Lead('fecha'), partition_by=[F('producto_id')], order_by=[F('fecha').asc(), F('pk').asc()],
+            ))
+            .filter(Q(hasta__isnull=True) | Q(hasta__gt=desde))
+            .order_by('producto_id', 'fecha', 'pk')
+            .values_list('producto_id', 'fecha', 'hasta', 'costo')
+        )
+
+        por_producto = {}
+        for producto_id, fecha, hasta, costo in renglones:
+            por_producto.setdefault(producto_id, []).append((fecha, hasta, costo))
+
+        resultado = {}
+        for producto_id, vigencias in por_producto.items():
+            ultima_fecha, _, costo_actual = vigencias[-1]
+            metricas = {
+                'dias_sin_cambio': max(0, (ahora - ultima_fecha).days),
+                'ultimo_cambio': ultima_fecha,
+            }
+            for dias, corte in cortes.items():
+                costo_corte = next(
+                    (costo for fecha, hasta, costo in vigencias if fecha <= corte and (hasta is None or hasta > corte)),
+                    None,
+                )
+                if costo_corte:
+                    variacion = (costo_actual - costo_corte) * 100 / costo_corte
+                    metricas[f'variacion_{dias}'] = round(float(variacion), 2)
+                else:
+                    metricas[f'variacion_{dias}'] = None
+            resultado[producto_id] = metricas
+        return resultado
+
+
+class AjusteStock(models.Model):
+    """
+    Correccion manual del stock (recuento, rotura, vencimiento): la
+    diferencia entre lo que habia y lo contado. Entra en el kardex junto con
+    las compras y las ventas.
+    """
+    producto = models.ForeignKey(Products, on_delete=models.CASCADE, related_name='ajustes_stock')
+    fecha = models.DateTimeField(default=timezone.now)
+    cantidad = models.DecimalField(max_digits=10, decimal_places=3, verbose_name='Diferencia')
+    costo_unitario = models.DecimalField(max_digits=18, decimal_places=6, default=Decimal('0'))
+    motivo = models.CharField(max_length=200, blank=True, default='')
+    usuario = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        ordering = ['fecha', 'pk']
+        indexes = [
+            models.Index(fields=['producto', 'fecha'], name='ajuste_producto_fecha_idx'),
+        ]
+        verbose_name = 'Ajuste de Stock'
+        verbose_name_plural = 'Ajustes de Stock'
+
+    def __str__(self):
+        return f"{self.producto_id} {self.fecha:%d/%m/%Y}: {self.cantidad:+}"
@@ -0,0 +1,216 @@
+"""
+Sugerencias de reposicion calculadas con NumPy.
+
+Las ventas diarias de todos los productos se leen en una sola consulta
+(salesItems agrupado por producto y dia) y se cargan en una matriz
+productos x dias. Sobre esa matriz se calcula todo de una vez, sin recorrer
+producto por producto:
+
+  demanda diaria:   media movil de 28 dias mezclada con la de 7 dias
+                    (PESO_RECIENTE) para reaccionar a cambios recientes
+  estacionalidad:   indice por dia de la semana (ventas del dia / media),
+                    solo para productos con suficientes dias de venta
+  stock seguridad:  z(nivel de servicio) * desvio diario * raiz(plazo)
+  punto de pedido:  demanda prevista durante el plazo de entrega + seguridad
+  a pedir:          demanda prevista para plazo + cobertura + seguridad - stock
+  dias de stock:    stock / demanda diaria
+
+El proveedor sugerido es el de la ultima compra de cada producto.
+numpy se importa dentro de las funciones (no demora el arranque).
+
+Uso:
+    reposicion = Reposicion(dias=90, plazo=7, cobertura=14)
+    for proveedor, filas in reposicion.por_proveedor(): ...
+    reposicion.aplicar_punto_pedido()
+"""
+from datetime import datetime, time, timedelta
+from decimal import ROUND_CEILING, Decimal
+from statistics import NormalDist
+
+from django.utils import timezone
+
+VENTANA_LARGA = 28
+VENTANA_CORTA = 7
+PESO_RECIENTE = 0.4
+MINIMO_DIAS_CON_VENTA = 8  # menos dias con ventas: sin estacionalidad (indice 1)
+
+
+def ventas_diarias(producto_ids, desde, hasta):
+    """
+    Matriz (len(producto_ids), dias) con las unidades vendidas por dia,
+    desde `desde` inclusive hasta `hasta` exclusive. producto_ids debe
+    venir ordenado (np.array).
+    """
+    import numpy as np
+    from django.db.models import Sum
+    from django.db.models.functions import TruncDate
+    from pos.models import salesItems
+
+    dias = (hasta - desde).days
+    matriz = np.zeros((len(producto_ids), dias))
+    if not len(producto_ids):
+        return matriz  # sin productos activos no hay donde ubicar las ventas
+    inicio = datetime.combine(desde, time.min)
+    fin = datetime.combine(hasta, time.min)
+    filas = (
+        salesItems.objects.filter(sale__date_added__gte=inicio, sale__date_added__lt=fin)  # rango: usa el indice
+        .annotate(dia=TruncDate('sale__date_added'))
+        .values('product_id', 'dia')
+        .annotate(cantidad=Sum('qty'))
+        .values_list('product_id', 'dia', 'cantidad')
+    )
+    productos, fechas, cantidades = [], [], []
+    for producto_id, dia, cantidad in filas.iterator(chunk_size=10000):
+        productos.append(producto_id)
+        fechas.append((dia - desde).days)
+        cantidades.append(float(cantidad or 0))
+    if not productos:
+        return matriz
+
+    productos = np.array(productos)
+    posiciones = np.searchsorted(producto_ids, productos)
+    posiciones = np.minimum(posiciones, len(producto_ids) - 1)
+    validos = producto_ids[posiciones] == productos  # items de productos inactivos
+    np.add.at(matriz, (posiciones[validos], np.array(fechas)[validos]), np.array(cantidades)[validos])
+    return matriz
+
+
+class Reposicion:
+    """
+    Pronostico y sugerencias de compra de los productos activos.
+
+    dias:      historia de ventas usada (dias completos hasta ayer)
+    plazo:     dias que tarda el proveedor en entregar
+    cobertura: dias de venta que tiene que cubrir cada pedido
+    servicio:  probabilidad de no quedarse sin stock durante el plazo
+    """
+
+    def __init__(self, dias=90, plazo=7, cobertura=14, servicio=0.95, hoy=None, producto_ids=None):
+        import numpy as np
+        from django.db.models import OuterRef, Subquery
+        from purchase.models import PurchaseProduct
+        from .models import Products
+
+        self.dias = max(dias, VENTANA_LARGA)
+        self.plazo = plazo
+        self.cobertura = cobertura
+        self.servicio = servicio
+        self.hoy = hoy or timezone.now().date()
+        desde = self.hoy - timedelta(days=self.dias)
+
+        ultima_compra = PurchaseProduct.objects.filter(product=OuterRef('pk')).order_by('-date_added', '-pk')
+        productos = Products.objects.filter(status=Products.STATUS_ACTIVE)
+        if producto_ids is not None:
+            productos = productos.filter(pk__in=producto_ids)
+        self.productos = list(
+            productos.annotate(proveedor_id=Subquery(ultima_compra.values('supplier_id')[:1]))
+            .order_by('pk')
+            .values_list('pk', 'code', 'name', 'quantity', 'punto_pedido', 'tipo_venta', 'cost', 'proveedor_id')
+        )
+        self.ids = np.array([fila[0] for fila in self.productos], dtype=np.int64)
+        self.ventas = ventas_diarias(self.ids, desde, self.hoy)
+        self._calcular(desde)
+
+    def _calcular(self, desde):
+        import numpy as np
+
+        ventas = self.ventas
+        self.media_larga = ventas[:, -VENTANA_LARGA:].mean(axis=1)
+        self.media_corta = ventas[:, -VENTANA_CORTA:].mean(axis=1)
+        self.demanda_diaria = (1 - PESO_RECIENTE) * self.media_larga + PESO_RECIENTE * self.media_corta
+        desvio = ventas[:, -VENTANA_LARGA:].std(axis=1)
+
+        # Indice por dia de la semana (0 = lunes), normalizado a promedio 1
+        dia_semana = (desde.weekday() + np.arange(ventas.shape[1])) % 7
+        por_dia = np.stack([ventas[:, dia_semana == dia].mean(axis=1) for dia in range(7)], axis=1)
+        media = por_dia.mean(axis=1, keepdims=True)
+        indice = np.divide(por_dia, media, out=np.ones_like(por_dia), where=media > 0)
+        pocos_datos = (ventas > 0).sum(axis=1) < MINIMO_DIAS_CON_VENTA
+        indice[pocos_datos] = 1.0
+        self.estacionalidad = indice
+
+        z = NormalDist().inv_cdf(self.servicio)
+        self.stock_seguridad = z * desvio * np.sqrt(self.plazo)
+        demanda_plazo = self.pronostico(self.plazo)
+        demanda_pedido = self.pronostico(self.plazo + self.cobertura)
+        self.stock = np.array([float(fila[3] or 0) for fila in self.productos])
+        self.punto_pedido = demanda_plazo + self.stock_seguridad
+        self.a_pedir = np.maximum(0, demanda_pedido + self.stock_seguridad - self.stock)
+        self.dias_cobertura = np.divide(
+            self.stock, self.demanda_diaria,
+            out=np.full_like(self.stock, np.inf), where=self.demanda_diaria > 0,
+        )
+
+    def pronostico(self, dias):
+        """Unidades previstas para los proximos `dias` de cada producto (desde hoy)."""
+        import numpy as np
+
+        dias_semana = (self.hoy.weekday() + np.arange(dias)) % 7
+        return self.demanda_diaria * self.estacionalidad[:, dias_semana].sum(axis=1)
+
+    @staticmethod
+    def _redondear(valor, tipo_venta):
+        """Unidades enteras hacia arriba; los fraccionables con dos decimales."""
+        from .models import Products
+
+        valor = Decimal(str(round(float(valor), 3)))
+        if tipo_venta == Products.TIPO_VENTA_FRACCIONABLE:
+            return valor.quantize(Decimal('0.01'), rounding=ROUND_CEILING)
+        return valor.quantize(Decimal('1'), rounding=ROUND_CEILING)
+
+    def filas(self, solo_a_pedir=True):
+        """Un dict por producto (los que hay que pedir, o todos), del mas urgente al menos."""
+        orden = self.dias_cobertura.argsort(kind='stable')
+        for i in orden:
+            pk, code, name, quantity, punto_pedido, tipo_venta, cost, proveedor_id = self.productos[i]
+            a_pedir = self._redondear(self.a_pedir[i], tipo_venta)
+            punto_sugerido = self._redondear(self.punto_pedido[i], tipo_venta)
+            if solo_a_pedir and (a_pedir <= 0 or quantity > punto_sugerido):
+                continue
+            dias = self.dias_cobertura[i]
+            yield {
+                'producto_id': pk,
+                'code': code,
+                'name': name,
+                'stock': quantity,
+                'punto_pedido': punto_pedido,
+                'punto_pedido_sugerido': punto_sugerido,
+                'demanda_diaria': Decimal(str(round(float(self.demanda_diaria[i]), 3))),
+                'dias_cobertura': None if dias == float('inf') else int(dias),
+                'a_pedir': a_pedir,
+                'costo': cost,
+                'importe': (a_pedir * cost).quantize(Decimal('0.01')),
+                'proveedor_id': proveedor_id,
+            }
+
+    def por_proveedor(self, solo_a_pedir=True):
+        """[(proveedor o None, [filas])] ordenado por nombre de proveedor; sin proveedor al final."""
+        from purchase.models import Supplier
+
+        grupos = {}
+        for fila in self.filas(solo_a_pedir):
+            grupos.setdefault(fila['proveedor_id'], []).append(fila)
+        proveedores = Supplier.objects.in_bulk([pk for pk in grupos if pk is not None])
+        resultado = [(proveedores.get(pk), filas) for pk, filas in grupos.items()]
+        resultado.sort(key=lambda grupo: (grupo[0] is None, grupo[0].name.lower() if grupo[0] else ''))
+        return resultado
+
+    def aplicar_punto_pedido(self, lote=1000):
+        """
+        Guarda el punto de pedido sugerido en todos los productos con ventas
+        en el periodo (bulk_update, sin pasar por save). Retorna cuantos cambiaron.
+        """
+        from django.db import transaction
+        from .models import Products
+
+        con_ventas = self.ventas.sum(axis=1) > 0
+        cambios = []
+        for i, fila in enumerate(self.productos):
+            if not con_ventas[i]:
+                continue
+            sugerido = self._redondear(self.punto_pedido[i], fila[5])
+            if sugerido != fila[4]:
+                cambios.append(Products(pk=fila[0], punto_pedido=sugerido))
+        with transaction.atomic():
+            Products.objects.bulk_update(cambios, ['punto_pedido'], batch_size=lote)
+        return len(cambios)
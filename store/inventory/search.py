@@ -0,0 +1,178 @@
+"""
+Busqueda de productos insensible a acentos y mayusculas.
+
+Cada producto guarda en `busqueda` su nombre, marca, codigo y codigo de barras
+normalizados (minusculas, sin acentos ni signos): "JAMÓN COC." -> "jamon coc".
+
+- PostgreSQL: indice GIN con gin_trgm_ops sobre `busqueda` (extension pg_trgm),
+  que acelera los LIKE '%texto%' y permite ordenar por word_similarity.
+- SQLite (desarrollo): tabla ProductoNgrama con los trigramas de cada palabra,
+  indexada por trigrama, para encontrar candidatos sin recorrer todos los productos.
+
+El ranking final se hace en Python sobre los pocos candidatos devueltos.
+"""
+import re
+import unicodedata
+
+CAMPOS_BUSQUEDA = ('name', 'marca', 'code', 'codigo_barras')
+
+# Cantidad maxima de candidatos que se rankean en Python
+MAX_CANDIDATOS = 200
+
+
+def normalizar_texto(texto):
+    """Minusculas, sin acentos y sin signos: 'Jamón COC.' -> 'jamon coc'."""
+    if not texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'[^0-9a-z]+', ' ', texto.lower())
+    return texto.strip()
+
+
+def texto_busqueda(producto):
+    """Arma el texto normalizado que se guarda en Products.busqueda."""
+    partes = [normalizar_texto(getattr(producto, campo, '')) for campo in CAMPOS_BUSQUEDA]
+    return ' '.join(p for p in partes if p)
+
+
+def trigramas_palabra(palabra, prefijo=False):
+    """
+    Trigramas de una palabra al estilo pg_trgm ('  jamon ' -> '  j', ' ja', 'jam', ...).
+    Con prefijo=True no se agrega el espacio final, asi 'coc' encuentra 'cocido'.
+    """
+    relleno = '  ' + palabra + ('' if prefijo else ' ')
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+def trigramas_texto(texto):
+    """Todos los trigramas de las palabras de un texto ya normalizado."""
+    resultado = set()
+    for palabra in texto.split():
+        resultado |= trigramas_palabra(palabra)
+    return resultado
+
+
+def puntaje(busqueda, nombre, tokens, consulta):
+    """
+    Puntaje de relevancia de un producto para los tokens buscados.
+    Palabra exacta > prefijo de palabra > contenido; bonus si el nombre empieza igual.
+    """
+    palabras = busqueda.split()
+    total = 0
+    for token in tokens:
+        if token in palabras:
+            total += 3
+        elif any(p.startswith(token) for p in palabras):
+            total += 2
+        elif token in busqueda:
+            total += 1
+    if normalizar_texto(nombre).startswith(consulta):
+        total += 5
+    return total
+
+
+def _candidatos_postgres(queryset, consulta, tokens):
+    from django.db.models import F, FloatField, Func, Value
+
+    similitud = Func(Value(consulta), F('busqueda'), function='word_similarity', output_field=FloatField())
+    filtrado = queryset
+    for token in tokens:
+        filtrado = filtrado.filter(busqueda__contains=token)
+    candidatos = list(filtrado.annotate(similitud=similitud).order_by('-similitud')[:MAX_CANDIDATOS])
+    if not candidatos:
+        # Sin coincidencias literales (errores de tipeo): buscar por similitud
+        candidatos = list(
+            queryset.annotate(similitud=similitud)
+            .filter(similitud__gt=0.3)
+            .order_by('-similitud')[:MAX_CANDIDATOS]
+        )
+    return candidatos
+
+
+def _candidatos_ngramas(queryset, tokens):
+    from django.db.models import Count
+    from .models import ProductoNgrama
+
+    largos = [t for t in tokens if len(t) >= 3]
+    cortos = [t for t in tokens if len(t) < 3]
+
+    if largos:
+        trigramas = set()
+        for token in largos:
+            trigramas |= trigramas_palabra(token, prefijo=True)
+        minimo = max(1, int(len(trigramas) * 0.6))
+        ids = (
+            ProductoNgrama.objects.filter(ngrama__in=trigramas)
+            .values('producto')
+            .annotate(coincidencias=Count('id'))
+            .filter(coincidencias__gte=minimo)
+            .order_by('-coincidencias')
+            .values_list('producto', flat=True)[:MAX_CANDIDATOS]
+        )
+        queryset = queryset.filter(pk__in=list(ids))
+
+    for token in cortos:
+        queryset = queryset.filter(busqueda__contains=token)
+    return list(queryset[:MAX_CANDIDATOS])
+
+
+def buscar_productos(texto, limite=20, solo_activos=True, queryset=None):
+    """
+    Retorna los `limite` productos mas relevantes para el texto buscado,
+    dentro de `queryset` si se indica (por defecto todos los productos).
+
+    Un codigo o codigo de barras exacto siempre va primero (lector de codigos).
+    """
+    from django.db import connection
+    from django.db.models import Q
+    from .models import Products
+
+    consulta = normalizar_texto(texto)
+    if not consulta:
+        return []
+    tokens = consulta.split()
+
+    queryset = Products.objects.all() if queryset is None else queryset
+    if solo_activos:
+        queryset = queryset.filter(status=Products.STATUS_ACTIVE)
+
+    crudo = str(texto).strip()
+    exactos = list(queryset.filter(Q(codigo_barras=crudo) | Q(code=crudo))[:limite])
+
+    if connection.vendor == 'postgresql':
+        candidatos = _candidatos_postgres(queryset, consulta, tokens)
+    else:
+        candidatos = _candidatos_ngramas(queryset, tokens)
+
+    vistos = {p.pk for p in exactos}
+    candidatos = [p for p in candidatos if p.pk not in vistos]
+    candidatos.sort(key=lambda p: (-puntaje(p.busqueda, p.name, tokens, consulta), len(p.name), p.name))
+    return (exactos + candidatos)[:limite]
+
+
+def actualizar_ngramas(productos, todos=False):
+    """
+    Regenera los trigramas de los productos dados (solo fuera de PostgreSQL).
+    Con todos=True se reemplaza la tabla completa (reindexado general).
+    """
+    from django.db import connection
+    from .models import ProductoNgrama
+
+    if connection.vendor == 'postgresql':
+        return
+    productos = list(productos)
+    if todos:
+        ProductoNgrama.objects.all().delete()
+    else:
+        ProductoNgrama.objects.filter(producto__in=productos).delete()
+
+    # executemany evita crear un objeto del ORM por trigrama (reindexados grandes)
+    filas = [
+        (producto.pk, ngrama)
+        for producto in productos
+        for ngrama in trigramas_texto(producto.busqueda)
+    ]
+    tabla = ProductoNgrama._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {tabla} (producto_id, ngrama) VALUES (%s, %s)', filas)
@@ -20,8 +20,13 @@ urlpatterns = [
     path('products/<int:pk>/', views.ProductDetailView.as_view(), name='product_detail'),
     path('edicion-rapida-precios/', views.edicion_rapida_precios, name='edicion_rapida_precios'),
     path('guardar-cambios-precios/', views.guardar_cambios_precios, name='guardar_cambios_precios'),
+    path('api/metricas-precios/', views.api_metricas_precios, name='api_metricas_precios'),
     path('actualizacion-masiva-proveedor/', views.actualizacion_masiva_proveedor, name='actualizacion_masiva_proveedor'),
     path('api/producto-costo/<int:pk>/', views.api_producto_costo, name='api_producto_costo'),
+    path('api/buscar-productos/', views.api_buscar_productos, name='api_buscar_productos'),
     path('api/asignar-codigo-barras/', views.asignar_codigo_barras, name='asignar_codigo_barras'),
+    path('plu-itegra/', views.plu_itegra, name='plu_itegra'),
     path('exportar-plu-itegra/', views.exportar_plu_itegra, name='exportar_plu_itegra'),
+    path('etiquetas/', views.imprimir_etiquetas, name='imprimir_etiquetas'),
+    path('reposicion/', views.sugerencias_reposicion, name='sugerencias_reposicion'),
 ]
\ No newline at end of file
@@ -15,7 +15,7 @@ from django.views import generic
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.messages.views import SuccessMessageMixin
 
-from .models import Category, Products
+from .models import Category, Products, HistorialPrecio
 from .forms import ProductsForm, CategoryForm
 from purchase.models import Supplier, PurchaseProduct
 from django.db import transaction
@@ -157,20 +157,50 @@ class ProductDetailView(LoginRequiredMixin, PermissionRequiredMixin, generic.Det
         context = super().get_context_data(**kwargs)
         product = self.get_object()
         
-        purchase_products = PurchaseProduct.objects.filter(product=product)
-        logger.debug(f"Purchase products count: {purchase_products.count()}")
-
-        cantidad_historica = sum([pp.qty for pp in purchase_products])
+        cantidad_historica = PurchaseProduct.objects.filter(product=product).aggregate(total=Sum('qty'))['total'] or 0
         logger.debug(f"Cantidad histórica calculada: {cantidad_historica}")
 
         context['cantidad_historica'] = cantidad_historica
         return context
     
 class ProductList(LoginRequiredMixin, PermissionRequiredMixin, generic.ListView):
+    """
+    Lista de productos. La clase ABC / XYZ de los ultimos 90 dias
+    (inventory/clasificacion.py) solo se calcula si se pide: ?abc=A y/o
+    ?xyz=X filtran por clase y ?clase=1 muestra la columna.
+    """
     model = Products
     template_name = "inventory/product_list.html"
     context_object_name = "products"
     permission_required = 'inventory.view_products'
+
+    def get_queryset(self):
+        from .clasificacion import clasificar
+
+        queryset = super().get_queryset().select_related('category')
+        self.filtro_abc = self.request.GET.get('abc', '').upper()
+        self.filtro_xyz = self.request.GET.get('xyz', '').upper()
+        filtrar = self.filtro_abc in ('A', 'B', 'C') or self.filtro_xyz in ('X', 'Y', 'Z')
+        self.mostrar_abc = filtrar or self.request.GET.get('clase') == '1'
+        # Clave de cache sin la marca de las ventas: no se recalcula con cada venta nueva
+        self.clasificacion = clasificar(exacta=False)['productos'] if self.mostrar_abc else {}
+        if filtrar:
+            ids = [
+                pk for pk, datos in self.clasificacion.items()
+                if self.filtro_abc in ('', datos['abc']) and self.filtro_xyz in ('', datos['xyz'])
+            ]
+            queryset = queryset.filter(pk__in=ids)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        for producto in context['products']:
+            datos = self.clasificacion.get(producto.pk)
+            producto.clase_abc = f"{datos['abc']}{datos['xyz']}" if datos else ''
+        context['mostrar_abc'] = self.mostrar_abc
+        context['filtro_abc'] = self.filtro_abc
+        context['filtro_xyz'] = self.filtro_xyz
+        return context
     
 class ProductCreate(LoginRequiredMixin, PermissionRequiredMixin, generic.CreateView):
     model = Products
@@ -323,6 +353,23 @@ def edicion_rapida_precios(request):
     return render(request, 'inventory/edicion_rapida_precios.html', context)
 
 
+@login_required
+def api_metricas_precios(request):
+    """
+    Inflacion de costos de todos los productos activos (o de ?ids=1,2,3):
+    variacion % del costo a 7, 30 y 90 dias y dias desde el ultimo cambio de precio.
+    """
+    if request.GET.get('ids'):
+        producto_ids = [int(pk) for pk in request.GET['ids'].split(',') if pk.strip().isdigit()]
+    else:
+        producto_ids = Products.objects.filter(status=Products.STATUS_ACTIVE).values('pk')
+
+    metricas = HistorialPrecio.metricas(producto_ids)
+    for datos in metricas.values():
+        datos['ultimo_cambio'] = datos['ultimo_cambio'].strftime('%Y-%m-%d')
+    return JsonResponse({'productos': metricas})
+
+
 def calcular_porcentaje(costo, precio):
     """Calcula el porcentaje de ganancia"""
     if costo <= 0:
@@ -359,6 +406,7 @@ def guardar_cambios_precios(request):
                     # Actualizar costo
                     # Guardar cada campo específicamente
                     producto.cost = nuevo_costo
+                    producto.origen_precio = HistorialPrecio.ORIGEN_EDICION_RAPIDA
                     producto.margen_minorista = porc_minor  # AGREGAR
                     producto.margen_mayorista = porc_mayor  # AGREGAR
                     producto.precio_minorista = round(nuevo_costo * (1 + porc_minor / 100), 2)
@@ -429,6 +477,7 @@ def actualizacion_masiva_proveedor(request):
                 porc_may = Decimal(str(porc_mayorista))
                 producto.precio_mayorista = producto.cost * (1 + porc_may / 100)
             
+            producto.origen_precio = HistorialPrecio.ORIGEN_MASIVA
             producto.save()
             actualizados += 1
         
@@ -483,32 +532,222 @@ def asignar_codigo_barras(request):
 
     return JsonResponse({'status': 'ok', 'mensaje': 'Código asignado correctamente'})
         
+@login_required
+def plu_itegra(request):
+    """
+    Pantalla de la exportacion a la balanza: cuantos PLU hay, cuantos cambiaron
+    o hay que dar de baja desde la ultima exportacion, links de descarga y la
+    confirmacion de que el archivo ya se importo en Itegra.
+    """
+    from . import itegra
+    from .models import PluExportado
+
+    exportaciones = []
+    for modo, titulo in (('cambios', 'Cambios'), ('bajas', 'Bajas'), ('completo', 'Completo')):
+        filas, bajas, contenido = itegra.exportacion(modo)
+        exportaciones.append({
+            'modo': modo,
+            'titulo': titulo,
+            'cantidad': len(bajas) if modo == 'bajas' else len(filas),
+            'huella': itegra.huella(contenido),
+        })
+
+    context = {
+        'page_title': 'Balanza (Itegra)',
+        'exportaciones': exportaciones,
+        'ultima_exportacion': PluExportado.objects.aggregate(ultima=Max('fecha_exportacion'))['ultima'],
+    }
+    return render(request, 'inventory/plu_itegra.html', context)
+
 @login_required
 def exportar_plu_itegra(request):
     """
     Genera un CSV con los productos fraccionables para importar en Itegra (Kretz).
-    Separado por ';'. Un renglon por PLU.
-    Campos: NUMERO DE PLU ; CODIGO DE PLU ; NOMBRE (max 26) ; DEPARTAMENTO ; PRECIO (entero) ; TIPO (P) ; ETIQUETA
+    Separado por ';'. Un renglon por PLU (formato en inventory/itegra.py).
+      ?modo=completo (por defecto): todos los PLU
+      ?modo=cambios: solo PLUs nuevos o con nombre/precio distinto a la ultima exportacion
+      ?modo=bajas:   PLUs exportados que ya no existen, para borrarlos de la balanza
+    Descargar no cambia nada. Por POST (modo y huella de lo descargado) se
+    confirma que el archivo se importo y recien ahi se actualiza la marca de agua.
+    """
+    from . import itegra
+
+    if request.method == 'POST':
+        modo = request.POST.get('modo')
+        if modo not in ('completo', 'cambios', 'bajas'):
+            messages.error(request, 'Exportación inválida.')
+            return redirect('inventory:plu_itegra')
+
+        filas, bajas, contenido = itegra.exportacion(modo)
+        if request.POST.get('huella') != itegra.huella(contenido):
+            messages.error(request, 'Los PLU cambiaron desde la descarga: descargue el archivo de nuevo antes de confirmar.')
+            return redirect('inventory:plu_itegra')
+
+        itegra.registrar_exportacion(filas, bajas, completo=(modo == 'completo'))
+        messages.success(request, f'Exportación confirmada: {len(filas)} PLU, {len(bajas)} bajas.')
+        return redirect('inventory:plu_itegra')
+
+    modo = request.GET.get('modo', 'completo')
+    if modo not in ('cambios', 'bajas'):
+        modo = 'completo'
+    _, _, contenido = itegra.exportacion(modo)
+
+    nombre = 'plu_itegra.csv' if modo == 'completo' else f'plu_itegra_{modo}.csv'
+    response = HttpResponse(contenido, content_type='text/csv; charset=iso-8859-1')
+    response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    return response
+
+@login_required
+def api_buscar_productos(request):
+    """
+    Typeahead de productos: devuelve los mejores resultados para ?q=.
+    Insensible a acentos y mayusculas; acepta abreviaturas ("jam coc").
+    Responde en el formato de Select2 ({'results': [...]}).
+    ?todos=1 incluye los inactivos; ?compra=1 busca lo que se puede comprar
+    (activos o no, sin los fraccionables).
+    """
+    from .search import buscar_productos
+
+    texto = request.GET.get('q', '').strip()
+    try:
+        limite = max(1, min(int(request.GET.get('limit', 20)), 100))
+    except ValueError:
+        limite = 20
+    solo_activos = request.GET.get('todos') != '1'
+    queryset = None
+    if request.GET.get('compra') == '1':
+        queryset = Products.objects.exclude(tipo_venta=Products.TIPO_VENTA_FRACCIONABLE)
+        solo_activos = False
+
+    resultados = []
+    for p in buscar_productos(texto, limite=limite, solo_activos=solo_activos, queryset=queryset):
+        resultados.append({
+            'id': p.id,
+            'text': p.name,
+            'name': p.name,
+            'code': p.code,
+            'marca': p.marca or '',
+            'precio_mayorista': float(p.precio_mayorista),
+            'precio_minorista': float(p.precio_minorista),
+            'price': float(p.precio_minorista),
+            'cost': float(p.cost),
+            'quantity': float(p.quantity),
+            'codigo_barras': p.codigo_barras or '',
+            'tipo_venta': p.tipo_venta,
+            'plu': p.plu or '',
+        })
+    return JsonResponse({'results': resultados})
+
+
+@login_required
+def imprimir_etiquetas(request):
+    """
+    Etiquetas de gondola en PDF (A4 o rollo de 58 mm) para los codigos
+    escaneados, los productos modificados desde una fecha o una categoria.
     """
-    DEPARTAMENTO = '1'   # Depto. 1 en Itegra
-    ETIQUETA = '1'       # diseno de etiqueta en la balanza
-    TIPO = 'P'           # P = pesable
-
-    productos = Products.objects.filter(
-        tipo_venta=Products.TIPO_VENTA_FRACCIONABLE,
-        plu__isnull=False,
-    ).order_by('plu')
-
-    lineas = ['NUMERO DE PLU;CODIGO DE PLU;NOMBRE DE PLU;CODIGO DE DEPARTAMENTO;PRECIO;TIPO DE PLU;CODIGO DE ETIQUETA']
-    for p in productos:
-        nombre = (p.name or '').replace(';', ' ').strip()[:26]
-        precio = int(round(float(p.precio_minorista or 0)))
-        lineas.append(f"{p.plu};{p.plu};{nombre};{DEPARTAMENTO};{precio};{TIPO};{ETIQUETA}")
-
-    contenido = '\r\n'.join(lineas) + '\r\n'
-    response = HttpResponse(
-        contenido.encode('latin-1', errors='replace'),
-        content_type='text/csv; charset=iso-8859-1',
+    from .etiquetas import etiquetas_pdf, productos_por_codigo
+    from .forms import EtiquetasForm
+
+    if request.method == 'POST':
+        form = EtiquetasForm(request.POST)
+        if form.is_valid():
+            datos = form.cleaned_data
+            faltantes = []
+            if datos['codigos'].strip():
+                productos, faltantes = productos_por_codigo(datos['codigos'].splitlines())
+            else:
+                productos = Products.objects.filter(status=Products.STATUS_ACTIVE)
+                if datos['desde']:
+                    productos = productos.filter(pk__in=HistorialPrecio.objects.filter(
+                        fecha__date__gte=datos['desde']).values('producto_id'))
+                if datos['categoria']:
+                    productos = productos.filter(category=datos['categoria'])
+                productos = list(productos.order_by('category__name', 'name'))
+
+            if faltantes:
+                messages.warning(request, 'No se encontraron los códigos: ' + ', '.join(faltantes[:20]))
+            if not productos:
+                messages.error(request, 'No hay productos para imprimir.')
+            else:
+                contenido = etiquetas_pdf(
+                    productos,
+                    formato=datos['formato'],
+                    lista=datos['lista'],
+                    copias=datos['copias'],
+                    posicion_inicial=datos['posicion_inicial'],
+                )
+                response = HttpResponse(contenido, content_type='application/pdf')
+                response['Content-Disposition'] = 'inline; filename="etiquetas.pdf"'
+                return response
+    else:
+        form = EtiquetasForm(initial={'codigos': request.GET.get('codigos', '')})
+
+    return render(request, 'inventory/etiquetas.html', {'page_title': 'Imprimir Etiquetas', 'form': form})
+
+
+@login_required
+def sugerencias_reposicion(request):
+    """
+    Pronostico de demanda y sugerencias de compra agrupadas por proveedor
+    (ultimo proveedor de cada producto). Calculo en inventory/reposicion.py.
+      ?formato=excel: una hoja por proveedor para armar los pedidos
+      POST: guarda el punto de pedido sugerido en los productos con ventas
+    """
+    from .forms import ReposicionForm
+    from .reposicion import Reposicion
+
+    form = ReposicionForm(request.GET or None)
+    parametros = form.cleaned_data if form.is_bound and form.is_valid() else {
+        nombre: campo.initial for nombre, campo in form.fields.items()
+    }
+    reposicion = Reposicion(
+        dias=parametros['dias'], plazo=parametros['plazo'],
+        cobertura=parametros['cobertura'], servicio=float(parametros['servicio']),
     )
-    response['Content-Disposition'] = 'attachment; filename="plu_itegra.csv"'
-    return response
\ No newline at end of file
+
+    if request.method == 'POST':
+        if not request.user.has_perm('inventory.change_products'):
+            messages.error(request, 'No tiene permiso para modificar los puntos de pedido.')
+        else:
+            cambiados = reposicion.aplicar_punto_pedido()
+            messages.success(request, f'Punto de pedido actualizado en {cambiados} productos.')
+        return redirect(f"{reverse_lazy('inventory:sugerencias_reposicion')}?{request.GET.urlencode()}")
+
+    grupos = reposicion.por_proveedor()
+    if request.GET.get('formato') == 'excel':
+        return _reposicion_excel(grupos)
+
+    context = {
+        'page_title': 'Sugerencias de Reposición',
+        'form': form,
+        'grupos': [
+            {'proveedor': proveedor, 'filas': filas, 'total': sum(fila['importe'] for fila in filas)}
+            for proveedor, filas in grupos
+        ],
+        'total_productos': sum(len(filas) for _, filas in grupos),
+        'total_importe': sum(sum(fila['importe'] for fila in filas) for _, filas in grupos),
+        'parametros': request.GET.urlencode(),
+    }
+    return render(request, 'inventory/reposicion.html', context)
+
+
+def _reposicion_excel(grupos):
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    for proveedor, filas in grupos:
+        nombre = (proveedor.name if proveedor else 'Sin proveedor')
+        hoja = libro.create_sheet(''.join(c for c in nombre if c not in '[]:*?/\\')[:31] or 'Proveedor')
+        hoja.append(['Código', 'Producto', 'Stock', 'Venta diaria', 'Días de stock',
+                     'Punto de pedido', 'Sugerido', 'A pedir', 'Costo', 'Importe'])
+        for fila in filas:
+            hoja.append([
+                fila['code'], fila['name'], float(fila['stock']), float(fila['demanda_diaria']),
+                fila['dias_cobertura'], float(fila['punto_pedido']), float(fila['punto_pedido_sugerido']),
+                float(fila['a_pedir']), float(fila['costo']), float(fila['importe']),
+            ])
+
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = 'attachment; filename="sugerencias_reposicion.xlsx"'
+    libro.save(response)
+    return response
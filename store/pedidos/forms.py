@@ -2,7 +2,7 @@ from django import forms
 from django.core.exceptions import ValidationError
 from .models import Pedido, PedidoItem
 from customers.models import Cliente
-from inventory.models import Products
+from inventory.models import Category, Products
 import datetime
 
 
@@ -142,3 +142,67 @@ class CambiarEstadoPedidoForm(forms.Form):
         }),
         label='Notas'
     )
+
+
+class PickListForm(forms.Form):
+    """
+    Filtros para la lista de preparación (pick list) de pedidos pendientes.
+    """
+    
+    entrega_desde = forms.DateField(
+        required=False,
+        label='Entrega desde',
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        })
+    )
+    
+    entrega_hasta = forms.DateField(
+        required=False,
+        label='Entrega hasta',
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        })
+    )
+    
+    cliente = forms.ModelChoiceField(
+        required=False,
+        queryset=Cliente.objects.filter(activo=True).order_by('name'),
+        widget=forms.Select(attrs={
+            'class': 'form-select'
+        }),
+        empty_label='Todos los clientes'
+    )
+    
+    categoria = forms.ModelChoiceField(
+        required=False,
+        queryset=Category.objects.order_by('name'),
+        widget=forms.Select(attrs={
+            'class': 'form-select'
+        }),
+        empty_label='Todas las categorías',
+        label='Categoría'
+    )
+
+
+class FacturarLoteForm(forms.Form):
+    """
+    Formulario para facturar varios pedidos pendientes de una vez.
+    """
+    
+    FORMA_PAGO_CHOICES = [
+        ('efectivo', 'Efectivo'),
+        ('banco', 'Banco/Transferencia'),
+        ('cuenta_corriente', 'Cuenta Corriente'),
+    ]
+    
+    forma_pago = forms.ChoiceField(
+        choices=FORMA_PAGO_CHOICES,
+        initial='efectivo',
+        widget=forms.Select(attrs={
+            'class': 'form-select form-select-sm'
+        }),
+        label='Forma de Pago'
+    )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_movimientocc_indices'),
+        ('pedidos', '0002_alter_pedido_estado'),
+        ('pos', '0005_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(condition=models.Q(('estado', 'pendiente')), fields=['fecha_entrega_estimada', 'cliente'], name='pedido_pendientes_idx'),
+        ),
+    ]
@@ -115,6 +115,12 @@ class Pedido(models.Model):
             models.Index(fields=['cliente']),
             models.Index(fields=['estado']),
             models.Index(fields=['fecha_entrega_estimada']),
+            # Indice parcial: lista de preparacion y facturacion solo leen pendientes
+            models.Index(
+                fields=['fecha_entrega_estimada', 'cliente'],
+                condition=models.Q(estado='pendiente'),
+                name='pedido_pendientes_idx'
+            ),
         ]
     
     def __str__(self):
@@ -167,6 +173,168 @@ class Pedido(models.Model):
         
         return (len(items_sin_stock) == 0, items_sin_stock)
 
+    @classmethod
+    def facturar_en_lote(cls, pedido_ids, forma_pago='efectivo', usuario=None):
+        """
+        Convierte varios pedidos pendientes en ventas dentro de una sola transacción.
+
+        forma_pago: 'efectivo', 'banco' o 'cuenta_corriente'.
+
+        El stock se valida contra los productos bloqueados una sola vez; los
+        pedidos sin stock suficiente se informan y se saltean sin abortar el
+        resto. Ventas, items, movimientos, stock y estados se escriben en bloque.
+
+        Retorna (facturados, errores): listas de dicts por pedido.
+        """
+        from decimal import Decimal
+        from django.db import transaction
+        from django.db.models import F
+        from pos.models import Sales, salesItems
+        from finances.models import Caja, MovimientoCaja
+        from customers.models import MovimientoCuentaCorriente
+
+        facturados = []
+        errores = []
+
+        with transaction.atomic():
+            pedidos = list(
+                cls.objects.select_for_update()
+                .filter(pk__in=pedido_ids)
+                .select_related('cliente')
+                .order_by('fecha_pedido')
+            )
+            encontrados = {pedido.pk for pedido in pedidos}
+            for pk in pedido_ids:
+                if int(pk) not in encontrados:
+                    errores.append({'pedido_id': pk, 'code': '-', 'msg': 'Pedido inexistente'})
+
+            items_por_pedido = {}
+            for item in PedidoItem.objects.filter(pedido__in=pedidos):
+                items_por_pedido.setdefault(item.pedido_id, []).append(item)
+
+            product_ids = {item.product_id for items in items_por_pedido.values() for item in items}
+            productos = Products.objects.select_for_update().in_bulk(product_ids)
+            stock = {pk: producto.quantity for pk, producto in productos.items()}
+
+            # 1. Validar stock en memoria y reservar por pedido
+            aprobados = []
+            for pedido in pedidos:
+                items = items_por_pedido.get(pedido.pk, [])
+                if not pedido.puede_convertirse_a_venta():
+                    errores.append({'pedido_id': pedido.pk, 'code': pedido.code,
+                                    'msg': f'Estado {pedido.get_estado_display()}: no se puede facturar'})
+                    continue
+                if not items:
+                    errores.append({'pedido_id': pedido.pk, 'code': pedido.code, 'msg': 'El pedido no tiene items'})
+                    continue
+
+                requerido = {}
+                for item in items:
+                    requerido[item.product_id] = requerido.get(item.product_id, Decimal('0')) + item.cantidad
+                faltantes = [
+                    f"{productos[pid].name} (pide {cant}, hay {stock[pid]})"
+                    for pid, cant in requerido.items() if stock[pid] < cant
+                ]
+                if faltantes:
+                    errores.append({'pedido_id': pedido.pk, 'code': pedido.code,
+                                    'msg': 'Stock insuficiente: ' + ', '.join(faltantes)})
+                    continue
+
+                for pid, cant in requerido.items():
+                    stock[pid] -= cant
+                aprobados.append((pedido, items))
+
+            if not aprobados:
+                return facturados, errores
+
+            # 2. Crear ventas en bloque
+            ahora = timezone.now()
+            codigos = Sales.generar_codigos(len(aprobados))
+            ventas = Sales.objects.bulk_create([
+                Sales(
+                    code=codigo,
+                    sub_total=float(pedido.total),
+                    grand_total=float(pedido.total),
+                    tax=0,
+                    tax_amount=0,
+                    tendered_amount=float(pedido.total),
+                    amount_change=0,
+                    cliente=pedido.cliente,
+                    tipo_lista=pedido.tipo_lista,
+                    forma_pago='banco' if forma_pago == 'banco' else 'efectivo',
+                    date_added=ahora,
+                )
+                for codigo, (pedido, items) in zip(codigos, aprobados)
+            ])
+
+            # 3. Items de venta con costo historico, y stock en una sola actualizacion
+            salesItems.objects.bulk_create([
+                salesItems(
+                    sale=venta,
+                    product_id=item.product_id,
+                    qty=item.cantidad,
+                    price=float(item.precio_unitario),
+                    costo_unitario=float(productos[item.product_id].costo_venta()),
+                    total=float(item.cantidad * item.precio_unitario),
+                )
+                for venta, (pedido, items) in zip(ventas, aprobados)
+                for item in items
+            ])
+            modificados = []
+            for pid, producto in productos.items():
+                if producto.quantity != stock[pid]:
+                    producto.quantity = stock[pid]
+                    producto.status = producto.status_calculado()  # bulk_update no pasa por save
+                    modificados.append(producto)
+            Products.objects.bulk_update(modificados, ['quantity', 'status'])
+
+            # 4. Movimientos de caja o de cuenta corriente
+            if forma_pago == 'cuenta_corriente':
+                MovimientoCuentaCorriente.objects.bulk_create([
+                    MovimientoCuentaCorriente(
+                        cliente=pedido.cliente,
+                        tipo='venta',
+                        monto=pedido.total,
+                        venta=venta,
+                        notas=f'Venta {venta.code} (Pedido {pedido.code})',
+                    )
+                    for venta, (pedido, items) in zip(ventas, aprobados)
+                ])
+            else:
+                es_banco = forma_pago == 'banco'
+                MovimientoCaja.objects.bulk_create([
+                    MovimientoCaja(
+                        tipo='venta_banco' if es_banco else 'venta_efectivo',
+                        monto=pedido.total,
+                        concepto=f"Venta {venta.code} (Pedido {pedido.code})",
+                        fecha=ahora,
+                        venta=venta,
+                        afecta_efectivo=not es_banco,
+                        afecta_banco=es_banco,
+                        es_ingreso=True,
+                        usuario=usuario,
+                    )
+                    for venta, (pedido, items) in zip(ventas, aprobados)
+                ])
+                # bulk_create no pasa por MovimientoCaja.save(): actualizar Caja una sola vez
+                total = sum((pedido.total for pedido, items in aprobados), Decimal('0'))
+                campo = 'saldo_banco' if es_banco else 'saldo_efectivo'
+                Caja.get_instance()
+                Caja.objects.filter(pk=1).update(**{campo: F(campo) + total})
+
+            # 5. Marcar pedidos como facturados
+            for venta, (pedido, items) in zip(ventas, aprobados):
+                pedido.venta = venta
+                pedido.estado = 'facturado'
+                pedido.fecha_entrega_real = ahora
+                facturados.append({'pedido_id': pedido.pk, 'code': pedido.code,
+                                   'venta_id': venta.pk, 'venta_code': venta.code,
+                                   'cliente': pedido.cliente.name, 'total': pedido.total})
+            cls.objects.bulk_update([pedido for pedido, items in aprobados],
+                                    ['venta', 'estado', 'fecha_entrega_real'])
+
+        return facturados, errores
+
 
 class PedidoItem(models.Model):
     """
@@ -8,6 +8,8 @@ urlpatterns = [
     path('', views.pedido_list, name='pedido_list'),
     path('crear/', views.pedido_create, name='pedido_create'),
     path('guardar/', views.save_pedido, name='save_pedido'),
+    path('preparacion/', views.pick_list, name='pick_list'),
+    path('facturar-lote/', views.facturar_lote, name='facturar_lote'),
     
     # Detalle y acciones
     path('<int:pk>/', views.pedido_detail, name='pedido_detail'),
@@ -1,16 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
 from django.db import transaction
 from django.db import models
+from django.db.models import Sum, Count, Min
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from datetime import datetime
-import json
 
 from .models import Pedido, PedidoItem
-from .forms import PedidoForm, PedidoSearchForm, CambiarEstadoPedidoForm
+from .forms import PedidoForm, PedidoSearchForm, CambiarEstadoPedidoForm, PickListForm, FacturarLoteForm
 from customers.models import Cliente
 from inventory.models import Products
 from pos.models import Sales, salesItems
@@ -60,6 +60,7 @@ def pedido_list(request):
         'pedidos': pedidos,
         'form': form,
         'stats': stats,
+        'facturar_form': FacturarLoteForm(),
     }
     
     return render(request, 'pedidos/pedido_list.html', context)
@@ -94,25 +95,10 @@ def pedido_detail(request, pk):
 def pedido_create(request):
     """
     Vista para tomar un nuevo pedido (similar al POS).
+    Los productos se buscan con inventory:api_buscar_productos.
     """
-    products = Products.objects.filter(status=1).order_by('name')
-    clientes = Cliente.objects.filter(activo=True).order_by('name')
-    
-    # Preparar datos de productos para JavaScript
-    product_json = []
-    for product in products:
-        product_json.append({
-            'id': product.id,
-            'name': product.name,
-            'precio_mayorista': float(product.precio_mayorista),
-            'precio_minorista': float(product.precio_minorista),
-        })
-    
     context = {
         'page_title': 'Tomar Nuevo Pedido',
-        'products': products,
-        'clientes': clientes,
-        'product_json': json.dumps(product_json),
     }
     
     return render(request, 'pedidos/pedido_create.html', context)
@@ -261,6 +247,7 @@ def convertir_a_venta(request, pk):
     request.session['pedido_a_facturar'] = {
         'pedido_id': pedido.pk,
         'cliente_id': pedido.cliente.pk,
+        'cliente_nombre': str(pedido.cliente),
         'tipo_lista': pedido.tipo_lista,
         'items': [
             {
@@ -280,6 +267,52 @@ def convertir_a_venta(request, pk):
     return redirect('pos:pos-page')
 
 
+@login_required
+@permission_required('pedidos.change_pedido', raise_exception=True)
+@permission_required('pos.add_sales', raise_exception=True)
+def facturar_lote(request):
+    """
+    Factura en un solo paso varios pedidos pendientes seleccionados en la lista.
+    Los pedidos sin stock suficiente se informan y quedan pendientes.
+    """
+    if request.method != 'POST':
+        return redirect('pedidos:pedido_list')
+
+    form = FacturarLoteForm(request.POST)
+    pedido_ids = [pk for pk in request.POST.getlist('pedido_ids') if pk.isdigit()]
+
+    if not pedido_ids:
+        messages.error(request, 'Seleccione al menos un pedido para facturar.')
+        return redirect('pedidos:pedido_list')
+    if not form.is_valid():
+        messages.error(request, 'Forma de pago inválida.')
+        return redirect('pedidos:pedido_list')
+
+    try:
+        facturados, errores = Pedido.facturar_en_lote(
+            pedido_ids,
+            forma_pago=form.cleaned_data['forma_pago'],
+            usuario=request.user
+        )
+    except Exception as e:
+        messages.error(request, f'Error al facturar pedidos: {str(e)}')
+        return redirect('pedidos:pedido_list')
+
+    if facturados:
+        messages.success(request, f'{len(facturados)} pedido(s) facturado(s) exitosamente.')
+    if errores:
+        messages.warning(request, f'{len(errores)} pedido(s) no pudieron facturarse.')
+
+    context = {
+        'page_title': 'Facturación de Pedidos',
+        'facturados': facturados,
+        'errores': errores,
+        'total_facturado': sum(f['total'] for f in facturados),
+        'forma_pago': dict(form.fields['forma_pago'].choices)[form.cleaned_data['forma_pago']],
+    }
+    return render(request, 'pedidos/facturar_lote.html', context)
+
+
 @login_required
 @permission_required('pedidos.delete_pedido', raise_exception=True)
 def pedido_delete(request, pk):
@@ -306,3 +339,170 @@ def pedido_delete(request, pk):
     }
     
     return render(request, 'pedidos/pedido_confirm_delete.html', context)
+
+
+def pick_list_items(filtros=None):
+    """
+    Cantidades a preparar por producto sumando todos los pedidos pendientes.
+
+    Se resuelve con una sola consulta agrupada sobre PedidoItem, trayendo
+    el stock actual del producto para calcular el faltante.
+    """
+    filtros = filtros or {}
+    items = PedidoItem.objects.filter(pedido__estado='pendiente')
+
+    if filtros.get('entrega_desde'):
+        items = items.filter(pedido__fecha_entrega_estimada__gte=filtros['entrega_desde'])
+    if filtros.get('entrega_hasta'):
+        items = items.filter(pedido__fecha_entrega_estimada__lte=filtros['entrega_hasta'])
+    if filtros.get('cliente'):
+        items = items.filter(pedido__cliente=filtros['cliente'])
+    if filtros.get('categoria'):
+        items = items.filter(product__category=filtros['categoria'])
+
+    filas = items.values(
+        'product_id',
+        'product__code',
+        'product__name',
+        'product__marca',
+        'product__category__name',
+        'product__quantity',
+    ).annotate(
+        cantidad_total=Sum('cantidad'),
+        cantidad_pedidos=Count('pedido', distinct=True),
+        primera_entrega=Min('pedido__fecha_entrega_estimada'),
+    ).order_by('product__category__name', 'product__name')
+
+    resultado = []
+    for fila in filas:
+        stock = fila['product__quantity']
+        faltante = fila['cantidad_total'] - stock
+        resultado.append({
+            'product_id': fila['product_id'],
+            'code': fila['product__code'],
+            'name': fila['product__name'],
+            'marca': fila['product__marca'] or '',
+            'category': fila['product__category__name'] or 'Sin categoría',
+            'stock': stock,
+            'cantidad': fila['cantidad_total'],
+            'pedidos': fila['cantidad_pedidos'],
+            'primera_entrega': fila['primera_entrega'],
+            'faltante': faltante if faltante > 0 else 0,
+        })
+    return resultado
+
+
+@login_required
+@permission_required('pedidos.view_pedido', raise_exception=True)
+def pick_list(request):
+    """
+    Lista de preparación: total a preparar por producto de los pedidos pendientes.
+    Con ?formato=pdf o ?formato=excel se descarga el reporte.
+    """
+    form = PickListForm(request.GET or None)
+    filtros = form.cleaned_data if form.is_valid() else {}
+    items = pick_list_items(filtros)
+
+    formato = request.GET.get('formato')
+    if formato == 'pdf':
+        return _pick_list_pdf(items)
+    if formato == 'excel':
+        return _pick_list_excel(items)
+
+    context = {
+        'page_title': 'Lista de Preparación',
+        'form': form,
+        'items': items,
+        'total_productos': len(items),
+        'productos_con_faltante': sum(1 for item in items if item['faltante'] > 0),
+        'querystring': request.GET.urlencode(),
+    }
+    return render(request, 'pedidos/pick_list.html', context)
+
+
+def _pick_list_pdf(items):
+    """Genera el PDF de la lista de preparación con reportlab."""
+    from io import BytesIO
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate, Spacer, TableStyle
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=1.5*cm,
+        leftMargin=1.5*cm,
+        topMargin=1.5*cm,
+        bottomMargin=1.5*cm
+    )
+    styles = getSampleStyleSheet()
+    fecha = timezone.now().strftime('%d/%m/%Y %H:%M')
+
+    data = [['CÓDIGO', 'PRODUCTO', 'CATEGORÍA', 'PEDIDOS', 'A PREPARAR', 'STOCK', 'FALTANTE']]
+    for item in items:
+        data.append([
+            item['code'],
+            item['name'][:40],
+            item['category'][:20],
+            item['pedidos'],
+            f"{item['cantidad']:.2f}",
+            f"{item['stock']:.2f}",
+            f"{item['faltante']:.2f}" if item['faltante'] else '-',
+        ])
+
+    tabla = LongTable(data, repeatRows=1, colWidths=[2*cm, 6*cm, 3*cm, 1.6*cm, 2.2*cm, 1.6*cm, 1.6*cm])
+    estilo = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.black),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('ALIGN', (3, 0), (-1, -1), 'RIGHT'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+    ]
+    for fila, item in enumerate(items, start=1):
+        if item['faltante']:
+            estilo.append(('TEXTCOLOR', (6, fila), (6, fila), colors.red))
+    tabla.setStyle(TableStyle(estilo))
+
+    elementos = [
+        Paragraph('LISTA DE PREPARACIÓN DE PEDIDOS', styles['Heading2']),
+        Paragraph(f'Generada el {fecha} | Productos: {len(items)}', styles['Normal']),
+        Spacer(1, 0.5*cm),
+        tabla,
+    ]
+    doc.build(elementos)
+
+    response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="preparacion_{timezone.now().strftime("%Y%m%d_%H%M")}.pdf"'
+    return response
+
+
+def _pick_list_excel(items):
+    """Genera el Excel de la lista de preparación con openpyxl."""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Preparacion"
+    ws.append(['Código', 'Producto', 'Marca', 'Categoría', 'Pedidos', 'Primera entrega', 'A preparar', 'Stock', 'Faltante'])
+    for item in items:
+        ws.append([
+            item['code'],
+            item['name'],
+            item['marca'],
+            item['category'],
+            item['pedidos'],
+            item['primera_entrega'],
+            float(item['cantidad']),
+            float(item['stock']),
+            float(item['faltante']),
+        ])
+
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = f'attachment; filename="preparacion_{timezone.now().strftime("%Y%m%d_%H%M")}.xlsx"'
+    wb.save(response)
+    return response
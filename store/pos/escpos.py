@@ -0,0 +1,217 @@
+"""
+Tickets termicos en ESC/POS generados en el servidor.
+
+El ticket se arma directamente como bytes ESC/POS (sin HTML ni dialogo de
+impresion del navegador) para impresoras de 58 mm (32 columnas) y 80 mm
+(48 columnas): cortes de linea, totales y codigo de barras con el codigo de
+la venta. Los bytes quedan en cache por venta, asi reimprimir es instantaneo.
+La clave lleva el date_updated de la venta (que tambien cambia al modificar
+sus items), asi ningun worker imprime un ticket viejo despues de una edicion.
+
+Configuracion opcional en settings.py:
+  TICKET_ANCHO_MM = 58                 # 58 u 80
+  TICKET_IMPRESORA = '/dev/usb/lp0'    # dispositivo, carpeta de spool o 'tcp://ip:9100'
+  TICKET_IMPRIMIR_AL_COBRAR = False    # imprimir automaticamente al guardar la venta
+"""
+import os
+import socket
+import textwrap
+import time
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+
+ESC = b'\x1b'
+GS = b'\x1d'
+
+INICIALIZAR = ESC + b'@'
+CODEPAGE_PC850 = ESC + b't\x02'
+IZQUIERDA = ESC + b'a\x00'
+CENTRO = ESC + b'a\x01'
+NEGRITA_ON = ESC + b'E\x01'
+NEGRITA_OFF = ESC + b'E\x00'
+DOBLE_ALTO = GS + b'!\x01'
+TAMANO_NORMAL = GS + b'!\x00'
+CORTE_PARCIAL = GS + b'V\x42\x00'  # avanza el papel y corta
+
+# Columnas con la fuente A (12 puntos) segun el ancho del papel
+COLUMNAS = {58: 32, 80: 48}
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def ancho_configurado():
+    ancho = getattr(settings, 'TICKET_ANCHO_MM', 58)
+    return ancho if ancho in COLUMNAS else 58
+
+
+def _clave_cache(venta_id, ancho_mm, modificada):
+    return f'ticket_escpos:{venta_id}:{modificada.isoformat()}:{ancho_mm}'
+
+
+def ultima_modificacion(venta_id):
+    """date_updated de la venta, o None si no existe."""
+    from .models import Sales
+
+    return Sales.objects.filter(pk=venta_id).values_list('date_updated', flat=True).first()
+
+
+def _codificar(texto):
+    """Texto -> bytes PC850; lo que no existe en la tabla se translitera ('€' -> '?')."""
+    resultado = bytearray()
+    for caracter in str(texto):
+        try:
+            resultado += caracter.encode('cp850')
+        except UnicodeEncodeError:
+            base = unicodedata.normalize('NFKD', caracter).encode('ascii', 'ignore')
+            resultado += base or b'?'
+    return bytes(resultado)
+
+
+def _monto(valor):
+    from inventory.templatetags.formato import pesos
+    return pesos(valor)
+
+
+def _cantidad(valor):
+    from inventory.templatetags.formato import cantidad
+    return cantidad(valor)
+
+
+def _columnas(izquierda, derecha, ancho):
+    """Texto a la izquierda y a la derecha en la misma linea."""
+    espacios = max(1, ancho - len(izquierda) - len(derecha))
+    return izquierda + ' ' * espacios + derecha
+
+
+def _codigo_barras(codigo):
+    """CODE128 (juego B) con el texto impreso debajo."""
+    datos = b'{B' + _codificar(codigo)[:253]
+    return (
+        CENTRO
+        + GS + b'h\x50'      # alto: 80 puntos
+        + GS + b'w\x02'      # ancho de modulo: 2 puntos
+        + GS + b'H\x02'      # texto debajo de las barras
+        + GS + b'k\x49' + bytes([len(datos)]) + datos
+        + b'\n' + IZQUIERDA
+    )
+
+
+def cargar_venta(venta_id):
+    """Venta con cliente, items y productos (sin consultas por item)."""
+    from django.db.models import Prefetch
+    from .models import Sales, salesItems
+
+    return (
+        Sales.objects.select_related('cliente')
+        .prefetch_related(Prefetch('salesitems_set', queryset=salesItems.objects.select_related('product').order_by('pk')))
+        .filter(pk=venta_id)
+        .first()
+    )
+
+
+def armar_ticket(venta, ancho_mm=58):
+    """Bytes ESC/POS del ticket de la venta (items ya precargados con cargar_venta)."""
+    from django.utils import translation
+    from django.utils.dateformat import DateFormat
+
+    ancho = COLUMNAS[ancho_mm]
+    separador = _codificar('-' * ancho + '\n')
+    with translation.override('es'):
+        fecha = DateFormat(venta.date_added).format('d/m/Y H:i')
+
+    partes = [
+        INICIALIZAR, CODEPAGE_PC850,
+        CENTRO, NEGRITA_ON, DOBLE_ALTO, _codificar('PUNTO DE VENTA\n'),
+        TAMANO_NORMAL, NEGRITA_OFF, _codificar('Recibo no oficial\n'),
+        IZQUIERDA, separador,
+        _codificar(f'Fecha: {fecha}\n'),
+        _codificar(f'Ticket: {venta.code}\n'),
+    ]
+    if venta.cliente_id:
+        for linea in textwrap.wrap(f'Cliente: {venta.cliente.name}', ancho):
+            partes.append(_codificar(linea + '\n'))
+    partes.append(separador)
+
+    # Items: nombre (con corte de linea) y debajo cantidad x precio ... total
+    for item in venta.salesitems_set.all():
+        for linea in textwrap.wrap(item.product.name, ancho) or ['']:
+            partes.append(_codificar(linea + '\n'))
+        detalle = f'  {_cantidad(item.qty)} x {_monto(item.price)}'
+        partes.append(_codificar(_columnas(detalle, _monto(item.total), ancho) + '\n'))
+
+    partes += [
+        separador,
+        NEGRITA_ON, DOBLE_ALTO,
+        _codificar(_columnas('TOTAL:', _monto(venta.grand_total), ancho) + '\n'),
+        TAMANO_NORMAL, NEGRITA_OFF,
+        _codificar(_columnas('Forma de pago:', venta.get_forma_pago_display(), ancho) + '\n'),
+    ]
+    if venta.tendered_amount:
+        partes += [
+            _codificar(_columnas('Recibido:', _monto(venta.tendered_amount), ancho) + '\n'),
+            _codificar(_columnas('Vuelto:', _monto(venta.amount_change), ancho) + '\n'),
+        ]
+    partes += [
+        separador,
+        _codigo_barras(venta.code),
+        CENTRO, _codificar('Gracias por su compra!\n'), IZQUIERDA,
+        b'\n\n\n', CORTE_PARCIAL,
+    ]
+    return b''.join(partes)
+
+
+def ticket_venta(venta_id, ancho_mm=None):
+    """
+    Bytes ESC/POS del ticket de una venta, desde la cache si ya se armo.
+    Retorna None si la venta no existe.
+    """
+    ancho_mm = ancho_mm if ancho_mm in COLUMNAS else ancho_configurado()
+    modificada = ultima_modificacion(venta_id)
+    if modificada is None:
+        return None
+    clave = _clave_cache(venta_id, ancho_mm, modificada)
+    datos = cache.get(clave)
+    if datos is None:
+        venta = cargar_venta(venta_id)
+        if venta is None:
+            return None
+        datos = armar_ticket(venta, ancho_mm)
+        cache.set(clave, datos, CACHE_TIMEOUT)
+    return datos
+
+
+def enviar_a_impresora(datos, destino=None):
+    """
+    Envia los bytes a la impresora configurada (TICKET_IMPRESORA):
+      - 'tcp://192.168.0.50:9100': impresora de red (puerto RAW)
+      - una carpeta existente: deja un archivo .bin para el spool
+      - cualquier otra ruta: dispositivo ('/dev/usb/lp0', '\\\\.\\COM3', ...)
+    Lanza ValueError si no hay impresora configurada y OSError si falla la escritura.
+    """
+    destino = destino or getattr(settings, 'TICKET_IMPRESORA', '')
+    if not destino:
+        raise ValueError('No hay impresora configurada (TICKET_IMPRESORA).')
+
+    if destino.startswith('tcp://'):
+        host, _, puerto = destino[len('tcp://'):].partition(':')
+        with socket.create_connection((host, int(puerto or 9100)), timeout=5) as conexion:
+            conexion.sendall(datos)
+    elif os.path.isdir(destino):
+        nombre = os.path.join(destino, f'ticket-{time.time_ns()}.bin')
+        with open(nombre + '.tmp', 'wb') as archivo:
+            archivo.write(datos)
+        os.replace(nombre + '.tmp', nombre)  # el spooler nunca ve un archivo a medias
+    else:
+        with open(destino, 'wb') as dispositivo:
+            dispositivo.write(datos)
+
+
+def imprimir_venta(venta_id, ancho_mm=None, destino=None):
+    """Arma (o toma de la cache) el ticket de la venta y lo envia a la impresora."""
+    datos = ticket_venta(venta_id, ancho_mm)
+    if datos is None:
+        raise ValueError('La venta no existe.')
+    enviar_a_impresora(datos, destino)
+    return len(datos)
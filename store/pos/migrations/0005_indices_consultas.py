@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:34
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_movimientocc_indices'),
+        ('inventory', '0009_products_indice_activos'),
+        ('pos', '0004_alter_salesitems_qty'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sales',
+            index=models.Index(fields=['date_added'], name='sales_date_added_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sales',
+            index=models.Index(fields=['cliente', 'date_added'], name='sales_cliente_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sales',
+            index=models.Index(django.db.models.functions.datetime.TruncDate('date_added'), name='sales_date_added_dia_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesitems',
+            index=models.Index(fields=['sale', 'product'], name='salesitems_sale_product_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesitems',
+            index=models.Index(fields=['product', 'sale'], name='salesitems_product_sale_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0005_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sales',
+            name='uuid',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True, verbose_name='UUID del POS'),
+        ),
+    ]
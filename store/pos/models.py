@@ -3,6 +3,7 @@ from unicodedata import category
 from django.db import models
 from django.utils import timezone
 from django.db import models
+from django.db.models.functions import TruncDate
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -57,9 +58,201 @@ class Sales(models.Model):
         verbose_name='Lista de Precios'
     )  
 
+    # Identificador generado por el POS (ventas cargadas sin conexión):
+    # evita duplicar la venta si el ticket se reenvía
+    uuid = models.UUIDField(
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+        verbose_name='UUID del POS'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_added'], name='sales_date_added_idx'),
+            models.Index(fields=['cliente', 'date_added'], name='sales_cliente_date_idx'),
+            # Reportes y caja filtran por date_added__date
+            models.Index(TruncDate('date_added'), name='sales_date_added_dia_idx'),
+        ]
+
     def __str__(self):
         return self.code
+
+    @classmethod
+    def generar_codigos(cls, cantidad=1):
+        """
+        Retorna los proximos `cantidad` codigos de venta libres.
+
+        Formato: prefijo (año + año) + correlativo de 5 digitos, usando
+        los primeros huecos libres igual que el POS.
+        """
+        pref = str(datetime.now().year + datetime.now().year)
+        usados = set(cls.objects.filter(code__startswith=pref).values_list('code', flat=True))
+        codigos = []
+        i = 1
+        while len(codigos) < cantidad:
+            code = pref + '{:0>5}'.format(i)
+            if code not in usados:
+                codigos.append(code)
+            i += 1
+        return codigos
     
+    @classmethod
+    def registrar_ticket(cls, datos, usuario=None, code=None):
+        """
+        Registra una venta del POS con su stock, caja / cuenta corriente y pedido.
+
+        `datos` trae los mismos campos que el formulario del POS (sub_total, tax,
+        tax_amount, grand_total, tendered_amount, amount_change, cliente_id,
+        tipo_lista, forma_pago, monto_transferencia, cuenta_corriente, pedido_id)
+        más `items` ([{'product_id', 'qty', 'price'}]) y opcionalmente `uuid`
+        y `fecha` (ventas cargadas sin conexión).
+
+        Retorna (venta, pedido); pedido es None si la venta no viene de un pedido.
+        Lanza ValueError si un producto o el cliente no existen.
+        """
+        from decimal import Decimal
+        from django.db import transaction
+        from django.utils.dateparse import parse_datetime
+        from customers.models import Cliente, MovimientoCuentaCorriente
+        from finances.models import MovimientoCaja
+
+        cliente = None
+        if datos.get('cliente_id') not in (None, '', 'None'):
+            cliente = Cliente.objects.filter(pk=datos['cliente_id']).first()
+
+        fecha = None
+        if datos.get('fecha'):
+            fecha = parse_datetime(str(datos['fecha']))
+            if fecha is not None and timezone.is_aware(fecha):
+                fecha = timezone.make_naive(fecha)
+            if fecha is not None and fecha > timezone.now():
+                fecha = None  # reloj del equipo adelantado
+        fecha = fecha or timezone.now()
+
+        items = datos.get('items') or []
+        forma_pago = datos.get('forma_pago', 'efectivo')
+
+        with transaction.atomic():
+            productos = Products.objects.in_bulk({item['product_id'] for item in items})
+            faltantes = [str(item['product_id']) for item in items if int(item['product_id']) not in productos]
+            if faltantes:
+                raise ValueError(f"Producto inexistente: {', '.join(faltantes)}")
+
+            venta = cls.objects.create(
+                code=code or cls.generar_codigos()[0],
+                sub_total=datos['sub_total'],
+                tax=datos.get('tax', 0) or 0,
+                tax_amount=datos.get('tax_amount', 0) or 0,
+                grand_total=datos['grand_total'],
+                tendered_amount=datos.get('tendered_amount', 0) or 0,
+                amount_change=datos.get('amount_change', 0) or 0,
+                cliente=cliente,
+                tipo_lista=datos.get('tipo_lista', 'minorista'),
+                forma_pago=forma_pago,
+                date_added=fecha,
+                uuid=datos.get('uuid') or None,
+            )
+
+            cuenta_corriente = str(datos.get('cuenta_corriente', '0')) == '1'
+            if not cuenta_corriente:
+                MovimientoCaja.crear_desde_venta(
+                    venta=venta,
+                    forma_pago=forma_pago,
+                    monto_transferencia=Decimal(str(datos.get('monto_transferencia', 0) or 0)),
+                    usuario=usuario,
+                    fecha=fecha,
+                )
+
+            for item in items:
+                salesItems(
+                    sale=venta,
+                    product=productos[int(item['product_id'])],
+                    qty=item['qty'],
+                    price=item['price'],
+                    total=float(item['qty']) * float(item['price']),
+                ).save()
+
+            pedido = None
+            if datos.get('pedido_id'):
+                from pedidos.models import Pedido
+                pedido = Pedido.objects.filter(pk=datos['pedido_id']).first()
+                if pedido:
+                    pedido.venta = venta
+                    pedido.estado = 'facturado'
+                    pedido.fecha_entrega_real = fecha  # la del ticket, igual que los movimientos de cuenta
+                    pedido.save()
+
+            if cliente and cuenta_corriente:
+                movimiento = MovimientoCuentaCorriente.objects.create(
+                    cliente=cliente,
+                    tipo='venta',
+                    monto=venta.grand_total,
+                    venta=venta,
+                    notas=f'Venta {venta.code}'
+                )
+                # fecha es auto_now_add: create ignora la fecha del ticket (ventas sin conexion)
+                MovimientoCuentaCorriente.objects.filter(pk=movimiento.pk).update(fecha=fecha)
+        return venta, pedido
+
+    @classmethod
+    def sincronizar_tickets(cls, tickets, usuario=None):
+        """
+        Registra un lote de ventas cargadas en el POS (con o sin conexión).
+
+        Idempotente: cada ticket trae un `uuid` y los que ya existen se informan
+        como 'duplicado' sin volver a registrarse. Todo el lote corre en una
+        transacción; un ticket con error se descarta solo (savepoint) y el
+        resto se registra igual.
+
+        Retorna una lista con un resultado por ticket, en el mismo orden:
+        {'uuid', 'status': 'ok'|'duplicado'|'error', 'sale', 'code', 'msg'}.
+        """
+        import uuid as uuid_lib
+        from django.db import IntegrityError, transaction
+
+        resultados = []
+        with transaction.atomic():
+            uuids = []
+            for ticket in tickets:
+                try:
+                    uuids.append(uuid_lib.UUID(str(ticket.get('uuid'))))
+                except ValueError:
+                    uuids.append(None)
+            existentes = {
+                v.uuid: v for v in cls.objects.filter(uuid__in=[u for u in uuids if u]).only('pk', 'code', 'uuid')
+            }
+            nuevos = sum(1 for u in uuids if u and u not in existentes)
+            codigos = iter(cls.generar_codigos(nuevos)) if nuevos else iter(())
+
+            for ticket, uuid in zip(tickets, uuids):
+                resultado = {'uuid': str(ticket.get('uuid')), 'status': 'error', 'sale': None, 'code': None, 'msg': ''}
+                resultados.append(resultado)
+                if uuid is None:
+                    resultado['msg'] = 'UUID inválido'
+                    continue
+                if uuid in existentes:
+                    resultado.update(status='duplicado', sale=existentes[uuid].pk, code=existentes[uuid].code)
+                    continue
+                try:
+                    with transaction.atomic():
+                        venta, _ = cls.registrar_ticket(dict(ticket, uuid=uuid), usuario=usuario, code=next(codigos))
+                except IntegrityError:
+                    # Otro envío del mismo ticket ganó la carrera
+                    previa = cls.objects.filter(uuid=uuid).first()
+                    if previa:
+                        resultado.update(status='duplicado', sale=previa.pk, code=previa.code)
+                    else:
+                        resultado['msg'] = 'No se pudo registrar la venta'
+                    continue
+                except (ValueError, KeyError, TypeError, ArithmeticError) as e:
+                    resultado['msg'] = str(e)
+                    continue
+                existentes[uuid] = venta
+                resultado.update(status='ok', sale=venta.pk, code=venta.code)
+        return resultados
+
     def get_nombre_cliente(self):
         """
         Retorna el nombre del cliente o 'Cliente General' si no hay cliente.
@@ -83,15 +276,22 @@ class salesItems(models.Model):
     qty = models.DecimalField(max_digits=10, decimal_places=3, default=0)
     total = models.FloatField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['sale', 'product'], name='salesitems_sale_product_idx'),
+            models.Index(fields=['product', 'sale'], name='salesitems_product_sale_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         """Guarda el item guardando el costo historico del producto."""
         # Guardar costo unitario si no esta establecido
         if self.costo_unitario == 0 and self.product:
-            self.costo_unitario = float(self.product.cost)
+            self.costo_unitario = float(self.product.costo_venta())
 
         print(f"Guardando SalesItem: Producto: {self.product.name}, Cantidad: {self.qty}, Precio: {self.price}, Costo: {self.costo_unitario}")
         super().save(*args, **kwargs)
         self.update_product_quantity()
+        self.marcar_venta_modificada()
 
     def update_product_quantity(self):
         """Actualiza la cantidad del producto despues de la venta."""
@@ -100,8 +300,17 @@ class salesItems(models.Model):
     def delete(self, *args, **kwargs):
         """Restaura la cantidad del producto al eliminar el item."""
         print(f"Eliminando SalesItem: Producto: {self.product.name}, Cantidad: {self.qty}")
+        from decimal import Decimal
+
+        # Las unidades vuelven al stock al costo con que se vendieron
+        self.product.ajustar_costo_promedio(entrada=(self.qty, Decimal(str(self.costo_unitario))))
         self.product.increase_quantity(self.qty)
         super().delete(*args, **kwargs)
+        self.marcar_venta_modificada()
+
+    def marcar_venta_modificada(self):
+        """Toca date_updated de la venta: el ticket en cache (pos.escpos) va por esa fecha."""
+        Sales.objects.filter(pk=self.sale_id).update(date_updated=timezone.now())
 
     @property
     def ganancia(self):
@@ -8,9 +8,12 @@ handler403 = views.error_403
 app_name = 'pos'
 urlpatterns = [
     path('pos', views.pos, name="pos-page"),
+    path('pos/catalogo', views.catalogo, name="catalogo"),
     path('checkout-modal', views.checkout_modal, name="checkout-modal"),
     path('save-pos', views.save_pos, name="save-pos"),
+    path('sync-ventas', views.sync_ventas, name="sync-ventas"),
     path('sales', views.salesList, name="sales-page"),
     path('receipt', views.receipt, name="receipt-modal"),
+    path('receipt/escpos', views.receipt_escpos, name="receipt-escpos"),
     path('delete_sale', views.delete_sale, name="delete-sale"),
 ]   
\ No newline at end of file
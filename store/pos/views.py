@@ -15,39 +15,58 @@ from django.contrib.auth.decorators import login_required, permission_required
 from django.shortcuts import render
 
 from django.db import transaction
+from django.views.decorators.http import condition
 
 @login_required
 @permission_required('pos.view_sales', raise_exception=True)
 def pos(request):
-    
-    products = Products.objects.filter(status=1).order_by('name')
-    product_json = []
-    for product in products:
-        product_json.append({
-            'id': product.id,
-            'name': product.name,
-            'precio_mayorista': float(product.precio_mayorista),
-            'precio_minorista': float(product.precio_minorista),
-            'price': float(product.precio_minorista),
-            'codigo_barras': product.codigo_barras or '',
-            'tipo_venta': product.tipo_venta,
-            'plu': product.plu or '',
-        })
-    
-    clientes = Cliente.objects.filter(activo=True).order_by('name')
-    
     # NUEVO: Verificar si hay datos de pedido a cargar desde sesión
     pedido_data = request.session.pop('pedido_a_facturar', None)
     
+    # Los productos no van en la pagina: el POS los pide a pos:catalogo al abrir
     context = {
         'page_title': "Point of Sale",
-        'products': products,
-        'product_json': json.dumps(product_json),
-        'clientes': clientes,
         'pedido_data': json.dumps(pedido_data) if pedido_data else None,
     }
     return render(request, 'pos/pos.html', context)
 
+def _marca_catalogo(request):
+    """ETag del catalogo: cantidad y ultima modificacion de los productos activos."""
+    from django.db.models import Count, Max
+
+    marca = Products.objects.filter(status=1).aggregate(cantidad=Count('pk'), modificado=Max('date_updated'))
+    modificado = marca['modificado'].isoformat() if marca['modificado'] else ''
+    return f"{marca['cantidad']}-{modificado}"
+
+@login_required
+@permission_required('pos.view_sales', raise_exception=True)
+@condition(etag_func=_marca_catalogo)
+def catalogo(request):
+    """
+    Productos activos para el lector de códigos, los PLU de balanza y la
+    búsqueda sin conexión del POS. La página lo pide una vez al abrir; si
+    no cambió desde la última vez el navegador recibe un 304 (ETag).
+    """
+    productos = [
+        {
+            'id': pk,
+            'name': nombre,
+            'precio_mayorista': float(mayorista),
+            'precio_minorista': float(minorista),
+            'price': float(minorista),
+            'codigo_barras': codigo_barras or '',
+            'tipo_venta': tipo_venta,
+            'plu': plu or '',
+        }
+        for pk, nombre, mayorista, minorista, codigo_barras, tipo_venta, plu in (
+            Products.objects.filter(status=1).order_by('name')
+            .values_list('pk', 'name', 'precio_mayorista', 'precio_minorista', 'codigo_barras', 'tipo_venta', 'plu')
+        )
+    ]
+    response = JsonResponse({'productos': productos})
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 @login_required
 def checkout_modal(request):
     grand_total = 0
@@ -71,101 +90,28 @@ def save_pos(request):
     resp = {'status': 'failed', 'msg': ''}
     data = request.POST
 
-    pref = datetime.now().year + datetime.now().year
-    i = 1
-    while True:
-        code = '{:0>5}'.format(i)
-        i += 1
-        check = Sales.objects.filter(code=str(pref) + str(code)).exists()
-        if not check:
-            break
-    code = str(pref) + str(code)
-
     try:
-        cliente_id = data.get('cliente_id', None)
-        cliente = None
-        if cliente_id and cliente_id != '':
-            try:
-                cliente = Cliente.objects.get(pk=cliente_id)
-            except Cliente.DoesNotExist:
-                cliente = None
-        
-        tipo_lista = data.get('tipo_lista', 'minorista')
-        forma_pago = data.get('forma_pago', 'efectivo')
-        monto_transferencia = Decimal(data.get('monto_transferencia', 0) or 0)
-        pedido_id = data.get('pedido_id', None)
-        
-        sales = Sales(
-            code=code,
-            sub_total=data['sub_total'],
-            tax=data['tax'],
-            tax_amount=data['tax_amount'],
-            grand_total=data['grand_total'],
-            tendered_amount=data['tendered_amount'],
-            amount_change=data['amount_change'],
-            cliente=cliente,
-            tipo_lista=tipo_lista,
-            forma_pago=forma_pago
-        )
-        
-        sales.save()
+        datos = {campo: data.get(campo) for campo in (
+            'sub_total', 'tax', 'tax_amount', 'grand_total', 'tendered_amount', 'amount_change',
+            'cliente_id', 'tipo_lista', 'forma_pago', 'monto_transferencia', 'cuenta_corriente', 'pedido_id',
+        )}
+        datos['items'] = [
+            {'product_id': prod_id, 'qty': qty, 'price': price}
+            for prod_id, qty, price in zip(data.getlist('product[]'), data.getlist('qty[]'), data.getlist('price[]'))
+        ]
+        sales, pedido = Sales.registrar_ticket(datos, usuario=request.user)
 
-        cuenta_corriente = data.get('cuenta_corriente', '0')
-        if cuenta_corriente != '1':
-            from finances.models import MovimientoCaja
-            MovimientoCaja.crear_desde_venta(
-                venta=sales,
-                forma_pago=forma_pago,
-                monto_transferencia=monto_transferencia,
-                usuario=request.user
-            )
-
-        sale_id = sales.pk
-        i = 0
-        for prod_id in data.getlist('product[]'):
-            product = get_object_or_404(Products, id=prod_id)
-            qty = data.getlist('qty[]')[i]
-            price = data.getlist('price[]')[i]
-            total = float(qty) * float(price)
-            sales_item = salesItems(
-                sale=sales,
-                product=product,
-                qty=qty,
-                price=price,
-                total=total
-            )
-            sales_item.save()
-            i += 1
-
-        # NUEVO: Si viene de un pedido, actualizar el pedido
-        if pedido_id:
-            try:
-                from pedidos.models import Pedido
-                pedido = Pedido.objects.get(pk=pedido_id)
-                pedido.venta = sales
-                pedido.estado = 'facturado'
-                pedido.fecha_entrega_real = timezone.now()
-                pedido.save()
-                messages.success(request, f"Pedido {pedido.code} facturado exitosamente.")
-            except:
-                pass  # Si no se encuentra el pedido, continuar normal
+        if pedido:
+            messages.success(request, f"Pedido {pedido.code} facturado exitosamente.")
 
         resp['status'] = 'success'
-        resp['sale'] = sale_id
-        
-        # Registrar en cuenta corriente si corresponde
-        if cliente and cuenta_corriente == '1':
-            from customers.models import MovimientoCuentaCorriente
-            MovimientoCuentaCorriente.objects.create(
-                cliente=cliente,
-                tipo='venta',
-                monto=sales.grand_total,
-                venta=sales,
-                notas=f'Venta {sales.code}'
-            )
-            messages.success(request, f"Venta registrada en cuenta corriente de {cliente.name}.")
-        elif cliente:
-            messages.success(request, f"Venta registrada para {cliente.name}.")
+        resp['sale'] = sales.pk
+        resp.update(_imprimir_al_cobrar([sales.pk]))
+
+        if sales.cliente and datos['cuenta_corriente'] == '1':
+            messages.success(request, f"Venta registrada en cuenta corriente de {sales.cliente.name}.")
+        elif sales.cliente:
+            messages.success(request, f"Venta registrada para {sales.cliente.name}.")
         else:
             messages.success(request, "Venta registrada (Cliente General).")
             
@@ -174,6 +120,50 @@ def save_pos(request):
 
     return JsonResponse(resp)
 
+def _imprimir_al_cobrar(sale_ids):
+    """Ticket directo a la impresora termica (si TICKET_IMPRIMIR_AL_COBRAR esta activo)."""
+    from django.conf import settings
+    if not sale_ids or not getattr(settings, 'TICKET_IMPRIMIR_AL_COBRAR', False):
+        return {}
+    from .escpos import imprimir_venta
+    try:
+        for sale_id in sale_ids:
+            imprimir_venta(sale_id)
+        return {'impreso': True}
+    except (ValueError, OSError) as e:
+        return {'impreso': False, 'msg_impresion': str(e)}
+
+@login_required
+@permission_required('pos.add_sales', raise_exception=True)
+def sync_ventas(request):
+    """
+    Sincroniza las ventas que el POS guardo en el navegador (con o sin conexion).
+
+    Recibe JSON {"ventas": [{uuid, fecha, items: [...], ...campos del POS}]} y
+    responde un resultado por ticket. Reenviar un ticket ya registrado no lo
+    duplica: vuelve como 'duplicado' con la venta original.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'status': 'failed', 'msg': 'Método no permitido.'}, status=405)
+    try:
+        tickets = json.loads(request.body or b'{}').get('ventas') or []
+    except (ValueError, AttributeError):
+        return JsonResponse({'status': 'failed', 'msg': 'JSON inválido.'}, status=400)
+    if not isinstance(tickets, list) or not all(isinstance(t, dict) for t in tickets):
+        return JsonResponse({'status': 'failed', 'msg': 'Formato inválido.'}, status=400)
+
+    resultados = Sales.sincronizar_tickets(tickets[:200], usuario=request.user)
+
+    registradas = [r['sale'] for r in resultados if r['status'] == 'ok']
+    if len(registradas) == 1:
+        messages.success(request, "Venta registrada.")
+    elif registradas:
+        messages.success(request, f"{len(registradas)} ventas sincronizadas.")
+
+    resp = {'status': 'success', 'resultados': resultados}
+    resp.update(_imprimir_al_cobrar(registradas))
+    return JsonResponse(resp)
+
 @login_required
 @permission_required('pos.view_sales', raise_exception=True)
 def salesList(request):
@@ -281,28 +271,66 @@ def create_sale(request):
 
 @login_required
 def receipt(request):
-    id = request.GET.get('id')
-    sales = Sales.objects.filter(id=id).first()
-    transaction = {}
-    for field in Sales._meta.get_fields():
-        if field.related_model is None: 
-            transaction[field.name] = getattr(sales, field.name)
-    if 'tax_amount' in transaction:
-        transaction['tax_amount'] = format(float(transaction['tax_amount']))
-    
-    transaction['cliente_nombre'] = sales.get_nombre_cliente()
-    
-    ItemList = salesItems.objects.filter(sale=sales).all()
-    
+    from django.conf import settings
+    from django.http import Http404
+    from .escpos import ancho_configurado, cargar_venta
+
+    try:
+        venta_id = int(request.GET.get('id'))
+    except (TypeError, ValueError):
+        raise Http404('Venta no encontrada')
+
+    # Venta, cliente, items y productos en una sola carga (sin consulta por item)
+    sales = cargar_venta(venta_id)
+    if sales is None:
+        raise Http404('Venta no encontrada')
+
     with translation.override('es'):
         formatted_date = DateFormat(sales.date_added).format('d \d\e F Y')
     context = {
-        "transaction": transaction,
-        "salesItems": ItemList,
+        "transaction": sales,
+        "salesItems": sales.salesitems_set.all(),
         "formatted_date": formatted_date,
+        "ancho_ticket": ancho_configurado(),
+        "impresora_configurada": bool(getattr(settings, 'TICKET_IMPRESORA', '')),
     }
     return render(request, 'pos/receipt.html', context)
 
+@login_required
+def receipt_escpos(request):
+    """
+    Ticket de la venta en bytes ESC/POS (?id=, ?ancho=58|80).
+    GET: descarga el .bin (para reenviarlo a la impresora del mostrador).
+    POST: lo envia a la impresora configurada en TICKET_IMPRESORA.
+    """
+    from django.http import Http404
+    from .escpos import imprimir_venta, ticket_venta
+
+    try:
+        venta_id = int(request.GET.get('id') or request.POST.get('id'))
+    except (TypeError, ValueError):
+        raise Http404('Venta no encontrada')
+    try:
+        ancho = int(request.GET.get('ancho') or request.POST.get('ancho') or 0)
+    except ValueError:
+        ancho = 0
+
+    if request.method == 'POST':
+        resp = {'status': 'failed', 'msg': ''}
+        try:
+            imprimir_venta(venta_id, ancho)
+            resp['status'] = 'success'
+        except (ValueError, OSError) as e:
+            resp['msg'] = str(e)
+        return JsonResponse(resp)
+
+    datos = ticket_venta(venta_id, ancho)
+    if datos is None:
+        raise Http404('Venta no encontrada')
+    response = HttpResponse(datos, content_type='application/octet-stream')
+    response['Content-Disposition'] = f'attachment; filename="ticket-{venta_id}.bin"'
+    return response
+
 @login_required
 @permission_required('pos.delete_sales', raise_exception=True)
 def delete_sale(request):
@@ -311,23 +339,11 @@ def delete_sale(request):
     try:
         sale = Sales.objects.get(id=id)
         with transaction.atomic():
-            # Revertir movimientos de caja
-            from finances.models import MovimientoCaja, Caja
-            movimientos = MovimientoCaja.objects.filter(venta=sale)
-            caja = Caja.get_instance()
-            for mov in movimientos:
-                if mov.afecta_efectivo:
-                    if mov.es_ingreso:
-                        caja.saldo_efectivo -= mov.monto
-                    else:
-                        caja.saldo_efectivo += mov.monto
-                if mov.afecta_banco:
-                    if mov.es_ingreso:
-                        caja.saldo_banco -= mov.monto
-                    else:
-                        caja.saldo_banco += mov.monto
-            caja.save()
-            movimientos.delete()
+            # Revertir movimientos de caja: MovimientoCaja.delete devuelve el saldo
+            # a la Caja e invalida el flujo de caja si la venta es de un dia cerrado
+            from finances.models import MovimientoCaja
+            for mov in MovimientoCaja.objects.filter(venta=sale):
+                mov.delete()
 
             for item in sale.salesitems_set.all():
                 item.delete()
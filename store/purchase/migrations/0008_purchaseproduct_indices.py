@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_products_indice_activos'),
+        ('purchase', '0007_alter_purchaseproduct_qty'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaseproduct',
+            index=models.Index(fields=['product', 'date_added'], name='purchprod_product_date_idx'),
+        ),
+    ]
@@ -90,6 +90,11 @@ class PurchaseProduct(models.Model):
     date_added = models.DateTimeField(default=timezone.now)
     date_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'date_added'], name='purchprod_product_date_idx'),
+        ]
+
     def clean(self):
         if self.qty <= 0:
             raise ValidationError("The quantity must be greater than zero.")
@@ -102,6 +107,7 @@ class PurchaseProduct(models.Model):
         
         with transaction.atomic():
             
+            previous_instance = None
             if self.pk:
             
                 previous_instance = PurchaseProduct.objects.get(pk=self.pk)
@@ -112,6 +118,14 @@ class PurchaseProduct(models.Model):
 
             # Actualizar el producto asociado
             if self.product:
+                # Costo promedio: si se modifico la compra se quita lo anterior y se ingresa lo nuevo
+                if previous_instance is not None and previous_instance.product_id == self.product_id:
+                    self.product.ajustar_costo_promedio(
+                        entrada=(self.qty, self.cost),
+                        salida=(previous_instance.qty, previous_instance.cost),
+                    )
+                elif previous_instance is None:
+                    self.product.ajustar_costo_promedio(entrada=(self.qty, self.cost))
                 self.product.update_quantity_on_purchase(quantity_difference)
                 self.product.update_cost(self.cost)
                 
@@ -120,8 +134,9 @@ class PurchaseProduct(models.Model):
         with transaction.atomic():
             if self.product:
                 # Actualizar el producto asociado antes de eliminar la compra
+                self.product.ajustar_costo_promedio(salida=(self.qty, self.cost))
                 self.product.decrease_quantity(self.qty)
-                self.product.update_cost_after_deletion(self.cost)
+                self.product.update_cost_after_deletion(self)
             super().delete(*args, **kwargs)
             
     def __str__(self):
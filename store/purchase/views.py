@@ -4,11 +4,9 @@ from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMix
 from django.views import generic
 from django.contrib import messages
 from django.contrib.messages.views import SuccessMessageMixin
-from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.db import transaction
-import json
 from decimal import Decimal
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
@@ -84,18 +82,7 @@ class PurchaseCreate(LoginRequiredMixin, PermissionRequiredMixin, generic.Templa
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['suppliers'] = Supplier.objects.all().order_by('name')
-        context['products'] = Products.objects.exclude(tipo_venta='fraccionable').order_by('name')
-        
-        # Crear JSON de productos para JavaScript
-        products_json = {}
-        for product in context['products']:
-            products_json[product.id] = {
-                'id': product.id,
-                'name': product.name,
-                'cost': float(product.cost),
-            }
-        context['products_json'] = json.dumps(products_json)
-        
+        # Los productos se buscan con inventory:api_buscar_productos (?compra=1)
         return context
     
     @method_decorator(csrf_exempt)
@@ -185,22 +172,11 @@ class PurchaseUpdate(LoginRequiredMixin, PermissionRequiredMixin, generic.View):
         purchase = get_object_or_404(Purchase, pk=pk)
         items = purchase.items.all()
         suppliers = Supplier.objects.all().order_by('name')
-        products = Products.objects.exclude(tipo_venta='fraccionable').order_by('name')
-        
-        products_json = {}
-        for product in products:
-            products_json[product.id] = {
-                'id': product.id,
-                'name': product.name,
-                'cost': float(product.cost),
-            }
         
         context = {
             'purchase': purchase,
             'items': items,
             'suppliers': suppliers,
-            'products': products,
-            'products_json': json.dumps(products_json),
         }
         return render(request, self.template_name, context)
 
@@ -223,8 +199,10 @@ class PurchaseUpdate(LoginRequiredMixin, PermissionRequiredMixin, generic.View):
                 purchase.supplier = supplier
                 purchase.numero_comprobante = numero_comprobante
 
-                # Borrar items anteriores y recrear
-                purchase.items.all().delete()
+                # Borrar items anteriores y recrear (uno por uno: PurchaseProduct.delete
+                # descuenta el stock y saca las unidades del costo promedio)
+                for item in purchase.items.select_related('product'):
+                    item.delete()
 
                 total = Decimal(0)
                 for i in range(len(product_ids)):
@@ -354,16 +332,3 @@ def purchase_pagar_view(request, pk):
         'purchase': purchase,
     }
     return render(request, 'purchases/purchase_pagar.html', context)
-
-@login_required
-def api_productos_compra(request):
-    """Devuelve lista de productos disponibles para compra en formato JSON."""
-    products = Products.objects.exclude(tipo_venta='fraccionable').order_by('name')
-    products_json = {}
-    for product in products:
-        products_json[product.id] = {
-            'id': product.id,
-            'name': product.name,
-            'cost': float(product.cost),
-        }
-    return JsonResponse(products_json)
\ No newline at end of file
@@ -1,3 +1,18 @@
 from django.contrib import admin
+from .models import ListaPreciosVersion
 
-# Register your models here.
+
+@admin.register(ListaPreciosVersion)
+class ListaPreciosVersionAdmin(admin.ModelAdmin):
+    """Versiones publicadas de las listas de precios (solo lectura)"""
+
+    list_display = ['fecha', 'tipo_lista', 'stock', 'categorias', 'cantidad_productos', 'descargas', 'usuario']
+    list_filter = ['tipo_lista', 'stock', 'fecha']
+    exclude = ['filas']
+    readonly_fields = [
+        'tipo_lista', 'stock', 'categorias', 'nombre_contacto', 'telefono_contacto',
+        'huella', 'cantidad_productos', 'archivo', 'descargas', 'usuario',
+    ]
+
+    def has_add_permission(self, request):
+        return False
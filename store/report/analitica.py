@@ -0,0 +1,474 @@
+"""
+Cache analitica en memoria de los items de venta, por columnas (NumPy).
+
+La tabla de hechos (un renglon por salesItems) se carga una sola vez en
+arreglos NumPy compactos, una columna por dato:
+
+  item, venta, fecha, producto, categoria, marca, cliente, tipo_lista,
+  forma_pago, qty, price, costo_unitario
+
+y despues se actualiza de a poco: solo se leen los items nuevos (id mayor
+al ultimo cargado) y los de las ventas modificadas desde la ultima
+actualizacion (Sales.date_updated, que tambien tocan salesItems.save /
+delete y el recalculo de costos). Los productos modificados desde entonces
+(Products.date_updated: categoria o marca) se corrigen en las columnas sin
+releer items. Si desaparecieron items (borrados) se recarga todo.
+
+Sobre los arreglos, consultar() agrupa, filtra y suma en milisegundos
+(np.unique + np.bincount), por ejemplo venta por categoria y por mes de los
+clientes mayoristas. Si la tabla no entra en ANALITICA_MAX_MB la misma
+consulta se resuelve en SQL con el ORM, con el mismo resultado.
+
+Configuracion opcional en settings.py:
+  ANALITICA_MAX_MB = 256   # tope de memoria de la tabla en cada proceso
+
+Uso:
+    consultar(agrupar=['categoria', 'mes'], filtros={'tipo_lista': 'mayorista'})
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+
+DIMENSIONES = {
+    'anio': 'Año',
+    'mes': 'Mes',
+    'dia': 'Día',
+    'dia_semana': 'Día de la semana',
+    'hora': 'Hora',
+    'producto': 'Producto',
+    'categoria': 'Categoría',
+    'marca': 'Marca',
+    'cliente': 'Cliente',
+    'tipo_lista': 'Lista de precios',
+    'forma_pago': 'Forma de pago',
+}
+VALORES = {
+    'venta': 'Venta',
+    'unidades': 'Unidades',
+    'costo': 'Costo',
+    'margen': 'Margen',
+    'tickets': 'Tickets',
+    'items': 'Items',
+}
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+TIPOS_LISTA = ['minorista', 'mayorista']
+FORMAS_PAGO = ['efectivo', 'banco']
+
+# Tipos de cada columna (bytes por renglon = suma de los tamanos)
+COLUMNAS = {
+    'item': 'int64',
+    'venta': 'int32',
+    'fecha': 'datetime64[s]',
+    'producto': 'int32',
+    'categoria': 'int32',
+    'marca': 'int32',
+    'cliente': 'int32',
+    'tipo_lista': 'int8',
+    'forma_pago': 'int8',
+    'qty': 'float64',
+    'price': 'float64',
+    'costo_unitario': 'float64',
+}
+CAMPOS = (
+    'pk', 'sale_id', 'sale__date_added', 'product_id', 'product__category_id', 'product__marca',
+    'sale__cliente_id', 'sale__tipo_lista', 'sale__forma_pago', 'qty', 'price', 'costo_unitario',
+)
+LOTE = 20000
+REFRESCO_SEGUNDOS = 30  # como mucho una verificacion de cambios cada tanto
+
+
+def limite_bytes():
+    return getattr(settings, 'ANALITICA_MAX_MB', 256) * 1024 * 1024
+
+
+def bytes_por_fila():
+    import numpy as np
+
+    return sum(np.dtype(tipo).itemsize for tipo in COLUMNAS.values())
+
+
+class TablaVentas:
+    """Items de venta en columnas NumPy, con actualizacion incremental."""
+
+    def __init__(self):
+        self.columnas = None
+        self.marcas = []          # codigo -> marca
+        self._codigo_marca = {}   # marca -> codigo
+        self.ultimo_item = 0
+        self.actualizada = None   # datetime de la ultima lectura de la base
+        self.verificada = 0.0     # time.monotonic() de la ultima verificacion
+        self.en_memoria = False
+        self.lock = threading.Lock()
+
+    # ── carga ───────────────────────────────────────────────
+    def _codificar_marca(self, marca):
+        marca = (marca or '').strip()
+        codigo = self._codigo_marca.get(marca)
+        if codigo is None:
+            codigo = self._codigo_marca[marca] = len(self.marcas)
+            self.marcas.append(marca)
+        return codigo
+
+    def _leer(self, items):
+        """Columnas NumPy de un queryset de salesItems, leido de a LOTE renglones."""
+        import numpy as np
+
+        partes = {nombre: [] for nombre in COLUMNAS}
+        filas = items.order_by('pk').values_list(*CAMPOS).iterator(chunk_size=LOTE)
+        while True:
+            bloque = [fila for _, fila in zip(range(LOTE), filas)]
+            if not bloque:
+                break
+            columnas = list(zip(*bloque))
+            partes['item'].append(np.array(columnas[0], dtype=COLUMNAS['item']))
+            partes['venta'].append(np.array(columnas[1], dtype=COLUMNAS['venta']))
+            partes['fecha'].append(np.array(columnas[2], dtype='datetime64[us]').astype(COLUMNAS['fecha']))
+            partes['producto'].append(np.array(columnas[3], dtype=COLUMNAS['producto']))
+            partes['categoria'].append(np.array([c if c is not None else -1 for c in columnas[4]], dtype=COLUMNAS['categoria']))
+            partes['marca'].append(np.array([self._codificar_marca(m) for m in columnas[5]], dtype=COLUMNAS['marca']))
+            partes['cliente'].append(np.array([c if c is not None else -1 for c in columnas[6]], dtype=COLUMNAS['cliente']))
+            partes['tipo_lista'].append(np.array([_indice(TIPOS_LISTA, t) for t in columnas[7]], dtype=COLUMNAS['tipo_lista']))
+            partes['forma_pago'].append(np.array([_indice(FORMAS_PAGO, f) for f in columnas[8]], dtype=COLUMNAS['forma_pago']))
+            partes['qty'].append(np.array(columnas[9], dtype=COLUMNAS['qty']))
+            partes['price'].append(np.array(columnas[10], dtype=COLUMNAS['price']))
+            partes['costo_unitario'].append(np.array(columnas[11], dtype=COLUMNAS['costo_unitario']))
+        return {
+            nombre: np.concatenate(lista) if lista else np.empty(0, dtype=COLUMNAS[nombre])
+            for nombre, lista in partes.items()
+        }
+
+    def recargar(self):
+        """Carga todo de nuevo; si no entra en el tope queda en modo SQL."""
+        from django.utils import timezone
+        from pos.models import salesItems
+
+        ahora = timezone.now()
+        if salesItems.objects.count() * bytes_por_fila() > limite_bytes():
+            self.columnas, self.en_memoria = None, False
+        else:
+            self.marcas, self._codigo_marca = [], {}
+            self.columnas = self._leer(salesItems.objects.all())
+            self.en_memoria = True
+            self.ultimo_item = int(self.columnas['item'].max()) if len(self.columnas['item']) else 0
+        self.actualizada = ahora
+        self.verificada = time.monotonic()
+
+    def actualizar(self, forzar=False):
+        """Agrega los items nuevos y relee los de ventas modificadas; recarga si hubo borrados."""
+        import numpy as np
+        from django.utils import timezone
+        from inventory.models import Products
+        from pos.models import Sales, salesItems
+
+        with self.lock:
+            if self.actualizada is None:
+                self.recargar()
+                return
+            if not forzar and time.monotonic() - self.verificada < REFRESCO_SEGUNDOS:
+                return
+            if not self.en_memoria:
+                self.recargar()  # vuelve a probar: quizas ahora entra
+                return
+
+            ahora = timezone.now()
+            modificadas = list(
+                Sales.objects.filter(date_updated__gte=self.actualizada).values_list('pk', flat=True)
+            )
+            nuevos = salesItems.objects.filter(pk__gt=self.ultimo_item)
+            releidos = salesItems.objects.filter(sale_id__in=modificadas, pk__lte=self.ultimo_item)
+
+            columnas = self.columnas
+            if modificadas:
+                quedan = ~np.isin(columnas['venta'], np.array(modificadas, dtype=COLUMNAS['venta']))
+                columnas = {nombre: arreglo[quedan] for nombre, arreglo in columnas.items()}
+            agregados = [self._leer(nuevos), self._leer(releidos) if modificadas else None]
+            for parte in agregados:
+                if parte is not None and len(parte['item']):
+                    columnas = {nombre: np.concatenate([columnas[nombre], parte[nombre]]) for nombre in COLUMNAS}
+
+            total = salesItems.objects.count()
+            if len(columnas['item']) != total or total * bytes_por_fila() > limite_bytes():
+                self.recargar()  # hubo items borrados (o la tabla ya no entra)
+                return
+
+            # Categoria y marca de los productos editados, en los items que ya estaban
+            productos = list(
+                Products.objects.filter(date_updated__gte=self.actualizada).values_list('pk', 'category_id', 'marca')
+            )
+            if productos:
+                categorias, marcas = columnas['categoria'].copy(), columnas['marca'].copy()
+                for producto_id, categoria_id, marca in productos:
+                    filas = columnas['producto'] == producto_id
+                    categorias[filas] = categoria_id if categoria_id is not None else -1
+                    marcas[filas] = self._codificar_marca(marca)
+                columnas = dict(columnas, categoria=categorias, marca=marcas)
+            self.columnas = columnas
+            if len(columnas['item']):
+                self.ultimo_item = int(columnas['item'].max())
+            self.actualizada = ahora
+            self.verificada = time.monotonic()
+
+    # ── estado ──────────────────────────────────────────────
+    def filas(self):
+        return len(self.columnas['item']) if self.columnas else 0
+
+    def memoria(self):
+        """Bytes ocupados por las columnas."""
+        return sum(arreglo.nbytes for arreglo in self.columnas.values()) if self.columnas else 0
+
+    # ── consultas ───────────────────────────────────────────
+    def _mascara(self, filtros):
+        import numpy as np
+
+        c = self.columnas
+        mascara = np.ones(len(c['item']), dtype=bool)
+        if filtros.get('desde'):
+            mascara &= c['fecha'] >= np.datetime64(_inicio(filtros['desde']), 's')
+        if filtros.get('hasta'):
+            mascara &= c['fecha'] < np.datetime64(_inicio(filtros['hasta'] + timedelta(days=1)), 's')
+        for filtro, columna in (('producto', 'producto'), ('categoria', 'categoria'), ('cliente', 'cliente')):
+            if filtros.get(filtro):
+                mascara &= np.isin(c[columna], _lista(filtros[filtro]))
+        if filtros.get('marca'):
+            codigos = [self._codigo_marca[m] for m in _lista(filtros['marca']) if m in self._codigo_marca]
+            mascara &= np.isin(c['marca'], codigos)
+        if filtros.get('tipo_lista'):
+            mascara &= np.isin(c['tipo_lista'], [_indice(TIPOS_LISTA, t) for t in _lista(filtros['tipo_lista'])])
+        if filtros.get('forma_pago'):
+            mascara &= np.isin(c['forma_pago'], [_indice(FORMAS_PAGO, f) for f in _lista(filtros['forma_pago'])])
+        return mascara
+
+    def _clave(self, dimension, c, mascara):
+        """Arreglo entero con el valor de la dimension de cada renglon filtrado."""
+        import numpy as np
+
+        if dimension in ('anio', 'mes', 'dia', 'dia_semana', 'hora'):
+            fecha = c['fecha'][mascara]
+            if dimension == 'anio':
+                return fecha.astype('datetime64[Y]').astype(np.int64)
+            if dimension == 'mes':
+                return fecha.astype('datetime64[M]').astype(np.int64)
+            dias = fecha.astype('datetime64[D]').astype(np.int64)
+            if dimension == 'dia':
+                return dias
+            if dimension == 'dia_semana':
+                return (dias + 3) % 7  # 1970-01-01 fue jueves
+            return (fecha.astype(np.int64) // 3600) % 24
+        return c[dimension][mascara].astype(np.int64)
+
+    def _etiqueta(self, dimension, valor):
+        """Valor de la dimension como lo devuelve tambien la consulta SQL."""
+        import numpy as np
+
+        if dimension == 'anio':
+            return 1970 + valor
+        if dimension == 'mes':
+            return str(np.datetime64(valor, 'M'))
+        if dimension == 'dia':
+            return np.datetime64(valor, 'D').astype(date)
+        if dimension == 'marca':
+            return self.marcas[valor]
+        if dimension == 'tipo_lista':
+            return TIPOS_LISTA[valor] if 0 <= valor < len(TIPOS_LISTA) else ''
+        if dimension == 'forma_pago':
+            return FORMAS_PAGO[valor] if 0 <= valor < len(FORMAS_PAGO) else ''
+        if dimension in ('producto', 'categoria', 'cliente'):
+            return None if valor < 0 else valor
+        return valor
+
+    def consultar(self, agrupar, valores, filtros):
+        import numpy as np
+
+        c = self.columnas
+        mascara = self._mascara(filtros)
+        qty = c['qty'][mascara]
+        importes = {
+            'venta': qty * c['price'][mascara],
+            'unidades': qty,
+            'costo': qty * c['costo_unitario'][mascara],
+        }
+        importes['margen'] = importes['venta'] - importes['costo']
+
+        if agrupar:
+            grupo = np.zeros(len(qty), dtype=np.int64)
+            claves = []
+            for dimension in agrupar:
+                unicos, codigos = np.unique(self._clave(dimension, c, mascara), return_inverse=True)
+                claves.append(unicos)
+                grupo = grupo * len(unicos) + codigos.ravel()
+            grupos, grupo = np.unique(grupo, return_inverse=True)
+            grupo = grupo.ravel()
+        else:
+            grupos, grupo, claves = np.zeros(1 if len(qty) else 0, dtype=np.int64), np.zeros(len(qty), dtype=np.int64), []
+
+        cantidad = len(grupos)
+        sumas = {}
+        for valor in valores:
+            if valor == 'items':
+                sumas[valor] = np.bincount(grupo, minlength=cantidad)
+            elif valor == 'tickets':
+                # ventas distintas por grupo: pares (grupo, venta) unicos
+                ventas = c['venta'][mascara].astype(np.int64)
+                base = int(ventas.max()) + 1 if len(ventas) else 1
+                pares = np.unique(grupo * base + ventas)
+                sumas[valor] = np.bincount(pares // base, minlength=cantidad)
+            else:
+                sumas[valor] = np.bincount(grupo, weights=importes[valor], minlength=cantidad)
+
+        resultado = []
+        for indice, combinado in enumerate(grupos):
+            fila = {}
+            for posicion in range(len(agrupar) - 1, -1, -1):
+                combinado, codigo = divmod(int(combinado), len(claves[posicion]))
+                fila[agrupar[posicion]] = self._etiqueta(agrupar[posicion], int(claves[posicion][codigo]))
+            for valor in valores:
+                fila[valor] = _numero(valor, sumas[valor][indice])
+            resultado.append(fila)
+        return resultado
+
+
+def _indice(lista, valor):
+    return lista.index(valor) if valor in lista else -1
+
+
+def _lista(valor):
+    return list(valor) if isinstance(valor, (list, tuple, set)) else [valor]
+
+
+def _inicio(dia):
+    return datetime.combine(dia, datetime.min.time()) if not isinstance(dia, datetime) else dia
+
+
+def _numero(valor, numero):
+    if valor in ('tickets', 'items'):
+        return int(numero)
+    return round(float(numero), 3 if valor == 'unidades' else 2)
+
+
+def consultar_sql(agrupar, valores, filtros):
+    """La misma consulta resuelta por la base (cuando la tabla no entra en memoria)."""
+    from django.db.models import Count, F, FloatField, Sum
+    from django.db.models.functions import ExtractHour, ExtractIsoWeekDay, ExtractYear, TruncDate, TruncMonth
+    from pos.models import salesItems
+
+    expresiones = {
+        'anio': ExtractYear('sale__date_added'),
+        'mes': TruncMonth('sale__date_added'),
+        'dia': TruncDate('sale__date_added'),
+        'dia_semana': ExtractIsoWeekDay('sale__date_added'),
+        'hora': ExtractHour('sale__date_added'),
+        'producto': F('product_id'),
+        'categoria': F('product__category_id'),
+        'marca': F('product__marca'),
+        'cliente': F('sale__cliente_id'),
+        'tipo_lista': F('sale__tipo_lista'),
+        'forma_pago': F('sale__forma_pago'),
+    }
+    agregados = {
+        'venta': Sum(F('qty') * F('price'), output_field=FloatField()),
+        'unidades': Sum('qty', output_field=FloatField()),
+        'costo': Sum(F('qty') * F('costo_unitario'), output_field=FloatField()),
+        'margen': Sum(F('qty') * F('price') - F('qty') * F('costo_unitario'), output_field=FloatField()),
+        'tickets': Count('sale', distinct=True),
+        'items': Count('pk'),
+    }
+
+    items = salesItems.objects.all()
+    if filtros.get('desde'):
+        items = items.filter(sale__date_added__gte=_inicio(filtros['desde']))
+    if filtros.get('hasta'):
+        items = items.filter(sale__date_added__lt=_inicio(filtros['hasta'] + timedelta(days=1)))
+    for filtro, campo in (('producto', 'product_id'), ('categoria', 'product__category_id'),
+                          ('cliente', 'sale__cliente_id'), ('marca', 'product__marca'),
+                          ('tipo_lista', 'sale__tipo_lista'), ('forma_pago', 'sale__forma_pago')):
+        if filtros.get(filtro):
+            items = items.filter(**{f'{campo}__in': _lista(filtros[filtro])})
+
+    if agrupar:
+        filas = (
+            items.annotate(**{f'd_{d}': expresiones[d] for d in agrupar})
+            .values(*[f'd_{d}' for d in agrupar])
+            .annotate(**{v: agregados[v] for v in valores})
+        )
+    else:
+        total = items.aggregate(cantidad_items=Count('pk'), **{v: agregados[v] for v in valores})
+        filas = [total] if total['cantidad_items'] else []
+
+    resultado = []
+    for fila in filas:
+        salida = {}
+        for dimension in agrupar:
+            valor = fila[f'd_{dimension}']
+            if dimension == 'mes':
+                valor = valor.strftime('%Y-%m') if valor else ''
+            elif dimension == 'dia' and isinstance(valor, datetime):
+                valor = valor.date()
+            elif dimension == 'dia_semana':
+                valor = valor - 1
+            elif dimension == 'marca':
+                valor = (valor or '').strip()
+            elif dimension in ('tipo_lista', 'forma_pago'):
+                valor = valor or ''
+            salida[dimension] = valor
+        for valor in valores:
+            salida[valor] = _numero(valor, fila[valor] or 0)
+        resultado.append(salida)
+    return resultado
+
+
+_tabla = TablaVentas()
+
+
+def tabla():
+    """La tabla del proceso, actualizada con las ventas nuevas."""
+    _tabla.actualizar()
+    return _tabla
+
+
+def consultar(agrupar=(), valores=('venta',), filtros=None, orden=None, limite=None):
+    """
+    Agrupa por las DIMENSIONES indicadas y suma los VALORES, aplicando los
+    filtros (desde, hasta, producto, categoria, cliente, marca, tipo_lista,
+    forma_pago; cada uno acepta un valor o una lista).
+    Retorna {'filas': [...], 'origen': 'memoria' | 'sql', 'milisegundos': ...}.
+    """
+    agrupar, valores, filtros = list(agrupar), list(valores), filtros or {}
+    for nombre in agrupar:
+        if nombre not in DIMENSIONES:
+            raise ValueError(f'Dimension desconocida: {nombre}')
+    for nombre in valores:
+        if nombre not in VALORES:
+            raise ValueError(f'Valor desconocido: {nombre}')
+
+    inicio = time.perf_counter()
+    actual = tabla()
+    if actual.en_memoria:
+        with actual.lock:
+            filas, origen = actual.consultar(agrupar, valores, filtros), 'memoria'
+    else:
+        filas, origen = consultar_sql(agrupar, valores, filtros), 'sql'
+
+    if orden:
+        descendente = orden.startswith('-')
+        campo = orden.lstrip('-')
+        filas.sort(key=lambda fila: (fila[campo] is None, fila[campo]), reverse=descendente)
+    else:
+        filas.sort(key=lambda fila: tuple((fila[d] is None, fila[d]) for d in agrupar))
+    if limite:
+        filas = filas[:limite]
+    return {'filas': filas, 'origen': origen, 'milisegundos': round((time.perf_counter() - inicio) * 1000, 1)}
+
+
+def nombres(dimension, valores):
+    """{id: nombre} de productos, categorias o clientes para mostrar los resultados."""
+    if dimension == 'producto':
+        from inventory.models import Products as modelo
+    elif dimension == 'categoria':
+        from inventory.models import Category as modelo
+    elif dimension == 'cliente':
+        from customers.models import Cliente as modelo
+    else:
+        return {}
+    return dict(modelo.objects.filter(pk__in=[v for v in valores if v is not None]).values_list('pk', 'name'))
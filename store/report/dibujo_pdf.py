@@ -0,0 +1,305 @@
+"""
+Dibujo con reportlab (platypus) de los reportes de report/tabla_pdf.py.
+
+Se importa solo al generar un reporte: reportlab pesa bastante en el arranque
+y en la memoria de cada worker, y la mayoria de los pedidos son del POS.
+"""
+import uuid
+from decimal import Decimal
+from io import BytesIO
+
+from django.utils import timezone
+from django.utils.html import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import BaseDocTemplate, Frame, LongTable, PageBreak, PageTemplate, Paragraph, Spacer, Table, TableStyle
+
+from report.tabla_pdf import Seccion, fecha_hora
+
+FILAS_POR_BLOQUE = 100
+# Una fila no puede partirse entre hojas: las celdas muy largas se resumen
+MAX_LINEAS_CELDA = 40
+
+FUENTE = 'Helvetica'
+FUENTE_NEGRITA = 'Helvetica-Bold'
+TAMANO_FUENTE = 8
+RELLENO = 4
+GRIS_CLARO = colors.HexColor('#f2f2f2')
+
+MARGEN = 1.5 * cm
+ALTO_BANDA = 1.6 * cm
+ALTO_PIE = 1.4 * cm
+
+
+def _recortar(texto, ancho, fuente=FUENTE):
+    """Corta el texto con '...' para que entre en el ancho (como el nowrap/ellipsis del HTML)."""
+    if len(texto) * TAMANO_FUENTE * 0.45 <= ancho:
+        return texto  # seguro entra: evita medir
+    if stringWidth(texto, fuente, TAMANO_FUENTE) <= ancho:
+        return texto
+    bajo, alto = 0, len(texto)
+    while bajo < alto:
+        medio = (bajo + alto + 1) // 2
+        if stringWidth(texto[:medio] + '...', fuente, TAMANO_FUENTE) <= ancho:
+            bajo = medio
+        else:
+            alto = medio - 1
+    return texto[:bajo].rstrip() + '...'
+
+
+def _partir(texto, ancho, fuente=FUENTE_NEGRITA):
+    """Reparte el texto en lineas que entren en el ancho (titulos de columna)."""
+    lineas = []
+    for palabra in texto.split():
+        if lineas and stringWidth(lineas[-1] + ' ' + palabra, fuente, TAMANO_FUENTE) <= ancho:
+            lineas[-1] += ' ' + palabra
+        else:
+            lineas.append(palabra)
+    return '\n'.join(_recortar(linea, ancho, fuente) for linea in lineas)
+
+
+class _Subtotales:
+    """Suma de las columnas sumables de lo que se dibujo en la hoja actual."""
+
+    def __init__(self, columnas):
+        self.indices = [i for i, columna in enumerate(columnas) if columna.sumar]
+        self.hoja = [Decimal(0)] * len(self.indices)
+        self.acumulado = [Decimal(0)] * len(self.indices)
+
+    def sumar(self, valores):
+        for fila in valores:
+            for posicion, valor in enumerate(fila):
+                self.hoja[posicion] += valor
+                self.acumulado[posicion] += valor
+
+    def cerrar_hoja(self):
+        hoja = self.hoja
+        self.hoja = [Decimal(0)] * len(self.indices)
+        return hoja
+
+
+class _TablaBloque(LongTable):
+    """
+    Bloque de filas de la tabla. Al dibujarse suma sus valores al subtotal de
+    la hoja; al partirse entre hojas la parte que sigue lleva el encabezado.
+    Los bloques que continuan la tabla en la misma hoja van sin encabezado.
+    """
+
+    def split(self, availWidth, availHeight):
+        partes = super().split(availWidth, availHeight)
+        if not partes:
+            if self._con_encabezado:
+                return []
+            # No entra nada: sigue en la hoja siguiente, ahi con encabezado
+            return [PageBreak(), self._reporte.bloque(self._filas, True)]
+        primera, resto = partes
+        entran = len(primera._cellvalues) - (1 if self._con_encabezado else 0)
+        self._reporte.marcar(primera, self._filas[:entran], self._con_encabezado)
+        if self._con_encabezado:
+            self._reporte.marcar(resto, self._filas[entran:], True)
+        else:
+            resto = self._reporte.bloque(self._filas[entran:], True)
+        return [primera, resto]
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        self._reporte.subtotales.sumar(valores for _, valores in self._filas)
+        super().drawOn(canvas, x, y, _sW)
+
+
+def _contenido(reporte, filas):
+    """
+    Flowables de la tabla: una LongTable por cada FILAS_POR_BLOQUE filas y un
+    titulo por cada Seccion del iterador. Las filas se recorren una sola vez,
+    antes de armar el documento; cada LongTable se parte recien al dibujarse.
+    """
+    flowables = []
+    bloque = []
+    primero = True  # el proximo bloque abre una tabla: va con encabezado
+    en_seccion = False
+
+    def agregar_bloque(bloque):
+        nonlocal primero
+        if bloque or primero:
+            flowables.append(reporte.bloque(bloque, primero))
+            primero = False
+
+    for fila in filas:
+        if isinstance(fila, Seccion):
+            if bloque or not primero or en_seccion:
+                agregar_bloque(bloque)
+                bloque = []
+            en_seccion = True
+            flowables.append(Spacer(1, 0.3 * cm))
+            flowables.append(Paragraph(escape(fila.titulo), reporte.estilos['Heading3']))
+            primero = True
+            continue
+        bloque.append(reporte.fila(fila))
+        if len(bloque) >= FILAS_POR_BLOQUE:
+            agregar_bloque(bloque)
+            bloque = []
+    agregar_bloque(bloque)
+    return flowables
+
+
+class _Reporte:
+    def __init__(self, columnas, encabezado, usuario, ancho_util):
+        self.columnas = columnas
+        self.encabezado = encabezado
+        self.usuario = usuario
+        self.generado = timezone.now()
+        self.clave = str(uuid.uuid4())
+        self.subtotales = _Subtotales(columnas)
+        self.estilos = getSampleStyleSheet()
+        self.anchos = [columna.ancho * ancho_util for columna in columnas]
+        self.titulos = [[
+            _partir(columna.titulo, ancho - 2 * RELLENO)
+            for columna, ancho in zip(columnas, self.anchos)
+        ]]
+
+        comandos = [
+            ('FONTNAME', (0, 0), (-1, -1), FUENTE),
+            ('FONTSIZE', (0, 0), (-1, -1), TAMANO_FUENTE),
+            ('LEADING', (0, 0), (-1, -1), TAMANO_FUENTE + 2),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('LEFTPADDING', (0, 0), (-1, -1), RELLENO),
+            ('RIGHTPADDING', (0, 0), (-1, -1), RELLENO),
+            ('TOPPADDING', (0, 0), (-1, -1), RELLENO),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), RELLENO),
+        ]
+        for indice, columna in enumerate(columnas):
+            comandos.append(('ALIGN', (indice, 0), (indice, -1), columna.alinear))
+        encabezado = [
+            ('BACKGROUND', (0, 0), (-1, 0), GRIS_CLARO),
+            ('FONTNAME', (0, 0), (-1, 0), FUENTE_NEGRITA),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ]
+        self.estilo = TableStyle(comandos)
+        self.estilo_con_encabezado = TableStyle(comandos + encabezado)
+
+    def fila(self, valores):
+        """(celdas de texto, valores sumables) de una fila."""
+        celdas = []
+        sumables = []
+        for valor, columna, ancho in zip(valores, self.columnas, self.anchos):
+            if isinstance(valor, (list, tuple)):
+                lineas = [str(linea) for linea in valor]
+                if len(lineas) > MAX_LINEAS_CELDA:
+                    resto = len(lineas) - MAX_LINEAS_CELDA + 1
+                    lineas = lineas[:MAX_LINEAS_CELDA - 1] + [f'... y {resto} más']
+            else:
+                lineas = ['' if valor is None else str(columna.formato(valor))]
+            celdas.append('\n'.join(_recortar(linea, ancho - 2 * RELLENO) for linea in lineas))
+            if columna.sumar:
+                sumables.append(Decimal(str(valor or 0)))
+        return celdas, sumables
+
+    def bloque(self, filas, con_encabezado):
+        datos = [celdas for celdas, _ in filas]
+        if con_encabezado:
+            datos = self.titulos + datos
+        tabla = _TablaBloque(datos, colWidths=self.anchos, repeatRows=1 if con_encabezado else 0)
+        tabla.setStyle(self.estilo_con_encabezado if con_encabezado else self.estilo)
+        return self.marcar(tabla, filas, con_encabezado)
+
+    def marcar(self, tabla, filas, con_encabezado):
+        """Datos propios del bloque (tambien en las partes que arma Table.split)."""
+        tabla._reporte = self
+        tabla._filas = filas
+        tabla._con_encabezado = con_encabezado
+        return tabla
+
+    def resumen(self, lineas, titulo):
+        datos = [[titulo]] + [[linea] for linea in lineas]
+        tabla = Table(datos, colWidths=[sum(self.anchos)])
+        tabla.setStyle(TableStyle([
+            ('BOX', (0, 0), (-1, -1), 0.5, colors.black),
+            ('BACKGROUND', (0, 0), (-1, 0), GRIS_CLARO),
+            ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.HexColor('#dddddd')),
+            ('FONTNAME', (0, 0), (-1, 0), FUENTE_NEGRITA),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('LEADING', (0, 0), (-1, -1), 14),
+        ]))
+        return [Spacer(1, 0.5 * cm), tabla]
+
+    # ----- Dibujo de la hoja -----
+
+    def dibujar_banda(self, canvas, doc):
+        if not self.encabezado:
+            return
+        ancho, alto = doc.pagesize
+        canvas.saveState()
+        canvas.setFillColor(GRIS_CLARO)
+        canvas.rect(0, alto - ALTO_BANDA, ancho, ALTO_BANDA, stroke=0, fill=1)
+        canvas.setStrokeColor(colors.black)
+        canvas.line(0, alto - ALTO_BANDA, ancho, alto - ALTO_BANDA)
+        canvas.setFillColor(colors.black)
+        canvas.setFont(FUENTE, 10)
+        canvas.drawCentredString(
+            ancho / 2, alto - 0.65 * cm, f'{self.encabezado} - Generado el: {fecha_hora(self.generado)}'
+        )
+        canvas.drawCentredString(ancho / 2, alto - 1.2 * cm, f'Usuario: {self.usuario}')
+        canvas.restoreState()
+
+    def dibujar_pie(self, canvas, doc):
+        ancho, _ = doc.pagesize
+        subtotales = self.subtotales.cerrar_hoja()
+        canvas.saveState()
+        canvas.setFillColor(GRIS_CLARO)
+        canvas.rect(0, 0, ancho, ALTO_PIE, stroke=0, fill=1)
+        canvas.setStrokeColor(colors.black)
+        canvas.line(0, ALTO_PIE, ancho, ALTO_PIE)
+        canvas.setFillColor(colors.black)
+        canvas.setFont(FUENTE, 8)
+        if self.subtotales.indices:
+            partes = []
+            for posicion, indice in enumerate(self.subtotales.indices):
+                columna = self.columnas[indice]
+                partes.append(
+                    f'{columna.titulo}: {columna.formato(subtotales[posicion])} '
+                    f'(acumulado {columna.formato(self.subtotales.acumulado[posicion])})'
+                )
+            canvas.drawString(MARGEN, ALTO_PIE - 0.5 * cm, 'Subtotal de la hoja - ' + ' | '.join(partes))
+        canvas.drawString(MARGEN, 0.4 * cm, f'Hoja {doc.page}')
+        canvas.drawRightString(ancho - MARGEN, 0.4 * cm, f'Clave Única: {self.clave}')
+        canvas.restoreState()
+
+
+def armar_pdf(columnas, filas, encabezado, usuario, titulos, subtitulos, resumen, titulo_resumen, apaisado):
+    """Bytes del PDF (ver tabla_pdf.reporte_pdf)."""
+    buffer = BytesIO()
+    tamano = landscape(A4) if apaisado else A4
+    superior = MARGEN + (ALTO_BANDA if encabezado else 0)
+    inferior = MARGEN + ALTO_PIE
+    ancho_util = tamano[0] - 2 * MARGEN
+
+    reporte = _Reporte(columnas, encabezado, usuario, ancho_util)
+    doc = BaseDocTemplate(
+        buffer, pagesize=tamano, leftMargin=MARGEN, rightMargin=MARGEN,
+        topMargin=superior, bottomMargin=inferior, title=titulos[0] if titulos else (encabezado or ''),
+    )
+    marco = Frame(MARGEN, inferior, ancho_util, tamano[1] - superior - inferior, id='contenido')
+    doc.addPageTemplates([
+        PageTemplate(id='reporte', frames=[marco], onPage=reporte.dibujar_banda, onPageEnd=reporte.dibujar_pie)
+    ])
+
+    iniciales = [Paragraph(escape(titulo), reporte.estilos['Heading2']) for titulo in titulos]
+    iniciales += [Paragraph(escape(linea), reporte.estilos['Normal']) for linea in subtitulos]
+    if iniciales:
+        iniciales.append(Spacer(1, 0.3 * cm))
+
+    contenido = iniciales + _contenido(reporte, filas)
+    if callable(resumen):
+        resumen = resumen()  # despues de recorrer las filas (totales acumulados)
+    if resumen is not None:
+        contenido += reporte.resumen(resumen, titulo_resumen)
+
+    doc.build(contenido)
+
+    return buffer.getvalue()
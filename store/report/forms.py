@@ -168,3 +168,220 @@ class ListaPreciosForm(forms.Form):
         widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': '123-456789'}),
         label='Teléfono de Contacto'
     )
+
+
+class KardexForm(forms.Form):
+    """Producto (por codigo) o categoria y periodo del kardex"""
+
+    codigo = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Código interno o de barras'}),
+        label='Producto'
+    )
+    categoria = forms.ModelChoiceField(
+        queryset=Category.objects.order_by('name'),
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='o Categoría'
+    )
+    desde = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Desde'
+    )
+    hasta = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Hasta'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        codigo = (cleaned_data.get('codigo') or '').strip()
+        cleaned_data['producto'] = None
+        if codigo:
+            from django.db.models import Q
+            from inventory.models import Products
+
+            producto = Products.objects.filter(Q(code=codigo) | Q(codigo_barras=codigo)).first()
+            if producto is None:
+                self.add_error('codigo', 'No existe un producto con ese código.')
+            cleaned_data['producto'] = producto
+        elif not cleaned_data.get('categoria'):
+            raise forms.ValidationError('Indicar un producto o una categoría.')
+        desde, hasta = cleaned_data.get('desde'), cleaned_data.get('hasta')
+        if desde and hasta and desde > hasta:
+            self.add_error('hasta', 'La fecha hasta debe ser posterior a la fecha desde.')
+        return cleaned_data
+
+
+class AjusteStockForm(forms.Form):
+    """Recuento fisico de un producto"""
+
+    cantidad_real = forms.DecimalField(
+        max_digits=10, decimal_places=3,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.001'}),
+        label='Stock contado'
+    )
+    motivo = forms.CharField(
+        max_length=200,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Recuento, rotura, vencimiento...'}),
+        label='Motivo'
+    )
+
+
+class ClasificacionAbcForm(forms.Form):
+    """Periodo y criterio de la clasificacion ABC"""
+
+    CRITERIO_CHOICES = [
+        ('venta', 'Venta'),
+        ('margen', 'Margen'),
+        ('unidades', 'Unidades'),
+    ]
+
+    desde = forms.DateField(
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Desde'
+    )
+    hasta = forms.DateField(
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Hasta'
+    )
+    criterio = forms.ChoiceField(
+        choices=CRITERIO_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Clasificar por'
+    )
+    clase = forms.ChoiceField(
+        choices=[('', 'Todas'), ('A', 'A'), ('B', 'B'), ('C', 'C')],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Clase'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        desde, hasta = cleaned_data.get('desde'), cleaned_data.get('hasta')
+        if desde and hasta and desde > hasta:
+            self.add_error('hasta', 'La fecha hasta debe ser posterior a la fecha desde.')
+        return cleaned_data
+
+
+class MapaCalorForm(forms.Form):
+    """Periodo, categoria y metrica del mapa de calor de ventas"""
+
+    METRICA_CHOICES = [
+        ('venta', 'Venta'),
+        ('tickets', 'Tickets'),
+        ('ticket_promedio', 'Ticket promedio'),
+        ('venta_por_dia', 'Venta promedio por día'),
+    ]
+
+    desde = forms.DateField(
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Desde'
+    )
+    hasta = forms.DateField(
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Hasta'
+    )
+    categoria = forms.ModelChoiceField(
+        queryset=Category.objects.order_by('name'),
+        required=False,
+        empty_label='Todas',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Categoría'
+    )
+    metrica = forms.ChoiceField(
+        choices=METRICA_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Mostrar'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        desde, hasta = cleaned_data.get('desde'), cleaned_data.get('hasta')
+        if desde and hasta and desde > hasta:
+            self.add_error('hasta', 'La fecha hasta debe ser posterior a la fecha desde.')
+        return cleaned_data
+
+
+class AnalisisVentasForm(forms.Form):
+    """Agrupacion, valores y filtros de la consulta sobre los items de venta"""
+
+    DIMENSION_CHOICES = [
+        ('anio', 'Año'),
+        ('mes', 'Mes'),
+        ('dia', 'Día'),
+        ('dia_semana', 'Día de la semana'),
+        ('hora', 'Hora'),
+        ('producto', 'Producto'),
+        ('categoria', 'Categoría'),
+        ('marca', 'Marca'),
+        ('cliente', 'Cliente'),
+        ('tipo_lista', 'Lista de precios'),
+        ('forma_pago', 'Forma de pago'),
+    ]
+    VALOR_CHOICES = [
+        ('venta', 'Venta'),
+        ('unidades', 'Unidades'),
+        ('costo', 'Costo'),
+        ('margen', 'Margen'),
+        ('tickets', 'Tickets'),
+        ('items', 'Items'),
+    ]
+
+    agrupar = forms.ChoiceField(
+        choices=DIMENSION_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Agrupar por'
+    )
+    agrupar_2 = forms.ChoiceField(
+        choices=[('', '---')] + DIMENSION_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='y por'
+    )
+    valores = forms.MultipleChoiceField(
+        choices=VALOR_CHOICES,
+        widget=forms.CheckboxSelectMultiple,
+        label='Valores'
+    )
+    desde = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Desde'
+    )
+    hasta = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Hasta'
+    )
+    categoria = forms.ModelChoiceField(
+        queryset=Category.objects.order_by('name'),
+        required=False,
+        empty_label='Todas',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Categoría'
+    )
+    tipo_lista = forms.ChoiceField(
+        choices=[('', 'Todas'), ('minorista', 'Minorista'), ('mayorista', 'Mayorista')],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Lista de precios'
+    )
+    forma_pago = forms.ChoiceField(
+        choices=[('', 'Todas'), ('efectivo', 'Efectivo'), ('banco', 'Banco/Transferencia')],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Forma de pago'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('agrupar_2') and cleaned_data.get('agrupar_2') == cleaned_data.get('agrupar'):
+            cleaned_data['agrupar_2'] = ''
+        desde, hasta = cleaned_data.get('desde'), cleaned_data.get('hasta')
+        if desde and hasta and desde > hasta:
+            self.add_error('hasta', 'La fecha hasta debe ser posterior a la fecha desde.')
+        return cleaned_data
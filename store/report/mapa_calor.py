@@ -0,0 +1,149 @@
+"""
+Mapa de calor de ventas por dia de la semana y hora.
+
+La base agrupa las ventas por (dia de la semana, hora) con ExtractIsoWeekDay
+y ExtractHour sobre Sales.date_added, asi la consulta devuelve a lo sumo
+7 x 24 filas aunque el rango sea de varios anos. Las fechas se guardan en
+hora local (USE_TZ = False); si se activara USE_TZ, Django convierte a la
+zona horaria local antes de extraer.
+
+Con categoria se cuentan los items de esa categoria: venta = price * qty y
+tickets = ventas distintas que la incluyen.
+
+Los periodos cerrados (hasta antes de hoy) quedan en la cache; el periodo
+que incluye hoy se calcula siempre. La clave incluye la cantidad, el ultimo
+id y la ultima modificacion de las ventas del rango, asi una venta cargada
+con fecha atrasada (cola sin conexion), borrada o editada genera otra clave
+en todos los workers.
+
+Metricas de cada celda:
+  tickets, venta, ticket_promedio (venta / tickets) y venta_por_dia
+  (venta / cantidad de ese dia de la semana en el rango).
+"""
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+DIAS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+METRICAS = {
+    'venta': 'Venta',
+    'tickets': 'Tickets',
+    'ticket_promedio': 'Ticket promedio',
+    'venta_por_dia': 'Venta promedio por día',
+}
+CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def dias_por_semana(desde, hasta):
+    """Cuantos lunes, martes, ... hay entre desde y hasta inclusive."""
+    total = (hasta - desde).days + 1
+    semanas, resto = divmod(total, 7)
+    cantidades = [semanas] * 7
+    for i in range(resto):
+        cantidades[(desde.weekday() + i) % 7] += 1
+    return cantidades
+
+
+def _celdas(desde, hasta, categoria_id):
+    """[(dia 1-7, hora, tickets, venta)] agrupado en la base."""
+    from django.db.models import Count, F, FloatField, Sum
+    from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+    from pos.models import Sales, salesItems
+
+    inicio = datetime.combine(desde, time.min)
+    fin = datetime.combine(hasta + timedelta(days=1), time.min)
+    if categoria_id is None:
+        filas = (
+            Sales.objects.filter(date_added__gte=inicio, date_added__lt=fin)
+            .annotate(dia=ExtractIsoWeekDay('date_added'), hora=ExtractHour('date_added'))
+            .values('dia', 'hora')
+            .annotate(tickets=Count('pk'), venta=Sum('grand_total'))
+        )
+    else:
+        filas = (
+            salesItems.objects.filter(
+                sale__date_added__gte=inicio, sale__date_added__lt=fin, product__category_id=categoria_id,
+            )
+            .annotate(dia=ExtractIsoWeekDay('sale__date_added'), hora=ExtractHour('sale__date_added'))
+            .values('dia', 'hora')
+            .annotate(tickets=Count('sale', distinct=True),
+                      venta=Sum(F('price') * F('qty'), output_field=FloatField()))
+        )
+    return [(fila['dia'], fila['hora'], fila['tickets'], float(fila['venta'] or 0)) for fila in filas]
+
+
+def _marca(desde, hasta):
+    """Cantidad, ultimo id y ultima modificacion de las ventas del rango (una consulta)."""
+    from django.db.models import Count, Max
+    from pos.models import Sales
+
+    marca = Sales.objects.filter(
+        date_added__gte=datetime.combine(desde, time.min),
+        date_added__lt=datetime.combine(hasta + timedelta(days=1), time.min),
+    ).aggregate(cantidad=Count('pk'), ultimo=Max('pk'), modificada=Max('date_updated'))
+    modificada = marca['modificada'].isoformat() if marca['modificada'] else ''
+    return f"{marca['cantidad']}:{marca['ultimo']}:{modificada}"
+
+
+def calcular(desde, hasta, categoria_id=None):
+    """
+    {'horas': [h...], 'celdas': {metrica: [[valor por dia] por hora]},
+     'por_dia': {metrica: [7 valores]}, 'por_hora': {metrica: [valor por hora]}, 'totales': {...}}
+    Solo se incluyen las horas con ventas (y las intermedias).
+    """
+    periodo_cerrado = hasta < timezone.now().date()
+    if periodo_cerrado:
+        clave = f'mapa_calor:{desde}:{hasta}:{categoria_id or ""}:{_marca(desde, hasta)}'
+        resultado = cache.get(clave)
+        if resultado is not None:
+            return resultado
+
+    tickets = [[0] * 7 for _ in range(24)]
+    venta = [[0.0] * 7 for _ in range(24)]
+    for dia, hora, cantidad, importe in _celdas(desde, hasta, categoria_id):
+        tickets[hora][dia - 1] += cantidad
+        venta[hora][dia - 1] += importe
+
+    con_ventas = [hora for hora in range(24) if any(tickets[hora])]
+    horas = list(range(con_ventas[0], con_ventas[-1] + 1)) if con_ventas else []
+    dias = dias_por_semana(desde, hasta)
+
+    def metricas(tickets_celda, venta_celda, cantidad_dias):
+        return {
+            'tickets': tickets_celda,
+            'venta': round(venta_celda, 2),
+            'ticket_promedio': round(venta_celda / tickets_celda, 2) if tickets_celda else 0,
+            'venta_por_dia': round(venta_celda / cantidad_dias, 2) if cantidad_dias else 0,
+        }
+
+    celdas = {metrica: [] for metrica in METRICAS}
+    por_hora = {metrica: [] for metrica in METRICAS}
+    for hora in horas:
+        fila = [metricas(tickets[hora][dia], venta[hora][dia], dias[dia]) for dia in range(7)]
+        total_hora = metricas(sum(tickets[hora]), sum(venta[hora]), sum(dias))
+        for metrica in METRICAS:
+            celdas[metrica].append([valores[metrica] for valores in fila])
+            por_hora[metrica].append(total_hora[metrica])
+
+    columnas = [
+        metricas(sum(tickets[hora][dia] for hora in range(24)), sum(venta[hora][dia] for hora in range(24)), dias[dia])
+        for dia in range(7)
+    ]
+    total_tickets = sum(sum(fila) for fila in tickets)
+    total_venta = sum(sum(fila) for fila in venta)
+    resultado = {
+        'horas': horas,
+        'celdas': celdas,
+        'por_dia': {metrica: [columna[metrica] for columna in columnas] for metrica in METRICAS},
+        'por_hora': por_hora,
+        'totales': metricas(total_tickets, total_venta, sum(dias)),
+    }
+    if periodo_cerrado:
+        cache.set(clave, resultado, CACHE_TIMEOUT)
+    return resultado
+
+
+def intensidad(valor, maximo):
+    """0..1 para colorear la celda."""
+    return round(valor / maximo, 3) if maximo else 0
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListaPreciosVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alcance', models.CharField(db_index=True, editable=False, max_length=40)),
+                ('tipo_lista', models.CharField(choices=[('minorista', 'Minorista'), ('mayorista', 'Mayorista')], max_length=10, verbose_name='Tipo de Lista')),
+                ('stock', models.CharField(choices=[('con_stock', 'Solo con stock'), ('todos', 'Todos')], max_length=10, verbose_name='Productos')),
+                ('categorias', models.TextField(blank=True, default='', verbose_name='Categorías')),
+                ('nombre_contacto', models.CharField(blank=True, default='', max_length=100)),
+                ('telefono_contacto', models.CharField(blank=True, default='', max_length=50)),
+                ('filas', models.JSONField(default=list)),
+                ('huella', models.CharField(max_length=64)),
+                ('cantidad_productos', models.PositiveIntegerField(default=0)),
+                ('archivo', models.CharField(blank=True, default='', max_length=255)),
+                ('descargas', models.PositiveIntegerField(default=0)),
+                ('fecha', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Publicación')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Versión de Lista de Precios',
+                'verbose_name_plural': 'Versiones de Listas de Precios',
+                'ordering': ['-fecha', '-pk'],
+            },
+        ),
+    ]
@@ -1,3 +1,209 @@
+import hashlib
+import json
+import os
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
 from django.db import models
 
-# Create your models here.
+
+class ListaPreciosVersion(models.Model):
+    """
+    Version publicada de una lista de precios en PDF.
+
+    Una lista queda definida por su alcance (tipo de lista, filtro de stock y
+    categorias). Cada version guarda las filas que entraron (producto, marca,
+    precio) y su huella: mientras no cambie nada del alcance ni los datos de
+    contacto se sirve el mismo PDF guardado en disco, sin volver a armarlo.
+    """
+
+    TIPO_LISTA_CHOICES = [
+        ('minorista', 'Minorista'),
+        ('mayorista', 'Mayorista'),
+    ]
+
+    STOCK_CHOICES = [
+        ('con_stock', 'Solo con stock'),
+        ('todos', 'Todos'),
+    ]
+
+    alcance = models.CharField(max_length=40, db_index=True, editable=False)
+
+    tipo_lista = models.CharField(
+        max_length=10,
+        choices=TIPO_LISTA_CHOICES,
+        verbose_name='Tipo de Lista'
+    )
+
+    stock = models.CharField(
+        max_length=10,
+        choices=STOCK_CHOICES,
+        verbose_name='Productos'
+    )
+
+    # Nombres de las categorias filtradas (vacio = todas)
+    categorias = models.TextField(blank=True, default='', verbose_name='Categorías')
+
+    nombre_contacto = models.CharField(max_length=100, blank=True, default='')
+    telefono_contacto = models.CharField(max_length=50, blank=True, default='')
+
+    # [[producto_id, nombre, marca, precio], ...] en el orden del PDF
+    filas = models.JSONField(default=list)
+    huella = models.CharField(max_length=64)
+    cantidad_productos = models.PositiveIntegerField(default=0)
+
+    archivo = models.CharField(max_length=255, blank=True, default='')
+    descargas = models.PositiveIntegerField(default=0)
+
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    fecha = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Publicación')
+
+    class Meta:
+        ordering = ['-fecha', '-pk']
+        verbose_name = 'Versión de Lista de Precios'
+        verbose_name_plural = 'Versiones de Listas de Precios'
+
+    def __str__(self):
+        return f"Lista {self.get_tipo_lista_display()} - {self.fecha:%d/%m/%Y %H:%M}"
+
+    @staticmethod
+    def directorio():
+        """Carpeta donde quedan los PDF publicados (settings.LISTAS_PRECIOS_DIR)."""
+        return str(getattr(settings, 'LISTAS_PRECIOS_DIR', os.path.join(settings.BASE_DIR, 'listas_precios')))
+
+    @staticmethod
+    def clave_alcance(tipo_lista, stock, categoria_ids):
+        texto = f"{tipo_lista}|{stock}|{','.join(str(pk) for pk in sorted(categoria_ids))}"
+        return hashlib.sha1(texto.encode()).hexdigest()
+
+    @staticmethod
+    def filas_actuales(tipo_lista, stock, categoria_ids):
+        """Filas de la lista con los precios de hoy (una sola consulta)."""
+        from inventory.models import Products
+
+        productos = Products.objects.filter(status=Products.STATUS_ACTIVE)
+        if stock == 'con_stock':
+            productos = productos.filter(quantity__gt=0)
+        if categoria_ids:
+            productos = productos.filter(category__in=categoria_ids)
+
+        campo_precio = 'precio_minorista' if tipo_lista == 'minorista' else 'precio_mayorista'
+        # La columna MARCA de la lista siempre mostro la categoria del producto
+        return [
+            [pk, nombre, marca or '-', str(precio or Decimal('0.00'))]
+            for pk, nombre, marca, precio in productos.order_by('category__name', 'name')
+            .values_list('pk', 'name', 'category__name', campo_precio)
+        ]
+
+    @classmethod
+    def vigente_o_nueva(cls, filtros, usuario=None):
+        """
+        Retorna (version, es_nueva) para los filtros del formulario.
+
+        Si la ultima version del mismo alcance tiene las mismas filas y el mismo
+        contacto se reutiliza; si no, se crea una version nueva (sin archivo:
+        el PDF lo arma la vista y lo guarda con guardar_pdf).
+        """
+        categorias = list(filtros.get('categorias') or [])
+        categoria_ids = [categoria.pk for categoria in categorias]
+        tipo_lista, stock = filtros['tipo_lista'], filtros['stock']
+        nombre_contacto = filtros.get('nombre_contacto') or ''
+        telefono_contacto = filtros.get('telefono_contacto') or ''
+
+        filas = cls.filas_actuales(tipo_lista, stock, categoria_ids)
+        huella = hashlib.sha256(json.dumps(filas, ensure_ascii=False).encode()).hexdigest()
+        alcance = cls.clave_alcance(tipo_lista, stock, categoria_ids)
+
+        ultima = cls.objects.filter(alcance=alcance).first()
+        if (ultima and ultima.huella == huella and ultima.nombre_contacto == nombre_contacto
+                and ultima.telefono_contacto == telefono_contacto):
+            return ultima, False
+
+        version = cls.objects.create(
+            alcance=alcance,
+            tipo_lista=tipo_lista,
+            stock=stock,
+            categorias=', '.join(sorted(categoria.name for categoria in categorias)),
+            nombre_contacto=nombre_contacto,
+            telefono_contacto=telefono_contacto,
+            filas=filas,
+            huella=huella,
+            cantidad_productos=len(filas),
+            usuario=usuario if usuario is not None and usuario.is_authenticated else None,
+        )
+        return version, True
+
+    @property
+    def ruta_archivo(self):
+        return os.path.join(self.directorio(), self.archivo) if self.archivo else ''
+
+    def tiene_archivo(self):
+        return bool(self.archivo) and os.path.exists(self.ruta_archivo)
+
+    def guardar_pdf(self, contenido):
+        """
+        Escribe el PDF en disco (archivo temporal + rename: nunca queda a medias).
+        El temporal tiene nombre unico: dos generaciones a la vez no se pisan.
+        """
+        import tempfile
+
+        os.makedirs(self.directorio(), exist_ok=True)
+        self.archivo = f'lista_{self.tipo_lista}_{self.pk}_{self.huella[:10]}.pdf'
+        descriptor, temporal = tempfile.mkstemp(dir=self.directorio(), prefix=self.archivo + '.', suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as destino:
+                destino.write(contenido)
+            os.replace(temporal, self.ruta_archivo)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+        ListaPreciosVersion.objects.filter(pk=self.pk).update(archivo=self.archivo)
+
+    def registrar_descarga(self):
+        ListaPreciosVersion.objects.filter(pk=self.pk).update(descargas=models.F('descargas') + 1)
+
+    def anterior(self):
+        """Version previa del mismo alcance (None si es la primera)."""
+        return (
+            ListaPreciosVersion.objects.filter(alcance=self.alcance)
+            .filter(models.Q(fecha__lt=self.fecha) | models.Q(fecha=self.fecha, pk__lt=self.pk))
+            .first()
+        )
+
+    def cambios(self, anterior=None):
+        """
+        Diferencias con la version anterior del mismo alcance:
+        productos agregados, quitados y con cambio de precio, nombre o marca.
+        """
+        anterior = anterior if anterior is not None else self.anterior()
+        previas = {fila[0]: fila for fila in (anterior.filas if anterior else [])}
+        actuales = {fila[0]: fila for fila in self.filas}
+
+        agregados = [fila for pk, fila in actuales.items() if pk not in previas]
+        quitados = [fila for pk, fila in previas.items() if pk not in actuales]
+
+        precios, datos = [], []
+        for pk, fila in actuales.items():
+            previa = previas.get(pk)
+            if previa is None:
+                continue
+            precio_anterior, precio_nuevo = Decimal(previa[3]), Decimal(fila[3])
+            if precio_anterior != precio_nuevo:
+                variacion = (precio_nuevo - precio_anterior) * 100 / precio_anterior if precio_anterior else None
+                precios.append({
+                    'nombre': fila[1], 'marca': fila[2], 'anterior': precio_anterior,
+                    'nuevo': precio_nuevo, 'variacion': variacion,
+                })
+            elif previa[1:3] != fila[1:3]:
+                datos.append({'anterior': previa, 'nuevo': fila})
+
+        precios.sort(key=lambda cambio: cambio['nombre'])
+        return {
+            'anterior': anterior,
+            'agregados': sorted(agregados, key=lambda fila: fila[1]),
+            'quitados': sorted(quitados, key=lambda fila: fila[1]),
+            'precios': precios,
+            'datos': datos,
+            'hay_cambios': bool(anterior) and bool(agregados or quitados or precios or datos),
+        }
@@ -0,0 +1,79 @@
+"""
+Reportes tabulares en PDF con reportlab (platypus), sin pasar por HTML.
+
+Mantiene el formato de los reportes que antes se armaban con xhtml2pdf:
+banda superior con "Reporte de X - Generado el: ..." y el usuario, titulos,
+tabla con bordes y encabezado gris, cuadro "Resumen General" y la
+"Clave Única" al pie. Ademas cada hoja lleva el subtotal de las columnas
+sumables (y el acumulado hasta esa hoja).
+
+Las filas se recorren una vez desde un iterador (por ejemplo un queryset
+con .iterator()) y se arman en bloques de FILAS_POR_BLOQUE: cada bloque es
+una LongTable, asi no se re-partiona una tabla gigante en cada hoja. En
+memoria queda el texto de las celdas; el calculo de alturas y el corte en
+hojas se hace al dibujar cada bloque.
+
+Uso:
+    columnas = [Columna('Cliente', 0.3, alinear='LEFT'),
+                Columna('Total', 0.2, formato=pesos, sumar=True)]
+    return reporte_pdf('ventas.pdf', columnas, filas, encabezado='Reporte de Ventas',
+                       usuario=request.user.username, titulos=['Reporte General de Ventas'],
+                       resumen=['Total de Ventas: $1.000,00'])
+
+Cada fila es una lista con un valor por columna; una lista como valor se
+muestra en varias lineas. El iterador puede intercalar Seccion('titulo')
+para cortar la tabla y empezar otra con ese titulo (listados agrupados).
+
+Este modulo no importa reportlab: las vistas lo usan para declarar sus
+columnas al cargarse y el dibujo (report/dibujo_pdf.py) se importa recien
+al generar el primer reporte del proceso.
+"""
+from django.http import HttpResponse
+from django.utils.dateformat import format as formato_fecha
+
+
+class Columna:
+    """
+    Columna de un reporte.
+      ancho:   fraccion del ancho util de la hoja (las columnas suman 1)
+      formato: funcion que convierte el valor en texto (pesos, cantidad, ...)
+      sumar:   el valor es numerico y se muestra su subtotal por hoja
+    """
+
+    def __init__(self, titulo, ancho, alinear='CENTER', formato=str, sumar=False):
+        self.titulo = titulo
+        self.ancho = ancho
+        self.alinear = alinear
+        self.formato = formato
+        self.sumar = sumar
+
+
+class Seccion:
+    """Marca dentro del iterador de filas: corta la tabla y abre otra con este titulo."""
+
+    def __init__(self, titulo):
+        self.titulo = titulo
+
+
+def fecha_hora(valor):
+    return formato_fecha(valor, 'd-m-Y H:i') if valor else ''
+
+
+def reporte_pdf(nombre_archivo, columnas, filas, encabezado=None, usuario='', titulos=(),
+                subtitulos=(), resumen=None, titulo_resumen='Resumen General', apaisado=False):
+    """
+    Arma el PDF y lo devuelve como descarga.
+
+      encabezado: texto de la banda superior ("Reporte de Ventas"); None la omite
+      titulos:    lineas grandes antes de la tabla
+      subtitulos: lineas de texto normal antes de la tabla
+      resumen:    lineas del cuadro final; puede ser una funcion sin argumentos,
+                  que se llama despues de recorrer las filas (totales acumulados)
+    """
+    from report.dibujo_pdf import armar_pdf
+
+    contenido = armar_pdf(columnas, filas, encabezado, usuario, titulos, subtitulos,
+                          resumen, titulo_resumen, apaisado)
+    response = HttpResponse(contenido, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
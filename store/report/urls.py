@@ -7,7 +7,11 @@ from .views.views_profit_pdf import *
 from .views.views_profit_excel import *
 from .views.views_miscelanea import *
 from .views.views_mix_excel import *
-from .views.views_lista_precios import lista_precios_form
+from .views.views_lista_precios import lista_precios_form, lista_precios_versiones, lista_precios_descargar, lista_precios_cambios
+from .views.views_kardex import kardex, kardex_ajuste
+from .views.views_abc import clasificacion_abc
+from .views.views_mapa_calor import mapa_calor_ventas
+from .views.views_analisis import analisis_ventas
 app_name = 'report'
 
 urlpatterns = [
@@ -67,4 +71,12 @@ urlpatterns = [
     path('mix-day-excel/', MixExcelSalesDayView.as_view(), name='mix_sales_excel'),
     path('mix-section-day-excel/', MixTramoExcelSalesDayView.as_view(), name='mix_sectionsales_excel'),
     path('lista-precios/', lista_precios_form, name='lista_precios'),
+    path('lista-precios/versiones/', lista_precios_versiones, name='lista_precios_versiones'),
+    path('lista-precios/versiones/<int:pk>/descargar/', lista_precios_descargar, name='lista_precios_descargar'),
+    path('lista-precios/versiones/<int:pk>/cambios/', lista_precios_cambios, name='lista_precios_cambios'),
+    path('clasificacion-abc/', clasificacion_abc, name='clasificacion_abc'),
+    path('mapa-calor-ventas/', mapa_calor_ventas, name='mapa_calor_ventas'),
+    path('analisis-ventas/', analisis_ventas, name='analisis_ventas'),
+    path('kardex/', kardex, name='kardex'),
+    path('kardex/ajuste/<int:pk>/', kardex_ajuste, name='kardex_ajuste'),
 ]
\ No newline at end of file
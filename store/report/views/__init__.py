@@ -2,4 +2,8 @@ from .views_sales_pdf import *
 from .views_sales_excel import *
 from .views_purchase_pdf import *
 from .views_purchase_excel import *
-from .views_lista_precios import lista_precios_form, generar_pdf_lista_precios
\ No newline at end of file
+from .views_lista_precios import lista_precios_form, lista_precios_versiones, lista_precios_descargar, lista_precios_cambios
+from .views_kardex import kardex, kardex_ajuste
+from .views_abc import clasificacion_abc
+from .views_mapa_calor import mapa_calor_ventas
+from .views_analisis import analisis_ventas
\ No newline at end of file
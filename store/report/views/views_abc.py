@@ -0,0 +1,69 @@
+"""
+Clasificacion ABC / XYZ de los productos (calculo en inventory/clasificacion.py).
+
+La pantalla muestra el resumen por clase, la matriz ABC x XYZ y el detalle
+de los productos ordenados por su participacion; ?formato=excel exporta el
+detalle completo.
+"""
+from django.contrib.auth.decorators import login_required, permission_required
+from django.http import HttpResponse
+from django.shortcuts import render
+
+from inventory.clasificacion import CRITERIOS, clasificar, periodo_por_defecto
+
+
+@login_required
+@permission_required('inventory.view_products', raise_exception=True)
+def clasificacion_abc(request):
+    """Productos clasificados A/B/C por venta, margen o unidades en el periodo elegido."""
+    from ..forms import ClasificacionAbcForm
+
+    desde, hasta = periodo_por_defecto()
+    form = ClasificacionAbcForm(request.GET or None, initial={'desde': desde, 'hasta': hasta, 'criterio': 'venta'})
+    criterio, clase = 'venta', ''
+    if form.is_bound and form.is_valid():
+        desde, hasta = form.cleaned_data['desde'], form.cleaned_data['hasta']
+        criterio, clase = form.cleaned_data['criterio'], form.cleaned_data['clase']
+
+    resultado = clasificar(desde, hasta, criterio)
+    productos = sorted(
+        ({'producto_id': pk, **datos} for pk, datos in resultado['productos'].items()
+         if datos['unidades'] and (not clase or datos['abc'] == clase)),
+        key=lambda fila: fila['ranking'],
+    )
+
+    if request.GET.get('formato') == 'excel':
+        return _clasificacion_excel(productos, criterio)
+
+    context = {
+        'page_title': 'Clasificación ABC',
+        'form': form,
+        'resultado': resultado,
+        'criterio_nombre': CRITERIOS[criterio],
+        'productos': productos,
+        'sin_ventas': sum(1 for datos in resultado['productos'].values() if not datos['unidades']),
+        'matriz': [
+            (abc, [resultado['matriz'][f'{abc}{xyz}'] for xyz in 'XYZ']) for abc in 'ABC'
+        ],
+        'parametros': request.GET.urlencode(),
+    }
+    return render(request, 'report/clasificacion_abc.html', context)
+
+
+def _clasificacion_excel(productos, criterio):
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('ABC')
+    hoja.append(['Ranking', 'Código', 'Producto', 'Categoría', 'Unidades', 'Venta', 'Margen',
+                 f'% acumulado ({CRITERIOS[criterio]})', 'ABC', 'XYZ', 'Coef. variación'])
+    for fila in productos:
+        hoja.append([
+            fila['ranking'], fila['code'], fila['name'], fila['categoria'], fila['unidades'],
+            fila['venta'], fila['margen'], fila['participacion'], fila['abc'], fila['xyz'], fila['variacion'],
+        ])
+
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = 'attachment; filename="clasificacion_abc.xlsx"'
+    libro.save(response)
+    return response
@@ -0,0 +1,74 @@
+"""
+Consultas libres sobre las ventas: agrupar por una o dos dimensiones
+(mes, categoria, cliente, ...), filtrar y sumar, contra la cache
+analitica en memoria (report/analitica.py).
+"""
+from django.contrib.auth.decorators import login_required, permission_required
+from django.shortcuts import render
+
+from report import analitica
+
+LIMITE_FILAS = 2000
+
+
+@login_required
+@permission_required('pos.view_sales', raise_exception=True)
+def analisis_ventas(request):
+    """Tabla de resultados de la consulta, con el tiempo y la memoria usada."""
+    from ..forms import AnalisisVentasForm
+
+    form = AnalisisVentasForm(request.GET or None, initial={'agrupar': 'mes', 'valores': ['venta', 'tickets']})
+    context = {'page_title': 'Análisis de Ventas', 'form': form}
+
+    if form.is_bound and form.is_valid():
+        datos = form.cleaned_data
+        agrupar = [d for d in (datos['agrupar'], datos['agrupar_2']) if d]
+        filtros = {
+            'desde': datos['desde'],
+            'hasta': datos['hasta'],
+            'categoria': datos['categoria'].pk if datos['categoria'] else None,
+            'tipo_lista': datos['tipo_lista'],
+            'forma_pago': datos['forma_pago'],
+        }
+        consulta = analitica.consultar(agrupar, datos['valores'], filtros, limite=LIMITE_FILAS)
+
+        etiquetas = {d: analitica.nombres(d, {fila[d] for fila in consulta['filas']}) for d in agrupar}
+        filas = []
+        for fila in consulta['filas']:
+            filas.append({
+                'claves': [_mostrar(d, fila[d], etiquetas[d]) for d in agrupar],
+                'valores': [(v, fila[v]) for v in datos['valores']],
+            })
+        # una venta puede estar en varios grupos: los tickets no se suman
+        totales = [
+            (v, None if v == 'tickets' else sum(fila[v] for fila in consulta['filas'])) for v in datos['valores']
+        ]
+        tabla = analitica.tabla()
+        context.update({
+            'columnas': [analitica.DIMENSIONES[d] for d in agrupar],
+            'valores': [analitica.VALORES[v] for v in datos['valores']],
+            'cantidad_columnas': len(agrupar) + len(datos['valores']),
+            'filas': filas,
+            'totales': totales,
+            'truncado': len(filas) >= LIMITE_FILAS,
+            'origen': consulta['origen'],
+            'milisegundos': consulta['milisegundos'],
+            'filas_en_memoria': tabla.filas(),
+            'memoria_mb': round(tabla.memoria() / 1024 / 1024, 1),
+            'limite_mb': round(analitica.limite_bytes() / 1024 / 1024),
+        })
+    return render(request, 'report/analisis_ventas.html', context)
+
+
+def _mostrar(dimension, valor, etiquetas):
+    if valor is None:
+        return {'cliente': 'Sin cliente', 'categoria': 'Sin categoría'}.get(dimension, '-')
+    if dimension in ('producto', 'categoria', 'cliente'):
+        return etiquetas.get(valor, valor)
+    if dimension == 'dia_semana':
+        return analitica.DIAS_SEMANA[valor]
+    if dimension == 'hora':
+        return f'{valor:02d}:00'
+    if dimension == 'dia':
+        return valor.strftime('%d/%m/%Y')
+    return valor if valor != '' else '-'
@@ -0,0 +1,147 @@
+"""
+Kardex (ficha de stock) por producto o por categoria.
+
+La consulta esta en inventory/kardex.py: compras, ajustes y ventas unidas y
+con el saldo acumulado calculado en la base (funciones de ventana). La
+pantalla pagina de a FILAS_POR_PAGINA y las exportaciones (PDF / Excel)
+recorren el periodo completo de a bloques, sin cargarlo entero en memoria.
+"""
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required, permission_required
+from django.core.paginator import Paginator
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+
+from inventory.kardex import Kardex
+from inventory.templatetags.formato import cantidad, pesos
+from report.tabla_pdf import Columna, Seccion, fecha_hora, reporte_pdf
+
+FILAS_POR_PAGINA = 100
+
+
+@login_required
+@permission_required('inventory.view_products', raise_exception=True)
+def kardex(request):
+    """Movimientos con saldo acumulado; ?formato=pdf|excel exporta el periodo completo."""
+    from ..forms import AjusteStockForm, KardexForm
+
+    form = KardexForm(request.GET or None)
+    context = {'page_title': 'Kardex de Stock', 'form': form}
+
+    if form.is_bound and form.is_valid():
+        datos = form.cleaned_data
+        producto = datos['producto']
+        movimientos = Kardex(
+            producto_id=producto.pk if producto else None,
+            categoria_id=datos['categoria'].pk if not producto else None,
+            desde=datos['desde'],
+            hasta=datos['hasta'],
+        )
+
+        formato = request.GET.get('formato')
+        if formato == 'pdf':
+            return _kardex_pdf(request, movimientos, producto, datos)
+        if formato == 'excel':
+            return _kardex_excel(movimientos, producto)
+
+        pagina = Paginator(movimientos, FILAS_POR_PAGINA).get_page(request.GET.get('page'))
+        parametros = request.GET.copy()
+        parametros.pop('page', None)
+        context.update({
+            'producto': producto,
+            'categoria': datos['categoria'] if not producto else None,
+            'pagina': pagina,
+            'parametros': parametros.urlencode(),
+        })
+        if producto:
+            saldo_inicial = movimientos.saldo_inicial().get(producto.pk)
+            saldo_final = movimientos.saldo_final().get(producto.pk)
+            context.update({
+                'saldo_inicial': saldo_inicial[0] if saldo_inicial else None,
+                'saldo_final': saldo_final[0] if saldo_final else 0,
+                'diferencia': None if datos['hasta'] else producto.quantity - (saldo_final[0] if saldo_final else 0),
+                'ajuste_form': AjusteStockForm(initial={'cantidad_real': producto.quantity}),
+            })
+
+    return render(request, 'report/kardex.html', context)
+
+
+@login_required
+@permission_required('inventory.change_products', raise_exception=True)
+def kardex_ajuste(request, pk):
+    """Registra un recuento fisico del producto y vuelve a su kardex."""
+    from inventory.models import Products
+    from ..forms import AjusteStockForm
+
+    producto = get_object_or_404(Products, pk=pk)
+    if request.method == 'POST':
+        form = AjusteStockForm(request.POST)
+        if form.is_valid():
+            ajuste = producto.ajustar_stock(form.cleaned_data['cantidad_real'], form.cleaned_data['motivo'], request.user)
+            if ajuste is None:
+                messages.info(request, 'El stock contado es igual al registrado: no se hizo ningún ajuste.')
+            else:
+                messages.success(request, f'Stock ajustado ({cantidad(ajuste.cantidad)}).')
+        else:
+            messages.error(request, 'Revisar el stock contado y el motivo del ajuste.')
+    return redirect(f"{reverse('report:kardex')}?codigo={producto.code}")
+
+
+def _filas(movimientos, por_categoria):
+    producto_actual = None
+    for movimiento in movimientos.iterar():
+        if por_categoria and movimiento.producto_id != producto_actual:
+            producto_actual = movimiento.producto_id
+            yield Seccion(movimiento.producto)
+        yield [
+            movimiento.fecha, movimiento.get_tipo_display(), movimiento.referencia,
+            movimiento.entrada or None, movimiento.salida or None,
+            movimiento.costo_unitario, movimiento.saldo, movimiento.costo_promedio,
+        ]
+
+
+def _kardex_pdf(request, movimientos, producto, datos):
+    columnas = [
+        Columna('Fecha', 0.14, formato=fecha_hora),
+        Columna('Tipo', 0.09),
+        Columna('Referencia', 0.21, alinear='LEFT'),
+        Columna('Entrada', 0.10, formato=cantidad),
+        Columna('Salida', 0.10, formato=cantidad),
+        Columna('Costo Unit.', 0.12, formato=pesos),
+        Columna('Saldo', 0.10, formato=cantidad),
+        Columna('Costo Prom.', 0.14, formato=pesos),
+    ]
+    titulo = f'Kardex de {producto.name}' if producto else f"Kardex de la categoría {datos['categoria'].name}"
+    periodo = []
+    if datos['desde'] or datos['hasta']:
+        desde = datos['desde'].strftime('%d/%m/%Y') if datos['desde'] else 'el inicio'
+        hasta = datos['hasta'].strftime('%d/%m/%Y') if datos['hasta'] else 'hoy'
+        periodo = [f'Período: desde {desde} hasta {hasta}']
+    return reporte_pdf(
+        'kardex.pdf', columnas, _filas(movimientos, producto is None),
+        encabezado='Kardex de Stock', usuario=request.user.username,
+        titulos=[titulo], subtitulos=periodo, apaisado=True,
+    )
+
+
+def _kardex_excel(movimientos, producto):
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Kardex')
+    hoja.append(['Producto', 'Fecha', 'Tipo', 'Referencia', 'Entrada', 'Salida',
+                 'Costo Unitario', 'Saldo', 'Valor', 'Costo Promedio'])
+    for movimiento in movimientos.iterar():
+        hoja.append([
+            movimiento.producto, movimiento.fecha, movimiento.get_tipo_display(), movimiento.referencia,
+            float(movimiento.entrada), float(movimiento.salida), float(movimiento.costo_unitario),
+            float(movimiento.saldo), float(movimiento.valor),
+            float(movimiento.costo_promedio) if movimiento.costo_promedio is not None else None,
+        ])
+
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    nombre = f'kardex_{producto.code}.xlsx' if producto else 'kardex_categoria.xlsx'
+    response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    libro.save(response)
+    return response
@@ -1,20 +1,21 @@
 """
 Vista para generar lista de precios en PDF
+
+Las listas se publican por versiones (report.models.ListaPreciosVersion): el
+PDF se arma una sola vez por alcance y precios, queda guardado en disco y las
+descargas siguientes lo sirven directamente.
 """
-from django.shortcuts import render
-from django.http import HttpResponse
+from django.shortcuts import render, get_object_or_404
+from django.http import FileResponse
 from django.contrib.auth.decorators import login_required
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_RIGHT, TA_CENTER
-from inventory.models import Products, Category
 from io import BytesIO
 from django.conf import settings
+from django.utils.html import escape
 import os
 
+from inventory.templatetags.formato import pesos
+from report.models import ListaPreciosVersion
+
 
 @login_required
 def lista_precios_form(request):
@@ -24,25 +25,42 @@ def lista_precios_form(request):
     if request.method == 'POST':
         form = ListaPreciosForm(request.POST)
         if form.is_valid():
-            # Generar PDF
-            return generar_pdf_lista_precios(request, form.cleaned_data)
+            # Publicar (o reutilizar) la version y descargarla
+            version, _ = ListaPreciosVersion.vigente_o_nueva(form.cleaned_data, request.user)
+            return servir_lista_precios(version)
     else:
         form = ListaPreciosForm()
     
     context = {
         'page_title': 'Generar Lista de Precios',
         'form': form,
+        'versiones': ListaPreciosVersion.objects.select_related('usuario')[:5],
     }
     return render(request, 'report/lista_precios_form.html', context)
 
 
-def generar_pdf_lista_precios(request, filtros):
-    """Genera PDF de lista de precios según filtros"""
-    
-    # Crear respuesta HTTP
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="lista_precios_{filtros["tipo_lista"]}.pdf"'
-    
+def servir_lista_precios(version):
+    """Descarga el PDF de la version; lo arma solo si todavia no esta en disco."""
+    if not version.tiene_archivo():
+        version.guardar_pdf(armar_pdf_lista_precios(version))
+    version.registrar_descarga()
+    return FileResponse(
+        open(version.ruta_archivo, 'rb'),
+        as_attachment=True,
+        filename=f'lista_precios_{version.tipo_lista}.pdf',
+        content_type='application/pdf',
+    )
+
+
+def armar_pdf_lista_precios(version):
+    """Genera el PDF de una version de la lista de precios a partir de sus filas"""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+
     # Crear buffer
     buffer = BytesIO()
     
@@ -71,8 +89,8 @@ def generar_pdf_lista_precios(request, filtros):
         logo = Image(logo_path, width=4*cm, height=4*cm)
         contacto_text = f"""
         <b>CONTACTO</b><br/>
-        {filtros['nombre_contacto']}<br/>
-        Tel: {filtros['telefono_contacto']}
+        {escape(version.nombre_contacto)}<br/>
+        Tel: {escape(version.telefono_contacto)}
         """
         contacto = Paragraph(contacto_text, styles['Normal'])
         header_data = [[logo, contacto]]
@@ -80,8 +98,8 @@ def generar_pdf_lista_precios(request, filtros):
         # Sin logo
         contacto_text = f"""
         <b>CONTACTO</b><br/>
-        {filtros['nombre_contacto']}<br/>
-        Tel: {filtros['telefono_contacto']}
+        {escape(version.nombre_contacto)}<br/>
+        Tel: {escape(version.telefono_contacto)}
         """
         contacto = Paragraph(contacto_text, styles['Normal'])
         header_data = [[contacto]]
@@ -108,38 +126,13 @@ def generar_pdf_lista_precios(request, filtros):
     elements.append(title)
     elements.append(Spacer(1, 0.5*cm))
     
-    # ===== FILTRAR PRODUCTOS =====
-    productos = Products.objects.filter(status=1)
-    
-    # Filtro por stock
-    if filtros['stock'] == 'con_stock':
-        productos = productos.filter(quantity__gt=0)
-    
-    # Filtro por categorías
-    if filtros.get('categorias'):
-        productos = productos.filter(category__in=filtros['categorias'])
-    
-    # Ordenar
-    productos = productos.order_by('category__name', 'name')
-    
     # ===== TABLA DE PRODUCTOS =====
     # Encabezados
     data = [['PRODUCTO', 'MARCA', 'PRECIO']]
     
-    # Datos
-    for producto in productos:
-        if filtros['tipo_lista'] == 'minorista':
-            precio = f"$ {producto.precio_minorista:,.2f}".replace(',', '.')
-        else:
-            precio = f"$ {producto.precio_mayorista:,.2f}".replace(',', '.')
-        
-        marca = producto.category.name if producto.category else '-'
-        
-        data.append([
-            producto.name,
-            marca,
-            precio
-        ])
+    # Datos (ya filtrados y ordenados al publicar la version)
+    for _, nombre, marca, precio in version.filas:
+        data.append([nombre, marca, pesos(precio)])
     
     # Crear tabla
     tabla = Table(data, colWidths=[10*cm, 4*cm, 3*cm])
@@ -188,8 +181,7 @@ def generar_pdf_lista_precios(request, filtros):
         alignment=TA_CENTER
     )
     
-    from datetime import datetime
-    fecha = datetime.now().strftime('%d/%m/%Y %H:%M')
+    fecha = version.fecha.strftime('%d/%m/%Y %H:%M')
     footer = Paragraph(f'Lista generada el {fecha} | Total productos: {len(data)-1}', footer_style)
     elements.append(footer)
     
@@ -199,6 +191,32 @@ def generar_pdf_lista_precios(request, filtros):
     # Obtener PDF del buffer
     pdf = buffer.getvalue()
     buffer.close()
-    response.write(pdf)
-    
-    return response
+    return pdf
+
+
+@login_required
+def lista_precios_versiones(request):
+    """Versiones publicadas de las listas de precios"""
+    context = {
+        'page_title': 'Versiones de Listas de Precios',
+        'versiones': ListaPreciosVersion.objects.select_related('usuario')[:100],
+    }
+    return render(request, 'report/lista_precios_versiones.html', context)
+
+
+@login_required
+def lista_precios_descargar(request, pk):
+    """Descarga una version publicada (la vigente o una anterior)"""
+    return servir_lista_precios(get_object_or_404(ListaPreciosVersion, pk=pk))
+
+
+@login_required
+def lista_precios_cambios(request, pk):
+    """Que cambio en esta version respecto de la anterior del mismo alcance"""
+    version = get_object_or_404(ListaPreciosVersion.objects.select_related('usuario'), pk=pk)
+    context = {
+        'page_title': 'Cambios en la Lista de Precios',
+        'version': version,
+        'cambios': version.cambios(),
+    }
+    return render(request, 'report/lista_precios_cambios.html', context)
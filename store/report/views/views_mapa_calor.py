@@ -0,0 +1,90 @@
+"""
+Mapa de calor de ventas por hora y dia de la semana (calculo en report/mapa_calor.py).
+
+Sirve para planificar personal y el cambio de la caja: la tabla colorea
+cada celda segun la metrica elegida y ?formato=excel exporta una hoja por
+metrica con escala de colores.
+"""
+from datetime import timedelta
+
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.utils import timezone
+
+from report.mapa_calor import DIAS, METRICAS, calcular, intensidad
+
+DIAS_POR_DEFECTO = 90
+
+
+@login_required
+def mapa_calor_ventas(request):
+    """Ventas agrupadas por hora (filas) y dia de la semana (columnas)."""
+    from ..forms import MapaCalorForm
+
+    hoy = timezone.now().date()
+    desde, hasta = hoy - timedelta(days=DIAS_POR_DEFECTO - 1), hoy
+    form = MapaCalorForm(request.GET or None, initial={'desde': desde, 'hasta': hasta, 'metrica': 'venta'})
+    categoria, metrica = None, 'venta'
+    if form.is_bound and form.is_valid():
+        desde, hasta = form.cleaned_data['desde'], form.cleaned_data['hasta']
+        categoria, metrica = form.cleaned_data['categoria'], form.cleaned_data['metrica']
+
+    mapa = calcular(desde, hasta, categoria.pk if categoria else None)
+    if request.GET.get('formato') == 'excel':
+        return _mapa_calor_excel(mapa, desde, hasta, categoria)
+
+    celdas = mapa['celdas'][metrica]
+    maximo = max((max(fila) for fila in celdas), default=0)
+    filas = [
+        {
+            'hora': hora,
+            'celdas': [(valor, intensidad(valor, maximo)) for valor in celdas[i]],
+            'total': mapa['por_hora'][metrica][i],
+        }
+        for i, hora in enumerate(mapa['horas'])
+    ]
+    context = {
+        'page_title': 'Mapa de Calor de Ventas',
+        'form': form,
+        'dias': DIAS,
+        'filas': filas,
+        'por_dia': mapa['por_dia'][metrica],
+        'totales': mapa['totales'],
+        'metrica': metrica,
+        'metrica_nombre': METRICAS[metrica],
+        'es_importe': metrica != 'tickets',
+        'parametros': request.GET.urlencode(),
+    }
+    return render(request, 'report/mapa_calor.html', context)
+
+
+def _mapa_calor_excel(mapa, desde, hasta, categoria):
+    from openpyxl import Workbook
+    from openpyxl.formatting.rule import ColorScaleRule
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    libro = Workbook()
+    libro.remove(libro.active)
+    for metrica, nombre in METRICAS.items():
+        hoja = libro.create_sheet(nombre[:31])
+        titulo = f"{nombre} del {desde.strftime('%d/%m/%Y')} al {hasta.strftime('%d/%m/%Y')}"
+        if categoria:
+            titulo += f' - {categoria.name}'
+        hoja.append([titulo])
+        hoja['A1'].font = Font(bold=True)
+        hoja.append(['Hora'] + DIAS + ['Total'])
+        for i, hora in enumerate(mapa['horas']):
+            hoja.append([f'{hora:02d}:00'] + mapa['celdas'][metrica][i] + [mapa['por_hora'][metrica][i]])
+        hoja.append(['Total'] + mapa['por_dia'][metrica] + [mapa['totales'][metrica]])
+        if mapa['horas']:
+            rango = f"B3:{get_column_letter(1 + len(DIAS))}{2 + len(mapa['horas'])}"
+            hoja.conditional_formatting.add(rango, ColorScaleRule(
+                start_type='min', start_color='FFFFFF', end_type='max', end_color='F8696B',
+            ))
+
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = 'attachment; filename="mapa_calor_ventas.xlsx"'
+    libro.save(response)
+    return response
@@ -3,12 +3,8 @@ from pos.models import *
 from inventory.models import *
 from report.forms import *
 
-import io
-from xhtml2pdf import pisa
 from datetime import datetime, timedelta
 from decimal import Decimal
-from io import BytesIO
-import uuid
 
 from django.conf import settings
 from django.contrib import messages
@@ -16,10 +12,9 @@ from django.contrib.auth.forms import PasswordResetForm, SetPasswordForm
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.auth.models import User
 from django.core.mail import send_mail, BadHeaderError
-from django.db.models import Sum
+from django.db.models import Prefetch, Sum
 from django.http import HttpResponse
 from django.shortcuts import render, redirect
-from django.template.loader import get_template, render_to_string
 from django.utils.encoding import force_bytes
 from django.utils.html import strip_tags
 from django.utils.http import urlsafe_base64_encode
@@ -27,8 +22,9 @@ from django.utils import timezone
 from django.views import View
 from django.views.generic import ListView, FormView
 
-import openpyxl
-from openpyxl import Workbook
+
+from inventory.templatetags.formato import cantidad, pesos
+from report.tabla_pdf import Columna, Seccion, fecha_hora, reporte_pdf
 
 class MixReportView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     model = Sales
@@ -37,119 +33,166 @@ class MixReportView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     form_class = SalesReportForm
     permission_required = 'report.view_mix' 
     
+def _fecha_generacion():
+    return f"Fecha de generación del informe: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
+
+
 class SupplierPDFView(View):
     def get(self, request, *args, **kwargs):
-        suppliers = Supplier.objects.all()
-
-        template = get_template('report/mix_suppliers_pdf.html') 
-        context = {
-            'suppliers': suppliers,
-            'current_date': timezone.now(),
-        }
-        html = template.render(context)
-        
-        current_date = datetime.now()
-        # Convertir HTML a PDF
-        pdf_file = BytesIO()
-        pisa_status = pisa.CreatePDF(html, dest=pdf_file)
-
-        if pisa_status.err:
-            return HttpResponse('Error al generar el PDF')
+        columnas = [
+            Columna('Nombre', 0.25, alinear='LEFT'),
+            Columna('Información de Contacto', 0.35, alinear='LEFT'),
+            Columna('Fecha de Registro', 0.20, formato=fecha_hora),
+            Columna('Última Actualización', 0.20, formato=fecha_hora),
+        ]
+        filas = (
+            [supplier.name, supplier.contact_info, supplier.date_added, supplier.date_updated]
+            for supplier in Supplier.objects.all().iterator()
+        )
 
-        # Configurar la respuesta HTTP con el PDF generado
-        pdf_file.seek(0)
+        current_date = datetime.now()
         filename = f"lista_proveedores_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
+        return reporte_pdf(
+            filename, columnas, filas, usuario=request.user.username,
+            titulos=['Lista de Proveedores'], subtitulos=[_fecha_generacion()],
+        )
 
 
 class SupplierProductPDFView(View):
     def get(self, request, *args, **kwargs):
-        suppliers = Supplier.objects.prefetch_related('purchaseproduct_set__product').all()
-        context = {
-            'suppliers': suppliers,
-            'current_date': timezone.now(),
-        }
-        template = get_template('report/mix_supplier_product_pdf.html')  # Ajusta el nombre del template según tu estructura
-        html = template.render(context)
-        
-        current_date = datetime.now()
-        
-        pdf_file = BytesIO()
-        pisa_status = pisa.CreatePDF(html, dest=pdf_file)
+        columnas = [
+            Columna('Producto', 0.40, alinear='LEFT'),
+            Columna('Costo Por Unidad', 0.20, formato=pesos),
+            Columna('Cantidad', 0.15, formato=cantidad),
+            Columna('Fecha de Adquisición', 0.25, formato=fecha_hora),
+        ]
 
-        if pisa_status.err:
-            return HttpResponse('Error al generar el PDF')
-
-        
-        pdf_file.seek(0)
+        current_date = datetime.now()
         filename = f"lista_proveedores_productos_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
+        return reporte_pdf(
+            filename, columnas, self.filas(), usuario=request.user.username,
+            titulos=['Listado de Proveedores y Productos'], subtitulos=[_fecha_generacion()],
+        )
 
-        return response
+    def filas(self):
+        """Una seccion por proveedor; las compras se leen en una sola consulta ordenada."""
+        compras = (
+            PurchaseProduct.objects.filter(supplier__isnull=False)
+            .select_related('product')
+            .order_by('supplier', 'pk')
+            .iterator(chunk_size=2000)
+        )
+        compra = next(compras, None)
+        for supplier in Supplier.objects.order_by('pk'):
+            yield Seccion(supplier.name)
+            while compra is not None and compra.supplier_id == supplier.pk:
+                producto = compra.product.name if compra.product_id else '-'
+                yield [producto, compra.cost, compra.qty, compra.date_added]
+                compra = next(compras, None)
 
 
 class ProductPDFView(View):
     def get(self, request, *args, **kwargs):
-        products = Products.objects.all().order_by('name')
-
-
-        template = get_template('report/mix_products_pdf.html')  
-        context = {
-            'products': products,
-            'current_date': timezone.now(),
-        }
-        html = template.render(context)
+        products = Products.objects.order_by('name').only('name', 'description', 'date_added')
+        columnas = [
+            Columna('Nombre', 0.35, alinear='LEFT'),
+            Columna('Descripción', 0.45, alinear='LEFT'),
+            Columna('Fecha de agregado', 0.20, formato=fecha_hora),
+        ]
+        filas = (
+            [product.name, product.description, product.date_added]
+            for product in products.iterator(chunk_size=2000)
+        )
 
         current_date = datetime.now()
-        # Convertir HTML a PDF
-        pdf_file = BytesIO()
-        pisa_status = pisa.CreatePDF(html, dest=pdf_file)
-
-        if pisa_status.err:
-            return HttpResponse('Error al generar el PDF')
-
-        
-        pdf_file.seek(0)
         filename = f"lista_productos_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return reporte_pdf(
+            filename, columnas, filas, usuario=request.user.username,
+            titulos=['Lista de Productos'], subtitulos=[_fecha_generacion()],
+        )
 
-        return response
 
 class ProductPDFQtyView(View):
     def get(self, request, *args, **kwargs):
-        products = Products.objects.all().order_by('name')
-
-        
-        template = get_template('report/mix_productsqty_pdf.html') 
-        context = {
-            'products': products,
-            'current_date': timezone.now(),
-        }
-        html = template.render(context)
+        products = Products.objects.order_by('name').only(
+            'name', 'description', 'date_added', 'quantity', 'cost', 'precio_mayorista', 'precio_minorista'
+        )
+        columnas = [
+            Columna('Nombre', 0.20, alinear='LEFT'),
+            Columna('Descripción', 0.20, alinear='LEFT'),
+            Columna('Fecha de agregado', 0.14, formato=fecha_hora),
+            Columna('Cantidad', 0.10, formato=cantidad),
+            Columna('Costo', 0.12, formato=pesos),
+            Columna('Precio Mayorista', 0.12, formato=pesos),
+            Columna('Precio Minorista', 0.12, formato=pesos),
+        ]
+        filas = (
+            [
+                product.name, product.description, product.date_added, product.quantity,
+                product.cost, product.precio_mayorista, product.precio_minorista,
+            ]
+            for product in products.iterator(chunk_size=2000)
+        )
 
         current_date = datetime.now()
-        
-        pdf_file = BytesIO()
-        pisa_status = pisa.CreatePDF(html, dest=pdf_file)
+        filename = f"lista_productos_detalles_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
+        return reporte_pdf(
+            filename, columnas, filas, usuario=request.user.username,
+            titulos=['Lista de Productos'], subtitulos=[_fecha_generacion()],
+        )
 
-        if pisa_status.err:
-            return HttpResponse('Error al generar el PDF')
 
-        
-        pdf_file.seek(0)
-        filename = f"lista_productos_detalles_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+COLUMNAS_MIX = [
+    Columna('Fecha', 0.11, formato=fecha_hora),
+    Columna('Cliente', 0.17, alinear='LEFT'),
+    Columna('Productos Cant. Vendidas', 0.23, alinear='LEFT'),
+    Columna('Precio Unit. - Coste Unit.', 0.27, alinear='LEFT'),
+    Columna('Grand Total', 0.11, formato=pesos, sumar=True),
+    Columna('Ganancia Neta', 0.11, formato=pesos, sumar=True),
+]
+
+
+def _pdf_mix(request, sales, nombre_archivo, titulo, fecha):
+    """Reporte de ventas con ganancia neta (precio de la venta - costo actual del producto)."""
+    items = salesItems.objects.filter(sale__in=sales)
+    total_items_vendidos = items.aggregate(total=Sum('qty'))['total']
+    total_net_profit = sum(
+        (Decimal(qty) * (Decimal(price) - cost) for qty, price, cost in items.values_list('qty', 'price', 'product__cost').iterator()),
+        Decimal(0),
+    )
+    subtitulos = [
+        fecha,
+        f"Total Clientes: {sales.values('id').distinct().count()}",
+        f'Total Items Vendidos: {cantidad(total_items_vendidos)}',
+        f"Total Ingresos: {pesos(sales.aggregate(total=Sum('grand_total'))['total'])}",
+        f'Total de Ganancias Netas: {pesos(total_net_profit)}',
+    ]
+
+    def filas():
+        detalle = salesItems.objects.select_related('product').only('sale', 'qty', 'price', 'product', 'product__name', 'product__cost')
+        ventas = sales.select_related('cliente').prefetch_related(Prefetch('salesitems_set', queryset=detalle))
+        for sale in ventas.iterator(chunk_size=1000):
+            products_list = {}
+            net_profit = Decimal(0)
+            for item in sale.salesitems_set.all():
+                products_list[item.product.name] = item
+                # Ganancia con el precio usado en la venta
+                net_profit += Decimal(item.qty) * (Decimal(item.price) - item.product.cost)
+            yield [
+                sale.date_added,
+                sale.cliente or '',
+                [f'{nombre}: {cantidad(item.qty)}' for nombre, item in products_list.items()],
+                [f'{nombre}: {pesos(item.price)} - {pesos(item.product.cost)}' for nombre, item in products_list.items()],
+                sale.grand_total,
+                net_profit,
+            ]
+
+    return reporte_pdf(
+        nombre_archivo, COLUMNAS_MIX, filas(), usuario=request.user.username,
+        titulos=[titulo], subtitulos=subtitulos, apaisado=True,
+    )
+
 
-        return response
-    
-    
 class MixPDFSalesDayView(FormView):
     template_name = 'report/mix_day_pdf.html'
     form_class = DayForm
@@ -159,84 +202,22 @@ class MixPDFSalesDayView(FormView):
         month = int(form.cleaned_data['month'])
         day = int(form.cleaned_data['day'])
 
-        
+        if not self.is_valid_day(year, month, day):
+            messages.error(self.request, "La fecha ingresada no es válida.")
+            return self.form_invalid(form)
+
         start_date = datetime(year, month, day, 3, 0, 0)
         end_date = start_date + timedelta(days=1)
 
         month_name = MONTH_NAMES[month - 1]
-        
-        day_name_english = start_date.strftime('%A')  
-        day_name = DAYS_OF_WEEK[day_name_english]  
-        
-        if not self.is_valid_day(year, month, day):
-            messages.error(self.request, "La fecha ingresada no es válida.")
-            return self.form_invalid(form)
+        day_name = DAYS_OF_WEEK[start_date.strftime('%A')]
 
-        
         sales = Sales.objects.filter(date_added__gte=start_date, date_added__lt=end_date)
-        total_clientes = sales.values('id').distinct().count()
-        total_items_vendidos = salesItems.objects.filter(sale__in=sales).aggregate(total=Sum('qty'))['total']
-        total_ingresos = sales.aggregate(total=Sum('grand_total'))['total']
-
-        sale_details = []
-        total_net_profit = Decimal(0)
-        for sale in sales:
-            items = salesItems.objects.filter(sale=sale)
-            products_list = {}
-            net_profit_total = Decimal(0)
-            for item in items:
-                product_name = item.product.name
-                products_list[product_name] = {
-                    'qty': item.qty,
-                    'price': item.price,  # CAMBIO: Usar precio de la venta
-                    'cost': item.product.cost,
-                }
-                # CAMBIO: Calcular ganancia con el precio usado en la venta
-                item_profit = Decimal(item.qty) * (Decimal(item.price) - item.product.cost)
-                net_profit_total += item_profit
-            total_net_profit += net_profit_total
-            sale_details.append({
-                'cliente': sale.cliente,
-                'date_added': sale.date_added,
-                'products_list': products_list,
-                'grand_total': sale.grand_total,
-                'net_profit': net_profit_total
-            })
 
         current_date = datetime.now()
-        unique_key = str(uuid.uuid4())
-
-        html_string = render_to_string('report/mix_day_pdf.html', {
-            'sale_data': sale_details,
-            'total_clientes': total_clientes,
-            'total_items_vendidos': total_items_vendidos,
-            'total_ingresos': total_ingresos,
-            'total_net_profit': total_net_profit,
-            'current_date': current_date,
-            'username': self.request.user.username,
-            'unique_key': unique_key,
-            'year': year,
-            'month_name': month_name,
-            'day': day,
-            'day_name':day_name,
-        })
-
-        pdf_buffer = io.BytesIO()
-        pisa_status = pisa.CreatePDF(
-            io.BytesIO(html_string.encode("UTF-8")), 
-            dest=pdf_buffer, 
-            encoding='UTF-8'
-        )
-
-        if pisa_status.err:
-            return HttpResponse('Hubo errores al generar el PDF.')
-
         filename = f"reporte_cierreventas_diario_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf_buffer.getvalue())
-
-        return response
+        fecha = f'Fecha: {day_name}, {day}/{month_name}/{year}'
+        return _pdf_mix(self.request, sales, filename, 'Reporte de Ventas Diario', fecha)
 
     def is_valid_day(self, year, month, day):
         try:
@@ -258,93 +239,30 @@ class MixTramoPDFSalesDayView(FormView):
         end_month = int(form.cleaned_data['end_month'])
         end_day = int(form.cleaned_data['end_day'])
 
-        
+        if not self.is_valid_day(start_year, start_month, start_day) or not self.is_valid_day(end_year, end_month, end_day):
+            messages.error(self.request, "Una de las fechas ingresadas no es válida.")
+            return self.form_invalid(form)
+
         if not self.is_valid_date_range(start_year, start_month, start_day, end_year, end_month, end_day):
             messages.error(self.request, "La fecha de inicio no puede ser mayor que la fecha de fin.")
             return self.form_invalid(form)
 
-        
         start_date = datetime(start_year, start_month, start_day, 3, 0, 0)
         end_date = datetime(end_year, end_month, end_day, 3, 0, 0) + timedelta(days=1)
-        
+
         end_date_display = datetime(end_year, end_month, end_day)
-        
-        if not self.is_valid_day(start_year, start_month, start_day) or not self.is_valid_day(end_year, end_month, end_day):
-            messages.error(self.request, "Una de las fechas ingresadas no es válida.")
-            return self.form_invalid(form)
-        day_name_start_english = start_date.strftime('%A')  
-        day_name_start = DAYS_OF_WEEK[day_name_start_english]
-        day_name_end_english = end_date_display.strftime('%A')
-        day_name_end = DAYS_OF_WEEK[day_name_end_english]  
-        
+        day_name_start = DAYS_OF_WEEK[start_date.strftime('%A')]
+        day_name_end = DAYS_OF_WEEK[end_date_display.strftime('%A')]
+
         sales = Sales.objects.filter(date_added__gte=start_date, date_added__lt=end_date)
-        total_clientes = sales.values('id').distinct().count()
-        total_items_vendidos = salesItems.objects.filter(sale__in=sales).aggregate(total=Sum('qty'))['total']
-        total_ingresos = sales.aggregate(total=Sum('grand_total'))['total']
-
-        sale_details = []
-        total_net_profit = Decimal(0)
-        for sale in sales:
-            items = salesItems.objects.filter(sale=sale)
-            products_list = {}
-            net_profit_total = Decimal(0)
-            for item in items:
-                product_name = item.product.name
-                products_list[product_name] = {
-                    'qty': item.qty,
-                    'price': item.price,  # CAMBIO: Usar precio de la venta
-                    'cost': item.product.cost,
-                }
-                # CAMBIO: Calcular ganancia con el precio usado en la venta
-                item_profit = Decimal(item.qty) * (Decimal(item.price) - item.product.cost)
-                net_profit_total += item_profit
-            total_net_profit += net_profit_total
-            sale_details.append({
-                'cliente': sale.cliente,
-                'date_added': sale.date_added,
-                'products_list': products_list,
-                'grand_total': sale.grand_total,
-                'net_profit': net_profit_total
-            })
 
         current_date = datetime.now()
-        unique_key = str(uuid.uuid4())
-
-        html_string = render_to_string('report/mix_tramo_day_pdf.html', {
-            'sale_data': sale_details,
-            'total_clientes': total_clientes,
-            'total_items_vendidos': total_items_vendidos,
-            'total_ingresos': total_ingresos,
-            'total_net_profit': total_net_profit,
-            'current_date': current_date,
-            'username': self.request.user.username,
-            'unique_key': unique_key,
-            'start_year': start_year,
-            'start_month': start_month,
-            'start_day': start_day,
-            'end_year': end_year,
-            'end_month': end_month,
-            'end_day': end_day,
-            'day_name_start':day_name_start,
-            'day_name_end':day_name_end,
-        })
-
-        pdf_buffer = io.BytesIO()
-        pisa_status = pisa.CreatePDF(
-            io.BytesIO(html_string.encode("UTF-8")), 
-            dest=pdf_buffer, 
-            encoding='UTF-8'
-        )
-
-        if pisa_status.err:
-            return HttpResponse('Hubo errores al generar el PDF.')
-
         filename = f"reporte_ventas_tramo_diario_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf_buffer.getvalue())
-
-        return response
+        fecha = (
+            f'Fecha Tramo: Entre el {day_name_start}, {start_day}/{start_month}/{start_year} '
+            f'y el {day_name_end}, {end_day}/{end_month}/{end_year}'
+        )
+        return _pdf_mix(self.request, sales, filename, 'Reporte de Ventas Tramo Diario', fecha)
 
     def is_valid_day(self, year, month, day):
         try:
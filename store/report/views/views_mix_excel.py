@@ -18,12 +18,11 @@ from django.utils import timezone
 from django.views import View
 from django.views.generic.edit import FormView
 
-import openpyxl
-from openpyxl import Workbook
 
 
 class SupplierExcelView(View):
     def get(self, request, *args, **kwargs):
+        from openpyxl import Workbook
 
         suppliers = Supplier.objects.all()
 
@@ -56,6 +55,8 @@ class SupplierExcelView(View):
 
 class SupplierProductExcelView(View):
     def get(self, request):
+        from openpyxl import Workbook
+
         suppliers = Supplier.objects.prefetch_related('purchaseproduct_set__product').all()
 
         
@@ -94,6 +95,8 @@ class SupplierProductExcelView(View):
 
 class ProductExcelView(View):
     def get(self, request, *args, **kwargs):
+        import openpyxl
+
         products = Products.objects.all().order_by('name')
 
 
@@ -128,6 +131,8 @@ class ProductExcelView(View):
 
 class ProductQtyExcelView(View):
     def get(self, request, *args, **kwargs):
+        import openpyxl
+
         products = Products.objects.all().order_by('name')
 
 
@@ -221,6 +226,8 @@ class MixExcelSalesDayView(FormView):
         return self.generate_excel(sale_details, total_clientes, total_items_vendidos, total_ingresos, total_net_profit, year, month_name, day, day_name, date_screen)
 
     def generate_excel(self, sale_details, total_clientes, total_items_vendidos, total_ingresos, total_net_profit, year, month_name, day, day_name, date_screen):
+        from openpyxl import Workbook
+
         # Crear el archivo Excel
         workbook = Workbook()
         sheet = workbook.active
@@ -333,7 +340,8 @@ class MixTramoExcelSalesDayView(FormView):
         return self.generate_excel(sale_details, total_clientes, total_items_vendidos, total_ingresos, total_net_profit, start_year, start_month, start_day, end_year, end_month, end_day, day_name_start, day_name_end, start_screen, end_date_display)
 
     def generate_excel(self, sale_details, total_clientes, total_items_vendidos, total_ingresos, total_net_profit, start_year, start_month, start_day, end_year, end_month, end_day, day_name_start, day_name_end, start_screen, end_date_display):
-    
+        from openpyxl import Workbook
+
         workbook = Workbook()
         sheet = workbook.active
         sheet.title = "Reporte de Ventas Diario"
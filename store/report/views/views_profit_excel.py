@@ -8,8 +8,6 @@ import uuid
 
 from django.http import HttpResponse, HttpResponseBadRequest
 from django.views.generic import FormView
-from openpyxl import Workbook
-from openpyxl.styles import Alignment
 from django.db.models import Sum
 
 from django.views import View  
@@ -129,6 +127,8 @@ class GenerateExcelProfitView(View):
         return sale_cost
 
     def generate_excel_file(self, sales_data):
+        from openpyxl import Workbook
+
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte de Ganancias"
@@ -284,6 +284,8 @@ class YearlyExcelProfitView(View):
         return sale_cost
 
     def generate_excel_file(self, sales_data):
+        from openpyxl import Workbook
+
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte de Ganancias"
@@ -440,6 +442,8 @@ class MonthlyExcelProfitView(FormView):
         return sale_cost
 
     def generate_excel_file(self, sales_data):
+        from openpyxl import Workbook
+
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte de Ganancias"
@@ -602,6 +606,8 @@ class DailyExcelProfitView(FormView):
         return sale_cost
 
     def generate_excel_file(self, sales_data):
+        from openpyxl import Workbook
+
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte de Ganancias"
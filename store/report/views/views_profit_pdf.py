@@ -4,14 +4,11 @@ from inventory.models import Products
 from report.forms import *
 from datetime import datetime
 from decimal import Decimal
-import io
-import uuid
 
 from django.conf import settings
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import Prefetch, Sum
+from django.http import HttpResponse, HttpResponseBadRequest
 from django.shortcuts import render, redirect
-from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.views.generic import ListView, View, FormView
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
@@ -23,9 +20,9 @@ from django.utils.encoding import force_bytes
 from django.contrib import messages
 from django.utils import timezone
 
-from xhtml2pdf import pisa
 
-import openpyxl
+from inventory.templatetags.formato import cantidad, pesos
+from report.tabla_pdf import Columna, reporte_pdf
 
 class ProfitReportView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     model = Sales
@@ -137,42 +134,105 @@ class ProfitReportView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     
 
 
+def _compras_por_producto(sales):
+    """
+    Para cada producto vendido: [costo de su primera compra, cantidad total comprada].
+    Reemplaza las consultas a PurchaseProduct que se hacian por cada item.
+    """
+    vendidos = salesItems.objects.filter(sale__in=sales).values('product')
+    compras = {}
+    filas = (
+        PurchaseProduct.objects.filter(product__in=vendidos)
+        .order_by('product', 'pk')
+        .values_list('product', 'cost', 'qty')
+    )
+    for product_id, cost, qty in filas.iterator():
+        if product_id in compras:
+            compras[product_id][1] += qty
+        else:
+            compras[product_id] = [cost, qty]
+    return compras
+
+
+def _filas_ganancias(sales, compras, totales, general):
+    """
+    Una fila por item vendido que tenga compras registradas.
+    `general` usa el calculo del reporte general (ganancia de la venta completa
+    por producto y costos sobre lo comprado); si no, el de los reportes por periodo.
+    Va sumando en `totales` los costos y las utilidades para el resumen.
+    """
+    items = salesItems.objects.select_related('product').only('sale', 'qty', 'product', 'product__name')
+    sales = sales.prefetch_related(Prefetch('salesitems_set', queryset=items))
+    for sale in sales.iterator(chunk_size=1000):
+        sale_items = list(sale.salesitems_set.all())
+        sale_cost = sum(
+            (compras[item.product_id][0] * item.qty for item in sale_items if item.product_id in compras),
+            Decimal(0),
+        )
+        grand_total = Decimal(sale.grand_total)
+        if not general:
+            totales['costos'] += sale_cost
+
+        for item in sale_items:
+            if item.product_id not in compras:
+                continue
+            cost_per_unit, total_qty_comprada = compras[item.product_id]
+            total_gasto_compras = cost_per_unit * total_qty_comprada
+            if general:
+                totales['costos'] += total_gasto_compras
+                product_ganancia = grand_total - sale_cost
+            else:
+                product_ganancia = grand_total - (cost_per_unit * item.qty)
+            ganancia_bruta = (sale_cost + product_ganancia) - total_gasto_compras
+            totales['utilidades'] += ganancia_bruta
+
+            yield [
+                f'{item.product.name} - {pesos(cost_per_unit)}',
+                f'{pesos(sale_cost)} - {cantidad(item.qty)} unidades',
+                product_ganancia,
+                f'{pesos(total_gasto_compras)} - {cantidad(total_qty_comprada)} unidades',
+                ganancia_bruta,
+            ]
+
+
+def _pdf_ganancias(request, sales, nombre_archivo, titulos, ultima_columna, etiqueta_ganancia, general=False):
+    columnas = [
+        Columna('Productos - Costo/u', 0.24, alinear='LEFT'),
+        Columna('Venta Total - Cant. Unidades Vendidas', 0.22),
+        Columna('Ganancias Por Ventas', 0.16, formato=pesos, sumar=True),
+        Columna('Compra Total - Cant. Unidades Compradas', 0.22),
+        Columna(ultima_columna, 0.16, formato=pesos, sumar=True),
+    ]
+    total_ingresos = Decimal(sales.aggregate(total=Sum('grand_total'))['total'] or 0)
+    totales = {'costos': Decimal(0), 'utilidades': Decimal(0)}
+
+    def resumen():
+        return [
+            f'Total de Ventas: {pesos(total_ingresos)}',
+            f"Total de Costos: {pesos(totales['costos'])}",
+            f"{etiqueta_ganancia}: {pesos(total_ingresos - totales['costos'])}",
+            f"Utilidades(Ganancias/Perdidas): {pesos(totales['utilidades'])}",
+        ]
+
+    filas = _filas_ganancias(sales, _compras_por_producto(sales), totales, general)
+    return reporte_pdf(
+        nombre_archivo, columnas, filas,
+        encabezado='Reporte de Ganancias', usuario=request.user.username,
+        titulos=titulos, resumen=resumen,
+    )
+
+
 class GeneratePDFProfitView(View):
     def get(self, request, *args, **kwargs):
         form = SalesReportForm(request.GET or None)
         sales_queryset = self.get_queryset(form)
 
-        total_ingresos = self.calculate_total_ingresos(sales_queryset)
-        total_costos = self.calculate_total_costos(sales_queryset)
-        total_ingresos_decimal = Decimal(total_ingresos)
-        total_costos_decimal = Decimal(total_costos)
-        total_ganancia = total_ingresos_decimal - total_costos_decimal
-
-
-        sales_data, total_utilidades = self.get_sales_data_and_utilities(sales_queryset)
-
         current_date = datetime.now()
-        username = request.user.username
-        unique_key = str(uuid.uuid4())
-
-        context = {
-            'sales_data': sales_data,
-            'total_ingresos': total_ingresos,
-            'total_costos': total_costos,
-            'total_ganancia': total_ganancia,
-            'total_utilidades': total_utilidades,
-            'current_date': current_date,
-            'username': username,
-            'unique_key': unique_key,
-        }
-
-        html_string = render_to_string('report/profit_pdf.html', context)
-
-        pdf_file = self.render_pdf(html_string)
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="reporte_ganancias_general_{current_date.strftime("%Y%m%d_%H%M%S")}.pdf"'
-
-        return response
+        filename = f'reporte_ganancias_general_{current_date.strftime("%Y%m%d_%H%M%S")}.pdf'
+        return _pdf_ganancias(
+            request, sales_queryset, filename, ['Reporte General de Ganancias'],
+            'Ganancia General', 'Ganancia Neta', general=True,
+        )
 
     def get_queryset(self, form):
         queryset = Sales.objects.all()
@@ -188,86 +248,6 @@ class GeneratePDFProfitView(View):
 
         return queryset
 
-    def calculate_total_ingresos(self, sales_queryset):
-        total_ingresos = sales_queryset.aggregate(total=Sum('grand_total'))['total'] or Decimal('0')
-        return total_ingresos
-
-    def calculate_total_costos(self, sales_queryset):
-        total_costos = Decimal('0')
-
-        for sale in sales_queryset:
-            for item in sale.salesitems_set.all():
-                purchase_product = PurchaseProduct.objects.filter(product=item.product).first()
-                if purchase_product:
-                    costo_producto = purchase_product.cost
-                    qty_comprada = sum([pp.qty for pp in PurchaseProduct.objects.filter(product=item.product)])
-                    costo_total = costo_producto * Decimal(qty_comprada)
-                    total_costos += costo_total
-
-        return total_costos
-
-    
-    def get_sales_data_and_utilities(self, sales_queryset):
-        sales_data = []
-        total_utilidades = Decimal(0)
-        
-        for sale in sales_queryset:
-            sale_cost = self.calculate_sale_cost(sale)
-            sale_profit = Decimal(sale.grand_total) - sale_cost
-            products_list = []
-
-            for item in sale.salesitems_set.all():
-                purchase_product = PurchaseProduct.objects.filter(product=item.product).first()
-                if purchase_product:
-                    cost_per_unit = purchase_product.cost
-                    qty_comprada = sum([pp.qty for pp in PurchaseProduct.objects.filter(product=item.product)])
-                    total_qty_vendida = item.qty
-                    total_qty_comprada = qty_comprada
-
-                    product_ganancia = (Decimal(item.qty) * sale_profit) / Decimal(total_qty_vendida)
-                    
-                    total_gasto_compras = cost_per_unit * Decimal(total_qty_comprada)    
-                    
-                    ganancia_bruta = (sale_cost + product_ganancia) - total_gasto_compras
-                    total_utilidades += ganancia_bruta
-                    products_list.append({
-                        'product_name': item.product.name,
-                        'cost_per_unit': cost_per_unit,
-                        'total_qty_vendida': total_qty_vendida,
-                        'total_qty_comprada': total_qty_comprada,
-                        'product_ganancia': product_ganancia,
-                        'ganancia_estado': 'Positiva' if product_ganancia > 0 else ('Negativa' if product_ganancia < 0 else 'Neutra'),
-                        
-                        'total_gasto_compras': total_gasto_compras,
-                        'ganancia_bruta': ganancia_bruta,
-                    })
-            
-            sales_data.append({
-                'date_added': sale.date_added,
-                'products_list': products_list,
-                'venta_total': Decimal(sale.grand_total),
-                'costo_total': sale_cost,
-                'ganancia_total': sale_profit,
-            })
-
-        return sales_data,total_utilidades
-
-    def calculate_sale_cost(self, sale):
-        sale_cost = Decimal('0')
-        for item in sale.salesitems_set.all():
-            purchase_product = PurchaseProduct.objects.filter(product=item.product).first()
-            if purchase_product:
-                costo_producto = purchase_product.cost
-                sale_cost += costo_producto * Decimal(item.qty)
-        return sale_cost
-
-    def render_pdf(self, html_string):
-        pdf_file = io.BytesIO()
-        pisa.CreatePDF(io.BytesIO(html_string.encode("UTF-8")), dest=pdf_file, encoding='UTF-8')
-        pdf_file.seek(0)
-        return pdf_file
-
-    
 
 class YearlyPDFProfitView(FormView):
     form_class = YearForm
@@ -279,117 +259,12 @@ class YearlyPDFProfitView(FormView):
         # Obtener las ventas filtradas por año
         sales_queryset = Sales.objects.filter(date_added__year=year)
 
-        # Calcular totales
-        total_ingresos = sales_queryset.aggregate(total=Sum('grand_total'))['total'] or 0
-        total_costos = self.calculate_total_costos(sales_queryset)
-        total_ingresos_decimal = Decimal(total_ingresos)
-        total_costos_decimal = Decimal(total_costos)
-        total_ganancia = total_ingresos_decimal - total_costos_decimal
-
-        sales_data, total_utilidades = self.get_sales_data_and_utilities(sales_queryset)
-
-
         current_date = timezone.now()
-        username = self.request.user.username
-        unique_key = uuid.uuid4()
-
-    
-        context = {
-            'sales_data': sales_data,
-            'total_ingresos': total_ingresos,
-            'total_costos': total_costos,
-            'total_ganancia': total_ganancia,
-            'total_utilidades': total_utilidades,
-            'current_date': current_date,
-            'username': username,
-            'unique_key': unique_key,
-            'year': year,
-        }
-
-    
-        html_string = render_to_string(self.template_name, context)
-
-    
-        pdf_file = io.BytesIO()
-        pisa_status = pisa.CreatePDF(io.BytesIO(html_string.encode("UTF-8")), dest=pdf_file, encoding='UTF-8')
-
-        if pisa_status.err:
-            return HttpResponse('Hubo errores al generar el PDF.')
-
-        pdf_file.seek(0)
-
-    
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="reporte_ganancias_anual_{current_date.strftime("%Y%m%d_%H%M%S")}.pdf"'
-
-        return response
-
-    def calculate_total_costos(self, sales_queryset):
-        total_costos = 0
-
-        for sale in sales_queryset:
-            sale_cost = self.calculate_sale_cost(sale)
-            total_costos += sale_cost
-
-        return total_costos
-
-    def get_sales_data_and_utilities(self, sales_queryset):
-        sales_data = []
-        total_utilidades = Decimal(0)
-
-        for sale in sales_queryset:
-            sale_items = salesItems.objects.filter(sale=sale)
-            products_list = []
-
-            for item in sale_items:
-                purchase_product = PurchaseProduct.objects.filter(product=item.product).first()
-
-                if purchase_product:
-                    cost_per_unit = purchase_product.cost
-                    total_qty_comprada = PurchaseProduct.objects.filter(product=item.product).aggregate(total_qty=Sum('qty'))['total_qty'] or 0
-                    total_qty_vendida = item.qty
-                    total_gasto_compras = cost_per_unit * total_qty_comprada
-                    
-    
-                    product_ganancia = Decimal(sale.grand_total) - (cost_per_unit * total_qty_vendida)
-                    
-    
-                    costo_total = self.calculate_sale_cost(sale)
-
-    
-                    ganancia_bruta = (costo_total + product_ganancia) - total_gasto_compras
-                    total_utilidades += ganancia_bruta
-                    products_list.append({
-                        'product_name': item.product.name,
-                        'cost_per_unit': cost_per_unit,
-                        'total_qty_vendida': total_qty_vendida,
-                        'total_qty_comprada': total_qty_comprada,
-                        'product_ganancia': product_ganancia,
-                        'ganancia_estado': 'Positiva' if product_ganancia > 0 else ('Negativa' if product_ganancia < 0 else 'Neutra'),
-                        'total_gasto_compras': total_gasto_compras,
-                        'ganancia_bruta': ganancia_bruta,
-                    })
-
-            sales_data.append({
-                'date_added': sale.date_added,
-                'products_list': products_list,
-                'venta_total': Decimal(sale.grand_total),
-                'costo_total': self.calculate_sale_cost(sale),
-                'ganancia_total': Decimal(sale.grand_total) - self.calculate_sale_cost(sale),
-            })
-
-        return sales_data, total_utilidades
-
-    def calculate_sale_cost(self, sale):
-        sale_cost = 0
-
-        for item in sale.salesitems_set.all():
-            purchase_product = PurchaseProduct.objects.filter(product=item.product).first()
-
-            if purchase_product:
-                sale_cost += purchase_product.cost * item.qty
-
-        return sale_cost
+        filename = f'reporte_ganancias_anual_{current_date.strftime("%Y%m%d_%H%M%S")}.pdf'
+        return _pdf_ganancias(
+            self.request, sales_queryset, filename, ['Reporte Anual de Ganancias', f'Gestión {year}'],
+            'Ganancia General (Ganancias/Perdidas)', 'Ganancia Neta',
+        )
 
 
 class MonthlyPDFProfitView(FormView):
@@ -400,131 +275,21 @@ class MonthlyPDFProfitView(FormView):
         year = form.cleaned_data['year']
         month = form.cleaned_data['month']
 
-        
         try:
             month = int(month)
             month_name = MONTH_CHOICES[month - 1][1]
         except ValueError:
             return HttpResponseBadRequest("El año o el mes proporcionados no son válidos.")
 
-    
         sales_queryset = Sales.objects.filter(date_added__year=year, date_added__month=month)
 
-
-        total_ingresos = sales_queryset.aggregate(total=Sum('grand_total'))['total'] or 0
-        total_costos = self.calculate_total_costos(sales_queryset)
-        total_ingresos_decimal = Decimal(total_ingresos)
-        total_costos_decimal = Decimal(total_costos)
-        total_ganancia = total_ingresos_decimal - total_costos_decimal
-
-
-        sales_data, total_utilidades = self.get_sales_data_and_utilities(sales_queryset)
-
         current_date = timezone.now()
-        username = self.request.user.username
-        unique_key = uuid.uuid4()
-
-
-        context = {
-            'sales_data': sales_data,
-            'total_ingresos': total_ingresos,
-            'total_costos': total_costos,
-            'total_ganancia': total_ganancia,
-            'total_utilidades': total_utilidades,
-            'current_date': current_date,
-            'username': username,
-            'unique_key': unique_key,
-            'year': year,
-            'month': month_name,
-        }
-
-    
-        html_string = render_to_string(self.template_name, context)
-
-    
-        pdf_file = io.BytesIO()
-        pisa_status = pisa.CreatePDF(io.BytesIO(html_string.encode("UTF-8")), dest=pdf_file, encoding='UTF-8')
-
-        if pisa_status.err:
-            return HttpResponse('Hubo errores al generar el PDF.')
-
-        pdf_file.seek(0)
-
-    
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="reporte_ganancias_mensual_{current_date.strftime("%Y%m%d_%H%M%S")}.pdf"'
-
-        return response
-
-    def calculate_total_costos(self, sales_queryset):
-        total_costos = 0
-
-        for sale in sales_queryset:
-            sale_cost = self.calculate_sale_cost(sale)
-            total_costos += sale_cost
-
-        return total_costos
-
-    
-    def get_sales_data_and_utilities(self, sales_queryset):
-        sales_data = []
-        total_utilidades = Decimal(0)
-
-        for sale in sales_queryset:
-            sale_items = salesItems.objects.filter(sale=sale)
-            products_list = []
-
-            for item in sale_items:
-                purchase_product = PurchaseProduct.objects.filter(product=item.product).first()
-
-                if purchase_product:
-                    cost_per_unit = purchase_product.cost
-                    total_qty_comprada = PurchaseProduct.objects.filter(product=item.product).aggregate(total_qty=Sum('qty'))['total_qty'] or 0
-                    total_qty_vendida = item.qty
-                    total_gasto_compras = cost_per_unit * total_qty_comprada
-                    
-                
-                    product_ganancia = Decimal(sale.grand_total) - (cost_per_unit * total_qty_vendida)
-                    
-                
-                    costo_total = self.calculate_sale_cost(sale)
-
-                
-                    ganancia_bruta = (costo_total + product_ganancia) - total_gasto_compras
-
-                    total_utilidades += ganancia_bruta 
-                    
-                    products_list.append({
-                        'product_name': item.product.name,
-                        'cost_per_unit': cost_per_unit,
-                        'total_qty_vendida': total_qty_vendida,
-                        'total_qty_comprada': total_qty_comprada,
-                        'product_ganancia': product_ganancia,
-                        'ganancia_estado': 'Positiva' if product_ganancia > 0 else ('Negativa' if product_ganancia < 0 else 'Neutra'),
-                        'total_gasto_compras': total_gasto_compras,
-                        'ganancia_bruta': ganancia_bruta,
-                    })
-
-            sales_data.append({
-                'date_added': sale.date_added,
-                'products_list': products_list,
-                'venta_total': Decimal(sale.grand_total),
-                'costo_total': self.calculate_sale_cost(sale),
-                'ganancia_total': Decimal(sale.grand_total) - self.calculate_sale_cost(sale),
-            })
-
-        return sales_data, total_utilidades
-
-    def calculate_sale_cost(self, sale):
-        sale_cost = 0
-
-        for item in sale.salesitems_set.all():
-            purchase_product = PurchaseProduct.objects.filter(product=item.product).first()
-
-            if purchase_product:
-                sale_cost += purchase_product.cost * item.qty
-
-        return sale_cost
+        filename = f'reporte_ganancias_mensual_{current_date.strftime("%Y%m%d_%H%M%S")}.pdf'
+        return _pdf_ganancias(
+            self.request, sales_queryset, filename,
+            ['Reporte Mensual de Ganancias', f'Reporte de {month_name} del {year}'],
+            'Utilidades (Ganancias/Perdidas)', 'Ganancias Netas Por Ventas',
+        )
 
 
 class DailyPDFProfitView(FormView):
@@ -535,130 +300,19 @@ class DailyPDFProfitView(FormView):
         year = form.cleaned_data['year']
         month = form.cleaned_data['month']
         day = form.cleaned_data['day']
-        
+
         try:
             month = int(month)
             month_name = MONTH_CHOICES[month - 1][1]
         except ValueError:
             return HttpResponseBadRequest("El año o el mes proporcionados no son válidos.")
 
-        
         sales_queryset = Sales.objects.filter(date_added__year=year, date_added__month=month, date_added__day=day)
 
-        
-        total_ingresos = sales_queryset.aggregate(total=Sum('grand_total'))['total'] or 0
-        total_costos = self.calculate_total_costos(sales_queryset)
-        total_ingresos_decimal = Decimal(total_ingresos)
-        total_costos_decimal = Decimal(total_costos)
-        total_ganancia = total_ingresos_decimal - total_costos_decimal
-
-
-        
-        sales_data, total_utilidades = self.get_sales_data_and_utilities(sales_queryset)
-
-        
         current_date = timezone.now()
-        username = self.request.user.username
-        unique_key = uuid.uuid4()
-
-        
-        context = {
-            'sales_data': sales_data,
-            'total_ingresos': total_ingresos,
-            'total_costos': total_costos,
-            'total_ganancia': total_ganancia,
-            'total_utilidades': total_utilidades,
-            'current_date': current_date,
-            'username': username,
-            'unique_key': unique_key,
-            'year': year,
-            'month': month_name,
-            'day': day,
-        }
-
-    
-        html_string = render_to_string(self.template_name, context)
-
-    
-        pdf_file = io.BytesIO()
-        pisa_status = pisa.CreatePDF(io.BytesIO(html_string.encode("UTF-8")), dest=pdf_file, encoding='UTF-8')
-
-        if pisa_status.err:
-            return HttpResponse('Hubo errores al generar el PDF.')
-
-        pdf_file.seek(0)
-
-    
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="reporte_ganancias_diaria_{current_date.strftime("%Y%m%d_%H%M%S")}.pdf"'
-
-        return response
-
-    def calculate_total_costos(self, sales_queryset):
-        total_costos = 0
-
-        for sale in sales_queryset:
-            sale_cost = self.calculate_sale_cost(sale)
-            total_costos += sale_cost
-
-        return total_costos
-
-    def get_sales_data_and_utilities(self, sales_queryset):
-        sales_data = []
-        total_utilidades = Decimal(0)
-
-        for sale in sales_queryset:
-            sale_items = salesItems.objects.filter(sale=sale)
-            products_list = []
-
-            for item in sale_items:
-                purchase_product = PurchaseProduct.objects.filter(product=item.product).first()
-
-                if purchase_product:
-                    cost_per_unit = purchase_product.cost
-                    total_qty_comprada = PurchaseProduct.objects.filter(product=item.product).aggregate(total_qty=Sum('qty'))['total_qty'] or 0
-                    total_qty_vendida = item.qty
-                    total_gasto_compras = cost_per_unit * total_qty_comprada
-                    
-    
-                    product_ganancia = Decimal(sale.grand_total) - (cost_per_unit * total_qty_vendida)
-                    
-    
-                    costo_total = self.calculate_sale_cost(sale)
-
-    
-                    ganancia_bruta = (costo_total + product_ganancia) - total_gasto_compras
-
-                    total_utilidades += ganancia_bruta  
-
-                    products_list.append({
-                        'product_name': item.product.name,
-                        'cost_per_unit': cost_per_unit,
-                        'total_qty_vendida': total_qty_vendida,
-                        'total_qty_comprada': total_qty_comprada,
-                        'product_ganancia': product_ganancia,
-                        'ganancia_estado': 'Positiva' if product_ganancia > 0 else ('Negativa' if product_ganancia < 0 else 'Neutra'),
-                        'total_gasto_compras': total_gasto_compras,
-                        'ganancia_bruta': ganancia_bruta,
-                    })
-
-            sales_data.append({
-                'date_added': sale.date_added,
-                'products_list': products_list,
-                'venta_total': Decimal(sale.grand_total),
-                'costo_total': self.calculate_sale_cost(sale),
-                'ganancia_total': Decimal(sale.grand_total) - self.calculate_sale_cost(sale),
-            })
-
-        return sales_data, total_utilidades
-    
-    def calculate_sale_cost(self, sale):
-        sale_cost = 0
-
-        for item in sale.salesitems_set.all():
-            purchase_product = PurchaseProduct.objects.filter(product=item.product).first()
-
-            if purchase_product:
-                sale_cost += purchase_product.cost * item.qty
-
-        return sale_cost
+        filename = f'reporte_ganancias_diaria_{current_date.strftime("%Y%m%d_%H%M%S")}.pdf'
+        return _pdf_ganancias(
+            self.request, sales_queryset, filename,
+            ['Reporte Diaria de Ganancias', f'Reporte del dia {day} de {month_name}, {year}'],
+            'Utilidades (Ganancias/Perdidas)', 'Ganancias Netas Por Ventas',
+        )
@@ -1,15 +1,11 @@
 from django.views import View
 from django.http import HttpResponse, HttpResponseBadRequest
-from openpyxl import Workbook
-from openpyxl.styles import Alignment
 from datetime import datetime
 from django.db.models import Sum
 from purchase.models import PurchaseProduct
 from report.forms import ReportForm
 from django.views.generic.edit import FormView
 from django.http import HttpResponse, HttpResponseBadRequest
-from openpyxl import Workbook
-from openpyxl.styles import Alignment
 from datetime import datetime
 from purchase.models import PurchaseProduct
 from report.forms import YearReportForm
@@ -37,6 +33,9 @@ def is_valid_day(year, month, day):
 
 class GenerateExcelPurchaseView(View):
     def post(self, request, *args, **kwargs):
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment
+
         form = ReportForm(request.POST)
         if form.is_valid():
             purchase_products = PurchaseProduct.objects.all()
@@ -118,6 +117,9 @@ class ExcelPurchaseYearView(FormView):
     form_class = YearReportForm
 
     def form_valid(self, form):
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment
+
         year = form.cleaned_data['year']
 
         
@@ -184,6 +186,9 @@ class ExcelPurchaseMonthView(FormView):
     form_class = MonthYearReportForm
 
     def form_valid(self, form):
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment
+
         year = form.cleaned_data['year']
         month = form.cleaned_data['month']
         try:
@@ -254,6 +259,9 @@ class ExcelPurchaseDayView(FormView):
     form_class = DayMonthYearReportForm
 
     def form_valid(self, form):
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment
+
         year = form.cleaned_data['year']
         month = form.cleaned_data['month']
         day = form.cleaned_data['day']
@@ -3,15 +3,15 @@ from report.forms import *
 
 from django.views.generic import ListView, View
 from django.views.generic.edit import FormView
-from django.http import HttpResponse
-from django.template.loader import render_to_string
+from django.contrib import messages
+from django.http import HttpResponse, HttpResponseBadRequest
 from django.utils import timezone
 from django.db.models import Sum
-from xhtml2pdf import pisa
+from django.utils.text import capfirst
 import datetime
-import uuid
-import io
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from inventory.templatetags.formato import cantidad, pesos
+from report.tabla_pdf import Columna, fecha_hora, reporte_pdf
 MONTH_NAMES = [
     "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
     "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
@@ -123,10 +123,43 @@ class PurchaseReportView(LoginRequiredMixin, PermissionRequiredMixin,ListView):
         return f"{total:,.2f}"
 
 
+COLUMNAS_COMPRAS = [
+    Columna('Proveedores', 0.20, alinear='LEFT'),
+    Columna('Fecha y Hora', 0.20, formato=fecha_hora),
+    Columna('Productos - Costo/u', 0.30, alinear='LEFT'),
+    Columna('Total', 0.18, formato=pesos, sumar=True),
+    Columna('Cantidad Total Items', 0.12, formato=cantidad, sumar=True),
+]
+
+
+def _filas_compras(purchases):
+    for purchase in purchases.select_related('supplier', 'product').iterator(chunk_size=2000):
+        producto = capfirst(purchase.product.name) if purchase.product_id else '-'
+        yield [
+            purchase.supplier or '',
+            purchase.date_added,
+            [f'{producto} - {pesos(purchase.cost)}'],
+            purchase.total,
+            purchase.qty,
+        ]
+
+
+def _pdf_compras(request, purchases, nombre_archivo, titulos):
+    totales = purchases.aggregate(items=Sum('qty'), costos=Sum('total'))
+    resumen = [
+        f"Total de Proveedores: {purchases.values('supplier').distinct().count()}",
+        f"Cantidad Total de Items Comprados: {cantidad(totales['items'])}",
+        f"Total de Compras: {pesos(totales['costos'])}",
+    ]
+    return reporte_pdf(
+        nombre_archivo, COLUMNAS_COMPRAS, _filas_compras(purchases),
+        encabezado='Reporte de Compras', usuario=request.user.username,
+        titulos=titulos, resumen=resumen,
+    )
+
+
 class GeneratePDFPurchaseView(View):
     def get(self, request, *args, **kwargs):
-        user = request.user  
-
         form = YearReportForm(request.GET)
         if form.is_valid():
             year = form.cleaned_data['year']
@@ -136,67 +169,9 @@ class GeneratePDFPurchaseView(View):
         else:
             purchase_data = PurchaseProduct.objects.order_by('date_added').all()
 
-        total_suppliers = PurchaseProduct.objects.values('supplier').distinct().count()
-        total_items_comprados = 0
-        total_costos = sum(purchase.total for purchase in purchase_data)
-
-        purchase_details = []
-
-        for purchase in purchase_data:
-            items = PurchaseProduct.objects.filter(id=purchase.id)
-            products_list = {}
-            total_items = 0  
-
-            for item in items:
-                product_name = item.product.name
-                if product_name in products_list:
-                    products_list[product_name] += item.cost
-                else:
-                    products_list[product_name] = item.cost
-                total_items_comprados += item.qty
-                total_items += item.qty  
-
-            purchase_details.append({
-                'supplier': purchase.supplier,
-                'date_added': purchase.date_added,
-                'products_list': products_list,
-                'grand_total': purchase.total,
-                'total_items_bought': total_items  
-            })
-
         current_date = datetime.datetime.now()
-        unique_key = str(uuid.uuid4())
-
-        
-        html_string = render_to_string('report/purchase_pdf.html', {
-            'purchase_data': purchase_details,
-            'total_suppliers': total_suppliers,
-            'total_items_comprados': total_items_comprados,
-            'total_costos': total_costos,
-            'current_date': current_date,
-            'username': user.username,  
-            'unique_key': unique_key,  
-        })
-
-        
-        pdf_buffer = io.BytesIO()
-        pisa_status = pisa.CreatePDF(
-            io.BytesIO(html_string.encode("UTF-8")), dest=pdf_buffer, encoding='UTF-8')
-
-        
-        if pisa_status.err:
-            return HttpResponse('We had some errors <pre>' + html_string + '</pre>')
-
-        
         filename = f"reporte_compras_general_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf_buffer.getvalue())
-
-        return response
-
-
+        return _pdf_compras(request, purchase_data, filename, ['Reporte General de Compras'])
 
 
 class YearlyPDFPurchaseView(FormView):
@@ -207,59 +182,10 @@ class YearlyPDFPurchaseView(FormView):
         year = form.cleaned_data['year']
         
         purchases = PurchaseProduct.objects.filter(date_added__year=year)
-        total_suppliers = purchases.values('supplier').distinct().count()
-        total_items_comprados = purchases.aggregate(total=Sum('qty'))['total']
-        total_costos = purchases.aggregate(total=Sum('total'))['total']
-
-        
-        purchase_details = []
-        for purchase in purchases:
-            items = PurchaseProduct.objects.filter(id=purchase.id)
-            total_items = 0 
-            products_list = {}
-            for item in items:
-                
-                product_name = item.product.name
-                if product_name in products_list:
-                    products_list[product_name] += item.cost
-                else:
-                    products_list[product_name] = item.cost
-                total_items_comprados += item.qty
-                total_items += item.qty 
-            purchase_details.append({
-                'supplier': purchase.supplier,
-                'date_added': purchase.date_added,
-                'products_list': products_list,
-                'grand_total': purchase.total,
-                'total_items_bought': total_items
-            })
 
         current_date = timezone.now()
-        unique_key = str(uuid.uuid4())
-        html_string = render_to_string('report/purchase_pdf_year.html', {
-            'purchase_data': purchase_details,
-            'total_suppliers': total_suppliers,
-            'total_items_comprados': total_items_comprados,
-            'total_costos': total_costos,
-            'current_date': current_date,
-            'username': self.request.user.username,
-            'unique_key': unique_key,
-            'year': year,
-        })
-
-        pdf_buffer = io.BytesIO()
-        pisa_status = pisa.CreatePDF(io.BytesIO(html_string.encode("UTF-8")), dest=pdf_buffer, encoding='UTF-8')
-
-        if pisa_status.err:
-            return HttpResponse('Hubo errores al generar el PDF.')
-
         filename = f"reporte_compras_anual_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf_buffer.getvalue())
-
-        return response
-
+        return _pdf_compras(self.request, purchases, filename, ['Reporte Anual de Compras', f'Gestión {year}'])
 
 
 class MonthlyPDFPurchaseView(FormView):
@@ -276,63 +202,12 @@ class MonthlyPDFPurchaseView(FormView):
         except ValueError:
             return HttpResponseBadRequest("El año o el mes proporcionados no son válidos.")
 
-        
         purchases = PurchaseProduct.objects.filter(date_added__year=year, date_added__month=month)
-        total_suppliers = purchases.values('supplier').distinct().count()
-        total_items_comprados = purchases.aggregate(total=Sum('qty'))['total']
-        total_costos = purchases.aggregate(total=Sum('total'))['total']
 
-        
-        purchase_details = []
-        for purchase in purchases:
-            items = PurchaseProduct.objects.filter(id=purchase.id)
-            total_items = 0
-            products_list = {}
-            for item in items:
-                product_name = item.product.name
-                if product_name in products_list:
-                    products_list[product_name] += item.cost
-                else:
-                    products_list[product_name] = item.cost
-                total_items_comprados += item.qty
-                total_items += item.qty
-            purchase_details.append({
-                'supplier': purchase.supplier,
-                'date_added': purchase.date_added,
-                'products_list': products_list,
-                'grand_total': purchase.total,
-                'total_items_bought': total_items
-            })
-
-        
         current_date = timezone.now()
-        unique_key = str(uuid.uuid4())
-        html_string = render_to_string('report/purchase_pdf_month.html', {
-            'purchase_data': purchase_details,
-            'total_suppliers': total_suppliers,
-            'total_items_comprados': total_items_comprados,
-            'total_costos': total_costos,
-            'current_date': current_date,
-            'username': self.request.user.username,
-            'unique_key': unique_key,
-            'year': year,
-            'month': month_name,
-        })
-
-        pdf_buffer = io.BytesIO()
-        pisa_status = pisa.CreatePDF(io.BytesIO(html_string.encode("UTF-8")), dest=pdf_buffer, encoding='UTF-8')
-
-        if pisa_status.err:
-            return HttpResponse('Hubo errores al generar el PDF.')
-
         filename = f"reporte_compras_mensual_{year}_{month}_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf_buffer.getvalue())
-
-        return response
-
-
+        titulos = ['Reporte Mensual de Compras', f'Reporte de {month_name} del {year}']
+        return _pdf_compras(self.request, purchases, filename, titulos)
 
 
 class DailyPDFPurchaseView(FormView):
@@ -350,66 +225,16 @@ class DailyPDFPurchaseView(FormView):
             messages.error(self.request, "La fecha ingresada no es válida.")
             return self.form_invalid(form)
         
-        
         purchases = PurchaseProduct.objects.filter(date_added__year=year, date_added__month=month, date_added__day=day)
-        total_suppliers = purchases.values('supplier').distinct().count()
-        total_items_comprados = purchases.aggregate(total=Sum('qty'))['total']
-        total_costos = purchases.aggregate(total=Sum('total'))['total']
-
-        
-        purchase_details = []
-        for purchase in purchases:
-            items = PurchaseProduct.objects.filter(id=purchase.id)
-            total_items = 0
-            products_list = {}
-            for item in items:
-                product_name = item.product.name
-                if product_name in products_list:
-                    products_list[product_name] += item.cost
-                else:
-                    products_list[product_name] = item.cost
-                total_items_comprados += item.qty
-                total_items += item.qty
-            purchase_details.append({
-                'supplier': purchase.supplier,
-                'date_added': purchase.date_added,
-                'products_list': products_list,
-                'grand_total': purchase.total,
-                'total_items_bought': total_items
-            })
 
-        
         current_date = timezone.now()
-        unique_key = str(uuid.uuid4())
-        html_string = render_to_string('report/purchase_pdf_day.html', {
-            'purchase_data': purchase_details,
-            'total_suppliers': total_suppliers,
-            'total_items_comprados': total_items_comprados,
-            'total_costos': total_costos,
-            'current_date': current_date,
-            'username': self.request.user.username,
-            'unique_key': unique_key,
-            'year': year,
-            'month': month_name,
-            'day': day,
-        })
-
-        pdf_buffer = io.BytesIO()
-        pisa_status = pisa.CreatePDF(io.BytesIO(html_string.encode("UTF-8")), dest=pdf_buffer, encoding='UTF-8')
-
-        if pisa_status.err:
-            return HttpResponse('Hubo errores al generar el PDF.')
-
         filename = f"reporte_compras_diario_{year}_{month}_{day}_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf_buffer.getvalue())
-
-        return response
+        titulos = ['Reporte Diario de Compras', f'Reporte del dia {day} de {month_name}, {year}']
+        return _pdf_compras(self.request, purchases, filename, titulos)
 
     def is_valid_day(self, year, month, day):
         try:
             datetime.datetime(year, month, day)
             return True
         except ValueError:
-            return False
\ No newline at end of file
+            return False
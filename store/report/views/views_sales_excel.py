@@ -15,9 +15,6 @@ from django.http import HttpResponse, HttpResponseBadRequest
 from django.shortcuts import redirect, render
 from django.template.loader import render_to_string
 from django.views import View
-from openpyxl import Workbook
-from openpyxl.styles import Alignment
-from xhtml2pdf import pisa
 
 from inventory.models import *
 from pos.models import *
@@ -60,6 +57,9 @@ class SalesListView(ListView):
     
 class GenerateExcelSalesView(View):
     def post(self, request, *args, **kwargs):
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment
+
         form = ReportForm(request.POST)
         if form.is_valid():
             
@@ -146,6 +146,9 @@ class GenerateExcelSalesView(View):
 
 class GenerateExcelSalesYearView(View):
     def post(self, request, *args, **kwargs):
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment
+
         form = YearReportForm(request.POST)
         if form.is_valid():
             year = form.cleaned_data.get('year')
@@ -233,6 +236,9 @@ class GenerateExcelSalesYearView(View):
 
 class GenerateExcelSalesMonthView(View):
     def post(self, request, *args, **kwargs):
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment
+
         form = MonthReportForm(request.POST)
         if form.is_valid():
             year = form.cleaned_data.get('year')
@@ -329,6 +335,9 @@ class GenerateExcelSalesMonthView(View):
 
 class GenerateExcelSalesDayView(View):
     def post(self, request, *args, **kwargs):
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment
+
         form = DayReportForm(request.POST)
         if form.is_valid():
             year = form.cleaned_data.get('year')
@@ -11,23 +11,20 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.db import transaction
-from django.db.models import Count, Sum
+from django.db.models import Count, Prefetch, Sum
 from django.http import HttpResponse, HttpResponseBadRequest
 from django.shortcuts import redirect, render
-from django.template.loader import get_template, render_to_string
 from django.utils import timezone
+from django.utils.text import capfirst
 from django.views.generic import FormView, ListView, View
 from django.views.generic.edit import FormView
 
-from openpyxl import Workbook
-from openpyxl.styles import Alignment
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from xhtml2pdf import pisa
 
 from inventory.models import *
+from inventory.templatetags.formato import cantidad, pesos
 from pos.models import *
 from report.forms import SalesReportForm, YearMonthForm, YearForm, DayForm, DateRangeForm, MONTH_CHOICES, MONTH_NAMES
+from report.tabla_pdf import Columna, fecha_hora, reporte_pdf
 
 
 
@@ -137,69 +134,55 @@ class SalesReportView(LoginRequiredMixin, PermissionRequiredMixin,ListView):
         
         return total
 
-class GeneratePDFSalesView(View):
-    def get(self, request, *args, **kwargs):
-        user = request.user  
-
-        sale_data = Sales.objects.order_by('date_added').all()
+COLUMNAS_VENTAS = [
+    Columna('Clientes', 0.20, alinear='LEFT'),
+    Columna('Fecha y Hora', 0.20, formato=fecha_hora),
+    Columna('Productos', 0.30, alinear='LEFT'),
+    Columna('Total', 0.18, formato=pesos, sumar=True),
+    Columna('Cantidad Total Items', 0.12, formato=cantidad, sumar=True),
+]
 
-        total_clientes = Sales.objects.values('id').distinct().count()
-        total_items_vendidos = 0
-        total_ingresos = sum(sale.grand_total for sale in sale_data)
 
-        sale_details = []
+def _filas_ventas(sales):
+    """Una fila por venta, con los items y productos precargados de a bloques."""
+    items = salesItems.objects.select_related('product').only('sale', 'qty', 'product', 'product__name')
+    sales = sales.select_related('cliente').prefetch_related(Prefetch('salesitems_set', queryset=items))
+    for sale in sales.iterator(chunk_size=1000):
+        products_list = {}
+        for item in sale.salesitems_set.all():
+            products_list[item.product.name] = products_list.get(item.product.name, 0) + item.qty
+        yield [
+            sale.cliente or '',
+            sale.date_added,
+            [f'{capfirst(nombre)} - {cantidad(qty)}' for nombre, qty in products_list.items()],
+            sale.grand_total,
+            sum(products_list.values()),
+        ]
+
+
+def _pdf_ventas(request, sales, nombre_archivo, titulos, total_clientes):
+    totales = salesItems.objects.filter(sale__in=sales).aggregate(total=Sum('qty'))
+    total_ingresos = sales.aggregate(total=Sum('grand_total'))['total']
+    resumen = [
+        f'Total de Clientes: {total_clientes}',
+        f'Cantidad Total de Items Vendidos: {cantidad(totales["total"])}',
+        f'Total de Ventas: {pesos(total_ingresos)}',
+    ]
+    return reporte_pdf(
+        nombre_archivo, COLUMNAS_VENTAS, _filas_ventas(sales),
+        encabezado='Reporte de Ventas', usuario=request.user.username,
+        titulos=titulos, resumen=resumen,
+    )
 
-        for sale in sale_data:
-            items = salesItems.objects.filter(sale=sale)
-            products_list = {}
 
-            for item in items:
-                product_name = item.product.name
-                if product_name in products_list:
-                    products_list[product_name] += item.qty
-                else:
-                    products_list[product_name] = item.qty
-                total_items_vendidos += item.qty
-
-            sale_details.append({
-                'cliente': sale.cliente,
-                'date_added': sale.date_added,
-                'products_list': products_list,
-                'grand_total': sale.grand_total,
-                'total_items_sold': sum(products_list.values())
-            })
+class GeneratePDFSalesView(View):
+    def get(self, request, *args, **kwargs):
+        sales = Sales.objects.order_by('date_added')
+        total_clientes = Sales.objects.values('id').distinct().count()
 
         current_date = datetime.now()
-        unique_key = str(uuid.uuid4())
-
-        
-        html_string = render_to_string('report/sales_pdf.html', {
-            'sale_data': sale_details,
-            'total_clientes': total_clientes,
-            'total_items_vendidos': total_items_vendidos,
-            'total_ingresos': total_ingresos,
-            'current_date': current_date,
-            'username': user.username,  
-            'unique_key': unique_key,  
-        })
-
-        
-        pdf_buffer = io.BytesIO()
-        pisa_status = pisa.CreatePDF(
-            io.BytesIO(html_string.encode("UTF-8")), dest=pdf_buffer, encoding='UTF-8')
-
-        
-        if pisa_status.err:
-            return HttpResponse('We had some errors <pre>' + html_string + '</pre>')
-
-
         filename = f"reporte_ventas_general_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf_buffer.getvalue())
-
-        return response
+        return _pdf_ventas(request, sales, filename, ['Reporte General de Ventas'], total_clientes)
 
 
 class GeneratePDFSalesYearView(FormView):
@@ -211,51 +194,11 @@ class GeneratePDFSalesYearView(FormView):
         
         sales = Sales.objects.filter(date_added__year=year)
         total_clientes = sales.values('cliente').distinct().count()
-        total_items_vendidos = salesItems.objects.filter(sale__in=sales).aggregate(total=Sum('qty'))['total']
-        total_ingresos = sales.aggregate(total=Sum('grand_total'))['total']
 
-        
-        sale_details = []
-        for sale in sales:
-            items = salesItems.objects.filter(sale=sale)
-            products_list = {}
-            for item in items:
-                product_name = item.product.name
-                products_list[product_name] = products_list.get(product_name, 0) + item.qty
-            sale_details.append({
-                'cliente': sale.cliente,
-                'date_added': sale.date_added,
-                'products_list': products_list,
-                'grand_total': sale.grand_total,
-                'total_items_sold': sum(products_list.values())
-            })
-
-        
         current_date = timezone.now()
-        unique_key = str(uuid.uuid4())
-        html_string = render_to_string('report/sales_pdf_year.html', {
-            'sale_data': sale_details,
-            'total_clientes': total_clientes,
-            'total_items_vendidos': total_items_vendidos,
-            'total_ingresos': total_ingresos,
-            'current_date': current_date,
-            'username': self.request.user.username,
-            'unique_key': unique_key,
-            'year': year,
-        })
-
-        pdf_buffer = io.BytesIO()
-        pisa_status = pisa.CreatePDF(io.BytesIO(html_string.encode("UTF-8")), dest=pdf_buffer, encoding='UTF-8')
-
-        if pisa_status.err:
-            return HttpResponse('Hubo errores al generar el PDF.')
-
         filename = f"reporte_ventas_anual_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf_buffer.getvalue())
-
-        return response
+        titulos = ['Reporte Anual de Ventas', f'Gestión {year}']
+        return _pdf_ventas(self.request, sales, filename, titulos, total_clientes)
 
 
 class GeneratePDFSalesMonthView(FormView):
@@ -274,51 +217,11 @@ class GeneratePDFSalesMonthView(FormView):
 
         sales = Sales.objects.filter(date_added__year=year, date_added__month=month)
         total_clientes = sales.values('id').distinct().count()
-        total_items_vendidos = salesItems.objects.filter(sale__in=sales).aggregate(total=Sum('qty'))['total']
-        total_ingresos = sales.aggregate(total=Sum('grand_total'))['total']
-
-        sale_details = []
-        for sale in sales:
-            items = salesItems.objects.filter(sale=sale)
-            products_list = {}
-            for item in items:
-                product_name = item.product.name
-                products_list[product_name] = products_list.get(product_name, 0) + item.qty
-            sale_details.append({
-                'cliente': sale.cliente,
-                'date_added': sale.date_added,
-                'products_list': products_list,
-                'grand_total': sale.grand_total,
-                'total_items_sold': sum(products_list.values())
-            })
 
         current_date = datetime.now()
-        unique_key = str(uuid.uuid4())
-
-        html_string = render_to_string('report/sales_pdf_month.html', {
-            'sale_data': sale_details,
-            'total_clientes': total_clientes,
-            'total_items_vendidos': total_items_vendidos,
-            'total_ingresos': total_ingresos,
-            'current_date': current_date,
-            'username': self.request.user.username,
-            'unique_key': unique_key,
-            'year': year,
-            'month': month_name,
-        })
-
-        pdf_buffer = io.BytesIO()
-        pisa_status = pisa.CreatePDF(io.BytesIO(html_string.encode("UTF-8")), dest=pdf_buffer, encoding='UTF-8')
-
-        if pisa_status.err:
-            return HttpResponse('Hubo errores al generar el PDF.')
-
         filename = f"reporte_ventas_mensual_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf_buffer.getvalue())
-
-        return response
+        titulos = ['Reporte Mensual de Ventas', f'Reporte de {month_name} del {year}']
+        return _pdf_ventas(self.request, sales, filename, titulos, total_clientes)
 
 
 class SalesReportCustomView(FormView):
@@ -334,52 +237,14 @@ class SalesReportCustomView(FormView):
 
         sales = Sales.objects.filter(date_added__range=(fecha_desde, fecha_hasta))
         total_clientes = sales.values('id').distinct().count()
-        total_items_vendidos = salesItems.objects.filter(sale__in=sales).aggregate(total=Sum('qty'))['total']
-        total_ingresos = sales.aggregate(total=Sum('grand_total'))['total']
-
-        sale_details = []
-        for sale in sales:
-            items = salesItems.objects.filter(sale=sale)
-            products_list = {}
-            for item in items:
-                product_name = item.product.name
-                products_list[product_name] = products_list.get(product_name, 0) + item.qty
-            sale_details.append({
-                'cliente': sale.cliente,
-                'date_added': sale.date_added,
-                'products_list': products_list,
-                'grand_total': sale.grand_total,
-                'total_items_sold': sum(products_list.values())
-            })
 
         current_date = datetime.now()
-        unique_key = str(uuid.uuid4())
-
-        html_string = render_to_string('posApp/sales_pdf_custom.html', {
-            'sale_data': sale_details,
-            'total_clientes': total_clientes,
-            'total_items_vendidos': total_items_vendidos,
-            'total_ingresos': total_ingresos,
-            'current_date': current_date,
-            'username': self.request.user.username,
-            'unique_key': unique_key,
-            'fecha_desde': fecha_desde,
-            'fecha_hasta': fecha_hasta,
-        })
-
-        pdf_buffer = io.BytesIO()
-        pisa_status = pisa.CreatePDF(io.BytesIO(html_string.encode("UTF-8")), dest=pdf_buffer, encoding='UTF-8')
-
-        if pisa_status.err:
-            return HttpResponse('Hubo errores al generar el PDF.')
-
         filename = f"reporte_ventas_personalizado_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf_buffer.getvalue())
-
-        return  
-
+        titulos = [
+            'Reporte Personalizado de Ventas',
+            f"Del {fecha_desde.strftime('%d-%m-%Y')} al {fecha_hasta.strftime('%d-%m-%Y')}",
+        ]
+        return _pdf_ventas(self.request, sales, filename, titulos, total_clientes)
 
 
 class GeneratePDFSalesDayView(FormView):
@@ -400,60 +265,15 @@ class GeneratePDFSalesDayView(FormView):
 
         sales = Sales.objects.filter(date_added__year=year, date_added__month=month, date_added__day=day)
         total_clientes = sales.values('id').distinct().count()
-        total_items_vendidos = salesItems.objects.filter(sale__in=sales).aggregate(total=Sum('qty'))['total']
-        total_ingresos = sales.aggregate(total=Sum('grand_total'))['total']
-
-        sale_details = []
-        for sale in sales:
-            items = salesItems.objects.filter(sale=sale)
-            products_list = {}
-            for item in items:
-                product_name = item.product.name
-                products_list[product_name] = products_list.get(product_name, 0) + item.qty
-            sale_details.append({
-                'cliente': sale.cliente,
-                'date_added': sale.date_added,
-                'products_list': products_list,
-                'grand_total': sale.grand_total,
-                'total_items_sold': sum(products_list.values())
-            })
 
         current_date = datetime.now()
-        unique_key = str(uuid.uuid4())
-
-        html_string = render_to_string('report/sales_pdf_day.html', {
-            'sale_data': sale_details,
-            'total_clientes': total_clientes,
-            'total_items_vendidos': total_items_vendidos,
-            'total_ingresos': total_ingresos,
-            'current_date': current_date,
-            'username': self.request.user.username,
-            'unique_key': unique_key,
-            'year': year,
-            'month_name': month_name,
-            'day': day,
-        })
-
-        pdf_buffer = io.BytesIO()
-        pisa_status = pisa.CreatePDF(
-            io.BytesIO(html_string.encode("UTF-8")), 
-            dest=pdf_buffer, 
-            encoding='UTF-8'
-        )
-
-        if pisa_status.err:
-            return HttpResponse('Hubo errores al generar el PDF.')
-
         filename = f"reporte_ventas_diario_{current_date.strftime('%Y%m%d_%H%M%S')}.pdf"
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf_buffer.getvalue())
-
-        return response
+        titulos = ['Reporte Diario de Ventas', f'Reporte del dia {day} de {month_name}, {year}']
+        return _pdf_ventas(self.request, sales, filename, titulos, total_clientes)
 
     def is_valid_day(self, year, month, day):
         try:
             datetime(year, month, day)
             return True
         except ValueError:
-            return False
\ No newline at end of file
+            return False
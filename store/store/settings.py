@@ -177,3 +177,14 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = '/'
 LOGIN_URL = '/login'
 
+
+# Ticket termico ESC/POS (ver pos/escpos.py)
+TICKET_ANCHO_MM = 58                # 58 u 80
+TICKET_IMPRESORA = ''               # '/dev/usb/lp0', carpeta de spool o 'tcp://ip:9100'
+TICKET_IMPRIMIR_AL_COBRAR = False
+
+# Listas de precios publicadas (ver report.models.ListaPreciosVersion)
+LISTAS_PRECIOS_DIR = BASE_DIR / 'listas_precios'
+
+# Carpeta donde `manage.py exportar_plu_itegra` deja los PLUs para la balanza (ver inventory/itegra.py)
+ITEGRA_DIRECTORIO = ''